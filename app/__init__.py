@@ -1,6 +1,8 @@
+import importlib
 import os
 import threading
 import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 
 from flask import Flask, jsonify
@@ -12,47 +14,35 @@ from app.extensions.extensions import ma, socketio
 from app.config import Config
 from app.db import db
 from app.performance_indexes import ensure_performance_indexes
+from app import schema_migrations
+from app.schema_migrations import MigrationStep
 from werkzeug.exceptions import HTTPException
-from app.socket_events import register_socket_events
-
-from app.routes.main_routes import main_bp
-from app.routes.post_routes import post_bp
-from app.routes.comment_routes import comment_bp
-from app.routes.vote_routes import vote_bp
-from app.routes.auth_routes import auth_bp
-from app.routes.contact_routes import contact_bp
-from app.routes.message_routes import message_bp
-from app.routes.profile_routes import profile_bp
-from app.routes.notification_routes import notification_bp
-from app.routes.activity_notification_routes import activity_notification_bp
-from app.routes.follow_routes import follow_bp
-from app.routes.search_routes import search_bp
-from app.routes.admin_routes import admin_bp
-from app.routes.group_routes import group_bp
-from app.routes.report_routes import report_bp
-from app.routes.block_routes import block_bp
-from app.routes.playlist_routes import playlist_bp
-from app.routes.crash_routes import crash_bp
-from app.routes.story_routes import story_bp
-from app.services import (
-    async_task_service,
-    report_service,
-    password_security,
-    daily_winner_service,
-    story_service,
-)
+from app.services import async_task_service
 
 import app.models.activity_notification_model  # noqa: F401 – register model with SQLAlchemy
 import app.models.about_us_model  # noqa: F401 – register model with SQLAlchemy
+import app.models.admin_model  # noqa: F401 – register model with SQLAlchemy
 import app.models.app_update_model  # noqa: F401 – register model with SQLAlchemy
 import app.models.block_model  # noqa: F401 – register model with SQLAlchemy
 import app.models.chat_message_model  # noqa: F401 – register model with SQLAlchemy
+import app.models.comment_model  # noqa: F401 – register model with SQLAlchemy
 import app.models.crash_log_model  # noqa: F401 – register model with SQLAlchemy
+import app.models.follow_model  # noqa: F401 – register model with SQLAlchemy
 import app.models.group_model  # noqa: F401 – register model with SQLAlchemy
+import app.models.media_model  # noqa: F401 – register model with SQLAlchemy
 import app.models.pending_registration_model  # noqa: F401 – register model with SQLAlchemy
 import app.models.playlist_track_model  # noqa: F401 – register model with SQLAlchemy
+import app.models.post_model  # noqa: F401 – register model with SQLAlchemy
+import app.models.profile_model  # noqa: F401 – register model with SQLAlchemy
+import app.models.profile_video_model  # noqa: F401 – register model with SQLAlchemy
 import app.models.report_model  # noqa: F401 – register model with SQLAlchemy
+import app.models.schema_migration_model  # noqa: F401 – register model with SQLAlchemy
 import app.models.story_model  # noqa: F401 – register model with SQLAlchemy
+import app.models.user_model  # noqa: F401 – register model with SQLAlchemy
+import app.models.vote_model  # noqa: F401 – register model with SQLAlchemy
+# Mapper events keep the search index current in every role, not only where
+# search routes are loaded.
+import app.services.search_index  # noqa: F401
 
 _cleanup_worker_started = False
 _cleanup_worker_lock = threading.Lock()
@@ -60,6 +50,12 @@ _daily_winner_worker_started = False
 _daily_winner_worker_lock = threading.Lock()
 _story_cleanup_worker_started = False
 _story_cleanup_worker_lock = threading.Lock()
+_password_migration_worker_started = False
+_password_migration_worker_lock = threading.Lock()
+_group_membership_listener_started = False
+_group_membership_listener_lock = threading.Lock()
+_media_cache_listener_started = False
+_media_cache_listener_lock = threading.Lock()
 
 
 def _ensure_post_visibility_schema():
@@ -186,6 +182,22 @@ def _ensure_media_schema():
         migration_sql.append(
             "ALTER TABLE media ADD COLUMN artist VARCHAR(255)"
         )
+    if "width" not in column_names:
+        migration_sql.append(
+            "ALTER TABLE media ADD COLUMN width INTEGER"
+        )
+    if "height" not in column_names:
+        migration_sql.append(
+            "ALTER TABLE media ADD COLUMN height INTEGER"
+        )
+    if "placeholder" not in column_names:
+        migration_sql.append(
+            "ALTER TABLE media ADD COLUMN placeholder TEXT"
+        )
+    if "variants_json" not in column_names:
+        migration_sql.append(
+            "ALTER TABLE media ADD COLUMN variants_json TEXT"
+        )
 
     if migration_sql:
         for sql in migration_sql:
@@ -621,6 +633,71 @@ def _ensure_user_badge_schema():
     db.session.commit()
 
 
+# Ordered; ids are recorded in schema_migrations, so never rename or reorder
+# existing steps. Add new ones at the end.
+SCHEMA_MIGRATION_STEPS = (
+    MigrationStep("create_all", lambda: db.create_all(), repeatable=True),
+    MigrationStep("0001_post_visibility", _ensure_post_visibility_schema),
+    MigrationStep("0002_post_quote", _ensure_post_quote_schema),
+    MigrationStep("0003_post_daily_winner", _ensure_post_daily_winner_schema),
+    MigrationStep("0004_media_columns", _ensure_media_schema),
+    MigrationStep("performance_indexes", _ensure_performance_indexes, repeatable=True),
+    MigrationStep("0005_app_update", _ensure_app_update_schema),
+    MigrationStep("0006_about_us", _ensure_about_us_schema),
+    MigrationStep("0007_private_message_sender_cipher", _ensure_private_message_sender_cipher_schema),
+    MigrationStep("0008_message_idempotency", _ensure_message_idempotency_schema),
+    MigrationStep("0009_group_recipient_seen", _ensure_group_recipient_seen_schema),
+    MigrationStep("0010_group_key_fanout", _ensure_group_key_fanout_schema),
+    MigrationStep("0011_message_user_delete", _ensure_message_user_delete_schema),
+    MigrationStep("0012_crash_log", _ensure_crash_log_schema),
+    MigrationStep("0013_user_created_at", _ensure_user_created_at_schema),
+    MigrationStep("0014_user_badge", _ensure_user_badge_schema),
+)
+
+
+def apply_schema_migrations(*, force: bool = False) -> list[str]:
+    """Brings the database up to the models; needs an app context.
+
+    With ``force`` every step runs again (they are all idempotent).
+    """
+    fingerprint = schema_migrations.compute_fingerprint(db.metadata, SCHEMA_MIGRATION_STEPS)
+    return schema_migrations.apply_migrations(
+        db.session,
+        SCHEMA_MIGRATION_STEPS,
+        fingerprint,
+        force=force,
+    )
+
+
+def _ensure_schema(app: Flask):
+    started_at = time.perf_counter()
+    with app.app_context():
+        fingerprint = schema_migrations.compute_fingerprint(db.metadata, SCHEMA_MIGRATION_STEPS)
+        if schema_migrations.read_fingerprint(db.engine) == fingerprint:
+            app.logger.info(
+                "Schema is current (fingerprint=%s, checked in %.1f ms).",
+                fingerprint[:12],
+                (time.perf_counter() - started_at) * 1000,
+            )
+            return
+        if not app.config.get("SCHEMA_AUTO_MIGRATE", True):
+            raise RuntimeError(
+                "Database schema is out of date. Run `python migrate_schema.py` "
+                "or set SCHEMA_AUTO_MIGRATE=true."
+            )
+        with schema_migrations.migration_lock(db.engine):
+            # Another worker may have migrated while this one waited for the lock.
+            if schema_migrations.read_fingerprint(db.engine) == fingerprint:
+                app.logger.info("Schema was migrated by another process; continuing.")
+                return
+            ran = apply_schema_migrations()
+    app.logger.info(
+        "Applied schema migrations %s in %.1f ms.",
+        ", ".join(ran),
+        (time.perf_counter() - started_at) * 1000,
+    )
+
+
 def _warn_on_database_fallback(app: Flask):
     if Config.DATABASE_URL_WAS_EXPLICIT:
         return
@@ -657,9 +734,57 @@ def _log_async_task_mode(app: Flask):
     )
 
 
+def _start_password_migration_worker(app: Flask):
+    global _password_migration_worker_started
+
+    from app.services import password_security
+
+    if not bool(app.config.get("AUTH_PASSWORD_MIGRATION_ENABLED", True)):
+        return
+    if not bool(app.config.get("AUTH_PASSWORD_MIGRATION_BACKGROUND", True)):
+        # Startup waits for the migration, as before.
+        with app.app_context():
+            migrated_passwords = password_security.migrate_plaintext_passwords()
+        if migrated_passwords:
+            app.logger.info(
+                "Migrated %s legacy plaintext password records to Argon2id hashes.",
+                migrated_passwords,
+            )
+        return
+
+    with _password_migration_worker_lock:
+        if _password_migration_worker_started:
+            return
+        _password_migration_worker_started = True
+
+    app_ref = app
+
+    def _worker():
+        # Runs once; plaintext rows only exist from before hashing was added.
+        try:
+            with app_ref.app_context():
+                migrated_passwords = password_security.run_background_password_migration()
+            if migrated_passwords:
+                app_ref.logger.info(
+                    "Migrated %s legacy plaintext password records to Argon2id hashes.",
+                    migrated_passwords,
+                )
+        except Exception:
+            app_ref.logger.exception("Password migration worker failed")
+
+    thread = threading.Thread(
+        target=_worker,
+        name="password-migration-worker",
+        daemon=True,
+    )
+    thread.start()
+
+
 def _start_moderation_cleanup_worker(app: Flask):
     global _cleanup_worker_started
 
+    from app.services import report_service
+
     enabled = bool(app.config.get("MODERATION_CLEANUP_BACKGROUND_ENABLED", True))
     if not enabled:
         app.logger.info(
@@ -726,6 +851,8 @@ def _next_daily_winner_run(now: datetime) -> datetime:
 def _start_daily_winner_worker(app: Flask):
     global _daily_winner_worker_started
 
+    from app.services import daily_winner_service
+
     enabled = bool(app.config.get("POST_OF_DAY_SCHEDULER_ENABLED", True))
     if not enabled:
         app.logger.info("Post of the Day scheduler disabled.")
@@ -772,6 +899,8 @@ def _start_daily_winner_worker(app: Flask):
 def _start_story_cleanup_worker(app: Flask):
     global _story_cleanup_worker_started
 
+    from app.services import story_service
+
     enabled = bool(app.config.get("STORY_CLEANUP_BACKGROUND_ENABLED", True))
     if not enabled:
         if bool(app.config.get("STORY_VIEW_ASYNC_ENABLED", False)):
@@ -839,12 +968,195 @@ def _start_story_cleanup_worker(app: Flask):
     thread.start()
 
 
-def create_app():
+def _start_group_membership_invalidation_listener(app: Flask):
+    global _group_membership_listener_started
+
+    from app.repositories import group_repository
+
+    enabled = bool(app.config.get("GROUP_MEMBERSHIP_CACHE_PUBSUB_ENABLED", True))
+    if not enabled:
+        app.logger.info("Group membership cache pub/sub invalidation disabled.")
+        return
+
+    with _group_membership_listener_lock:
+        if _group_membership_listener_started:
+            return
+        _group_membership_listener_started = True
+
+    app_ref = app
+
+    def _worker():
+        retry_delay = 1
+        while True:
+            connected_at = time.monotonic()
+            try:
+                with app_ref.app_context():
+                    group_repository.listen_for_membership_invalidations()
+            except Exception as exc:
+                app_ref.logger.warning(
+                    "Group membership invalidation listener disconnected, retrying in %ss: %s",
+                    retry_delay,
+                    exc,
+                )
+            # Any snapshot may have missed an invalidation while disconnected.
+            group_repository.clear_membership_cache()
+            if time.monotonic() - connected_at > 60:
+                retry_delay = 1
+            time.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, 30)
+
+    thread = threading.Thread(
+        target=_worker,
+        name="group-membership-invalidation-listener",
+        daemon=True,
+    )
+    thread.start()
+
+
+def _start_media_cache_invalidation_listener(app: Flask):
+    global _media_cache_listener_started
+
+    from app.services import media_cache
+
+    enabled = bool(app.config.get("MEDIA_HOT_CACHE_PUBSUB_ENABLED", True))
+    if not enabled or not app.config.get("MEDIA_HOT_CACHE_ENABLED", True):
+        app.logger.info("Media cache pub/sub invalidation disabled.")
+        return
+
+    with _media_cache_listener_lock:
+        if _media_cache_listener_started:
+            return
+        _media_cache_listener_started = True
+
+    app_ref = app
+
+    def _worker():
+        retry_delay = 1
+        while True:
+            connected_at = time.monotonic()
+            try:
+                with app_ref.app_context():
+                    media_cache.listen_for_invalidations()
+            except Exception as exc:
+                app_ref.logger.warning(
+                    "Media cache invalidation listener disconnected, retrying in %ss: %s",
+                    retry_delay,
+                    exc,
+                )
+            # listen_for_invalidations drops the entries once it is subscribed
+            # again, so a process that cannot reach Redis keeps its cache.
+            if time.monotonic() - connected_at > 60:
+                retry_delay = 1
+            time.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, 30)
+
+    thread = threading.Thread(
+        target=_worker,
+        name="media-cache-invalidation-listener",
+        daemon=True,
+    )
+    thread.start()
+
+
+# (module, blueprint attribute, url prefix), in registration order. Modules are
+# imported by create_app only for roles that serve HTTP.
+BLUEPRINTS = (
+    ("app.routes.main_routes", "main_bp", "/"),
+    ("app.routes.auth_routes", "auth_bp", "/api/auth"),
+    ("app.routes.contact_routes", "contact_bp", "/api/contacts"),
+    ("app.routes.message_routes", "message_bp", "/api/messages"),
+    ("app.routes.post_routes", "post_bp", "/api"),
+    ("app.routes.comment_routes", "comment_bp", "/api"),
+    ("app.routes.vote_routes", "vote_bp", "/api"),
+    ("app.routes.notification_routes", "notification_bp", "/api/notifications"),
+    ("app.routes.activity_notification_routes", "activity_notification_bp", "/api/activity-notifications"),
+    ("app.routes.profile_routes", "profile_bp", "/api"),
+    ("app.routes.follow_routes", "follow_bp", "/api"),
+    ("app.routes.search_routes", "search_bp", "/api"),
+    ("app.routes.report_routes", "report_bp", "/api"),
+    ("app.routes.crash_routes", "crash_bp", "/api"),
+    ("app.routes.block_routes", "block_bp", "/api"),
+    ("app.routes.playlist_routes", "playlist_bp", "/api"),
+    ("app.routes.story_routes", "story_bp", "/api"),
+    ("app.routes.admin_routes", "admin_bp", "/admin"),
+    ("app.routes.group_routes", "group_bp", "/api/groups"),
+)
+
+
+@dataclass(frozen=True)
+class AppRole:
+    name: str
+    blueprints: bool
+    socket_events: bool
+    # Started in this order; each still honours its own *_ENABLED setting.
+    background_workers: tuple = ()
+
+
+APP_ROLES = {
+    role.name: role
+    for role in (
+        # HTTP API and sockets in one process; runs the in-process schedulers.
+        AppRole(
+            "web",
+            blueprints=True,
+            socket_events=True,
+            background_workers=(
+                _start_password_migration_worker,
+                _start_moderation_cleanup_worker,
+                _start_daily_winner_worker,
+                _start_story_cleanup_worker,
+                _start_group_membership_invalidation_listener,
+                _start_media_cache_invalidation_listener,
+            ),
+        ),
+        AppRole(
+            "socket",
+            blueprints=False,
+            socket_events=True,
+            background_workers=(_start_group_membership_invalidation_listener,),
+        ),
+        # run_async_worker.py: task handlers import their services on first use.
+        AppRole(
+            "worker",
+            blueprints=False,
+            socket_events=False,
+            background_workers=(_start_group_membership_invalidation_listener,),
+        ),
+        # run_cleanup_worker.py: one cleanup cycle from cron, no threads.
+        AppRole("cleanup", blueprints=False, socket_events=False),
+    )
+}
+
+
+def resolve_app_role(role: str | None = None) -> AppRole:
+    name = str(role or Config.APP_ROLE or "web").strip().lower()
+    if name not in APP_ROLES:
+        raise RuntimeError(
+            f"Unknown APP_ROLE {name!r}; expected one of {', '.join(APP_ROLES)}."
+        )
+    return APP_ROLES[name]
+
+
+def _register_blueprints(app: Flask):
+    for module_name, attribute, url_prefix in BLUEPRINTS:
+        module = importlib.import_module(module_name)
+        app.register_blueprint(getattr(module, attribute), url_prefix=url_prefix)
+
+
+def create_app(role: str | None = None):
+    """Builds the app for ``role`` (default: APP_ROLE, then "web").
+
+    Every role registers all models, socketio and the schema check; only
+    "web" imports the HTTP blueprints and only web/socket the socket
+    handlers, which keeps worker and cron processes small.
+    """
+    app_role = resolve_app_role(role)
     app = Flask(__name__,
                 template_folder='templates',
                 static_folder='static')
 
     app.config.from_object(Config)
+    app.config["APP_ROLE"] = app_role.name
 
     app.config["MAX_CONTENT_LENGTH"] = 100 * 1024 * 1024  # 100 MB hard cap
     _warn_on_database_fallback(app)
@@ -875,58 +1187,22 @@ def create_app():
         engineio_logger=Config.SOCKETIO_ENGINEIO_LOGGER,
     )
     jwt = JWTManager(app)
-    with app.app_context():
-        register_socket_events()
-
-    app.register_blueprint(main_bp, url_prefix="/")
-    app.register_blueprint(auth_bp, url_prefix="/api/auth")
-    app.register_blueprint(contact_bp, url_prefix="/api/contacts")
-    app.register_blueprint(message_bp, url_prefix="/api/messages")
-    app.register_blueprint(post_bp, url_prefix="/api")
-    app.register_blueprint(comment_bp, url_prefix="/api")
-    app.register_blueprint(vote_bp, url_prefix="/api")
-    app.register_blueprint(notification_bp, url_prefix="/api/notifications")
-    app.register_blueprint(activity_notification_bp, url_prefix="/api/activity-notifications")
-    app.register_blueprint(profile_bp, url_prefix="/api")
-    app.register_blueprint(follow_bp, url_prefix="/api")
-    app.register_blueprint(search_bp, url_prefix="/api")
-    app.register_blueprint(report_bp, url_prefix="/api")
-    app.register_blueprint(crash_bp, url_prefix="/api")
-    app.register_blueprint(block_bp, url_prefix="/api")
-    app.register_blueprint(playlist_bp, url_prefix="/api")
-    app.register_blueprint(story_bp, url_prefix="/api")
-    app.register_blueprint(admin_bp, url_prefix="/admin")
-    app.register_blueprint(group_bp, url_prefix="/api/groups")
+    if app_role.socket_events:
+        from app.socket_events import register_socket_events
 
-    with app.app_context():
-        db.create_all()
-        _ensure_post_visibility_schema()
-        _ensure_post_quote_schema()
-        _ensure_post_daily_winner_schema()
-        _ensure_media_schema()
-        _ensure_performance_indexes()
-        _ensure_app_update_schema()
-        _ensure_about_us_schema()
-        _ensure_private_message_sender_cipher_schema()
-        _ensure_message_idempotency_schema()
-        _ensure_group_recipient_seen_schema()
-        _ensure_group_key_fanout_schema()
-        _ensure_message_user_delete_schema()
-        _ensure_crash_log_schema()
-        _ensure_user_created_at_schema()
-        _ensure_user_badge_schema()
-        migrated_passwords = password_security.migrate_plaintext_passwords()
-        if migrated_passwords:
-            app.logger.info(
-                "Migrated %s legacy plaintext password records to Argon2id hashes.",
-                migrated_passwords,
-            )
+        with app.app_context():
+            register_socket_events()
+
+    if app_role.blueprints:
+        _register_blueprints(app)
+
+    _ensure_schema(app)
 
     if os.getenv("FLASK_RUN_FROM_CLI", "").strip().lower() in {"1", "true"}:
         app.logger.info("Using Flask CLI runtime. For production prefer Gunicorn.")
-    _start_moderation_cleanup_worker(app)
-    _start_daily_winner_worker(app)
-    _start_story_cleanup_worker(app)
+    app.logger.info("Starting app role=%s", app_role.name)
+    for start_worker in app_role.background_workers:
+        start_worker(app)
 
     # error handler
     @app.errorhandler(HTTPException)
@@ -111,11 +111,17 @@ class Config:
         "APP_ENV",
         _env_str("FLASK_ENV", "development"),
     )
+    # What this process runs: web (HTTP, sockets and schedulers), socket,
+    # worker or cleanup. The worker scripts pass their role explicitly.
+    APP_ROLE = _env_str("APP_ROLE", "web").lower()
 
     DATABASE_URL = os.getenv("DATABASE_URL", "").strip()
     SQLALCHEMY_DATABASE_URI = DATABASE_URL or "sqlite:///messenger.db"
     DATABASE_URL_WAS_EXPLICIT = bool(DATABASE_URL)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # When the schema fingerprint is stale, migrate during startup. Set false in
+    # production and run `python migrate_schema.py` once per deploy instead.
+    SCHEMA_AUTO_MIGRATE = _env_bool("SCHEMA_AUTO_MIGRATE", True)
 
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "dev-secret")
     AUTH_PASSWORD_PEPPER = _env_str(
@@ -157,11 +163,74 @@ class Config:
         1,
         _env_int("AUTH_PASSWORD_MIGRATION_BATCH_SIZE", 1000),
     )
+    # Hash legacy plaintext passwords on a background thread (one process per
+    # deployment, via a Redis lock) instead of during create_app.
+    AUTH_PASSWORD_MIGRATION_BACKGROUND = _env_bool("AUTH_PASSWORD_MIGRATION_BACKGROUND", True)
+    AUTH_PASSWORD_MIGRATION_BATCH_PAUSE_SECONDS = max(
+        0.0,
+        _env_float("AUTH_PASSWORD_MIGRATION_BATCH_PAUSE_SECONDS", 0.2),
+    )
+    AUTH_PASSWORD_MIGRATION_LOCK_SECONDS = max(
+        10,
+        _env_int("AUTH_PASSWORD_MIGRATION_LOCK_SECONDS", 600),
+    )
+    # Argon2 calls run on eventlet's OS thread pool; each one uses
+    # AUTH_ARGON2_MEMORY_COST_KIB of memory and AUTH_ARGON2_PARALLELISM lanes.
+    AUTH_HASH_POOL_MAX_CONCURRENCY = max(1, _env_int("AUTH_HASH_POOL_MAX_CONCURRENCY", 2))
+    AUTH_HASH_POOL_MAX_QUEUE = max(0, _env_int("AUTH_HASH_POOL_MAX_QUEUE", 32))
+    AUTH_HASH_POOL_QUEUE_TIMEOUT_SECONDS = max(
+        0.0,
+        _env_float("AUTH_HASH_POOL_QUEUE_TIMEOUT_SECONDS", 5.0),
+    )
+    AUTH_HASH_POOL_METRICS_KEY = _env_str("AUTH_HASH_POOL_METRICS_KEY", "auth:password_hash:metrics")
     # Post of the Day scoring knobs.
     UPVOTE_SCORE = max(0, _env_int("UPVOTE_SCORE", 3))
     DOWNVOTE_SCORE = max(0, _env_int("DOWNVOTE_SCORE", 1))
     COMMENT_SCORE = max(0, _env_int("COMMENT_SCORE", 2))
     POST_OF_DAY_SCHEDULER_ENABLED = _env_bool("POST_OF_DAY_SCHEDULER_ENABLED", True)
+    # Search totals stop counting here and report total_capped instead.
+    SEARCH_TOTAL_CAP = max(1, _env_int("SEARCH_TOTAL_CAP", 1000))
+    SEARCH_INDEX_BUILD_BATCH_SIZE = max(
+        100,
+        _env_int("SEARCH_INDEX_BUILD_BATCH_SIZE", 5000),
+    )
+    TYPEAHEAD_MAX_LIMIT = max(1, _env_int("TYPEAHEAD_MAX_LIMIT", 20))
+    # ZRANGEBYLEX window read per keystroke before ranking and block filtering.
+    TYPEAHEAD_SCAN_LIMIT = max(1, _env_int("TYPEAHEAD_SCAN_LIMIT", 200))
+    TYPEAHEAD_BUILD_BATCH_SIZE = max(
+        100,
+        _env_int("TYPEAHEAD_BUILD_BATCH_SIZE", 1000),
+    )
+    TYPEAHEAD_FOLLOWING_CACHE_TTL_SECONDS = max(
+        1,
+        _env_int("TYPEAHEAD_FOLLOWING_CACHE_TTL_SECONDS", 300),
+    )
+    # Cursor-mode feed totals are cached per viewer and may lag by this much.
+    POSTS_TOTAL_CACHE_TTL_SECONDS = max(1, _env_int("POSTS_TOTAL_CACHE_TTL_SECONDS", 60))
+    # Home timeline: per-user capped ZSET filled on post creation (fan-out on write).
+    TIMELINE_MAX_ENTRIES = max(1, _env_int("TIMELINE_MAX_ENTRIES", 800))
+    TIMELINE_TTL_SECONDS = max(60, _env_int("TIMELINE_TTL_SECONDS", 3 * 24 * 60 * 60))
+    # Authors with more followers are merged in at read time instead.
+    TIMELINE_FAN_OUT_MAX_FOLLOWERS = max(1, _env_int("TIMELINE_FAN_OUT_MAX_FOLLOWERS", 10000))
+    TIMELINE_FAN_OUT_BATCH_SIZE = max(1, _env_int("TIMELINE_FAN_OUT_BATCH_SIZE", 1000))
+    TIMELINE_BACKFILL_POSTS = max(0, _env_int("TIMELINE_BACKFILL_POSTS", 50))
+    # Deleted accounts are purged from other users' inboxes by a background
+    # job that works through this many inboxes or message ids per step.
+    ACCOUNT_PURGE_BATCH_SIZE = max(1, _env_int("ACCOUNT_PURGE_BATCH_SIZE", 200))
+    ACCOUNT_PURGE_LOCK_SECONDS = max(10, _env_int("ACCOUNT_PURGE_LOCK_SECONDS", 300))
+    ACCOUNT_PURGE_JOB_TTL_SECONDS = max(
+        60,
+        _env_int("ACCOUNT_PURGE_JOB_TTL_SECONDS", 7 * 24 * 60 * 60),
+    )
+    # Author cards (username, badge, name, avatar): a Redis hash shared by all
+    # processes, fronted by a short-lived per-process LRU.
+    AUTHOR_CARD_CACHE_TTL_SECONDS = max(1, _env_int("AUTHOR_CARD_CACHE_TTL_SECONDS", 3600))
+    AUTHOR_CARD_LOCAL_TTL_SECONDS = max(0.0, _env_float("AUTHOR_CARD_LOCAL_TTL_SECONDS", 10.0))
+    AUTHOR_CARD_LOCAL_MAX_ENTRIES = max(0, _env_int("AUTHOR_CARD_LOCAL_MAX_ENTRIES", 20000))
+    # Per-viewer set of blocked/blocking user ids, dropped on block and unblock.
+    BLOCK_HIDDEN_CACHE_TTL_SECONDS = max(1, _env_int("BLOCK_HIDDEN_CACHE_TTL_SECONDS", 3600))
+    # Larger hidden sets are filtered with anti-joins on blocks instead of NOT IN.
+    BLOCK_HIDDEN_INLINE_LIMIT = max(0, _env_int("BLOCK_HIDDEN_INLINE_LIMIT", 500))
 
     MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT", "localhost:9000")
     MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY", "admin")
@@ -184,11 +253,49 @@ class Config:
         "MEDIA_LOCAL_FALLBACK_ENABLED",
         True,
     )
+    # Post media uploads run on a process-wide pool; keep it within MINIO_HTTP_POOL_MAXSIZE.
+    MEDIA_UPLOAD_MAX_WORKERS = max(1, _env_int("MEDIA_UPLOAD_MAX_WORKERS", 8))
+    MEDIA_UPLOAD_PART_SIZE_BYTES = max(
+        5 * 1024 * 1024,
+        _env_int("MEDIA_UPLOAD_PART_SIZE_BYTES", 5 * 1024 * 1024),
+    )
+    # Compares single-part ETags with the MD5 computed while streaming; disable
+    # when MinIO encrypts objects, since encrypted ETags are not the body MD5.
+    MEDIA_UPLOAD_VERIFY_ETAG = _env_bool("MEDIA_UPLOAD_VERIFY_ETAG", True)
+    # Downscaled copies of post images, written next to the original by the
+    # media_post_process task. Widths at or above the original are skipped.
+    MEDIA_VARIANT_WIDTHS = sorted(
+        {
+            int(width)
+            for width in _env_csv_list("MEDIA_VARIANT_WIDTHS", ["320", "640", "1080"])
+            if width.isdigit() and int(width) > 0
+        }
+    )
+    MEDIA_VARIANT_FORMAT = _env_str("MEDIA_VARIANT_FORMAT", "webp").lower()
+    MEDIA_VARIANT_QUALITY = min(max(1, _env_int("MEDIA_VARIANT_QUALITY", 78)), 100)
+    MEDIA_VARIANT_MAX_SOURCE_PIXELS = max(1, _env_int("MEDIA_VARIANT_MAX_SOURCE_PIXELS", 50_000_000))
+    MEDIA_PLACEHOLDER_WIDTH = min(max(4, _env_int("MEDIA_PLACEHOLDER_WIDTH", 16)), 64)
     MEDIA_CACHE_MAX_AGE_SECONDS = int(
         os.getenv("MEDIA_CACHE_MAX_AGE_SECONDS", str(7 * 24 * 60 * 60))
     )
     MEDIA_CACHE_IMMUTABLE = _env_bool("MEDIA_CACHE_IMMUTABLE", True)
     MEDIA_STREAM_CHUNK_SIZE = int(os.getenv("MEDIA_STREAM_CHUNK_SIZE", str(256 * 1024)))
+    MEDIA_RANGE_MAX_PARTS = max(1, _env_int("MEDIA_RANGE_MAX_PARTS", 16))
+    # Process-local LRU for small hot objects (avatars, thumbnails).
+    MEDIA_HOT_CACHE_ENABLED = _env_bool("MEDIA_HOT_CACHE_ENABLED", True)
+    MEDIA_HOT_CACHE_MAX_BYTES = max(
+        0,
+        _env_int("MEDIA_HOT_CACHE_MAX_BYTES", 64 * 1024 * 1024),
+    )
+    MEDIA_HOT_CACHE_MAX_OBJECT_BYTES = max(
+        0,
+        _env_int("MEDIA_HOT_CACHE_MAX_OBJECT_BYTES", 256 * 1024),
+    )
+    MEDIA_HOT_CACHE_REVALIDATE_SECONDS = max(
+        0.0,
+        _env_float("MEDIA_HOT_CACHE_REVALIDATE_SECONDS", 60.0),
+    )
+    MEDIA_HOT_CACHE_PUBSUB_ENABLED = _env_bool("MEDIA_HOT_CACHE_PUBSUB_ENABLED", True)
     MEDIA_CONTENT_SNIFFING_ENABLED = _env_bool("MEDIA_CONTENT_SNIFFING_ENABLED", True)
     MEDIA_CONTENT_REJECT_ACTIVE_TEXT = _env_bool("MEDIA_CONTENT_REJECT_ACTIVE_TEXT", True)
     MEDIA_CONTENT_ENFORCE_CATEGORY_MATCH = _env_bool("MEDIA_CONTENT_ENFORCE_CATEGORY_MATCH", True)
@@ -269,6 +376,29 @@ class Config:
         10,
         _env_int("PRESENCE_CLEANUP_BATCH_SIZE", 200),
     )
+    # user_status fanout audience (followers + shared groups) cache.
+    PRESENCE_SUBSCRIBERS_CACHE_TTL_SECONDS = max(
+        1,
+        _env_int("PRESENCE_SUBSCRIBERS_CACHE_TTL_SECONDS", 300),
+    )
+    PRESENCE_SUBSCRIBERS_MAX_CONVERSATIONS = max(
+        1,
+        _env_int("PRESENCE_SUBSCRIBERS_MAX_CONVERSATIONS", 1000),
+    )
+    PRESENCE_SUBSCRIBE_MAX_USERS = max(
+        1,
+        _env_int("PRESENCE_SUBSCRIBE_MAX_USERS", 200),
+    )
+    # In-process group member sets, keyed by (group id, membership version).
+    GROUP_MEMBERSHIP_CACHE_TTL_SECONDS = max(
+        0,
+        _env_int("GROUP_MEMBERSHIP_CACHE_TTL_SECONDS", 60),
+    )
+    GROUP_MEMBERSHIP_CACHE_MAX_GROUPS = max(
+        0,
+        _env_int("GROUP_MEMBERSHIP_CACHE_MAX_GROUPS", 5000),
+    )
+    GROUP_MEMBERSHIP_CACHE_PUBSUB_ENABLED = _env_bool("GROUP_MEMBERSHIP_CACHE_PUBSUB_ENABLED", True)
 
     # Optional async task worker queue.
     ASYNC_TASKS_ENABLED = _env_bool("ASYNC_TASKS_ENABLED", False)
@@ -302,6 +432,34 @@ class Config:
         5,
         _env_int("ASYNC_TASK_WORKER_HEARTBEAT_STALE_SECONDS", 30),
     )
+    # Async task counters, gauges and latency histograms are buffered in
+    # process and written in one pipeline at most this often.
+    ASYNC_TASK_METRICS_FLUSH_INTERVAL_SECONDS = max(
+        0.0,
+        _env_float("ASYNC_TASK_METRICS_FLUSH_INTERVAL_SECONDS", 5.0),
+    )
+    ASYNC_TASK_WORKER_CONCURRENCY = max(
+        1,
+        _env_int("ASYNC_TASK_WORKER_CONCURRENCY", 1),
+    )
+    # 0 prefetches as many tasks as the pool has threads.
+    ASYNC_TASK_WORKER_PREFETCH = max(
+        0,
+        _env_int("ASYNC_TASK_WORKER_PREFETCH", 0),
+    )
+    # Dequeued tasks not acked within this window are requeued by the reaper.
+    ASYNC_TASK_VISIBILITY_TIMEOUT_SECONDS = max(
+        1.0,
+        _env_float("ASYNC_TASK_VISIBILITY_TIMEOUT_SECONDS", 300.0),
+    )
+    ASYNC_TASK_REAPER_INTERVAL_SECONDS = max(
+        0.0,
+        _env_float("ASYNC_TASK_REAPER_INTERVAL_SECONDS", 5.0),
+    )
+    ASYNC_TASK_RETRY_PROMOTE_INTERVAL_SECONDS = max(
+        0.0,
+        _env_float("ASYNC_TASK_RETRY_PROMOTE_INTERVAL_SECONDS", 1.0),
+    )
     ASYNC_TASK_WORKER_STARTUP_STRICT = _env_bool(
         "ASYNC_TASK_WORKER_STARTUP_STRICT",
         False,
@@ -386,6 +544,17 @@ class Config:
         1,
         int(os.getenv("MODERATION_CLEANUP_BATCH_SIZE", "100")),
     )
+    # Posts purged per transaction; a suspended account with more posts is
+    # deleted over several short transactions.
+    MODERATION_CLEANUP_PURGE_CHUNK_SIZE = max(
+        1,
+        int(os.getenv("MODERATION_CLEANUP_PURGE_CHUNK_SIZE", "500")),
+    )
+    # Media objects per bulk storage delete (MinIO accepts up to 1000).
+    MODERATION_CLEANUP_MEDIA_REMOVAL_BATCH_SIZE = min(
+        1000,
+        max(1, int(os.getenv("MODERATION_CLEANUP_MEDIA_REMOVAL_BATCH_SIZE", "1000"))),
+    )
     MODERATION_CLEANUP_RUNNER = (
         os.getenv("MODERATION_CLEANUP_RUNNER", "inprocess").strip().lower()
     )
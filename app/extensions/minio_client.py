@@ -1,13 +1,15 @@
 import urllib3
 from threading import Lock
+from weakref import WeakKeyDictionary
 
 from flask import current_app
-from minio import Minio
 
 
 _minio_client = None
 _minio_signature = None
 _minio_lock = Lock()
+# client -> buckets already confirmed to exist, so uploads skip bucket_exists.
+_known_buckets: "WeakKeyDictionary[object, set[str]]" = WeakKeyDictionary()
 
 
 def _build_signature():
@@ -33,6 +35,9 @@ def get_minio_client():
         if _minio_client is not None and _minio_signature == signature:
             return _minio_client
 
+        # The SDK takes ~0.3 s to import; processes that never touch storage skip it.
+        from minio import Minio
+
         timeout = urllib3.Timeout(
             connect=current_app.config["MINIO_CONNECT_TIMEOUT"],
             read=current_app.config["MINIO_READ_TIMEOUT"],
@@ -53,3 +58,20 @@ def get_minio_client():
         )
         _minio_signature = signature
         return _minio_client
+
+
+def ensure_bucket(client, bucket: str):
+    """Creates ``bucket`` if needed, checking MinIO once per client and bucket."""
+    with _minio_lock:
+        if bucket in _known_buckets.get(client, ()):
+            return
+    if not client.bucket_exists(bucket):
+        client.make_bucket(bucket)
+    with _minio_lock:
+        _known_buckets.setdefault(client, set()).add(bucket)
+
+
+def forget_bucket(client, bucket: str):
+    """Makes the next ensure_bucket ask MinIO again, e.g. after a failed upload."""
+    with _minio_lock:
+        _known_buckets.get(client, set()).discard(bucket)
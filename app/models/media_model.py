@@ -15,4 +15,11 @@ class Media(db.Model):
     display_name = db.Column(db.String(255), nullable=True)
     title = db.Column(db.String(255), nullable=True)
     artist = db.Column(db.String(255), nullable=True)
+    width = db.Column(db.Integer, nullable=True)
+    height = db.Column(db.Integer, nullable=True)
+    # Tiny base64 data URI shown while the image loads.
+    placeholder = db.Column(db.Text, nullable=True)
+    # JSON list of {"width", "height", "object_name", "mime_type"}; NULL until
+    # the media_post_process task has run, "[]" when no variant applies.
+    variants_json = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
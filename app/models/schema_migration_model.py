@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from app.db import db
+
+
+class AppliedSchemaMigration(db.Model):
+    __tablename__ = "schema_migrations"
+
+    migration_id = db.Column(db.String(128), primary_key=True)
+    applied_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class SchemaState(db.Model):
+    __tablename__ = "schema_state"
+
+    name = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.String(128), nullable=False)
+    updated_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+    )
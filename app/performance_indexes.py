@@ -1,8 +1,11 @@
+import logging
 from dataclasses import dataclass
 from typing import Iterable
 
 from sqlalchemy import inspect, text
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass(frozen=True)
 class IndexSpec:
@@ -10,6 +13,10 @@ class IndexSpec:
     index_name: str
     ddl_target: str
     rollback_safe: bool = False
+    # Empty means every dialect; otherwise the spec is skipped elsewhere.
+    dialects: tuple[str, ...] = ()
+    # Runs before CREATE INDEX; a failure skips the index instead of startup.
+    prerequisite_sql: str | None = None
 
 
 @dataclass(frozen=True)
@@ -138,6 +145,27 @@ MANAGED_INDEX_SPECS: tuple[IndexSpec, ...] = (
         index_name="ix_post_reports_reporter_post_status",
         ddl_target="post_reports (reporter_id, post_id, status)",
     ),
+    # Search indexes. Other dialects use app.services.search_index instead.
+    IndexSpec(
+        table_name="users",
+        index_name="ix_users_username_trgm",
+        ddl_target="users USING gin (username gin_trgm_ops)",
+        dialects=("postgresql",),
+        prerequisite_sql="CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    ),
+    IndexSpec(
+        table_name="profiles",
+        index_name="ix_profiles_name_trgm",
+        ddl_target="profiles USING gin (name gin_trgm_ops)",
+        dialects=("postgresql",),
+        prerequisite_sql="CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    ),
+    IndexSpec(
+        table_name="posts",
+        index_name="ix_posts_text_search",
+        ddl_target="posts USING gin (to_tsvector('simple', text))",
+        dialects=("postgresql",),
+    ),
 )
 
 LOOKUP_REQUIREMENTS: tuple[LookupRequirement, ...] = (
@@ -174,12 +202,39 @@ ROLLBACK_SAFE_INDEX_NAMES: tuple[str, ...] = tuple(
 )
 
 
+def _dialect_name(engine) -> str | None:
+    dialect = getattr(engine, "dialect", None)
+    return getattr(dialect, "name", None)
+
+
+def _applies_to(spec: IndexSpec, dialect_name: str | None) -> bool:
+    return not spec.dialects or dialect_name in spec.dialects
+
+
+def _run_prerequisite(session, spec: IndexSpec) -> bool:
+    try:
+        with session.begin_nested():
+            session.execute(text(spec.prerequisite_sql))
+    except Exception as exc:
+        logger.warning(
+            "Skipping index %s, prerequisite failed (%s): %s",
+            spec.index_name,
+            spec.prerequisite_sql,
+            exc,
+        )
+        return False
+    return True
+
+
 def ensure_performance_indexes(session, engine) -> tuple[int, int]:
     inspector = inspect(engine)
+    dialect_name = _dialect_name(engine)
     created = 0
     ensured = 0
 
     for spec in MANAGED_INDEX_SPECS:
+        if not _applies_to(spec, dialect_name):
+            continue
         if not inspector.has_table(spec.table_name):
             continue
         ensured += 1
@@ -190,6 +245,8 @@ def ensure_performance_indexes(session, engine) -> tuple[int, int]:
         }
         if spec.index_name in existing_names:
             continue
+        if spec.prerequisite_sql and not _run_prerequisite(session, spec):
+            continue
 
         session.execute(
             text(
@@ -209,11 +266,14 @@ def drop_indexes(session, engine, index_names: Iterable[str]) -> int:
         for spec in MANAGED_INDEX_SPECS
     }
     inspector = inspect(engine)
+    dialect_name = _dialect_name(engine)
     dropped = 0
 
     for index_name in index_names:
         spec = index_by_name.get(index_name)
-        if not spec or not inspector.has_table(spec.table_name):
+        if not spec or not _applies_to(spec, dialect_name):
+            continue
+        if not inspector.has_table(spec.table_name):
             continue
 
         existing_names = {
@@ -232,9 +292,12 @@ def drop_indexes(session, engine, index_names: Iterable[str]) -> int:
 
 def collect_missing_managed_indexes(engine) -> list[IndexSpec]:
     inspector = inspect(engine)
+    dialect_name = _dialect_name(engine)
     missing = []
 
     for spec in MANAGED_INDEX_SPECS:
+        if not _applies_to(spec, dialect_name):
+            continue
         if not inspector.has_table(spec.table_name):
             continue
 
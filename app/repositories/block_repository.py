@@ -1,9 +1,60 @@
-from sqlalchemy import or_
+import logging
+
+from flask import current_app
+from sqlalchemy import and_, or_, select
 
 from app.db import db
+from app.extensions import redis_client as redis_module
 from app.models.block_model import Block
 from app.models.profile_model import Profile
 from app.models.user_model import User
+from app.services import author_card_cache
+
+logger = logging.getLogger(__name__)
+
+# user id:generation -> set of user ids hidden from them in either direction.
+BLOCK_HIDDEN_KEY_PREFIX = "blocks:hidden:"
+# user id -> generation of their hidden set, bumped by every block change.
+BLOCK_HIDDEN_GENERATION_KEY_PREFIX = "blocks:hidden_gen:"
+# Stored alone so a viewer without blocks is still a cache hit.
+_EMPTY_HIDDEN_MARKER = "__none__"
+
+
+def _hidden_key(user_id: int, generation: int) -> str:
+    return f"{BLOCK_HIDDEN_KEY_PREFIX}{int(user_id)}:{int(generation)}"
+
+
+def _hidden_generation_key(user_id: int) -> str:
+    return f"{BLOCK_HIDDEN_GENERATION_KEY_PREFIX}{int(user_id)}"
+
+
+def _hidden_cache_ttl_seconds() -> int:
+    return max(int(current_app.config.get("BLOCK_HIDDEN_CACHE_TTL_SECONDS", 3600)), 1)
+
+
+def _hidden_inline_limit() -> int:
+    return max(int(current_app.config.get("BLOCK_HIDDEN_INLINE_LIMIT", 500)), 0)
+
+
+def _decode(value):
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="ignore")
+    return value
+
+
+def invalidate_hidden_user_ids(*user_ids):
+    user_ids = [user_id for user_id in user_ids if user_id]
+    if not user_ids:
+        return
+    # The counters never expire: one that restarted from 0 could bring back a
+    # set cached under an old generation. Sets of old generations expire.
+    try:
+        pipe = redis_module.redis_client.pipeline()
+        for user_id in user_ids:
+            pipe.incrby(_hidden_generation_key(user_id), 1)
+        pipe.execute()
+    except Exception as exc:
+        logger.warning("Failed to invalidate hidden user ids user_ids=%s: %s", user_ids, exc)
 
 
 def is_blocking(blocker_id: int, blocked_id: int) -> bool:
@@ -27,6 +78,7 @@ def create_block(blocker_id: int, blocked_id: int) -> bool:
         )
     )
     db.session.commit()
+    invalidate_hidden_user_ids(blocker_id, blocked_id)
     return True
 
 
@@ -40,6 +92,7 @@ def delete_block(blocker_id: int, blocked_id: int) -> bool:
 
     db.session.delete(block)
     db.session.commit()
+    invalidate_hidden_user_ids(blocker_id, blocked_id)
     return True
 
 
@@ -58,10 +111,7 @@ def has_block_relation(user_a_id: int, user_b_id: int) -> bool:
     )
 
 
-def get_hidden_user_ids_for_viewer(viewer_user_id: int) -> set[int]:
-    if not viewer_user_id:
-        return set()
-
+def _load_hidden_user_ids(viewer_user_id: int) -> set[int]:
     blocked_rows = (
         db.session.query(Block.blocked_id)
         .filter(Block.blocker_id == viewer_user_id)
@@ -78,6 +128,65 @@ def get_hidden_user_ids_for_viewer(viewer_user_id: int) -> set[int]:
     return hidden_ids
 
 
+def get_hidden_user_ids_for_viewer(viewer_user_id: int) -> set[int]:
+    """Users the viewer blocked or was blocked by, cached in Redis per viewer.
+
+    The set is keyed by the viewer's generation, which create_block and
+    delete_block bump for both users after commit. A reader that loaded the
+    blocks before a change can only write its set under the old generation,
+    which nobody reads any more. Without Redis the blocks table is queried
+    every time.
+    """
+    if not viewer_user_id:
+        return set()
+
+    try:
+        client = redis_module.redis_client
+        generation = int(_decode(client.get(_hidden_generation_key(viewer_user_id))) or 0)
+        key = _hidden_key(viewer_user_id, generation)
+        cached = {_decode(member) for member in client.smembers(key) or set()}
+    except Exception as exc:
+        logger.warning("Failed to read hidden user ids viewer_user_id=%s: %s", viewer_user_id, exc)
+        return _load_hidden_user_ids(viewer_user_id)
+    if cached:
+        cached.discard(_EMPTY_HIDDEN_MARKER)
+        return {int(member) for member in cached}
+
+    hidden_ids = _load_hidden_user_ids(viewer_user_id)
+    try:
+        pipe = redis_module.redis_client.pipeline()
+        pipe.sadd(key, *({str(user_id) for user_id in hidden_ids} or {_EMPTY_HIDDEN_MARKER}))
+        pipe.expire(key, _hidden_cache_ttl_seconds())
+        pipe.execute()
+    except Exception as exc:
+        logger.warning("Failed to cache hidden user ids viewer_user_id=%s: %s", viewer_user_id, exc)
+    return hidden_ids
+
+
+def get_hidden_usernames_for_viewer(viewer_user_id: int) -> set[str]:
+    """Usernames of get_hidden_user_ids_for_viewer, resolved from author cards."""
+    hidden_ids = get_hidden_user_ids_for_viewer(viewer_user_id)
+    if not hidden_ids:
+        return set()
+    return {card["username"] for card in author_card_cache.get_cards(hidden_ids).values()}
+
+
+def hidden_user_filter(column, viewer_user_id: int | None, hidden_user_ids):
+    """Excludes hidden users from ``column``.
+
+    Small sets become ``NOT IN (...)``. Past BLOCK_HIDDEN_INLINE_LIMIT ids the
+    bound list is replaced by subqueries on ``blocks``, which the database runs
+    once as a hashed anti-join instead of comparing every row to every id.
+    """
+    if not viewer_user_id or len(hidden_user_ids) <= _hidden_inline_limit():
+        return ~column.in_(hidden_user_ids)
+    # Both columns are NOT NULL, so the planner can hash each subquery once.
+    return and_(
+        ~column.in_(select(Block.blocked_id).where(Block.blocker_id == viewer_user_id)),
+        ~column.in_(select(Block.blocker_id).where(Block.blocked_id == viewer_user_id)),
+    )
+
+
 def get_blocked_users_page(blocker_id: int, page: int, limit: int):
     if limit > 100:
         limit = 100
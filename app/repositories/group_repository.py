@@ -1,13 +1,39 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+
+from flask import current_app
 from sqlalchemy import func
 from sqlalchemy.orm import aliased, joinedload
 
 from app.db import db
-from app.extensions.redis_client import redis_client
+from app.extensions import redis_client as redis_module
 from app.models.group_model import Group, GroupMember
 from app.models.user_model import User
-from app.models.profile_model import Profile
+from app.services import author_card_cache
+
+logger = logging.getLogger(__name__)
 
 GROUP_MEMBERSHIP_VERSION_HASH = "group:membership_versions"
+GROUP_MEMBERSHIP_INVALIDATION_CHANNEL = "group:membership_invalidations"
+
+
+@dataclass(frozen=True)
+class GroupMembershipSnapshot:
+    group_id: int
+    version: int
+    usernames: tuple[str, ...]
+    username_set: frozenset[str]
+    user_ids: frozenset[int]
+    loaded_at: float
+
+
+# group id -> snapshot, valid only while its version matches the Redis hash.
+_membership_cache: "OrderedDict[int, GroupMembershipSnapshot]" = OrderedDict()
+_membership_cache_lock = Lock()
 
 
 def _normalize_group_id(group_id):
@@ -67,6 +93,11 @@ def remove_member(group_id: int, user_id: int) -> bool:
 
 
 def is_member(group_id: int, user_id: int) -> bool:
+    normalized_group_id = _normalize_group_id(group_id)
+    version = _read_membership_version(normalized_group_id) if normalized_group_id else None
+    if version is not None:
+        return int(user_id) in _membership_snapshot(normalized_group_id, version).user_ids
+
     return (
         GroupMember.query.filter_by(
             group_id=group_id, user_id=user_id
@@ -81,6 +112,10 @@ def is_username_member(group_id: int, username: str) -> bool:
     if not normalized_group_id or not normalized_username:
         return False
 
+    version = _read_membership_version(normalized_group_id)
+    if version is not None:
+        return normalized_username in _membership_snapshot(normalized_group_id, version).username_set
+
     return (
         db.session.query(GroupMember.id)
         .join(User, User.id == GroupMember.user_id)
@@ -98,15 +133,8 @@ def get_membership_version(group_id: int) -> int:
     if not normalized_group_id:
         return 0
 
-    try:
-        raw_value = redis_client.hget(
-            GROUP_MEMBERSHIP_VERSION_HASH,
-            str(normalized_group_id),
-        )
-    except Exception:
-        return 0
-
-    return _decode_redis_int(raw_value, default=0)
+    version = _read_membership_version(normalized_group_id)
+    return 0 if version is None else version
 
 
 def bump_membership_version(group_id: int) -> int:
@@ -115,15 +143,17 @@ def bump_membership_version(group_id: int) -> int:
         return 0
 
     try:
-        return int(
-            redis_client.hincrby(
+        version = int(
+            redis_module.redis_client.hincrby(
                 GROUP_MEMBERSHIP_VERSION_HASH,
                 str(normalized_group_id),
                 1,
             )
         )
     except Exception:
-        return get_membership_version(normalized_group_id)
+        version = get_membership_version(normalized_group_id)
+    invalidate_membership_cache(normalized_group_id)
+    return version
 
 
 def clear_membership_version(group_id: int) -> None:
@@ -132,13 +162,164 @@ def clear_membership_version(group_id: int) -> None:
         return
 
     try:
-        redis_client.hdel(
+        redis_module.redis_client.hdel(
             GROUP_MEMBERSHIP_VERSION_HASH,
             str(normalized_group_id),
         )
     except Exception:
+        pass
+    # The version restarts at 0, so an old snapshot could match it again.
+    invalidate_membership_cache(normalized_group_id)
+
+
+def _membership_cache_ttl_seconds() -> float:
+    return max(float(current_app.config.get("GROUP_MEMBERSHIP_CACHE_TTL_SECONDS", 60)), 0.0)
+
+
+def _membership_cache_max_groups() -> int:
+    return max(int(current_app.config.get("GROUP_MEMBERSHIP_CACHE_MAX_GROUPS", 5000)), 0)
+
+
+def _evict_membership_snapshot(group_id: int):
+    with _membership_cache_lock:
+        _membership_cache.pop(group_id, None)
+
+
+def invalidate_membership_cache(group_id: int, *, publish: bool = True):
+    """Drops the local snapshot and tells the other processes to drop theirs."""
+    normalized_group_id = _normalize_group_id(group_id)
+    if not normalized_group_id:
         return
 
+    _evict_membership_snapshot(normalized_group_id)
+    if not publish:
+        return
+    try:
+        redis_module.redis_client.publish(
+            GROUP_MEMBERSHIP_INVALIDATION_CHANNEL,
+            json.dumps({"group_id": normalized_group_id}),
+        )
+    except Exception as exc:
+        logger.warning(
+            "Failed to publish group membership invalidation group_id=%s: %s",
+            normalized_group_id,
+            exc,
+        )
+
+
+def handle_membership_invalidation_message(message) -> int | None:
+    if not isinstance(message, dict) or message.get("type") != "message":
+        return None
+    data = message.get("data")
+    if isinstance(data, bytes):
+        data = data.decode("utf-8", errors="ignore")
+    try:
+        group_id = _normalize_group_id(json.loads(data).get("group_id"))
+    except (TypeError, ValueError, AttributeError):
+        return None
+    if group_id:
+        _evict_membership_snapshot(group_id)
+    return group_id
+
+
+def clear_membership_cache():
+    with _membership_cache_lock:
+        _membership_cache.clear()
+
+
+def listen_for_membership_invalidations(should_stop=lambda: False):
+    """Blocks on the invalidation channel, evicting snapshots changed on other nodes."""
+    pubsub = redis_module.redis_client.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(GROUP_MEMBERSHIP_INVALIDATION_CHANNEL)
+    try:
+        # Messages published while this node was disconnected are lost;
+        # snapshots loaded before the reconnect are dropped instead.
+        clear_membership_cache()
+        while not should_stop():
+            message = pubsub.get_message(timeout=1.0)
+            if message:
+                handle_membership_invalidation_message(message)
+    finally:
+        pubsub.close()
+
+
+def _read_membership_version(group_id: int) -> int | None:
+    try:
+        raw_value = redis_module.redis_client.hget(
+            GROUP_MEMBERSHIP_VERSION_HASH,
+            str(group_id),
+        )
+    except Exception:
+        return None
+    return _decode_redis_int(raw_value, default=0)
+
+
+def _cached_membership_snapshot(group_id: int, version: int) -> GroupMembershipSnapshot | None:
+    with _membership_cache_lock:
+        snapshot = _membership_cache.get(group_id)
+        if snapshot is None:
+            return None
+        if (
+            snapshot.version != version
+            or time.monotonic() - snapshot.loaded_at > _membership_cache_ttl_seconds()
+        ):
+            _membership_cache.pop(group_id, None)
+            return None
+        _membership_cache.move_to_end(group_id)
+        return snapshot
+
+
+def _store_membership_snapshot(snapshot: GroupMembershipSnapshot):
+    max_groups = _membership_cache_max_groups()
+    if max_groups <= 0:
+        return
+    with _membership_cache_lock:
+        _membership_cache[snapshot.group_id] = snapshot
+        _membership_cache.move_to_end(snapshot.group_id)
+        while len(_membership_cache) > max_groups:
+            _membership_cache.popitem(last=False)
+
+
+def get_membership_snapshot(group_id: int) -> GroupMembershipSnapshot | None:
+    """Members of a group, cached per (group id, membership version).
+
+    The version is read before the members, so a snapshot is never older than
+    the version it is stored under. Without Redis nothing is cached.
+    """
+    normalized_group_id = _normalize_group_id(group_id)
+    if not normalized_group_id:
+        return None
+    return _membership_snapshot(
+        normalized_group_id,
+        _read_membership_version(normalized_group_id),
+    )
+
+
+def _membership_snapshot(group_id: int, version: int | None) -> GroupMembershipSnapshot:
+    if version is not None:
+        snapshot = _cached_membership_snapshot(group_id, version)
+        if snapshot is not None:
+            return snapshot
+
+    rows = (
+        db.session.query(User.id, User.username)
+        .join(GroupMember, GroupMember.user_id == User.id)
+        .filter(GroupMember.group_id == group_id)
+        .all()
+    )
+    usernames = tuple(row[1] for row in rows)
+    snapshot = GroupMembershipSnapshot(
+        group_id=group_id,
+        version=version or 0,
+        usernames=usernames,
+        username_set=frozenset(usernames),
+        user_ids=frozenset(int(row[0]) for row in rows),
+        loaded_at=time.monotonic(),
+    )
+    if version is not None:
+        _store_membership_snapshot(snapshot)
+    return snapshot
+
 
 def get_group_by_id(group_id: int) -> Group | None:
     return Group.query.get(group_id)
@@ -156,40 +337,57 @@ def get_groups_for_user(user_id: int):
 
 def get_group_members(group_id: int):
     rows = (
-        db.session.query(
-            User.id,
-            User.username,
-            User.badge,
-            Profile.name,
-            Profile.image_object_name,
-            Profile.profile_image_shape,
-            User.public_key,
-        )
+        db.session.query(User.id, User.public_key)
         .join(GroupMember, GroupMember.user_id == User.id)
-        .outerjoin(Profile, Profile.user_id == User.id)
         .filter(GroupMember.group_id == group_id)
         .order_by(User.username.asc())
         .all()
     )
-    return [
-        {
-            "id": row.id,
-            "username": row.username,
-            "name": row.name or row.username,
-            "badge": row.badge,
-            "image_object_name": row.image_object_name,
-            "profile_image_shape": row.profile_image_shape or "circle",
-            "public_key": row.public_key,
-        }
-        for row in rows
-    ]
+    cards = author_card_cache.get_cards(row.id for row in rows)
+    members = []
+    for row in rows:
+        card = cards.get(int(row.id))
+        if not card:
+            continue
+        members.append(
+            {
+                "id": row.id,
+                "username": card["username"],
+                "name": card["name"] or card["username"],
+                "badge": card["badge"],
+                "image_object_name": card["image_object_name"],
+                "profile_image_shape": card["profile_image_shape"],
+                "public_key": row.public_key,
+            }
+        )
+    return members
 
 
 def get_group_member_usernames(group_id: int) -> list[str]:
+    snapshot = get_membership_snapshot(group_id)
+    return list(snapshot.usernames) if snapshot else []
+
+
+def get_group_ids_for_user(user_id: int) -> list[int]:
+    rows = (
+        db.session.query(GroupMember.group_id)
+        .filter(GroupMember.user_id == user_id)
+        .all()
+    )
+    return [int(row[0]) for row in rows]
+
+
+def get_co_member_usernames(user_id: int) -> list[str]:
+    own_membership = aliased(GroupMember)
     rows = (
         db.session.query(User.username)
         .join(GroupMember, GroupMember.user_id == User.id)
-        .filter(GroupMember.group_id == group_id)
+        .join(own_membership, own_membership.group_id == GroupMember.group_id)
+        .filter(
+            own_membership.user_id == user_id,
+            GroupMember.user_id != user_id,
+        )
+        .distinct()
         .all()
     )
     return [row[0] for row in rows]
@@ -4,7 +4,7 @@ from fnmatch import fnmatch
 from datetime import datetime, timezone
 
 from flask import has_app_context
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, case, func, or_
 from sqlalchemy.exc import IntegrityError
 
 from app.db import db
@@ -27,6 +27,11 @@ MESSAGE_DELIVERED_TTL_SECONDS = 7 * 24 * 60 * 60
 MESSAGE_SEEN_TTL_SECONDS = 7 * 24 * 60 * 60
 MESSAGE_DELETED_TTL_SECONDS = 7 * 24 * 60 * 60
 MAX_GROUP_KEY_REF_LENGTH = 128
+# Reverse indexes read by account purges (sender -> inboxes holding their
+# messages). Refreshed on every write; older pending messages are found
+# through the database rows.
+PURGE_INDEX_TTL_SECONDS = 30 * 24 * 60 * 60
+PURGE_BATCH_SIZE = 200
 
 
 def _db_available():
@@ -559,10 +564,8 @@ def get_group_message_by_client_message_id(sender, group_id, client_message_id):
     return _group_message_to_payload(row)
 
 ACK_MESSAGES_LUA = """
-local list_key = KEYS[1]
-local order_key = KEYS[2]
-local payload_key = KEYS[3]
-local ids_key = KEYS[4]
+local order_key = KEYS[1]
+local payload_key = KEYS[2]
 local removed = {}
 
 for i = 1, #ARGV do
@@ -570,9 +573,7 @@ for i = 1, #ARGV do
     local raw = redis.call('HGET', payload_key, message_id)
     if raw then
         local zremoved = redis.call('ZREM', order_key, message_id)
-        redis.call('SREM', ids_key, message_id)
         redis.call('HDEL', payload_key, message_id)
-        redis.call('LREM', list_key, 1, raw)
         if zremoved > 0 then
             table.insert(removed, message_id)
             table.insert(removed, raw)
@@ -583,9 +584,59 @@ end
 return removed
 """
 
-def _inbox_key(username):
-    return f"inbox:{username}"
+# KEYS[1] is the shared payload and KEYS[2] its reference count; then order,
+# payload, unread count and last message keys per recipient. ARGV: shared
+# payload, message id, score, ttl, group id, sender, type, timestamp, then one
+# key record per recipient.
+GROUP_FANOUT_LUA = """
+local ttl = tonumber(ARGV[4])
+local message_id = ARGV[2]
+local score = ARGV[3]
+local group_id = ARGV[5]
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ttl)
+redis.call('INCRBY', KEYS[2], (#KEYS - 2) / 4)
+redis.call('EXPIRE', KEYS[2], ttl)
+
+local written = 0
+for i = 3, #KEYS, 4 do
+    written = written + 1
+    local order_key = KEYS[i]
+    local payload_key = KEYS[i + 1]
+    local unread_key = KEYS[i + 2]
+    local last_key = KEYS[i + 3]
+    redis.call('HSET', payload_key, message_id, ARGV[8 + written])
+    redis.call('ZADD', order_key, score, message_id)
+    redis.call('EXPIRE', order_key, ttl)
+    redis.call('EXPIRE', payload_key, ttl)
+    redis.call('HINCRBY', unread_key, group_id, 1)
+    redis.call('EXPIRE', unread_key, ttl)
+    redis.call(
+        'HSET', last_key,
+        'sender', ARGV[6], 'type', ARGV[7], 'timestamp', ARGV[8], 'message_id', message_id
+    )
+    redis.call('EXPIRE', last_key, ttl)
+end
 
+return written
+"""
+GROUP_FANOUT_BATCH_SIZE = 500
+
+# Pairs of (shared payload, reference count) keys in KEYS, the number of
+# acked records of each in ARGV. The payload goes with its last reference;
+# payloads without a count (fanned out before counting) are left to their TTL.
+RELEASE_GROUP_PAYLOADS_LUA = """
+local released = 0
+for i = 1, #KEYS, 2 do
+    if redis.call('EXISTS', KEYS[i + 1]) == 1 then
+        local left = redis.call('DECRBY', KEYS[i + 1], ARGV[(i + 1) / 2])
+        if left <= 0 then
+            redis.call('DEL', KEYS[i], KEYS[i + 1])
+            released = released + 1
+        end
+    end
+end
+return released
+"""
 
 def _inbox_index_order_key(username):
     return f"inbox_order:{username}"
@@ -595,14 +646,6 @@ def _inbox_index_payload_key(username):
     return f"inbox_payloads:{username}"
 
 
-def _inbox_index_ids_key(username):
-    return f"inbox_ids:{username}"
-
-
-def _group_inbox_key(username, group_id):
-    return f"group_user_inbox:{username}:{group_id}"
-
-
 def _group_inbox_index_order_key(username, group_id):
     return f"group_inbox_order:{username}:{group_id}"
 
@@ -611,8 +654,41 @@ def _group_inbox_index_payload_key(username, group_id):
     return f"group_inbox_payloads:{username}:{group_id}"
 
 
-def _group_inbox_index_ids_key(username, group_id):
-    return f"group_inbox_ids:{username}:{group_id}"
+GROUP_SHARED_PAYLOAD_PREFIX = "group_message_payload:"
+# Recipients whose key record still points at the shared payload.
+GROUP_SHARED_PAYLOAD_REFS_PREFIX = "group_message_refs:"
+
+
+def _group_shared_payload_key(group_id, message_id):
+    return f"{GROUP_SHARED_PAYLOAD_PREFIX}{group_id}:{message_id}"
+
+
+def _group_shared_payload_refs_key(shared_payload_key):
+    return GROUP_SHARED_PAYLOAD_REFS_PREFIX + shared_payload_key[len(GROUP_SHARED_PAYLOAD_PREFIX):]
+
+
+def _sender_inboxes_key(sender):
+    return f"sender_inboxes:{sender}"
+
+
+def _sender_group_inboxes_key(sender):
+    return f"sender_group_inboxes:{sender}"
+
+
+def _contact_owners_key(contact):
+    return f"contact_owners:{contact}"
+
+
+def _group_inbox_member(username, group_id):
+    return f"{username}:{int(group_id)}"
+
+
+def _parse_group_inbox_member(member):
+    username, _, group_id = _decode_redis_text(member).rpartition(":")
+    try:
+        return (username, int(group_id)) if username else None
+    except ValueError:
+        return None
 
 
 def _chat_unread_count_key(username):
@@ -623,6 +699,14 @@ def _chat_last_key(username, contact):
     return f"chat:last:{username}:{contact}"
 
 
+def _group_unread_count_key(username):
+    return f"group_chat:unread_count:{username}"
+
+
+def _group_unread_last_key(username, group_id):
+    return f"group_chat:last:{username}:{group_id}"
+
+
 def _decode_raw_message(raw):
     if raw is None:
         return None
@@ -646,82 +730,23 @@ def _timestamp_score(iso_timestamp):
     return datetime.now(timezone.utc).timestamp()
 
 
-def _refresh_index_ttls(order_key, payload_key, ids_key, ttl_seconds):
+def _refresh_index_ttls(order_key, payload_key, ttl_seconds):
     pipe = redis_client.pipeline()
     pipe.expire(order_key, ttl_seconds)
     pipe.expire(payload_key, ttl_seconds)
-    pipe.expire(ids_key, ttl_seconds)
-    pipe.execute()
-
-
-def _hydrate_inbox_index_if_needed(
-    list_key,
-    order_key,
-    payload_key,
-    ids_key,
-    ttl_seconds,
-):
-    has_index = redis_client.zcard(order_key) > 0 or redis_client.hlen(payload_key) > 0
-    if has_index:
-        return
-
-    if redis_client.llen(list_key) == 0:
-        return
-
-    raw_messages = redis_client.lrange(list_key, 0, -1)
-    if not raw_messages:
-        return
-
-    pipe = redis_client.pipeline()
-    indexed = 0
-    for raw in raw_messages:
-        message = _decode_raw_message(raw)
-        if not message:
-            continue
-        message_id = message.get("message_id")
-        if not message_id:
-            continue
-        score = _timestamp_score(message.get("timestamp"))
-        if isinstance(raw, bytes):
-            raw = raw.decode("utf-8")
-        pipe.hset(payload_key, message_id, raw)
-        pipe.sadd(ids_key, message_id)
-        pipe.zadd(order_key, {message_id: score})
-        indexed += 1
-
-    if indexed > 0:
-        pipe.expire(order_key, ttl_seconds)
-        pipe.expire(payload_key, ttl_seconds)
-        pipe.expire(ids_key, ttl_seconds)
     pipe.execute()
 
 
 def _ordered_messages_from_index(
     *,
-    list_key,
     order_key,
     payload_key,
-    ids_key,
-    ttl_seconds,
     start,
     end,
 ):
-    _hydrate_inbox_index_if_needed(
-        list_key=list_key,
-        order_key=order_key,
-        payload_key=payload_key,
-        ids_key=ids_key,
-        ttl_seconds=ttl_seconds,
-    )
-
     message_ids = redis_client.zrange(order_key, start, end)
     if not message_ids:
-        raw_messages = redis_client.lrange(list_key, start, end)
-        return [
-            message
-            for message in (_decode_raw_message(raw) for raw in raw_messages)
-            if message is not None
-        ]
+        return []
 
     raw_values = redis_client.hmget(payload_key, message_ids)
     decoded = []
@@ -733,63 +758,138 @@ def _ordered_messages_from_index(
             continue
         decoded.append(message)
 
+    decoded, expired = _expand_shared_group_payloads(decoded)
+    missing_ids.extend(expired)
     if missing_ids:
         pipe = redis_client.pipeline()
         pipe.zrem(order_key, *missing_ids)
-        pipe.srem(ids_key, *missing_ids)
+        pipe.hdel(payload_key, *missing_ids)
         pipe.execute()
 
     return decoded
 
 
-def _pending_count_from_index(
-    *,
-    list_key,
-    order_key,
-    payload_key,
-    ids_key,
-    ttl_seconds,
-):
-    _hydrate_inbox_index_if_needed(
-        list_key=list_key,
-        order_key=order_key,
-        payload_key=payload_key,
-        ids_key=ids_key,
-        ttl_seconds=ttl_seconds,
-    )
-    count = redis_client.zcard(order_key)
-    if count > 0:
-        return count
-    return redis_client.llen(list_key)
+def _is_shared_group_record(message):
+    return isinstance(message, dict) and isinstance(message.get("shared_payload_key"), str)
+
+
+def _expand_shared_group_payloads(messages):
+    """Turns group key records back into full recipient payloads.
+
+    Group fanout stores the message once under group_message_payload:* and a
+    small {"message_id", "shared_payload_key", "recipient", "encrypted_key"}
+    record per recipient. Returns the expanded messages, in order, and the ids
+    whose shared payload has expired.
+    """
+    shared_keys = list(dict.fromkeys(
+        message["shared_payload_key"]
+        for message in messages
+        if _is_shared_group_record(message)
+    ))
+    if not shared_keys:
+        return messages, []
+
+    shared_payloads = {
+        key: _decode_raw_message(raw)
+        for key, raw in zip(shared_keys, redis_client.mget(shared_keys))
+    }
+    expanded = []
+    expired_ids = []
+    for message in messages:
+        if not _is_shared_group_record(message):
+            expanded.append(message)
+            continue
+        shared_payload = shared_payloads.get(message["shared_payload_key"])
+        if shared_payload is None:
+            if message.get("message_id"):
+                expired_ids.append(message["message_id"])
+            continue
+        recipient = message.get("recipient")
+        recipient_payload = dict(shared_payload)
+        recipient_payload["encrypted_key"] = message.get("encrypted_key")
+        recipient_payload["encrypted_keys"] = {recipient: message.get("encrypted_key")}
+        expanded.append(build_group_message_payload_for_recipient(recipient_payload, recipient))
+    return expanded, expired_ids
 
 
 def _pop_all_messages(
     *,
-    list_key,
     order_key,
     payload_key,
-    ids_key,
-    ttl_seconds,
 ):
     messages = _ordered_messages_from_index(
-        list_key=list_key,
         order_key=order_key,
         payload_key=payload_key,
-        ids_key=ids_key,
-        ttl_seconds=ttl_seconds,
         start=0,
         end=-1,
     )
 
     pipe = redis_client.pipeline()
-    pipe.delete(list_key)
     pipe.delete(order_key)
     pipe.delete(payload_key)
-    pipe.delete(ids_key)
     pipe.execute()
     return messages
 
 
+def _migrate_legacy_inbox_list(list_key, order_key, payload_key, ttl_seconds):
+    # Same rule the runtime backfill used: the list only seeds an empty index.
+    indexed = 0
+    if redis_client.zcard(order_key) == 0 and redis_client.hlen(payload_key) == 0:
+        pipe = redis_client.pipeline()
+        for raw in redis_client.lrange(list_key, 0, -1) or []:
+            message = _decode_raw_message(raw)
+            message_id = (message or {}).get("message_id")
+            if not message_id:
+                continue
+            pipe.hset(payload_key, message_id, _decode_redis_text(raw))
+            pipe.zadd(order_key, {message_id: _timestamp_score(message.get("timestamp"))})
+            indexed += 1
+        if indexed:
+            pipe.expire(order_key, ttl_seconds)
+            pipe.expire(payload_key, ttl_seconds)
+        pipe.execute()
+    redis_client.delete(list_key)
+    return indexed
+
+
+def migrate_legacy_inbox_keys():
+    """Folds the old inbox lists and id sets into the order zset + payload hash.
+
+    Private inboxes used inbox:<user> (list) and inbox_ids:<user> (set), group
+    inboxes group_user_inbox:<user>:<group> and group_inbox_ids:<user>:<group>,
+    next to the index that now holds everything. Safe to re-run.
+    """
+    stats = {"lists_migrated": 0, "messages_indexed": 0, "id_sets_dropped": 0}
+
+    for list_key in _scan_keys("inbox:*"):
+        username = list_key.split(":", 1)[1]
+        stats["messages_indexed"] += _migrate_legacy_inbox_list(
+            list_key,
+            _inbox_index_order_key(username),
+            _inbox_index_payload_key(username),
+            INBOX_TTL_SECONDS,
+        )
+        stats["lists_migrated"] += 1
+
+    for list_key in _scan_keys("group_user_inbox:*:*"):
+        parts = list_key.split(":")
+        if len(parts) != 3:
+            continue
+        stats["messages_indexed"] += _migrate_legacy_inbox_list(
+            list_key,
+            _group_inbox_index_order_key(parts[1], parts[2]),
+            _group_inbox_index_payload_key(parts[1], parts[2]),
+            GROUP_INBOX_TTL_SECONDS,
+        )
+        stats["lists_migrated"] += 1
+
+    for ids_key in [*_scan_keys("inbox_ids:*"), *_scan_keys("group_inbox_ids:*:*")]:
+        redis_client.delete(ids_key)
+        stats["id_sets_dropped"] += 1
+
+    return stats
+
+
 def _normalize_message_ids(message_ids):
     normalized_ids = []
     seen = set()
@@ -811,10 +911,8 @@ def _decode_redis_text(value):
 
 def _ack_messages_from_index_python(
     *,
-    list_key,
     order_key,
     payload_key,
-    ids_key,
     normalized_ids,
 ):
     raw_values = redis_client.hmget(payload_key, normalized_ids)
@@ -825,9 +923,7 @@ def _ack_messages_from_index_python(
             continue
         indexed_ids.append((message_id, raw))
         pipe.zrem(order_key, message_id)
-        pipe.srem(ids_key, message_id)
         pipe.hdel(payload_key, message_id)
-        pipe.lrem(list_key, 1, raw)
 
     if not indexed_ids:
         return 0, []
@@ -838,7 +934,7 @@ def _ack_messages_from_index_python(
     result_index = 0
     for _message_id, raw in indexed_ids:
         removed = int(results[result_index] or 0)
-        result_index += 4
+        result_index += 2
         if removed > 0:
             removed_total += removed
             message = _decode_raw_message(raw)
@@ -850,10 +946,8 @@ def _ack_messages_from_index_python(
 
 def _ack_messages_from_index_lua(
     *,
-    list_key,
     order_key,
     payload_key,
-    ids_key,
     normalized_ids,
 ):
     eval_fn = getattr(redis_client, "eval", None)
@@ -863,11 +957,9 @@ def _ack_messages_from_index_lua(
     try:
         raw_result = eval_fn(
             ACK_MESSAGES_LUA,
-            4,
-            list_key,
+            2,
             order_key,
             payload_key,
-            ids_key,
             *normalized_ids,
         )
     except Exception:
@@ -891,59 +983,85 @@ def _ack_messages_from_index_lua(
 
 def _ack_messages_from_index(
     *,
-    list_key,
     order_key,
     payload_key,
-    ids_key,
     ttl_seconds,
     message_ids,
 ):
-    _hydrate_inbox_index_if_needed(
-        list_key=list_key,
-        order_key=order_key,
-        payload_key=payload_key,
-        ids_key=ids_key,
-        ttl_seconds=ttl_seconds,
-    )
-
     normalized_ids = _normalize_message_ids(message_ids)
 
     if not normalized_ids:
         return 0, []
 
     acked = _ack_messages_from_index_lua(
-        list_key=list_key,
         order_key=order_key,
         payload_key=payload_key,
-        ids_key=ids_key,
         normalized_ids=normalized_ids,
     )
     if acked is None:
         acked = _ack_messages_from_index_python(
-            list_key=list_key,
             order_key=order_key,
             payload_key=payload_key,
-            ids_key=ids_key,
             normalized_ids=normalized_ids,
         )
     removed_total, removed_payloads = acked
+    removed_payloads, _expired_ids = _expand_shared_group_payloads(removed_payloads)
+    _release_shared_group_payloads(acked[1])
 
     remaining = redis_client.zcard(order_key)
     if remaining > 0:
-        _refresh_index_ttls(order_key, payload_key, ids_key, ttl_seconds)
-        redis_client.expire(list_key, ttl_seconds)
+        _refresh_index_ttls(order_key, payload_key, ttl_seconds)
     else:
         pipe = redis_client.pipeline()
         pipe.delete(order_key)
         pipe.delete(payload_key)
-        pipe.delete(ids_key)
-        if redis_client.llen(list_key) == 0:
-            pipe.delete(list_key)
         pipe.execute()
 
     return removed_total, removed_payloads
 
 
+def _release_shared_group_payloads(records):
+    """Drops one reference per acked group key record; the last one deletes the shared payload."""
+    counts = {}
+    for record in records:
+        if _is_shared_group_record(record):
+            key = record["shared_payload_key"]
+            counts[key] = counts.get(key, 0) + 1
+    if not counts:
+        return 0
+
+    keys = []
+    for shared_payload_key in counts:
+        keys.extend((shared_payload_key, _group_shared_payload_refs_key(shared_payload_key)))
+    eval_fn = getattr(redis_client, "eval", None)
+    if eval_fn is not None:
+        try:
+            return int(eval_fn(RELEASE_GROUP_PAYLOADS_LUA, len(keys), *keys, *counts.values()) or 0)
+        except Exception:
+            pass
+
+    pipe = redis_client.pipeline()
+    for shared_payload_key in counts:
+        pipe.exists(_group_shared_payload_refs_key(shared_payload_key))
+    counted = [key for key, exists in zip(counts, pipe.execute()) if exists]
+    if not counted:
+        return 0
+    pipe = redis_client.pipeline()
+    for shared_payload_key in counted:
+        pipe.decrby(_group_shared_payload_refs_key(shared_payload_key), counts[shared_payload_key])
+    released = [
+        shared_payload_key
+        for shared_payload_key, left in zip(counted, pipe.execute())
+        if int(left) <= 0
+    ]
+    if released:
+        redis_client.delete(
+            *released,
+            *(_group_shared_payload_refs_key(shared_payload_key) for shared_payload_key in released),
+        )
+    return len(released)
+
+
 def _increment_unread_metadata(recipient, payload, pipe=None):
     sender = (payload or {}).get("from")
     message_id = (payload or {}).get("message_id")
@@ -998,7 +1116,10 @@ def _decrement_unread_metadata(username, removed_payloads):
 
 
 def add_contact(username, contact):
-    redis_client.sadd(f"contacts:{username}", contact)
+    pipe = redis_client.pipeline()
+    pipe.sadd(f"contacts:{username}", contact)
+    pipe.sadd(_contact_owners_key(contact), username)
+    pipe.execute()
 
 
 def get_contacts(username):
@@ -1033,6 +1154,9 @@ def build_message_payload(sender, encrypted_message, encrypted_key, attachment=N
 
 
 def push_message_payload(recipient, payload):
+    if not (payload or {}).get("message_id"):
+        # Nothing could be stored or acked later; never report it as delivered.
+        raise ValueError("message payload requires a message_id")
     sender = (payload or {}).get("from")
     client_message_id = (payload or {}).get("client_message_id")
 
@@ -1062,25 +1186,19 @@ def push_message_payload(recipient, payload):
     recipient_payload.pop("sender_encrypted_message", None)
     recipient_payload.pop("sender_encrypted_key", None)
 
-    key = _inbox_key(recipient)
+    message_id = recipient_payload["message_id"]
     order_key = _inbox_index_order_key(recipient)
     payload_key = _inbox_index_payload_key(recipient)
-    ids_key = _inbox_index_ids_key(recipient)
-
-    data = json.dumps(recipient_payload)
-    message_id = recipient_payload.get("message_id")
     score = _timestamp_score(recipient_payload.get("timestamp"))
 
     pipe = redis_client.pipeline()
-    pipe.rpush(key, data)
-    pipe.expire(key, INBOX_TTL_SECONDS)
-    if message_id:
-        pipe.hset(payload_key, message_id, data)
-        pipe.sadd(ids_key, message_id)
-        pipe.zadd(order_key, {message_id: score})
-        pipe.expire(payload_key, INBOX_TTL_SECONDS)
-        pipe.expire(ids_key, INBOX_TTL_SECONDS)
-        pipe.expire(order_key, INBOX_TTL_SECONDS)
+    if sender:
+        pipe.sadd(_sender_inboxes_key(sender), recipient)
+        pipe.expire(_sender_inboxes_key(sender), PURGE_INDEX_TTL_SECONDS)
+    pipe.hset(payload_key, message_id, json.dumps(recipient_payload))
+    pipe.zadd(order_key, {message_id: score})
+    pipe.expire(payload_key, INBOX_TTL_SECONDS)
+    pipe.expire(order_key, INBOX_TTL_SECONDS)
     _increment_unread_metadata(recipient, recipient_payload, pipe=pipe)
     pipe.execute()
     return payload, True
@@ -1102,11 +1220,8 @@ def _hydrate_private_pending_from_redis(username):
         return
 
     redis_pending = _ordered_messages_from_index(
-        list_key=_inbox_key(username),
         order_key=_inbox_index_order_key(username),
         payload_key=_inbox_index_payload_key(username),
-        ids_key=_inbox_index_ids_key(username),
-        ttl_seconds=INBOX_TTL_SECONDS,
         start=0,
         end=-1,
     )
@@ -1140,11 +1255,8 @@ def _query_private_pending_rows(username, limit=None):
 def pop_messages(username):
     if not _db_available():
         messages = _pop_all_messages(
-            list_key=_inbox_key(username),
             order_key=_inbox_index_order_key(username),
             payload_key=_inbox_index_payload_key(username),
-            ids_key=_inbox_index_ids_key(username),
-            ttl_seconds=INBOX_TTL_SECONDS,
         )
         _decrement_unread_metadata(username, messages)
         return messages
@@ -1163,10 +1275,8 @@ def pop_messages(username):
     removed_ids = [row.message_id for row in rows if row.message_id]
     if removed_ids:
         _ack_messages_from_index(
-            list_key=_inbox_key(username),
             order_key=_inbox_index_order_key(username),
             payload_key=_inbox_index_payload_key(username),
-            ids_key=_inbox_index_ids_key(username),
             ttl_seconds=INBOX_TTL_SECONDS,
             message_ids=removed_ids,
         )
@@ -1177,11 +1287,8 @@ def pop_messages(username):
 def peek_messages(username):
     if not _db_available():
         return _ordered_messages_from_index(
-            list_key=_inbox_key(username),
             order_key=_inbox_index_order_key(username),
             payload_key=_inbox_index_payload_key(username),
-            ids_key=_inbox_index_ids_key(username),
-            ttl_seconds=INBOX_TTL_SECONDS,
             start=0,
             end=-1,
         )
@@ -1193,11 +1300,8 @@ def peek_messages_batch(username, limit=100):
     safe_limit = max(1, int(limit or 1))
     if not _db_available():
         return _ordered_messages_from_index(
-            list_key=_inbox_key(username),
             order_key=_inbox_index_order_key(username),
             payload_key=_inbox_index_payload_key(username),
-            ids_key=_inbox_index_ids_key(username),
-            ttl_seconds=INBOX_TTL_SECONDS,
             start=0,
             end=safe_limit - 1,
         )
@@ -1208,13 +1312,7 @@ def peek_messages_batch(username, limit=100):
 
 def get_pending_count(username):
     if not _db_available():
-        return _pending_count_from_index(
-            list_key=_inbox_key(username),
-            order_key=_inbox_index_order_key(username),
-            payload_key=_inbox_index_payload_key(username),
-            ids_key=_inbox_index_ids_key(username),
-            ttl_seconds=INBOX_TTL_SECONDS,
-        )
+        return redis_client.zcard(_inbox_index_order_key(username))
 
     _hydrate_private_pending_from_redis(username)
 
@@ -1333,10 +1431,8 @@ def ack_transient_messages(username, message_ids):
     if not message_ids:
         return 0
     removed, removed_payloads = _ack_messages_from_index(
-        list_key=_inbox_key(username),
         order_key=_inbox_index_order_key(username),
         payload_key=_inbox_index_payload_key(username),
-        ids_key=_inbox_index_ids_key(username),
         ttl_seconds=INBOX_TTL_SECONDS,
         message_ids=message_ids,
     )
@@ -1350,10 +1446,8 @@ def ack_messages_with_payloads(username, message_ids):
 
     if not _db_available():
         removed, removed_payloads = _ack_messages_from_index(
-            list_key=_inbox_key(username),
             order_key=_inbox_index_order_key(username),
             payload_key=_inbox_index_payload_key(username),
-            ids_key=_inbox_index_ids_key(username),
             ttl_seconds=INBOX_TTL_SECONDS,
             message_ids=message_ids,
         )
@@ -1391,10 +1485,8 @@ def ack_messages_with_payloads(username, message_ids):
 
     # Best-effort transient queue cleanup.
     _ack_messages_from_index(
-        list_key=_inbox_key(username),
         order_key=_inbox_index_order_key(username),
         payload_key=_inbox_index_payload_key(username),
-        ids_key=_inbox_index_ids_key(username),
         ttl_seconds=INBOX_TTL_SECONDS,
         message_ids=normalized_ids,
     )
@@ -1464,10 +1556,8 @@ def sync_private_chat_read_state(recipient, sender):
     db.session.commit()
 
     _ack_messages_from_index(
-        list_key=_inbox_key(recipient),
         order_key=_inbox_index_order_key(recipient),
         payload_key=_inbox_index_payload_key(recipient),
-        ids_key=_inbox_index_ids_key(recipient),
         ttl_seconds=INBOX_TTL_SECONDS,
         message_ids=message_ids,
     )
@@ -1884,6 +1974,7 @@ def mark_group_messages_seen_with_payloads(username, group_id, message_ids):
         synchronize_session=False,
     )
     db.session.commit()
+    _decrement_group_unread_metadata(username, group_id, len(delivered_now_ids))
 
     message_rows = (
         db.session.query(
@@ -2391,6 +2482,16 @@ def get_contacts_sorted_by_last_message(username, offset=0, count=20):
     )
 
 
+def get_conversation_partner_usernames(username, limit=1000):
+    raw_members = redis_client.zrevrange(f"contact_ts:{username}", 0, max(int(limit), 1) - 1)
+    partners = []
+    for raw_member in raw_members or []:
+        member = _decode_redis_text(raw_member)
+        if isinstance(member, str) and member.strip():
+            partners.append(member.strip())
+    return partners
+
+
 def get_contact_timestamp_score(username, contact):
     return redis_client.zscore(f"contact_ts:{username}", contact)
 
@@ -2425,6 +2526,10 @@ def count_contacts_with_timestamps(username):
 
 
 GROUP_INBOX_TTL_SECONDS = 24 * 60 * 60
+# Counters are rebuilt from group_message_recipients when this field is missing
+# (first read, expired key) or older than the interval, to bound drift.
+GROUP_UNREAD_RECONCILED_FIELD = "_reconciled_at"
+GROUP_UNREAD_RECONCILE_SECONDS = 15 * 60
 
 
 def build_group_message_payload(
@@ -2520,6 +2625,9 @@ def _persist_group_message_recipients(group_id, payload, recipients, recipient_k
 
 
 def push_group_messages_to_members(group_id, recipients, payload):
+    message_id = (payload or {}).get("message_id")
+    if not message_id:
+        raise ValueError("group message payload requires a message_id")
     if not recipients:
         return 0
 
@@ -2552,38 +2660,95 @@ def push_group_messages_to_members(group_id, recipients, payload):
         recipient_keys=recipient_keys,
     )
 
-    message_id = (payload or {}).get("message_id")
+    shared_payload_key = _group_shared_payload_key(group_id, message_id)
+    shared_payload = dict(payload or {})
+    for field in ("encrypted_key", "encrypted_keys", "recipient_key_records"):
+        shared_payload.pop(field, None)
+    shared_data = json.dumps(shared_payload)
     score = _timestamp_score((payload or {}).get("timestamp"))
-    pipe = redis_client.pipeline()
+    last_message = {
+        "sender": (payload or {}).get("from") or "",
+        "type": (payload or {}).get("type") or "text",
+        "timestamp": (payload or {}).get("timestamp") or "",
+        "message_id": message_id,
+    }
 
-    for username in recipients_with_keys:
-        key = _group_inbox_key(username, group_id)
-        order_key = _group_inbox_index_order_key(username, group_id)
-        payload_key = _group_inbox_index_payload_key(username, group_id)
-        ids_key = _group_inbox_index_ids_key(username, group_id)
-        recipient_payload = dict(payload or {})
-        recipient_key = recipient_keys.get(username)
-        if recipient_key:
-            recipient_payload["encrypted_key"] = recipient_key
-            recipient_payload["encrypted_keys"] = {username: recipient_key}
-        data = json.dumps(
-            build_group_message_payload_for_recipient(recipient_payload, username)
-        )
-
-        pipe.rpush(key, data)
-        pipe.expire(key, GROUP_INBOX_TTL_SECONDS)
-        if message_id:
-            pipe.hset(payload_key, message_id, data)
-            pipe.sadd(ids_key, message_id)
-            pipe.zadd(order_key, {message_id: score})
-            pipe.expire(payload_key, GROUP_INBOX_TTL_SECONDS)
-            pipe.expire(ids_key, GROUP_INBOX_TTL_SECONDS)
-            pipe.expire(order_key, GROUP_INBOX_TTL_SECONDS)
+    if last_message["sender"]:
+        # Indexed before the inboxes are written, so a purge never misses one.
+        index_key = _sender_group_inboxes_key(last_message["sender"])
+        pipe = redis_client.pipeline()
+        pipe.sadd(index_key, *(_group_inbox_member(username, group_id) for username in recipients_with_keys))
+        pipe.expire(index_key, PURGE_INDEX_TTL_SECONDS)
+        pipe.execute()
+
+    for offset in range(0, len(recipients_with_keys), GROUP_FANOUT_BATCH_SIZE):
+        batch = recipients_with_keys[offset:offset + GROUP_FANOUT_BATCH_SIZE]
+        keys = [shared_payload_key, _group_shared_payload_refs_key(shared_payload_key)]
+        records = []
+        for username in batch:
+            keys.extend((
+                _group_inbox_index_order_key(username, group_id),
+                _group_inbox_index_payload_key(username, group_id),
+                _group_unread_count_key(username),
+                _group_unread_last_key(username, group_id),
+            ))
+            records.append(json.dumps({
+                "message_id": message_id,
+                "shared_payload_key": shared_payload_key,
+                "recipient": username,
+                "encrypted_key": recipient_keys.get(username),
+            }))
+        fanout_args = (keys, group_id, shared_data, score, last_message, records)
+        if not _fanout_group_records_lua(*fanout_args):
+            _fanout_group_records_python(*fanout_args)
 
-    pipe.execute()
     return len(recipients_with_keys)
 
 
+def _fanout_group_records_lua(keys, group_id, shared_data, score, last_message, records):
+    eval_fn = getattr(redis_client, "eval", None)
+    if eval_fn is None:
+        return False
+
+    try:
+        eval_fn(
+            GROUP_FANOUT_LUA,
+            len(keys),
+            *keys,
+            shared_data,
+            last_message["message_id"],
+            score,
+            GROUP_INBOX_TTL_SECONDS,
+            str(group_id),
+            last_message["sender"],
+            last_message["type"],
+            last_message["timestamp"],
+            *records,
+        )
+    except Exception:
+        return False
+    return True
+
+
+def _fanout_group_records_python(keys, group_id, shared_data, score, last_message, records):
+    message_id = last_message["message_id"]
+    pipe = redis_client.pipeline()
+    pipe.set(keys[0], shared_data, ex=GROUP_INBOX_TTL_SECONDS)
+    pipe.incrby(keys[1], len(records))
+    pipe.expire(keys[1], GROUP_INBOX_TTL_SECONDS)
+    for index, record in enumerate(records):
+        order_key, payload_key, unread_key, last_key = keys[2 + index * 4:6 + index * 4]
+        pipe.hset(payload_key, message_id, record)
+        pipe.zadd(order_key, {message_id: score})
+        pipe.expire(order_key, GROUP_INBOX_TTL_SECONDS)
+        pipe.expire(payload_key, GROUP_INBOX_TTL_SECONDS)
+        pipe.hincrby(unread_key, str(group_id), 1)
+        pipe.expire(unread_key, GROUP_INBOX_TTL_SECONDS)
+        pipe.hset(last_key, mapping=last_message)
+        pipe.expire(last_key, GROUP_INBOX_TTL_SECONDS)
+    pipe.execute()
+
+
 def build_group_message_payloads_for_recipients(payload, recipients):
     normalized_recipients = list(
         dict.fromkeys(
@@ -2631,11 +2796,8 @@ def _hydrate_group_pending_from_redis(username, group_id):
         return
 
     redis_pending = _ordered_messages_from_index(
-        list_key=_group_inbox_key(username, group_id),
         order_key=_group_inbox_index_order_key(username, group_id),
         payload_key=_group_inbox_index_payload_key(username, group_id),
-        ids_key=_group_inbox_index_ids_key(username, group_id),
-        ttl_seconds=GROUP_INBOX_TTL_SECONDS,
         start=0,
         end=-1,
     )
@@ -2695,11 +2857,8 @@ def _query_group_pending_rows(username, group_id, limit=None):
 def peek_group_messages_for_user(username, group_id):
     if not _db_available():
         return _ordered_messages_from_index(
-            list_key=_group_inbox_key(username, group_id),
             order_key=_group_inbox_index_order_key(username, group_id),
             payload_key=_group_inbox_index_payload_key(username, group_id),
-            ids_key=_group_inbox_index_ids_key(username, group_id),
-            ttl_seconds=GROUP_INBOX_TTL_SECONDS,
             start=0,
             end=-1,
         )
@@ -2718,11 +2877,8 @@ def peek_group_messages_batch_for_user(username, group_id, limit=100):
     safe_limit = max(1, int(limit or 1))
     if not _db_available():
         return _ordered_messages_from_index(
-            list_key=_group_inbox_key(username, group_id),
             order_key=_group_inbox_index_order_key(username, group_id),
             payload_key=_group_inbox_index_payload_key(username, group_id),
-            ids_key=_group_inbox_index_ids_key(username, group_id),
-            ttl_seconds=GROUP_INBOX_TTL_SECONDS,
             start=0,
             end=safe_limit - 1,
         )
@@ -2743,13 +2899,7 @@ def peek_group_messages_batch_for_user(username, group_id, limit=100):
 
 def get_group_pending_count(username, group_id):
     if not _db_available():
-        return _pending_count_from_index(
-            list_key=_group_inbox_key(username, group_id),
-            order_key=_group_inbox_index_order_key(username, group_id),
-            payload_key=_group_inbox_index_payload_key(username, group_id),
-            ids_key=_group_inbox_index_ids_key(username, group_id),
-            ttl_seconds=GROUP_INBOX_TTL_SECONDS,
-        )
+        return redis_client.zcard(_group_inbox_index_order_key(username, group_id))
 
     _hydrate_group_pending_from_redis(username, group_id)
 
@@ -2769,6 +2919,325 @@ def get_group_pending_count(username, group_id):
     )
 
 
+def _normalize_group_ids(group_ids):
+    normalized = []
+    for group_id in group_ids or []:
+        try:
+            normalized.append(int(group_id))
+        except (TypeError, ValueError):
+            continue
+    return list(dict.fromkeys(normalized))
+
+
+def _group_redis_pending_counts(username, group_ids):
+    if not group_ids:
+        return {}
+    pipe = redis_client.pipeline()
+    for group_id in group_ids:
+        pipe.zcard(_group_inbox_index_order_key(username, group_id))
+    results = pipe.execute()
+    return {
+        group_id: int(count or 0)
+        for group_id, count in zip(group_ids, results)
+    }
+
+
+def _group_db_pending_counts(username, group_ids):
+    rows = (
+        db.session.query(
+            GroupMessageRecipient.group_id,
+            func.count(GroupMessageRecipient.id),
+            func.sum(case((GroupMessage.deleted_for_everyone.is_(False), 1), else_=0)),
+        )
+        .join(
+            GroupMessage,
+            GroupMessage.message_id == GroupMessageRecipient.message_id,
+        )
+        .filter(
+            GroupMessageRecipient.recipient_username == username,
+            GroupMessageRecipient.group_id.in_(group_ids),
+            GroupMessageRecipient.delivered_at.is_(None),
+        )
+        .group_by(GroupMessageRecipient.group_id)
+        .all()
+    )
+    return {
+        int(group_id): (int(total or 0), int(visible or 0))
+        for group_id, total, visible in rows
+    }
+
+
+def get_group_pending_counts_for_user(username, group_ids):
+    # One grouped query (or one Redis pipeline without a database) instead of
+    # a count per group. Groups whose recipient rows are missing are probed in
+    # a single pipeline and only the ones with Redis-only backlog are hydrated.
+    normalized_ids = _normalize_group_ids(group_ids)
+    if not normalized_ids:
+        return {}
+
+    if not _db_available():
+        return _group_redis_pending_counts(username, normalized_ids)
+
+    db_counts = _group_db_pending_counts(username, normalized_ids)
+    unhydrated_ids = [
+        group_id for group_id in normalized_ids if db_counts.get(group_id, (0, 0))[0] == 0
+    ]
+    redis_counts = _group_redis_pending_counts(username, unhydrated_ids)
+    hydrate_ids = [group_id for group_id, count in redis_counts.items() if count > 0]
+    if hydrate_ids:
+        for group_id in hydrate_ids:
+            _hydrate_group_pending_from_redis(username, group_id)
+        db_counts.update(_group_db_pending_counts(username, hydrate_ids))
+
+    return {
+        group_id: db_counts.get(group_id, (0, 0))[1]
+        for group_id in normalized_ids
+    }
+
+
+def _empty_group_unread_summary(group_id):
+    return {
+        "group_id": group_id,
+        "count": 0,
+        "last_type": "text",
+        "last_timestamp": "",
+        "last_sender": "",
+        "message_id": "",
+    }
+
+
+def _group_db_unread_summaries(username, group_ids):
+    position = (
+        func.row_number()
+        .over(
+            partition_by=GroupMessageRecipient.group_id,
+            order_by=(GroupMessage.timestamp.desc(), GroupMessage.id.desc()),
+        )
+        .label("position")
+    )
+    pending = func.count(GroupMessageRecipient.id).over(
+        partition_by=GroupMessageRecipient.group_id,
+    ).label("pending")
+    ranked = (
+        db.session.query(
+            GroupMessageRecipient.group_id.label("group_id"),
+            GroupMessage.message_id.label("message_id"),
+            GroupMessage.sender_username.label("sender"),
+            GroupMessage.message_type.label("message_type"),
+            GroupMessage.timestamp.label("timestamp"),
+            position,
+            pending,
+        )
+        .join(
+            GroupMessage,
+            GroupMessage.message_id == GroupMessageRecipient.message_id,
+        )
+        .filter(
+            GroupMessageRecipient.recipient_username == username,
+            GroupMessageRecipient.group_id.in_(group_ids),
+            GroupMessageRecipient.delivered_at.is_(None),
+            GroupMessage.deleted_for_everyone.is_(False),
+        )
+        .subquery()
+    )
+    rows = db.session.query(ranked).filter(ranked.c.position == 1).all()
+
+    summaries = {}
+    for row in rows:
+        group_id = int(row.group_id)
+        summaries[group_id] = {
+            "group_id": group_id,
+            "count": int(row.pending or 0),
+            "last_type": row.message_type or "text",
+            "last_timestamp": _format_iso_datetime(row.timestamp),
+            "last_sender": row.sender or "",
+            "message_id": row.message_id or "",
+        }
+    return summaries
+
+
+def reconcile_group_unread_counters(username, group_ids):
+    """Rewrites the group unread counters of one user from the database."""
+    normalized_ids = _normalize_group_ids(group_ids)
+    if not normalized_ids or not _db_available():
+        return {}
+
+    summaries = _group_db_unread_summaries(username, normalized_ids)
+    unread_key = _group_unread_count_key(username)
+    counts = {str(group_id): summary["count"] for group_id, summary in summaries.items()}
+    counts[GROUP_UNREAD_RECONCILED_FIELD] = int(datetime.now(timezone.utc).timestamp())
+    try:
+        pipe = redis_client.pipeline()
+        pipe.delete(unread_key)
+        pipe.hset(unread_key, mapping=counts)
+        pipe.expire(unread_key, GROUP_INBOX_TTL_SECONDS)
+        for group_id in normalized_ids:
+            last_key = _group_unread_last_key(username, group_id)
+            pipe.delete(last_key)
+            summary = summaries.get(group_id)
+            if summary is None:
+                continue
+            pipe.hset(last_key, mapping={
+                "sender": summary["last_sender"],
+                "type": summary["last_type"],
+                "timestamp": summary["last_timestamp"],
+                "message_id": summary["message_id"],
+            })
+            pipe.expire(last_key, GROUP_INBOX_TTL_SECONDS)
+        pipe.execute()
+    except Exception:
+        # Redis is an optimization layer for unread counters.
+        pass
+    return summaries
+
+
+def _group_unread_counters_stale(raw_counts):
+    try:
+        reconciled_at = int(raw_counts.get(GROUP_UNREAD_RECONCILED_FIELD))
+    except (TypeError, ValueError):
+        return True
+    return datetime.now(timezone.utc).timestamp() - reconciled_at > GROUP_UNREAD_RECONCILE_SECONDS
+
+
+def get_group_unread_summaries_for_user(username, group_ids):
+    # Returns {group_id: summary} for groups with unread messages. Counters and
+    # last-message hashes for every group come back in one pipeline; the
+    # database is only read to reconcile missing or stale counters.
+    normalized_ids = _normalize_group_ids(group_ids)
+    if not normalized_ids:
+        return {}
+
+    try:
+        pipe = redis_client.pipeline()
+        pipe.hgetall(_group_unread_count_key(username))
+        for group_id in normalized_ids:
+            pipe.hgetall(_group_unread_last_key(username, group_id))
+        results = pipe.execute()
+    except Exception:
+        results = None
+
+    if results is None:
+        if not _db_available():
+            return {}
+        return _group_db_unread_summaries(username, normalized_ids)
+
+    raw_counts = {
+        _decode_redis_text(field): value
+        for field, value in (results[0] or {}).items()
+    }
+    if _db_available() and _group_unread_counters_stale(raw_counts):
+        return reconcile_group_unread_counters(username, normalized_ids)
+
+    summaries = {}
+    for group_id, raw_last in zip(normalized_ids, results[1:]):
+        try:
+            count = int(raw_counts.get(str(group_id)) or 0)
+        except (TypeError, ValueError):
+            continue
+        if count <= 0:
+            continue
+        last = {
+            _decode_redis_text(field): _decode_redis_text(value)
+            for field, value in (raw_last or {}).items()
+        }
+        summary = _empty_group_unread_summary(group_id)
+        summary.update({
+            "count": count,
+            "last_type": last.get("type") or "text",
+            "last_timestamp": last.get("timestamp", ""),
+            "last_sender": last.get("sender", ""),
+            "message_id": last.get("message_id", ""),
+        })
+        summaries[group_id] = summary
+    return summaries
+
+
+def _decrement_group_unread_metadata(username, group_id, amount):
+    if amount <= 0:
+        return
+
+    unread_key = _group_unread_count_key(username)
+    next_count = redis_client.hincrby(unread_key, str(group_id), -amount)
+    if next_count > 0:
+        return
+    pipe = redis_client.pipeline()
+    pipe.hdel(unread_key, str(group_id))
+    pipe.delete(_group_unread_last_key(username, group_id))
+    pipe.execute()
+
+
+def _clear_group_unread_metadata(username, group_id):
+    pipe = redis_client.pipeline()
+    pipe.hdel(_group_unread_count_key(username), str(group_id))
+    pipe.delete(_group_unread_last_key(username, group_id))
+    pipe.execute()
+
+
+def peek_group_messages_first_pages_for_user(username, group_ids, limit=100):
+    # Returns {group_id: [payload, ...]} with at most `limit` oldest pending
+    # messages per group, read with a single windowed query.
+    safe_limit = max(1, int(limit or 1))
+    normalized_ids = _normalize_group_ids(group_ids)
+    if not normalized_ids:
+        return {}
+
+    if not _db_available():
+        return {
+            group_id: peek_group_messages_batch_for_user(username, group_id, limit=safe_limit)
+            for group_id in normalized_ids
+        }
+
+    position = (
+        func.row_number()
+        .over(
+            partition_by=GroupMessageRecipient.group_id,
+            order_by=(GroupMessage.timestamp.asc(), GroupMessage.id.asc()),
+        )
+        .label("position")
+    )
+    ranked = (
+        db.session.query(
+            GroupMessageRecipient.id.label("recipient_row_id"),
+            GroupMessage.id.label("message_row_id"),
+            position,
+        )
+        .join(
+            GroupMessage,
+            GroupMessage.message_id == GroupMessageRecipient.message_id,
+        )
+        .filter(
+            GroupMessageRecipient.recipient_username == username,
+            GroupMessageRecipient.group_id.in_(normalized_ids),
+            GroupMessageRecipient.delivered_at.is_(None),
+            GroupMessage.deleted_for_everyone.is_(False),
+        )
+        .subquery()
+    )
+    rows = (
+        db.session.query(GroupMessage, GroupMessageRecipient)
+        .join(ranked, ranked.c.message_row_id == GroupMessage.id)
+        .join(GroupMessageRecipient, GroupMessageRecipient.id == ranked.c.recipient_row_id)
+        .filter(ranked.c.position <= safe_limit)
+        .order_by(
+            GroupMessageRecipient.group_id.asc(),
+            GroupMessage.timestamp.asc(),
+            GroupMessage.id.asc(),
+        )
+        .all()
+    )
+
+    pages = {group_id: [] for group_id in normalized_ids}
+    for message_row, recipient_row in rows:
+        pages.setdefault(int(recipient_row.group_id), []).append(
+            _group_message_to_payload(
+                message_row,
+                recipient_username=username,
+                recipient_encrypted_key=recipient_row.encrypted_key,
+            )
+        )
+    return pages
+
+
 def purge_group_delivery_for_user(group_id, username):
     if not group_id or not isinstance(username, str) or not username.strip():
         return 0
@@ -2798,17 +3267,12 @@ def purge_group_delivery_for_user(group_id, username):
             ).delete(synchronize_session=False)
             db.session.commit()
 
-    list_key = _group_inbox_key(normalized_username, normalized_group_id)
     order_key = _group_inbox_index_order_key(normalized_username, normalized_group_id)
     payload_key = _group_inbox_index_payload_key(normalized_username, normalized_group_id)
-    ids_key = _group_inbox_index_ids_key(normalized_username, normalized_group_id)
 
     transient_messages = _ordered_messages_from_index(
-        list_key=list_key,
         order_key=order_key,
         payload_key=payload_key,
-        ids_key=ids_key,
-        ttl_seconds=GROUP_INBOX_TTL_SECONDS,
         start=0,
         end=-1,
     )
@@ -2822,20 +3286,17 @@ def purge_group_delivery_for_user(group_id, username):
     ]
     if transient_ids:
         _ack_messages_from_index(
-            list_key=list_key,
             order_key=order_key,
             payload_key=payload_key,
-            ids_key=ids_key,
             ttl_seconds=GROUP_INBOX_TTL_SECONDS,
             message_ids=transient_ids,
         )
         removed_message_ids.update(transient_ids)
 
-    redis_client.delete(list_key)
     redis_client.delete(order_key)
     redis_client.delete(payload_key)
-    redis_client.delete(ids_key)
     redis_client.delete(f"group_deleted:{normalized_username}:{normalized_group_id}")
+    _clear_group_unread_metadata(normalized_username, normalized_group_id)
 
     return len(removed_message_ids)
 
@@ -2951,13 +3412,14 @@ def ack_group_transient_messages(username, group_id, message_ids):
     if not message_ids:
         return 0
     removed, _removed_payloads = _ack_messages_from_index(
-        list_key=_group_inbox_key(username, group_id),
         order_key=_group_inbox_index_order_key(username, group_id),
         payload_key=_group_inbox_index_payload_key(username, group_id),
-        ids_key=_group_inbox_index_ids_key(username, group_id),
         ttl_seconds=GROUP_INBOX_TTL_SECONDS,
         message_ids=message_ids,
     )
+    if not _db_available():
+        # Without a database the transient inbox is the only pending store.
+        _decrement_group_unread_metadata(username, group_id, removed)
     return removed
 
 
@@ -2967,13 +3429,12 @@ def ack_group_messages_with_payloads(username, group_id, message_ids):
 
     if not _db_available():
         removed, removed_payloads = _ack_messages_from_index(
-            list_key=_group_inbox_key(username, group_id),
             order_key=_group_inbox_index_order_key(username, group_id),
             payload_key=_group_inbox_index_payload_key(username, group_id),
-            ids_key=_group_inbox_index_ids_key(username, group_id),
             ttl_seconds=GROUP_INBOX_TTL_SECONDS,
             message_ids=message_ids,
         )
+        _decrement_group_unread_metadata(username, group_id, removed)
         delivered_ids = [
             (payload or {}).get("message_id")
             for payload in removed_payloads
@@ -3015,6 +3476,7 @@ def ack_group_messages_with_payloads(username, group_id, message_ids):
 
     if not delivered_ids:
         return 0, []
+    _decrement_group_unread_metadata(username, group_id, len(delivered_ids))
 
     payload_rows = (
         db.session.query(
@@ -3050,10 +3512,8 @@ def ack_group_messages_with_payloads(username, group_id, message_ids):
 
     # Best-effort transient queue cleanup.
     _ack_messages_from_index(
-        list_key=_group_inbox_key(username, group_id),
         order_key=_group_inbox_index_order_key(username, group_id),
         payload_key=_group_inbox_index_payload_key(username, group_id),
-        ids_key=_group_inbox_index_ids_key(username, group_id),
         ttl_seconds=GROUP_INBOX_TTL_SECONDS,
         message_ids=normalized_ids,
     )
@@ -3253,222 +3713,417 @@ def _safe_load_json(raw_value):
     return parsed if isinstance(parsed, dict) else None
 
 
-def purge_user_data(username, candidate_usernames=None):
-    if not username:
-        return
+def _batches(items, size):
+    items = list(items)
+    for offset in range(0, len(items), size):
+        yield items[offset:offset + size]
 
-    normalized_users = {username}
-    if candidate_usernames:
-        for candidate in candidate_usernames:
-            if isinstance(candidate, bytes):
-                candidate = candidate.decode("utf-8")
-            if isinstance(candidate, str) and candidate:
-                normalized_users.add(candidate)
 
-    contacts = get_contacts(username)
-    for contact in contacts:
-        contact_text = _decode_redis_text(contact)
-        if isinstance(contact_text, str) and contact_text:
-            normalized_users.add(contact_text)
+def collect_purge_targets(username, *, candidate_usernames=None, group_ids=None):
+    """Everything an account purge of ``username`` has to touch, without SCAN.
 
-    removed_message_ids = set()
+    Inboxes come from the reverse indexes written on delivery, the contact
+    indexes and, when the database is available, the message rows (which
+    cover pending messages older than the index TTL). Must run before
+    delete_message_rows_for_user. Returns sorted lists under
+    ``private_inboxes``, ``group_inboxes`` ("<user>:<group id>"),
+    ``own_group_ids``, ``sender_group_ids`` and ``message_ids``.
+    """
+    private_inboxes = set()
+    for candidate in candidate_usernames or ():
+        candidate = _decode_redis_text(candidate)
+        if isinstance(candidate, str) and candidate:
+            private_inboxes.add(candidate)
 
-    private_rows = (
-        PrivateMessage.query.filter(
+    pipe = redis_client.pipeline()
+    pipe.smembers(_sender_inboxes_key(username))
+    pipe.smembers(f"contacts:{username}")
+    pipe.smembers(_contact_owners_key(username))
+    pipe.zrange(f"contact_ts:{username}", 0, -1)
+    pipe.smembers(_sender_group_inboxes_key(username))
+    pipe.hgetall(_group_unread_count_key(username))
+    (
+        indexed_inboxes,
+        contacts,
+        contact_owners,
+        conversation_partners,
+        indexed_group_inboxes,
+        group_unread_counts,
+    ) = pipe.execute()
+    for members in (indexed_inboxes, contacts, contact_owners, conversation_partners):
+        private_inboxes.update(_decode_redis_text(member) for member in members or ())
+
+    group_inboxes = set()
+    for member in indexed_group_inboxes or ():
+        parsed = _parse_group_inbox_member(member)
+        if parsed is not None:
+            group_inboxes.add(parsed)
+
+    own_group_ids = {int(group_id) for group_id in group_ids or ()}
+    for field in (group_unread_counts or {}):
+        field = _decode_redis_text(field)
+        if isinstance(field, str) and field.isdigit():
+            own_group_ids.add(int(field))
+
+    message_ids = set()
+    sender_group_ids = set()
+    if _db_available():
+        for (partner,) in (
+            db.session.query(PrivateMessage.recipient_username)
+            .filter(PrivateMessage.sender_username == username)
+            .distinct()
+        ):
+            private_inboxes.add(partner)
+        for (partner,) in (
+            db.session.query(PrivateMessage.sender_username)
+            .filter(PrivateMessage.recipient_username == username)
+            .distinct()
+        ):
+            private_inboxes.add(partner)
+        for (message_id,) in db.session.query(PrivateMessage.message_id).filter(
             or_(
                 PrivateMessage.sender_username == username,
                 PrivateMessage.recipient_username == username,
             )
-        )
-        .all()
-    )
-    for row in private_rows:
-        if isinstance(row.message_id, str) and row.message_id:
-            removed_message_ids.add(row.message_id)
+        ):
+            message_ids.add(message_id)
+
+        for message_id, group_id in db.session.query(
+            GroupMessage.message_id,
+            GroupMessage.group_id,
+        ).filter(GroupMessage.sender_username == username):
+            message_ids.add(message_id)
+            sender_group_ids.add(int(group_id))
+        for recipient, group_id in (
+            db.session.query(GroupMessageRecipient.recipient_username, GroupMessageRecipient.group_id)
+            .join(GroupMessage, GroupMessage.message_id == GroupMessageRecipient.message_id)
+            .filter(
+                GroupMessage.sender_username == username,
+                GroupMessageRecipient.delivered_at.is_(None),
+            )
+            .distinct()
+        ):
+            group_inboxes.add((recipient, int(group_id)))
+        for (group_id,) in (
+            db.session.query(GroupMessageRecipient.group_id)
+            .filter(GroupMessageRecipient.recipient_username == username)
+            .distinct()
+        ):
+            own_group_ids.add(int(group_id))
+        for (group_id,) in (
+            db.session.query(GroupMember.group_id)
+            .join(User, User.id == GroupMember.user_id)
+            .filter(User.username == username)
+        ):
+            own_group_ids.add(int(group_id))
+
+    private_inboxes.discard(username)
+    # The user's own inboxes are dropped whole by purge_user_message_keys.
+    group_inboxes = {(owner, group_id) for owner, group_id in group_inboxes if owner != username}
+    sender_group_ids.update(group_id for _owner, group_id in group_inboxes)
+    return {
+        "private_inboxes": sorted(private_inboxes),
+        "group_inboxes": sorted(_group_inbox_member(owner, group_id) for owner, group_id in group_inboxes),
+        "own_group_ids": sorted(own_group_ids),
+        "sender_group_ids": sorted(sender_group_ids),
+        "message_ids": sorted(message_ids),
+    }
 
-    group_rows_by_sender = (
-        GroupMessage.query.filter(GroupMessage.sender_username == username).all()
-    )
-    sender_group_message_ids = []
-    for row in group_rows_by_sender:
-        if isinstance(row.message_id, str) and row.message_id:
-            sender_group_message_ids.append(row.message_id)
-            removed_message_ids.add(row.message_id)
 
-    if sender_group_message_ids:
-        GroupMessageRecipient.query.filter(
-            GroupMessageRecipient.message_id.in_(sender_group_message_ids)
-        ).delete(synchronize_session=False)
-        GroupMessage.query.filter(
-            GroupMessage.message_id.in_(sender_group_message_ids)
-        ).delete(synchronize_session=False)
-
-    GroupMessageRecipient.query.filter(
-        GroupMessageRecipient.recipient_username == username
+def delete_message_rows_for_user(username):
+    """Deletes the user's private and group message rows in four statements."""
+    if not _db_available():
+        return 0
+
+    sent_group_message_ids = (
+        db.session.query(GroupMessage.message_id)
+        .filter(GroupMessage.sender_username == username)
+        .scalar_subquery()
+    )
+    deleted = GroupMessageRecipient.query.filter(
+        or_(
+            GroupMessageRecipient.message_id.in_(sent_group_message_ids),
+            GroupMessageRecipient.recipient_username == username,
+        )
     ).delete(synchronize_session=False)
+    deleted += GroupMessage.query.filter(
+        GroupMessage.sender_username == username
+    ).delete(synchronize_session=False)
+    deleted += PrivateMessage.query.filter(
+        or_(
+            PrivateMessage.sender_username == username,
+            PrivateMessage.recipient_username == username,
+        )
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
 
-    if private_rows:
-        private_ids = [row.id for row in private_rows]
-        PrivateMessage.query.filter(
-            PrivateMessage.id.in_(private_ids)
-        ).delete(synchronize_session=False)
 
-    db.session.commit()
+def _read_inboxes(key_pairs):
+    """Pending records of several inboxes in three round trips.
 
-    # Remove private pending messages sent by this user from every known inbox.
-    for owner in sorted(normalized_users):
-        messages = _ordered_messages_from_index(
-            list_key=_inbox_key(owner),
-            order_key=_inbox_index_order_key(owner),
-            payload_key=_inbox_index_payload_key(owner),
-            ids_key=_inbox_index_ids_key(owner),
-            ttl_seconds=INBOX_TTL_SECONDS,
-            start=0,
-            end=-1,
+    ``key_pairs`` is a list of (order_key, payload_key); returns one list of
+    expanded messages per pair. Shared group payloads that expired are skipped.
+    """
+    pipe = redis_client.pipeline()
+    for order_key, _payload_key in key_pairs:
+        pipe.zrange(order_key, 0, -1)
+    id_lists = pipe.execute()
+
+    pipe = redis_client.pipeline()
+    for (_order_key, payload_key), message_ids in zip(key_pairs, id_lists):
+        if message_ids:
+            pipe.hmget(payload_key, message_ids)
+    raw_lists = iter(pipe.execute())
+
+    inboxes = []
+    for message_ids in id_lists:
+        raw_values = next(raw_lists) if message_ids else []
+        inboxes.append([
+            message
+            for message in (_decode_raw_message(raw) for raw in raw_values)
+            if message is not None
+        ])
+
+    shared_keys = list(dict.fromkeys(
+        message["shared_payload_key"]
+        for messages in inboxes
+        for message in messages
+        if _is_shared_group_record(message)
+    ))
+    shared_payloads = {}
+    for batch in _batches(shared_keys, PURGE_BATCH_SIZE):
+        shared_payloads.update(
+            (key, _decode_raw_message(raw))
+            for key, raw in zip(batch, redis_client.mget(batch))
         )
-        removable_ids = [
-            message_id
-            for message_id in (
-                (message or {}).get("message_id")
-                for message in messages
-                if (message or {}).get("from") == username
-            )
-            if isinstance(message_id, str) and message_id
+    return [
+        [
+            dict(shared_payloads.get(message["shared_payload_key"]) or {}, message_id=message.get("message_id"))
+            if _is_shared_group_record(message)
+            else message
+            for message in messages
         ]
-        if removable_ids:
-            _removed_count, removed_payloads = ack_messages_with_payloads(owner, removable_ids)
-            for payload in removed_payloads:
-                message_id = (payload or {}).get("message_id")
-                if isinstance(message_id, str) and message_id:
-                    removed_message_ids.add(message_id)
-
-        redis_client.hdel(_chat_unread_count_key(owner), username)
-        redis_client.delete(_chat_last_key(owner, username))
-        redis_client.srem(f"contacts:{owner}", username)
-        redis_client.zrem(f"contact_ts:{owner}", username)
-        redis_client.delete(f"private_seen:{owner}:{username}")
-        redis_client.delete(f"private_seen:{username}:{owner}")
-        redis_client.delete(f"private_deleted:{owner}:{username}")
-        redis_client.delete(f"private_deleted:{username}:{owner}")
-
-    redis_client.delete(_inbox_key(username))
-    redis_client.delete(_inbox_index_order_key(username))
-    redis_client.delete(_inbox_index_payload_key(username))
-    redis_client.delete(_inbox_index_ids_key(username))
-    redis_client.delete(_chat_unread_count_key(username))
-    redis_client.delete(f"contacts:{username}")
-    redis_client.delete(f"contact_ts:{username}")
-    redis_client.delete(f"message_delete_events:{username}")
-
-    # Remove group pending messages sent by this user from all group inboxes.
-    for inbox_key in _scan_keys("group_user_inbox:*:*"):
-        parts = inbox_key.split(":")
-        if len(parts) != 4:
-            continue
-        owner = parts[2]
-        try:
-            group_id = int(parts[3])
-        except (TypeError, ValueError):
-            continue
+        for messages in inboxes
+    ]
 
-        if owner == username:
-            redis_client.delete(_group_inbox_key(owner, group_id))
-            redis_client.delete(_group_inbox_index_order_key(owner, group_id))
-            redis_client.delete(_group_inbox_index_payload_key(owner, group_id))
-            redis_client.delete(_group_inbox_index_ids_key(owner, group_id))
-            continue
 
-        messages = _ordered_messages_from_index(
-            list_key=_group_inbox_key(owner, group_id),
-            order_key=_group_inbox_index_order_key(owner, group_id),
-            payload_key=_group_inbox_index_payload_key(owner, group_id),
-            ids_key=_group_inbox_index_ids_key(owner, group_id),
-            ttl_seconds=GROUP_INBOX_TTL_SECONDS,
-            start=0,
-            end=-1,
+def _message_ids_from(messages, sender):
+    return [
+        message["message_id"]
+        for message in messages
+        if message.get("from") == sender
+        and isinstance(message.get("message_id"), str)
+        and message["message_id"]
+    ]
+
+
+def purge_private_inboxes(username, owners):
+    """Removes ``username`` from the private inboxes and chat keys of ``owners``.
+
+    Reads every inbox of the batch in one pass and removes the user's pending
+    messages plus the per-contact keys in a single pipeline. Returns the ids
+    of the removed messages.
+    """
+    owners = [owner for owner in dict.fromkeys(owners) if owner and owner != username]
+    if not owners:
+        return []
+
+    inboxes = _read_inboxes([
+        (_inbox_index_order_key(owner), _inbox_index_payload_key(owner))
+        for owner in owners
+    ])
+    removed_message_ids = []
+    pipe = redis_client.pipeline()
+    for owner, messages in zip(owners, inboxes):
+        message_ids = _message_ids_from(messages, username)
+        if message_ids:
+            pipe.zrem(_inbox_index_order_key(owner), *message_ids)
+            pipe.hdel(_inbox_index_payload_key(owner), *message_ids)
+            removed_message_ids.extend(message_ids)
+        pipe.hdel(_chat_unread_count_key(owner), username)
+        pipe.delete(
+            _chat_last_key(owner, username),
+            _chat_last_key(username, owner),
+            f"private_seen:{owner}:{username}",
+            f"private_seen:{username}:{owner}",
+            f"private_delivered:{owner}:{username}",
+            f"private_delivered:{username}:{owner}",
+            f"private_deleted:{owner}:{username}",
+            f"private_deleted:{username}:{owner}",
         )
-        removable_ids = [
-            message_id
-            for message_id in (
-                (message or {}).get("message_id")
-                for message in messages
-                if (message or {}).get("from") == username
-            )
-            if isinstance(message_id, str) and message_id
-        ]
-        if removable_ids:
-            _removed_count, removed_payloads = ack_group_messages_with_payloads(
-                owner,
-                group_id,
-                removable_ids,
-            )
-            for payload in removed_payloads:
-                message_id = (payload or {}).get("message_id")
-                if isinstance(message_id, str) and message_id:
-                    removed_message_ids.add(message_id)
-
-    for key in _scan_keys("chat:last:*"):
-        parts = key.split(":")
-        if len(parts) != 4:
-            continue
-        if parts[2] == username or parts[3] == username:
-            redis_client.delete(key)
+        pipe.srem(f"contacts:{owner}", username)
+        pipe.zrem(f"contact_ts:{owner}", username)
+        pipe.srem(_contact_owners_key(owner), username)
+    pipe.execute()
+    return removed_message_ids
 
-    for key in _scan_keys("chat:unread_count:*"):
-        redis_client.hdel(key, username)
 
-    for key in _scan_keys("contacts:*"):
-        redis_client.srem(key, username)
+def purge_group_inboxes(username, inbox_members):
+    """Removes the pending group messages ``username`` sent from the given inboxes.
 
-    for key in _scan_keys("contact_ts:*"):
-        redis_client.zrem(key, username)
+    ``inbox_members`` are "<user>:<group id>" entries from
+    collect_purge_targets. Unread counters drop by the number of removed
+    messages. Returns the ids of the removed messages.
+    """
+    inboxes = [
+        parsed
+        for parsed in dict.fromkeys(_parse_group_inbox_member(member) for member in inbox_members)
+        if parsed is not None and parsed[0] != username
+    ]
+    if not inboxes:
+        return []
 
-    for key in _scan_keys("private_seen:*"):
-        parts = key.split(":")
-        if len(parts) != 3:
+    contents = _read_inboxes([
+        (_group_inbox_index_order_key(owner, group_id), _group_inbox_index_payload_key(owner, group_id))
+        for owner, group_id in inboxes
+    ])
+    removed = []
+    pipe = redis_client.pipeline()
+    for (owner, group_id), messages in zip(inboxes, contents):
+        message_ids = _message_ids_from(messages, username)
+        if not message_ids:
             continue
-        if parts[1] == username or parts[2] == username:
-            redis_client.delete(key)
+        pipe.zrem(_group_inbox_index_order_key(owner, group_id), *message_ids)
+        pipe.hdel(_group_inbox_index_payload_key(owner, group_id), *message_ids)
+        pipe.hincrby(_group_unread_count_key(owner), str(group_id), -len(message_ids))
+        removed.append((owner, group_id, message_ids))
+    if not removed:
+        return []
+    results = pipe.execute()
 
-    for key in _scan_keys("private_deleted:*"):
-        parts = key.split(":")
-        if len(parts) != 3:
-            continue
-        if parts[1] == username or username in parts[2]:
-            redis_client.delete(key)
+    # Every third reply is the new unread count of that inbox.
+    pipe = redis_client.pipeline()
+    for (owner, group_id, message_ids), unread in zip(removed, results[2::3]):
+        for message_id in message_ids:
+            shared_payload_key = _group_shared_payload_key(group_id, message_id)
+            pipe.delete(shared_payload_key, _group_shared_payload_refs_key(shared_payload_key))
+        if int(unread or 0) <= 0:
+            pipe.hdel(_group_unread_count_key(owner), str(group_id))
+            pipe.delete(_group_unread_last_key(owner, group_id))
+    pipe.execute()
+    return [message_id for _owner, _group_id, message_ids in removed for message_id in message_ids]
 
-    for key in _scan_keys("group_deleted:*"):
-        parts = key.split(":")
-        if len(parts) != 3:
-            continue
-        if parts[1] == username:
-            redis_client.delete(key)
 
-    for key in _scan_keys("message_delete_events:*"):
-        parts = key.split(":")
-        if len(parts) != 2:
-            continue
-        if parts[1] == username:
-            redis_client.delete(key)
+def purge_user_message_keys(username, own_group_ids):
+    """Drops the user's own inboxes, counters and indexes.
 
-    for key in _scan_keys("message_meta:*"):
-        metadata = _safe_load_json(redis_client.get(key))
-        if not metadata:
+    Returns the ids still pending in the private inbox, whose metadata also
+    has to go.
+    """
+    pending_ids = [
+        _decode_redis_text(message_id)
+        for message_id in redis_client.zrange(_inbox_index_order_key(username), 0, -1)
+    ]
+    pipe = redis_client.pipeline()
+    pipe.delete(
+        _inbox_index_order_key(username),
+        _inbox_index_payload_key(username),
+        _chat_unread_count_key(username),
+        _group_unread_count_key(username),
+        f"contacts:{username}",
+        f"contact_ts:{username}",
+        f"message_delete_events:{username}",
+        _sender_inboxes_key(username),
+        _sender_group_inboxes_key(username),
+        _contact_owners_key(username),
+    )
+    for group_id in own_group_ids:
+        pipe.delete(
+            _group_inbox_index_order_key(username, group_id),
+            _group_inbox_index_payload_key(username, group_id),
+            _group_unread_last_key(username, group_id),
+            f"group_deleted:{username}:{group_id}",
+            f"group_seen:{group_id}:{username}",
+        )
+    pipe.execute()
+    return pending_ids
+
+
+def purge_message_ids(message_ids, sender_group_ids):
+    """Deletes the metadata of purged messages and their group receipt entries."""
+    message_ids = [message_id for message_id in dict.fromkeys(message_ids) if message_id]
+    if not message_ids:
+        return 0
+
+    pipe = redis_client.pipeline()
+    pipe.delete(*(f"message_meta:{message_id}" for message_id in message_ids))
+    for group_id in sender_group_ids:
+        pipe.srem(f"group_delivered:{group_id}", *message_ids)
+        pipe.srem(f"group_seen:{group_id}", *message_ids)
+    pipe.execute()
+    return len(message_ids)
+
+
+def purge_user_data(username, candidate_usernames=None, group_ids=None):
+    """Removes a deleted account's messages and chat state in one call.
+
+    account_purge_service runs the same steps as a resumable background job;
+    this is the synchronous form for scripts and tests.
+    """
+    if not username:
+        return
+
+    targets = collect_purge_targets(
+        username,
+        candidate_usernames=candidate_usernames,
+        group_ids=group_ids,
+    )
+    delete_message_rows_for_user(username)
+
+    message_ids = list(targets["message_ids"])
+    for owners in _batches(targets["private_inboxes"], PURGE_BATCH_SIZE):
+        message_ids.extend(purge_private_inboxes(username, owners))
+    for inbox_members in _batches(targets["group_inboxes"], PURGE_BATCH_SIZE):
+        message_ids.extend(purge_group_inboxes(username, inbox_members))
+    message_ids.extend(purge_user_message_keys(username, targets["own_group_ids"]))
+    for batch in _batches(dict.fromkeys(message_ids), PURGE_BATCH_SIZE):
+        purge_message_ids(batch, targets["sender_group_ids"])
+
+
+def build_purge_indexes():
+    """One-time backfill of the purge reverse indexes from the existing inboxes.
+
+    Scans the keyspace once; afterwards the indexes are kept up to date on
+    every delivery. Safe to re-run.
+    """
+    stats = {"private_inboxes": 0, "group_inboxes": 0, "contacts": 0}
+
+    for order_key in _scan_keys("inbox_order:*"):
+        owner = order_key.split(":", 1)[1]
+        (messages,) = _read_inboxes([(order_key, _inbox_index_payload_key(owner))])
+        senders = {message.get("from") for message in messages if message.get("from")}
+        if senders:
+            pipe = redis_client.pipeline()
+            for sender in senders:
+                pipe.sadd(_sender_inboxes_key(sender), owner)
+                pipe.expire(_sender_inboxes_key(sender), PURGE_INDEX_TTL_SECONDS)
+            pipe.execute()
+            stats["private_inboxes"] += 1
+
+    for order_key in _scan_keys("group_inbox_order:*:*"):
+        parsed = _parse_group_inbox_member(order_key.split(":", 1)[1])
+        if parsed is None:
             continue
-        if metadata.get("sender") == username or metadata.get("recipient") == username:
-            message_id = metadata.get("message_id")
-            if isinstance(message_id, str) and message_id:
-                removed_message_ids.add(message_id)
-            redis_client.delete(key)
-
-    if removed_message_ids:
-        for key in _scan_keys("private_seen:*"):
-            redis_client.srem(key, *removed_message_ids)
-        for key in _scan_keys("private_deleted:*"):
-            redis_client.srem(key, *removed_message_ids)
-        for key in _scan_keys("group_delivered:*"):
-            redis_client.srem(key, *removed_message_ids)
-        for key in _scan_keys("group_seen:*"):
-            redis_client.srem(key, *removed_message_ids)
-        for key in _scan_keys("group_deleted:*"):
-            redis_client.srem(key, *removed_message_ids)
+        owner, group_id = parsed
+        (messages,) = _read_inboxes([(order_key, _group_inbox_index_payload_key(owner, group_id))])
+        senders = {message.get("from") for message in messages if message.get("from")}
+        if senders:
+            pipe = redis_client.pipeline()
+            for sender in senders:
+                pipe.sadd(_sender_group_inboxes_key(sender), _group_inbox_member(owner, group_id))
+                pipe.expire(_sender_group_inboxes_key(sender), PURGE_INDEX_TTL_SECONDS)
+            pipe.execute()
+            stats["group_inboxes"] += 1
+
+    for contacts_key in _scan_keys("contacts:*"):
+        owner = contacts_key.split(":", 1)[1]
+        contacts = redis_client.smembers(contacts_key)
+        if contacts:
+            pipe = redis_client.pipeline()
+            for contact in contacts:
+                pipe.sadd(_contact_owners_key(_decode_redis_text(contact)), owner)
+            pipe.execute()
+            stats["contacts"] += 1
+
+    return stats
@@ -73,3 +73,23 @@ def list_expired_handled(now: datetime, limit: int | None = None):
     if limit is not None:
         query = query.limit(max(int(limit), 1))
     return query.all()
+
+
+def delete_expired_handled(now: datetime, limit: int | None = None) -> int:
+    query = (
+        db.session.query(PostReport.id)
+        .filter(
+            PostReport.status == "handled",
+            PostReport.decision_expires_at.isnot(None),
+            PostReport.decision_expires_at <= now,
+        )
+        .order_by(PostReport.decision_expires_at.asc(), PostReport.id.asc())
+    )
+    if limit is not None:
+        query = query.limit(max(int(limit), 1))
+    expired_ids = [row[0] for row in query.all()]
+    if not expired_ids:
+        return 0
+    return PostReport.query.filter(
+        PostReport.id.in_(expired_ids)
+    ).delete(synchronize_session=False)
@@ -9,6 +9,7 @@ from app.models.follow_model import Follow
 from app.models.profile_model import Profile
 from app.models.story_model import Story, StoryDailyQuota, StoryView
 from app.models.user_model import User
+from app.services import author_card_cache
 
 
 def _utc_now():
@@ -162,11 +163,7 @@ def get_active_feed_grouped(*, viewer_user_id: int, now: datetime | None = None)
         )
     }
 
-    user_ids = {story.user_id for story in stories}
-    users = User.query.filter(User.id.in_(list(user_ids))).all()
-    profiles = Profile.query.filter(Profile.user_id.in_(list(user_ids))).all()
-    user_by_id = {user.id: user for user in users}
-    profile_by_user_id = {profile.user_id: profile for profile in profiles}
+    cards = author_card_cache.get_cards({story.user_id for story in stories})
 
     grouped = defaultdict(list)
     for story in stories:
@@ -174,10 +171,9 @@ def get_active_feed_grouped(*, viewer_user_id: int, now: datetime | None = None)
 
     response = []
     for user_id, user_stories in grouped.items():
-        user = user_by_id.get(user_id)
-        if not user:
+        card = cards.get(user_id)
+        if not card:
             continue
-        profile = profile_by_user_id.get(user_id)
 
         unseen = any(story.id not in viewed_story_ids for story in user_stories)
         first_story = user_stories[0]
@@ -185,14 +181,12 @@ def get_active_feed_grouped(*, viewer_user_id: int, now: datetime | None = None)
 
         response.append(
             {
-                "user_id": user.id,
-                "username": user.username,
-                "name": profile.name if profile and profile.name else user.username,
-                "badge": user.badge,
-                "avatar_object_name": profile.image_object_name if profile else None,
-                "profile_image_shape": (
-                    profile.profile_image_shape if profile and profile.profile_image_shape else "circle"
-                ),
+                "user_id": card["id"],
+                "username": card["username"],
+                "name": card["name"] or card["username"],
+                "badge": card["badge"],
+                "avatar_object_name": card["image_object_name"],
+                "profile_image_shape": card["profile_image_shape"],
                 "has_unseen_story": unseen,
                 "story_count": len(user_stories),
                 "first_story_timestamp": first_story.created_at,
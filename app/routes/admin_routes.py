@@ -17,12 +17,17 @@ from app.models.profile_model import Profile
 from app.models.media_model import Media
 from app.models.vote_model import Vote
 from app.models.follow_model import Follow
+from app.repositories import group_repository
+from app.services import account_purge_service
 from app.services import report_service
 from app.services import app_update_service
 from app.services import about_us_service
 from app.services import crash_log_service
 from app.services import auth_service
+from app.services import author_card_cache
 from app.services import daily_winner_service
+from app.services import media_cache
+from app.services import typeahead_service
 from app.services.post_service import _build_media_url
 from app.constants.badges import USER_BADGE_CATALOG
 from datetime import datetime
@@ -137,6 +142,31 @@ def admin_run_post_of_day_now():
     return jsonify(result), 200
 
 
+@admin_bp.route("/api/media-cache/stats", methods=["GET"])
+@admin_required
+def admin_get_media_cache_stats():
+    return jsonify(media_cache.get_stats()), 200
+
+
+@admin_bp.route("/api/account-purges", methods=["GET"])
+@admin_required
+def admin_list_account_purges():
+    limit = min(200, max(1, request.args.get("limit", 50, type=int)))
+    return jsonify({"purges": account_purge_service.list_purges(limit)}), 200
+
+
+@admin_bp.route("/api/account-purges/<username>/resume", methods=["POST"])
+@admin_required
+def admin_resume_account_purge(username):
+    if account_purge_service.get_purge_progress(username) is None:
+        return jsonify({"error": "Purge not found"}), 404
+    started = account_purge_service.resume_purge(username, source="admin_resume")
+    return jsonify({
+        "started": started,
+        "purge": account_purge_service.get_purge_progress(username),
+    }), 200
+
+
 # ── App update settings ─────────────────────────────────────────────
 
 @admin_bp.route("/api/app-update/settings", methods=["GET"])
@@ -623,8 +653,13 @@ def admin_delete_user(user_id):
         (Follow.follower_id == user.id) | (Follow.following_id == user.id)
     ).delete()
     Profile.query.filter_by(user_id=user.id).delete()
+    member_group_ids = group_repository.get_group_ids_for_user(user.id)
     db.session.delete(user)
     db.session.commit()
+    typeahead_service.remove_user(user_id)
+    author_card_cache.invalidate(user_id)
+    for group_id in member_group_ids:
+        group_repository.bump_membership_version(group_id)
     return jsonify({"message": "User deleted"}), 200
 
 
@@ -684,6 +719,7 @@ def admin_update_user_badge(user_id):
 
     user.badge = normalized_badge
     db.session.commit()
+    author_card_cache.invalidate(user.id)
 
     if normalized_badge:
         message = f"Badge '{normalized_badge}' assigned to {user.username}"
@@ -760,6 +796,8 @@ def admin_update_user_credentials(user_id):
         ), 200
 
     db.session.commit()
+    if "username" in changed_fields:
+        author_card_cache.invalidate(user.id)
 
     return jsonify(
         {
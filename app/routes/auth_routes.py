@@ -12,6 +12,9 @@ auth_bp = Blueprint("auth", __name__)
 
 def _auth_error_response(error: Exception, fallback_status_code: int = 400):
     status_code = getattr(error, "status_code", fallback_status_code)
+    retry_after_seconds = getattr(error, "retry_after_seconds", None)
+    if retry_after_seconds:
+        return jsonify({"error": str(error)}), status_code, {"Retry-After": str(retry_after_seconds)}
     return jsonify({"error": str(error)}), status_code
 
 
@@ -3,6 +3,7 @@ from flask_jwt_extended import get_jwt_identity, jwt_required
 
 from app.extensions.extensions import socketio
 from app.services import block_service
+from app.socket_events import evict_user_from_presence_watch
 
 
 block_bp = Blueprint("blocks", __name__)
@@ -22,6 +23,8 @@ def block_user(username):
         return jsonify({"error": error}), 400
 
     if result["created"]:
+        evict_user_from_presence_watch(result["blocker_username"], result["blocked_username"])
+        evict_user_from_presence_watch(result["blocked_username"], result["blocker_username"])
         socketio.emit(
             "chat_blocked",
             {
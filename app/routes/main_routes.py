@@ -1,5 +1,6 @@
 from datetime import timezone
 import os
+import uuid
 
 from flask import (
     Blueprint,
@@ -12,9 +13,10 @@ from flask import (
     request,
 )
 from minio.error import S3Error
-from werkzeug.http import http_date, parse_date
+from werkzeug.http import http_date, parse_date, parse_range_header
 
 from app.extensions.minio_client import get_minio_client
+from app.services import media_cache
 from app.services import app_update_service
 from app.services import about_us_service
 
@@ -174,6 +176,253 @@ def _build_media_headers(*, content_type: str, content_length, etag: str | None,
     return headers
 
 
+def _if_range_allows_partial(if_range: str | None, etag: str | None, last_modified) -> bool:
+    if not if_range:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        # If-Range requires a strong comparison; weak validators never match.
+        if if_range.startswith("W/") or not etag or etag.startswith("W/"):
+            return False
+        return if_range == etag
+    if not last_modified:
+        return False
+    if_range_dt = parse_date(if_range)
+    last_modified_dt = parse_date(_build_last_modified(last_modified) or "")
+    if if_range_dt is None or last_modified_dt is None:
+        return False
+    return int(if_range_dt.timestamp()) == int(last_modified_dt.timestamp())
+
+
+_RANGE_NOT_SATISFIABLE = object()
+
+
+def _resolve_byte_ranges(range_header: str | None, size):
+    # Returns merged inclusive (start, end) pairs, None to serve the full
+    # object, or _RANGE_NOT_SATISFIABLE when no range overlaps the object.
+    if not range_header or size is None:
+        return None
+
+    parsed = parse_range_header(range_header)
+    if parsed is None or parsed.units != "bytes" or not parsed.ranges:
+        return None
+
+    max_parts = max(int(current_app.config.get("MEDIA_RANGE_MAX_PARTS", 16)), 1)
+    if len(parsed.ranges) > max_parts:
+        return None
+
+    size = int(size)
+    resolved = []
+    for start, stop in parsed.ranges:
+        if start < 0:
+            # Suffix range: the last ``-start`` bytes of the object.
+            if size == 0:
+                continue
+            start = max(size + start, 0)
+            end = size - 1
+        else:
+            if start >= size:
+                continue
+            end = size - 1 if stop is None else min(stop, size) - 1
+        resolved.append((start, end))
+
+    if not resolved:
+        return _RANGE_NOT_SATISFIABLE
+
+    resolved.sort()
+    merged = [resolved[0]]
+    for start, end in resolved[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _open_media_range(minio, *, bucket: str, object_name: str, start: int, end: int):
+    return minio.get_object(
+        bucket_name=bucket,
+        object_name=object_name,
+        offset=start,
+        length=end - start + 1,
+    )
+
+
+def _stream_minio_response(minio_response, chunk_size: int):
+    try:
+        for chunk in minio_response.stream(chunk_size):
+            yield chunk
+    finally:
+        minio_response.close()
+        minio_response.release_conn()
+
+
+def _media_range_not_satisfiable_response(headers: dict, size):
+    headers = dict(headers)
+    headers.pop("Content-Length", None)
+    headers.pop("Content-Type", None)
+    headers["Content-Range"] = f"bytes */{int(size)}"
+    return Response(status=416, headers=headers)
+
+
+def _media_single_range_response(
+    minio,
+    *,
+    bucket: str,
+    object_name: str,
+    headers: dict,
+    byte_range,
+    size: int,
+    chunk_size: int,
+):
+    start, end = byte_range
+    try:
+        minio_response = _open_media_range(
+            minio,
+            bucket=bucket,
+            object_name=object_name,
+            start=start,
+            end=end,
+        )
+    except S3Error as e:
+        return _media_error_response(e)
+    except Exception:
+        return jsonify({"error": "Media unavailable"}), 503
+
+    headers = dict(headers)
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+
+    return Response(
+        stream_with_context(_stream_minio_response(minio_response, chunk_size)),
+        status=206,
+        headers=headers,
+        direct_passthrough=True,
+    )
+
+
+def _build_multipart_framing(headers: dict, byte_ranges, size: int):
+    boundary = uuid.uuid4().hex
+    part_content_type = headers.get("Content-Type") or "application/octet-stream"
+    part_headers = [
+        (
+            f"\r\n--{boundary}\r\n"
+            f"Content-Type: {part_content_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+        ).encode("latin-1")
+        for start, end in byte_ranges
+    ]
+    closing = f"\r\n--{boundary}--\r\n".encode("latin-1")
+    content_length = sum(len(part) for part in part_headers) + len(closing)
+    content_length += sum(end - start + 1 for start, end in byte_ranges)
+    return boundary, part_headers, closing, content_length
+
+
+def _cached_media_range_response(entry, *, headers: dict, byte_ranges):
+    headers = dict(headers)
+    if len(byte_ranges) == 1:
+        start, end = byte_ranges[0]
+        headers["Content-Range"] = f"bytes {start}-{end}/{entry.size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return Response(entry.body[start:end + 1], status=206, headers=headers)
+
+    boundary, part_headers, closing, content_length = _build_multipart_framing(
+        headers,
+        byte_ranges,
+        entry.size,
+    )
+    body = b"".join(
+        part_headers[index] + entry.body[start:end + 1]
+        for index, (start, end) in enumerate(byte_ranges)
+    ) + closing
+    headers["Content-Type"] = f"multipart/byteranges; boundary={boundary}"
+    headers["Content-Length"] = str(content_length)
+    return Response(body, status=206, headers=headers)
+
+
+def _read_cacheable_media(minio, *, bucket: str, object_name: str, stat, chunk_size: int):
+    minio_response = minio.get_object(
+        bucket_name=bucket,
+        object_name=object_name,
+    )
+    body = b"".join(_stream_minio_response(minio_response, chunk_size))
+    media_cache.put(
+        object_name,
+        etag=getattr(stat, "etag", None),
+        content_type=getattr(stat, "content_type", None),
+        last_modified=getattr(stat, "last_modified", None),
+        body=body,
+    )
+    return body
+
+
+def _media_multi_range_response(
+    minio,
+    *,
+    bucket: str,
+    object_name: str,
+    headers: dict,
+    byte_ranges,
+    size: int,
+    chunk_size: int,
+):
+    # Open the first part eagerly so a missing object still maps to 404/503
+    # instead of failing halfway through a 206 body.
+    first_start, first_end = byte_ranges[0]
+    try:
+        first_response = _open_media_range(
+            minio,
+            bucket=bucket,
+            object_name=object_name,
+            start=first_start,
+            end=first_end,
+        )
+    except S3Error as e:
+        return _media_error_response(e)
+    except Exception:
+        return jsonify({"error": "Media unavailable"}), 503
+
+    boundary, part_headers, closing, content_length = _build_multipart_framing(
+        headers,
+        byte_ranges,
+        size,
+    )
+
+    def _stream():
+        pending_first = first_response
+        try:
+            for index, (start, end) in enumerate(byte_ranges):
+                yield part_headers[index]
+                if pending_first is not None:
+                    part_response, pending_first = pending_first, None
+                else:
+                    part_response = _open_media_range(
+                        minio,
+                        bucket=bucket,
+                        object_name=object_name,
+                        start=start,
+                        end=end,
+                    )
+                yield from _stream_minio_response(part_response, chunk_size)
+            yield closing
+        finally:
+            if pending_first is not None:
+                pending_first.close()
+                pending_first.release_conn()
+
+    headers = dict(headers)
+    headers["Content-Type"] = f"multipart/byteranges; boundary={boundary}"
+    headers["Content-Length"] = str(content_length)
+
+    return Response(
+        stream_with_context(_stream()),
+        status=206,
+        headers=headers,
+        direct_passthrough=True,
+    )
+
+
 @main_bp.route("/media/<path:object_name>", methods=["GET", "HEAD"])
 def get_media(object_name: str):
     bucket = current_app.config["MINIO_BUCKET"]
@@ -183,15 +432,26 @@ def get_media(object_name: str):
     if normalized_object_name.startswith("static/"):
         return current_app.send_static_file(normalized_object_name[len("static/"):])
 
-    try:
-        stat = minio.stat_object(
-            bucket_name=bucket,
-            object_name=normalized_object_name,
-        )
-    except S3Error as e:
-        return _media_error_response(e)
-    except Exception:
-        return jsonify({"error": "Media unavailable"}), 503
+    # Hot small objects (avatars, thumbnails) are answered from the process
+    # cache; within the revalidation window MinIO is not contacted at all.
+    cached = media_cache.get(normalized_object_name)
+    stat = cached
+    if cached is None:
+        try:
+            stat = minio.stat_object(
+                bucket_name=bucket,
+                object_name=normalized_object_name,
+            )
+        except S3Error as e:
+            media_cache.invalidate(normalized_object_name)
+            return _media_error_response(e)
+        except Exception:
+            return jsonify({"error": "Media unavailable"}), 503
+        if media_cache.is_cacheable_size(getattr(stat, "size", None)):
+            cached = media_cache.get(
+                normalized_object_name,
+                etag=getattr(stat, "etag", None),
+            )
 
     headers = _build_media_headers(
         content_type=getattr(stat, "content_type", None) or "application/octet-stream",
@@ -211,6 +471,67 @@ def get_media(object_name: str):
     if request.method == "HEAD":
         return Response(status=200, headers=headers)
 
+    chunk_size = max(
+        int(current_app.config.get("MEDIA_STREAM_CHUNK_SIZE", 256 * 1024)),
+        1024,
+    )
+
+    size = getattr(stat, "size", None)
+    byte_ranges = None
+    if _if_range_allows_partial(
+        request.headers.get("If-Range"),
+        headers.get("ETag"),
+        getattr(stat, "last_modified", None),
+    ):
+        byte_ranges = _resolve_byte_ranges(request.headers.get("Range"), size)
+
+    if byte_ranges is _RANGE_NOT_SATISFIABLE:
+        return _media_range_not_satisfiable_response(headers, size)
+    if byte_ranges and cached is not None:
+        return _cached_media_range_response(
+            cached,
+            headers=headers,
+            byte_ranges=byte_ranges,
+        )
+    if byte_ranges and len(byte_ranges) == 1:
+        return _media_single_range_response(
+            minio,
+            bucket=bucket,
+            object_name=normalized_object_name,
+            headers=headers,
+            byte_range=byte_ranges[0],
+            size=int(size),
+            chunk_size=chunk_size,
+        )
+    if byte_ranges:
+        return _media_multi_range_response(
+            minio,
+            bucket=bucket,
+            object_name=normalized_object_name,
+            headers=headers,
+            byte_ranges=byte_ranges,
+            size=int(size),
+            chunk_size=chunk_size,
+        )
+
+    if cached is not None:
+        return Response(cached.body, status=200, headers=headers)
+
+    if media_cache.is_cacheable_size(size):
+        try:
+            body = _read_cacheable_media(
+                minio,
+                bucket=bucket,
+                object_name=normalized_object_name,
+                stat=stat,
+                chunk_size=chunk_size,
+            )
+        except S3Error as e:
+            return _media_error_response(e)
+        except Exception:
+            return jsonify({"error": "Media unavailable"}), 503
+        return Response(body, status=200, headers=headers)
+
     try:
         minio_response = minio.get_object(
             bucket_name=bucket,
@@ -223,21 +544,8 @@ def get_media(object_name: str):
     except Exception:
         return jsonify({"error": "Media unavailable"}), 503
 
-    chunk_size = max(
-        int(current_app.config.get("MEDIA_STREAM_CHUNK_SIZE", 256 * 1024)),
-        1024,
-    )
-
-    def _stream():
-        try:
-            for chunk in minio_response.stream(chunk_size):
-                yield chunk
-        finally:
-            minio_response.close()
-            minio_response.release_conn()
-
     return Response(
-        stream_with_context(_stream()),
+        stream_with_context(_stream_minio_response(minio_response, chunk_size)),
         status=200,
         headers=headers,
         direct_passthrough=True,
@@ -7,7 +7,9 @@ from app.services.post_service import (
     get_post,
     delete_post_by_username,
     get_posts,
+    resolve_include_total,
 )
+from app.services import timeline_service
 
 post_bp = Blueprint("posts", __name__)
 
@@ -32,26 +34,6 @@ def _parse_followers_only(value):
     raise ValueError("followers_only must be a boolean")
 
 
-def _parse_include_total(value):
-    if value is None:
-        return True
-
-    if isinstance(value, bool):
-        return value
-
-    if isinstance(value, (int, float)):
-        return bool(value)
-
-    if isinstance(value, str):
-        normalized = value.strip().lower()
-        if normalized in {"true", "1", "yes", "on"}:
-            return True
-        if normalized in {"false", "0", "no", "off"}:
-            return False
-
-    raise ValueError("include_total must be a boolean")
-
-
 def _parse_optional_post_id(value):
     if value is None:
         return None
@@ -156,17 +138,33 @@ def list_posts():
     viewer_username = get_jwt_identity()
     page = request.args.get("page", default=1, type=int)
     limit = request.args.get("limit", default=10, type=int)
+    # Any cursor parameter, even empty for the first page, selects keyset mode.
+    cursor = request.args.get("cursor")
     try:
-        include_total = _parse_include_total(request.args.get("include_total"))
+        include_total = resolve_include_total(cursor, request.args.get("include_total"))
+        data = get_posts(
+            page,
+            limit,
+            viewer_username=viewer_username,
+            include_total=include_total,
+            cursor=cursor,
+        )
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
 
-    data = get_posts(
-        page,
-        limit,
-        viewer_username=viewer_username,
-        include_total=include_total,
-    )
+    return jsonify(data), 200
+
+
+@post_bp.route("/timeline", methods=["GET"])
+@jwt_required()
+def home_timeline():
+    username = get_jwt_identity()
+    page = request.args.get("page", default=1, type=int)
+    limit = request.args.get("limit", default=10, type=int)
+    try:
+        data = timeline_service.get_home_timeline(username, page, limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
     return jsonify(data), 200
 
 
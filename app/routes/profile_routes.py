@@ -2,6 +2,7 @@ from flask import Blueprint, jsonify, request
 from flask_jwt_extended import get_jwt_identity, jwt_required
 
 from app.services import profile_service
+from app.services.post_service import InvalidCursorError, resolve_include_total
 
 
 profile_bp = Blueprint("profiles", __name__)
@@ -98,6 +99,11 @@ def get_profile_posts(username):
     viewer_username = get_jwt_identity()
     page = request.args.get("page", default=1, type=int)
     limit = request.args.get("limit", default=10, type=int)
+    cursor = request.args.get("cursor")
+    try:
+        include_total = resolve_include_total(cursor, request.args.get("include_total"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     try:
         data = profile_service.get_profile_posts(
@@ -105,7 +111,11 @@ def get_profile_posts(username):
             page=page,
             limit=limit,
             viewer_username=viewer_username,
+            include_total=include_total,
+            cursor=cursor,
         )
         return jsonify(data), 200
+    except InvalidCursorError as e:
+        return jsonify({"error": str(e)}), 400
     except ValueError as e:
         return jsonify({"error": str(e)}), 404
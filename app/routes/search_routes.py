@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import get_jwt_identity, jwt_required
-from app.services.search_service import search_users, search_posts, search_all
+from app.services.search_service import search_users, search_posts, search_all, typeahead_users
 
 search_bp = Blueprint("search", __name__)
 
@@ -53,3 +53,17 @@ def api_search_all():
 
     data = search_all(query, page, limit, viewer_username=viewer_username)
     return jsonify(data), 200
+
+
+@search_bp.route("/search/typeahead", methods=["GET"])
+@jwt_required(optional=True)
+def api_search_typeahead():
+    viewer_username = get_jwt_identity()
+    query = request.args.get("q", default="", type=str).strip()
+    limit = request.args.get("limit", default=10, type=int)
+
+    if not query:
+        return jsonify({"error": "Query parameter 'q' is required"}), 400
+
+    data = typeahead_users(query, limit, viewer_username=viewer_username)
+    return jsonify(data), 200
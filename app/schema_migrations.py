@@ -0,0 +1,157 @@
+import hashlib
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterable
+
+from sqlalchemy import text
+
+from app.performance_indexes import MANAGED_INDEX_SPECS
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_STATE_NAME = "schema_fingerprint"
+# Key of the PostgreSQL advisory lock / MySQL named lock held while migrating.
+MIGRATION_LOCK_ID = 0x5EC5C4E3
+MIGRATION_LOCK_NAME = "schema_migrations"
+MIGRATION_LOCK_TIMEOUT_SECONDS = 600
+
+
+@dataclass(frozen=True)
+class MigrationStep:
+    migration_id: str
+    apply: Callable[[], None]
+    # Repeatable steps (create_all, managed indexes) run again whenever the
+    # fingerprint changes; the others run once and are recorded by id.
+    repeatable: bool = False
+
+
+def compute_fingerprint(metadata, steps: Iterable[MigrationStep]) -> str:
+    """Hash of the models, managed indexes and migration ids, computed without the database.
+
+    Any model, column, index or migration change gives a new value, which makes
+    the next startup (or migrate_schema.py) run the migrations again.
+    """
+    digest = hashlib.sha256()
+    for step in steps:
+        digest.update(f"step:{step.migration_id}:{int(step.repeatable)}\n".encode())
+    for table in sorted(metadata.tables.values(), key=lambda item: item.name):
+        digest.update(f"table:{table.name}\n".encode())
+        for column in table.columns:
+            digest.update(
+                f"column:{column.name}:{column.type!r}:{column.nullable}:{column.primary_key}\n".encode()
+            )
+        for index in sorted(table.indexes, key=lambda item: item.name or ""):
+            columns = ",".join(column.name for column in index.columns)
+            digest.update(f"index:{index.name}:{columns}:{index.unique}\n".encode())
+    for spec in MANAGED_INDEX_SPECS:
+        digest.update(f"managed_index:{spec.index_name}:{spec.ddl_target}:{spec.dialects}\n".encode())
+    return digest.hexdigest()
+
+
+def read_fingerprint(engine) -> str | None:
+    """The recorded fingerprint, in one query; None before the first migration."""
+    try:
+        with engine.connect() as connection:
+            return connection.execute(
+                text("SELECT value FROM schema_state WHERE name = :name"),
+                {"name": FINGERPRINT_STATE_NAME},
+            ).scalar()
+    except Exception:
+        # Missing table on a fresh database.
+        return None
+
+
+@contextmanager
+def migration_lock(engine):
+    """Holds a database-wide lock so only one process migrates at a time.
+
+    Every worker of a fresh deploy sees the same stale fingerprint; the others
+    wait here and should read the fingerprint again once they get the lock.
+    PostgreSQL uses an advisory lock and MySQL a named lock, each on its own
+    connection. SQLite runs on one host and takes none.
+    """
+    dialect = engine.dialect.name
+    if dialect not in {"postgresql", "mysql", "mariadb"}:
+        yield
+        return
+
+    with engine.connect() as connection:
+        if dialect == "postgresql":
+            connection.execute(text("SELECT pg_advisory_lock(:lock_id)"), {"lock_id": MIGRATION_LOCK_ID})
+        else:
+            acquired = connection.execute(
+                text("SELECT GET_LOCK(:name, :timeout)"),
+                {"name": MIGRATION_LOCK_NAME, "timeout": MIGRATION_LOCK_TIMEOUT_SECONDS},
+            ).scalar()
+            if acquired != 1:
+                raise RuntimeError("Timed out waiting for the schema migration lock.")
+        try:
+            yield
+        finally:
+            if dialect == "postgresql":
+                connection.execute(text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": MIGRATION_LOCK_ID})
+            else:
+                connection.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": MIGRATION_LOCK_NAME})
+            connection.commit()
+
+
+def applied_migration_ids(session) -> set[str]:
+    return {
+        row[0]
+        for row in session.execute(text("SELECT migration_id FROM schema_migrations"))
+    }
+
+
+def apply_migrations(
+    session,
+    steps: Iterable[MigrationStep],
+    fingerprint: str,
+    *,
+    force: bool = False,
+) -> list[str]:
+    """Runs repeatable steps and steps missing from the ledger, then stores ``fingerprint``.
+
+    With ``force`` every step runs. The first step must create the ledger
+    tables (db.create_all does). Returns the ids of the steps that ran.
+    """
+    ran = []
+    applied = None
+    for step in steps:
+        if applied is None and not step.repeatable:
+            applied = applied_migration_ids(session)
+        if not step.repeatable and step.migration_id in applied and not force:
+            continue
+        step.apply()
+        ran.append(step.migration_id)
+        if not step.repeatable and step.migration_id not in applied:
+            # Insert-if-absent, in case a process without the lock got here first.
+            session.execute(
+                text(
+                    "INSERT INTO schema_migrations (migration_id, applied_at) "
+                    "SELECT :migration_id, :applied_at WHERE NOT EXISTS "
+                    "(SELECT 1 FROM schema_migrations WHERE migration_id = :migration_id)"
+                ),
+                {"migration_id": step.migration_id, "applied_at": datetime.utcnow()},
+            )
+            session.commit()
+            applied.add(step.migration_id)
+
+    now = datetime.utcnow()
+    updated = session.execute(
+        text("UPDATE schema_state SET value = :value, updated_at = :now WHERE name = :name"),
+        {"value": fingerprint, "now": now, "name": FINGERPRINT_STATE_NAME},
+    ).rowcount
+    if not updated:
+        session.execute(
+            text(
+                "INSERT INTO schema_state (name, value, updated_at) "
+                "SELECT :name, :value, :now WHERE NOT EXISTS "
+                "(SELECT 1 FROM schema_state WHERE name = :name)"
+            ),
+            {"value": fingerprint, "now": now, "name": FINGERPRINT_STATE_NAME},
+        )
+    session.commit()
+    logger.info("schema_migrations_applied steps=%s fingerprint=%s", ",".join(ran), fingerprint[:12])
+    return ran
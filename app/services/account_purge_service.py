@@ -0,0 +1,369 @@
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+
+from flask import current_app
+
+from app.extensions import redis_client as redis_module
+from app.repositories import message_repository
+from app.services import async_task_service
+
+logger = logging.getLogger(__name__)
+
+# username -> hash with status, phase, counters and timestamps of its purge.
+ACCOUNT_PURGE_JOB_KEY_PREFIX = "account_purge:"
+# Purges by last update time, for the admin listing.
+ACCOUNT_PURGE_JOBS_KEY = "account_purge:jobs"
+
+# Work lists are sorted sets drained from the front one batch at a time, so a
+# purge interrupted by a worker restart continues where it stopped.
+WORK_PHASES = ("private_inboxes", "group_inboxes", "message_ids")
+PHASES = ("collect", "private_inboxes", "group_inboxes", "own_keys", "message_ids", "done")
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+# The lock holds a per-run token; it is only refreshed or released by the run
+# that still owns it, never by one whose lock expired and was taken over.
+_REFRESH_LOCK_LUA = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_LOCK_LUA = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class PurgeLockLost(Exception):
+    """Another run took over the purge after this run's lock expired."""
+
+
+def _client():
+    return redis_module.redis_client
+
+
+def _job_key(username: str) -> str:
+    return f"{ACCOUNT_PURGE_JOB_KEY_PREFIX}{username}"
+
+
+def _work_key(username: str, phase: str) -> str:
+    return f"{ACCOUNT_PURGE_JOB_KEY_PREFIX}{username}:{phase}"
+
+
+def _group_ids_key(username: str, kind: str) -> str:
+    return f"{ACCOUNT_PURGE_JOB_KEY_PREFIX}{username}:{kind}_group_ids"
+
+
+def _lock_key(username: str) -> str:
+    return f"{ACCOUNT_PURGE_JOB_KEY_PREFIX}{username}:lock"
+
+
+def _batch_size() -> int:
+    return max(int(current_app.config.get("ACCOUNT_PURGE_BATCH_SIZE", 200)), 1)
+
+
+def _lock_seconds() -> int:
+    return max(int(current_app.config.get("ACCOUNT_PURGE_LOCK_SECONDS", 300)), 10)
+
+
+def _job_ttl_seconds() -> int:
+    return max(int(current_app.config.get("ACCOUNT_PURGE_JOB_TTL_SECONDS", 7 * 24 * 60 * 60)), 60)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _text(value):
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def _touch(pipe, username: str, fields: dict):
+    fields = dict(fields, updated_at=_now())
+    pipe.hset(_job_key(username), mapping=fields)
+    pipe.zadd(ACCOUNT_PURGE_JOBS_KEY, {username: time.time()})
+    ttl = _job_ttl_seconds()
+    pipe.expire(_job_key(username), ttl)
+    for phase in WORK_PHASES:
+        pipe.expire(_work_key(username, phase), ttl)
+    for kind in ("own", "sender"):
+        pipe.expire(_group_ids_key(username, kind), ttl)
+
+
+def _update(username: str, **fields):
+    pipe = _client().pipeline()
+    _touch(pipe, username, fields)
+    pipe.execute()
+
+
+def start_purge(username: str, *, group_ids=None, source: str) -> bool:
+    """Records a purge job for a deleted account and hands it to the task worker.
+
+    Runs it inline when the queue is unavailable and inline fallback is
+    allowed. Returns False when the purge could not be started; the job stays
+    queued and can be resumed from the admin API.
+    """
+    client = _client()
+    pipe = client.pipeline()
+    pipe.delete(
+        _job_key(username),
+        *(_work_key(username, phase) for phase in WORK_PHASES),
+        _group_ids_key(username, "own"),
+        _group_ids_key(username, "sender"),
+    )
+    group_ids = [int(group_id) for group_id in group_ids or ()]
+    if group_ids:
+        pipe.sadd(_group_ids_key(username, "own"), *group_ids)
+    _touch(pipe, username, {
+        "status": STATUS_QUEUED,
+        "phase": PHASES[0],
+        "source": source,
+        "created_at": _now(),
+        "error": "",
+    })
+    pipe.execute()
+    return _dispatch(username, source=source)
+
+
+def resume_purge(username: str, *, source: str) -> bool:
+    """Re-queues an unfinished purge; it continues from its recorded phase."""
+    status = _text(_client().hget(_job_key(username), "status"))
+    if status is None or status == STATUS_DONE:
+        return False
+    _update(username, status=STATUS_QUEUED, error="")
+    return _dispatch(username, source=source)
+
+
+def _dispatch(username: str, *, source: str) -> bool:
+    if async_task_service.enqueue_account_purge_task(username=username, source=source):
+        return True
+    if not async_task_service.should_fallback_inline():
+        logger.warning("account_purge_not_queued username=%s source=%s", username, source)
+        return False
+    try:
+        run_purge(username)
+    except Exception:
+        # The account is already gone; the job records the failure for a resume.
+        logger.exception("account_purge_inline_failed username=%s", username)
+        return False
+    return True
+
+
+def run_purge(username: str) -> dict:
+    """Runs (or continues) the purge of ``username`` and returns its progress.
+
+    A Redis lock keeps concurrent workers off the same job. Every batch is
+    removed from its work list only after it has been purged, so a failure
+    repeats at most one batch.
+    """
+    client = _client()
+    lock_token = uuid.uuid4().hex
+    if not client.set(_lock_key(username), lock_token, nx=True, ex=_lock_seconds()):
+        logger.info("account_purge_locked username=%s", username)
+        return get_purge_progress(username)
+
+    try:
+        phase = _text(client.hget(_job_key(username), "phase")) or PHASES[0]
+        if phase == "done":
+            return get_purge_progress(username)
+        _update(username, status=STATUS_RUNNING, started_at=_now())
+        started_at = time.perf_counter()
+        for phase in PHASES[PHASES.index(phase):]:
+            _refresh_lock(username, lock_token)
+            if phase != "done":
+                _update(username, phase=phase)
+            _PHASE_RUNNERS[phase](username, lock_token)
+        _update(
+            username,
+            status=STATUS_DONE,
+            phase="done",
+            finished_at=_now(),
+            duration_ms=int((time.perf_counter() - started_at) * 1000),
+        )
+        logger.info("account_purge_done username=%s", username)
+    except PurgeLockLost:
+        # The run that took over owns the job status now.
+        logger.warning("account_purge_lock_lost username=%s", username)
+    except Exception as exc:
+        _update(username, status=STATUS_FAILED, error=str(exc)[:500])
+        raise
+    finally:
+        _release_lock(username, lock_token)
+    return get_purge_progress(username)
+
+
+def _refresh_lock(username: str, lock_token: str):
+    client = _client()
+    key = _lock_key(username)
+    try:
+        refreshed = client.eval(_REFRESH_LOCK_LUA, 1, key, lock_token, _lock_seconds())
+    except Exception:
+        refreshed = _text(client.get(key)) == lock_token and client.expire(key, _lock_seconds())
+    if not refreshed:
+        raise PurgeLockLost(username)
+
+
+def _release_lock(username: str, lock_token: str):
+    client = _client()
+    key = _lock_key(username)
+    try:
+        client.eval(_RELEASE_LOCK_LUA, 1, key, lock_token)
+    except Exception:
+        try:
+            if _text(client.get(key)) == lock_token:
+                client.delete(key)
+        except Exception:
+            # The lock expires on its own.
+            logger.warning("account_purge_lock_release_failed username=%s", username)
+
+
+def _collect(username: str, _lock_token: str):
+    client = _client()
+    own_group_ids = [int(group_id) for group_id in client.smembers(_group_ids_key(username, "own"))]
+    targets = message_repository.collect_purge_targets(username, group_ids=own_group_ids)
+
+    # The work lists are stored before the rows they were partly read from go.
+    pipe = client.pipeline()
+    for phase in WORK_PHASES:
+        if targets[phase]:
+            # Equal scores keep the members in lexical order.
+            pipe.zadd(_work_key(username, phase), {member: 0 for member in targets[phase]})
+    if targets["own_group_ids"]:
+        pipe.sadd(_group_ids_key(username, "own"), *targets["own_group_ids"])
+    if targets["sender_group_ids"]:
+        pipe.sadd(_group_ids_key(username, "sender"), *targets["sender_group_ids"])
+    _touch(pipe, username, {
+        **{f"{phase}_total": len(targets[phase]) for phase in WORK_PHASES},
+        **{f"{phase}_done": 0 for phase in WORK_PHASES},
+    })
+    pipe.execute()
+    _update(username, deleted_rows=message_repository.delete_message_rows_for_user(username))
+
+
+def _queue_message_ids(username: str, message_ids):
+    if not message_ids:
+        return
+    client = _client()
+    added = client.zadd(_work_key(username, "message_ids"), {message_id: 0 for message_id in message_ids})
+    if added:
+        client.hincrby(_job_key(username), "message_ids_total", int(added))
+
+
+def _drain(username: str, phase: str, lock_token: str, purge_batch):
+    client = _client()
+    work_key = _work_key(username, phase)
+    batch_size = _batch_size()
+    while True:
+        batch = [_text(member) for member in client.zrange(work_key, 0, batch_size - 1)]
+        if not batch:
+            return
+        purge_batch(batch)
+        pipe = client.pipeline()
+        pipe.zrem(work_key, *batch)
+        pipe.hincrby(_job_key(username), f"{phase}_done", len(batch))
+        _touch(pipe, username, {})
+        pipe.execute()
+        _refresh_lock(username, lock_token)
+
+
+def _purge_private_inboxes(username: str, lock_token: str):
+    _drain(
+        username,
+        "private_inboxes",
+        lock_token,
+        lambda owners: _queue_message_ids(
+            username,
+            message_repository.purge_private_inboxes(username, owners),
+        ),
+    )
+
+
+def _purge_group_inboxes(username: str, lock_token: str):
+    _drain(
+        username,
+        "group_inboxes",
+        lock_token,
+        lambda members: _queue_message_ids(
+            username,
+            message_repository.purge_group_inboxes(username, members),
+        ),
+    )
+
+
+def _purge_own_keys(username: str, _lock_token: str):
+    own_group_ids = [int(group_id) for group_id in _client().smembers(_group_ids_key(username, "own"))]
+    _queue_message_ids(
+        username,
+        message_repository.purge_user_message_keys(username, own_group_ids),
+    )
+
+
+def _purge_message_ids(username: str, lock_token: str):
+    sender_group_ids = [
+        int(group_id) for group_id in _client().smembers(_group_ids_key(username, "sender"))
+    ]
+    _drain(
+        username,
+        "message_ids",
+        lock_token,
+        lambda message_ids: message_repository.purge_message_ids(message_ids, sender_group_ids),
+    )
+
+
+def _finish(username: str, _lock_token: str):
+    _client().delete(_group_ids_key(username, "own"), _group_ids_key(username, "sender"))
+
+
+_PHASE_RUNNERS = {
+    "collect": _collect,
+    "private_inboxes": _purge_private_inboxes,
+    "group_inboxes": _purge_group_inboxes,
+    "own_keys": _purge_own_keys,
+    "message_ids": _purge_message_ids,
+    "done": _finish,
+}
+
+
+def get_purge_progress(username: str) -> dict | None:
+    """The job hash of ``username`` with counters as ints; None if there is no job."""
+    raw = _client().hgetall(_job_key(username))
+    if not raw:
+        return None
+    progress = {"username": username}
+    for field, value in raw.items():
+        field, value = _text(field), _text(value)
+        if field.endswith(("_total", "_done", "_rows", "_ms")):
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                pass
+        progress[field] = value
+    return progress
+
+
+def list_purges(limit: int = 50) -> list[dict]:
+    """Most recently updated purge jobs first."""
+    client = _client()
+    usernames = [
+        _text(username)
+        for username in client.zrange(ACCOUNT_PURGE_JOBS_KEY, 0, -1)
+    ]
+    jobs = []
+    for username in reversed(usernames):
+        progress = get_purge_progress(username)
+        if progress is None:
+            # Expired job; drop it from the listing.
+            client.zrem(ACCOUNT_PURGE_JOBS_KEY, username)
+            continue
+        jobs.append(progress)
+        if len(jobs) >= limit:
+            break
+    return jobs
@@ -13,10 +13,10 @@ from app.models.comment_model import Comment
 from app.models.follow_model import Follow
 from app.models.post_model import Post
 from app.models.user_model import User
-from app.models.profile_model import Profile
 from app.models.vote_model import Vote
 from app.repositories import user_repository
 from app.services import async_task_service
+from app.services import author_card_cache
 from app.services import report_service
 from app.repositories.activity_notification_repository import (
     create_notification,
@@ -48,15 +48,14 @@ def _build_profile_image_url(image_object_name):
     return f"/media/{image_object_name}"
 
 
-def _serialize_notification(notif, user_by_id, profile_by_user_id):
-    actor = user_by_id.get(notif.actor_id)
-    profile = profile_by_user_id.get(notif.actor_id)
+def _serialize_notification(notif, cards):
+    card = cards.get(notif.actor_id)
 
-    actor_username = actor.username if actor else f"user-{notif.actor_id}"
-    actor_name = profile.name if profile else actor_username
+    actor_username = card["username"] if card else f"user-{notif.actor_id}"
+    actor_name = card["name"] if card and card["name"] is not None else actor_username
     actor_image = None
-    if profile and profile.image_object_name:
-        actor_image = _build_profile_image_url(profile.image_object_name)
+    if card and card["image_object_name"]:
+        actor_image = _build_profile_image_url(card["image_object_name"])
 
     extra = None
     if notif.extra:
@@ -72,13 +71,9 @@ def _serialize_notification(notif, user_by_id, profile_by_user_id):
             "id": notif.actor_id,
             "username": actor_username,
             "name": actor_name,
-            "badge": actor.badge if actor else None,
+            "badge": card["badge"] if card else None,
             "profile_image_url": actor_image,
-            "profile_image_shape": (
-                profile.profile_image_shape
-                if profile and profile.profile_image_shape
-                else "circle"
-            ),
+            "profile_image_shape": card["profile_image_shape"] if card else "circle",
         },
         "target_type": notif.target_type,
         "target_id": notif.target_id,
@@ -90,17 +85,6 @@ def _serialize_notification(notif, user_by_id, profile_by_user_id):
     }
 
 
-def _build_author_maps(author_ids):
-    if not author_ids:
-        return {}, {}
-    users = User.query.filter(User.id.in_(author_ids)).all()
-    profiles = Profile.query.filter(Profile.user_id.in_(author_ids)).all()
-    return (
-        {u.id: u for u in users},
-        {p.user_id: p for p in profiles},
-    )
-
-
 def get_activity_notifications(username, page, limit, unread_only=False):
     user = user_repository.get_by_username(username)
     if not user:
@@ -111,14 +95,14 @@ def get_activity_notifications(username, page, limit, unread_only=False):
 
     total, items = get_notifications_page(user.id, page, limit, unread_only=unread_only)
     actor_ids = {n.actor_id for n in items}
-    user_by_id, profile_by_user_id = _build_author_maps(actor_ids)
+    cards = author_card_cache.get_cards(actor_ids)
 
     return {
         "page": page,
         "limit": limit,
         "total": total,
         "notifications": [
-            _serialize_notification(n, user_by_id, profile_by_user_id) for n in items
+            _serialize_notification(n, cards) for n in items
         ],
     }
 
@@ -345,8 +329,8 @@ def _maybe_emit_post_engagement_milestone(
     )
     db.session.commit()
 
-    user_by_id, profile_by_user_id = _build_author_maps({post_owner.id})
-    payload = _serialize_notification(notif, user_by_id, profile_by_user_id)
+    cards = author_card_cache.get_cards({post_owner.id})
+    payload = _serialize_notification(notif, cards)
     _emit_activity_notification(post_owner.username, payload)
 
 
@@ -410,8 +394,8 @@ def _notify_follow_sync(actor_username, target_username):
     )
     db.session.commit()
 
-    user_by_id, profile_by_user_id = _build_author_maps({actor.id})
-    payload = _serialize_notification(notif, user_by_id, profile_by_user_id)
+    cards = author_card_cache.get_cards({actor.id})
+    payload = _serialize_notification(notif, cards)
     _emit_activity_notification(target_username, payload)
 
 
@@ -428,8 +412,8 @@ def _notify_unfollow_sync(actor_username, target_username):
     )
     db.session.commit()
 
-    user_by_id, profile_by_user_id = _build_author_maps({actor.id})
-    payload = _serialize_notification(notif, user_by_id, profile_by_user_id)
+    cards = author_card_cache.get_cards({actor.id})
+    payload = _serialize_notification(notif, cards)
     _emit_activity_notification(target_username, payload)
 
 
@@ -504,9 +488,9 @@ def _notify_comment_sync(
             created_notifications.append((recipient, notif))
         db.session.commit()
 
-        user_by_id, profile_by_user_id = _build_author_maps({actor.id})
+        cards = author_card_cache.get_cards({actor.id})
         for recipient, notif in created_notifications:
-            payload = _serialize_notification(notif, user_by_id, profile_by_user_id)
+            payload = _serialize_notification(notif, cards)
             _emit_activity_notification(recipient.username, payload)
 
     if post_owner and post_owner.id == post.author_id:
@@ -547,8 +531,8 @@ def _notify_vote_sync(actor_username, target_type, target_id, value):
     )
     db.session.commit()
 
-    user_by_id, profile_by_user_id = _build_author_maps({actor.id})
-    payload = _serialize_notification(notif, user_by_id, profile_by_user_id)
+    cards = author_card_cache.get_cards({actor.id})
+    payload = _serialize_notification(notif, cards)
     _emit_activity_notification(recipient.username, payload)
 
     if target_type == "post" and value == 1:
@@ -577,8 +561,8 @@ def _notify_story_mention_sync(actor_username, target_username, story_id):
     )
     db.session.commit()
 
-    user_by_id, profile_by_user_id = _build_author_maps({actor.id})
-    payload = _serialize_notification(notif, user_by_id, profile_by_user_id)
+    cards = author_card_cache.get_cards({actor.id})
+    payload = _serialize_notification(notif, cards)
     _emit_activity_notification(target.username, payload)
 
 
@@ -605,8 +589,8 @@ def _notify_story_reply_sync(actor_username, target_username, story_id, reply_pr
     )
     db.session.commit()
 
-    user_by_id, profile_by_user_id = _build_author_maps({actor.id})
-    payload = _serialize_notification(notif, user_by_id, profile_by_user_id)
+    cards = author_card_cache.get_cards({actor.id})
+    payload = _serialize_notification(notif, cards)
     _emit_activity_notification(target.username, payload)
 
 
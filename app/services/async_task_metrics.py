@@ -0,0 +1,163 @@
+import time
+from threading import Lock
+
+
+LATENCY_HISTOGRAM_PREFIX = "latency_hist:"
+LATENCY_HISTOGRAM_BUCKETS_MS = (
+    1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000,
+)
+
+# Pending writes per metrics hash key: {"counters": {field: delta}, "gauges": {field: value}}
+_pending: dict[str, dict] = {}
+_pending_lock = Lock()
+_last_flush_at = time.monotonic()
+
+
+def _bucket_for(metrics_key: str) -> dict:
+    bucket = _pending.get(metrics_key)
+    if bucket is None:
+        bucket = {"counters": {}, "gauges": {}}
+        _pending[metrics_key] = bucket
+    return bucket
+
+
+def increment(metrics_key: str, field: str, amount: int = 1):
+    if not field:
+        return
+    with _pending_lock:
+        counters = _bucket_for(metrics_key)["counters"]
+        counters[field] = counters.get(field, 0) + int(amount)
+
+
+def set_gauge(metrics_key: str, field: str, value):
+    if not field or value is None:
+        return
+    with _pending_lock:
+        _bucket_for(metrics_key)["gauges"][field] = value
+
+
+def latency_bucket_label(duration_ms: float) -> str:
+    for bound in LATENCY_HISTOGRAM_BUCKETS_MS:
+        if duration_ms <= bound:
+            return str(bound)
+    return "inf"
+
+
+def observe_latency(metrics_key: str, histogram: str, task_type: str | None, duration_ms: float):
+    # Buckets are plain counters in the metrics hash so every process
+    # contributes to the same histogram:
+    # latency_hist:<histogram>:<task_type>:<bucket|count|sum_ms>.
+    prefix = f"{LATENCY_HISTOGRAM_PREFIX}{histogram}:{task_type or 'unknown'}"
+    duration_ms = max(0.0, float(duration_ms))
+    with _pending_lock:
+        counters = _bucket_for(metrics_key)["counters"]
+        for field, amount in (
+            (f"{prefix}:{latency_bucket_label(duration_ms)}", 1),
+            (f"{prefix}:count", 1),
+            (f"{prefix}:sum_ms", int(round(duration_ms))),
+        ):
+            counters[field] = counters.get(field, 0) + amount
+
+
+def flush_due(interval_seconds: float) -> bool:
+    return time.monotonic() - _last_flush_at >= interval_seconds
+
+
+def flush(client) -> int:
+    """Writes every buffered counter and gauge in one pipeline.
+
+    Returns the number of fields written. On failure the batch is merged back
+    so the deltas are retried on the next flush instead of being lost.
+    """
+    global _last_flush_at
+
+    with _pending_lock:
+        batch = {key: value for key, value in _pending.items() if value["counters"] or value["gauges"]}
+        _pending.clear()
+        _last_flush_at = time.monotonic()
+    if not batch:
+        return 0
+
+    written = 0
+    try:
+        pipe = client.pipeline()
+        for metrics_key, bucket in batch.items():
+            for field, amount in bucket["counters"].items():
+                pipe.hincrby(metrics_key, field, amount)
+            if bucket["gauges"]:
+                pipe.hset(metrics_key, mapping=bucket["gauges"])
+            written += len(bucket["counters"]) + len(bucket["gauges"])
+        pipe.execute()
+    except Exception:
+        with _pending_lock:
+            for metrics_key, bucket in batch.items():
+                pending = _bucket_for(metrics_key)
+                for field, amount in bucket["counters"].items():
+                    pending["counters"][field] = pending["counters"].get(field, 0) + amount
+                for field, value in bucket["gauges"].items():
+                    pending["gauges"].setdefault(field, value)
+        raise
+    return written
+
+
+def histogram_percentile(buckets: dict, total: int, fraction: float):
+    if total <= 0:
+        return None
+    threshold = total * fraction
+    seen = 0
+    for bound in LATENCY_HISTOGRAM_BUCKETS_MS:
+        seen += buckets.get(str(bound), 0)
+        if seen >= threshold:
+            return bound
+    return None
+
+
+def _summarize_buckets(buckets: dict) -> dict:
+    buckets = dict(buckets)
+    total = buckets.pop("count", 0)
+    sum_ms = buckets.pop("sum_ms", 0)
+    return {
+        "count": total,
+        "avg_ms": round(sum_ms / total, 2) if total else 0.0,
+        # Percentiles are bucket upper bounds; None means above the largest bucket.
+        "p50_ms": histogram_percentile(buckets, total, 0.50),
+        "p95_ms": histogram_percentile(buckets, total, 0.95),
+        "p99_ms": histogram_percentile(buckets, total, 0.99),
+        "buckets": {
+            bucket: buckets[bucket]
+            for bucket in [*map(str, LATENCY_HISTOGRAM_BUCKETS_MS), "inf"]
+            if buckets.get(bucket)
+        },
+    }
+
+
+def summarize_latency_histograms(raw_fields: dict) -> dict:
+    # {histogram: {task_type: summary, ..., "all": summary across task types}}
+    grouped: dict = {}
+    for field, value in raw_fields.items():
+        histogram, _, rest = field[len(LATENCY_HISTOGRAM_PREFIX):].partition(":")
+        task_type, _, bucket = rest.rpartition(":")
+        if not histogram or not task_type or not bucket:
+            continue
+        try:
+            count = int(value or 0)
+        except (TypeError, ValueError):
+            continue
+        grouped.setdefault(histogram, {}).setdefault(task_type, {})[bucket] = count
+
+    summary: dict = {}
+    for histogram, task_types in grouped.items():
+        combined: dict = {}
+        for task_type, buckets in task_types.items():
+            summary.setdefault(histogram, {})[task_type] = _summarize_buckets(buckets)
+            for bucket, count in buckets.items():
+                combined[bucket] = combined.get(bucket, 0) + count
+        summary[histogram]["all"] = _summarize_buckets(combined)
+    return summary
+
+
+def reset():
+    global _last_flush_at
+    with _pending_lock:
+        _pending.clear()
+        _last_flush_at = time.monotonic()
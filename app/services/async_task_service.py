@@ -1,24 +1,76 @@
+import atexit
 import json
 import logging
 import os
+import socket
+import threading
 import time
 import uuid
+from contextlib import contextmanager, nullcontext
 from datetime import datetime, timezone
 
 import redis
 from flask import current_app, has_app_context
 
 from app.extensions.redis_client import redis_client
+from app.services import async_task_metrics
 
 
 TASK_TYPE_ACTIVITY_NOTIFICATION = "activity_notification_event"
 TASK_TYPE_GROUP_MESSAGE_SIDE_EFFECTS = "group_message_side_effects"
 TASK_TYPE_MODERATION_CLEANUP = "moderation_cleanup"
 TASK_TYPE_MEDIA_POST_PROCESS = "media_post_process"
+TASK_TYPE_TIMELINE_FAN_OUT = "timeline_fan_out"
+TASK_TYPE_ACCOUNT_PURGE = "account_purge"
+TASK_TYPE_TYPEAHEAD_INDEX_BUILD = "typeahead_index_build"
 
 
 _enqueue_client = None
 
+# Envelope key carrying the processing-list lease of a dequeued task. It is
+# popped before processing so it never ends up in retry or dead-letter copies.
+LEASE_FIELD = "_lease"
+_LEASE_MEMBER_SEPARATOR = "\n"
+
+# Acks ARGV[3..] (raw envelopes finished by this worker), then moves up to
+# ARGV[1] tasks from the queue into the worker's processing list and records a
+# lease (visibility deadline ARGV[2]) for each, atomically.
+DEQUEUE_LEASED_TASKS_LUA = """
+for i = 3, #ARGV do
+    redis.call('LREM', KEYS[2], 1, ARGV[i])
+    redis.call('ZREM', KEYS[3], KEYS[2] .. '\\n' .. ARGV[i])
+end
+local items = {}
+for i = 1, tonumber(ARGV[1]) do
+    local raw = redis.call('LMOVE', KEYS[1], KEYS[2], 'LEFT', 'RIGHT')
+    if not raw then
+        break
+    end
+    redis.call('ZADD', KEYS[3], ARGV[2], KEYS[2] .. '\\n' .. raw)
+    items[#items + 1] = raw
+end
+return items
+"""
+
+# Returns tasks whose lease expired to the head of the queue. A lease whose
+# processing-list entry is already gone (acked late) is simply dropped.
+RECLAIM_EXPIRED_TASKS_LUA = """
+local members = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+local reclaimed = 0
+for _, member in ipairs(members) do
+    local separator = string.find(member, '\\n', 1, true)
+    if separator then
+        local processing_key = string.sub(member, 1, separator - 1)
+        local raw = string.sub(member, separator + 1)
+        if redis.call('LREM', processing_key, 1, raw) > 0 then
+            redis.call('LPUSH', KEYS[2], raw)
+            reclaimed = reclaimed + 1
+        end
+    end
+    redis.call('ZREM', KEYS[1], member)
+end
+return reclaimed
+"""
 
 def _logger():
     if has_app_context():
@@ -104,6 +156,42 @@ def _worker_registry_key() -> str:
     return f"{_queue_name()}:workers"
 
 
+def _processing_list_name(worker_id: str) -> str:
+    return f"{_queue_name()}:processing:{worker_id}"
+
+
+def _leases_key() -> str:
+    return f"{_queue_name()}:leases"
+
+
+def _default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _visibility_timeout_seconds() -> float:
+    value = _config("ASYNC_TASK_VISIBILITY_TIMEOUT_SECONDS", 300)
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        seconds = 300.0
+    return max(1.0, seconds)
+
+
+def lease_renewal_interval_seconds() -> float:
+    # Leases of running tasks are pushed out a full visibility timeout three
+    # times per timeout, so one missed renewal does not expire them.
+    return _visibility_timeout_seconds() / 3
+
+
+def _reaper_interval_seconds() -> float:
+    value = _config("ASYNC_TASK_REAPER_INTERVAL_SECONDS", 5)
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        seconds = 5.0
+    return max(0.0, seconds)
+
+
 def _block_timeout_seconds() -> int:
     value = _config("ASYNC_TASK_WORKER_BLOCK_TIMEOUT_SECONDS", 5)
     try:
@@ -183,25 +271,53 @@ def _enqueue_connect_timeout_seconds() -> float:
     return max(0.1, timeout)
 
 
-def _increment_metric(field: str, amount: int = 1):
-    if not field:
-        return
+def _metrics_flush_interval_seconds() -> float:
+    value = _config("ASYNC_TASK_METRICS_FLUSH_INTERVAL_SECONDS", 5.0)
     try:
-        redis_client.hincrby(_metrics_key(), field, int(amount))
+        seconds = float(value)
+    except (TypeError, ValueError):
+        seconds = 5.0
+    return max(0.0, seconds)
+
+
+def flush_metrics(*, force: bool = False) -> int:
+    # Buffered counters, gauges and histogram buckets go out as one pipeline
+    # at most once per flush interval, piggybacking on whichever call is
+    # recording a metric when the interval elapses.
+    if not force and not async_task_metrics.flush_due(_metrics_flush_interval_seconds()):
+        return 0
+    try:
+        return async_task_metrics.flush(redis_client)
     except Exception:
         # Metrics writes are best-effort and must never block task handling.
-        return
+        return 0
 
 
-def _set_metric(field: str, value):
-    if not field:
-        return
+def _flush_metrics_at_exit():
     try:
-        redis_client.hset(_metrics_key(), field, value)
+        async_task_metrics.flush(redis_client)
     except Exception:
         return
 
 
+atexit.register(_flush_metrics_at_exit)
+
+
+def _increment_metric(field: str, amount: int = 1):
+    async_task_metrics.increment(_metrics_key(), field, amount)
+    flush_metrics()
+
+
+def _set_metric(field: str, value):
+    async_task_metrics.set_gauge(_metrics_key(), field, value)
+    flush_metrics()
+
+
+def _record_latency(histogram: str, task_type: str | None, duration_ms: float):
+    async_task_metrics.observe_latency(_metrics_key(), histogram, task_type, duration_ms)
+    flush_metrics()
+
+
 def _queue_depth_safe(queue_name: str) -> int:
     try:
         return int(redis_client.llen(queue_name) or 0)
@@ -294,6 +410,30 @@ def enqueue_media_post_process_task(
     )
 
 
+def enqueue_timeline_fan_out_task(*, post_id: int, source: str) -> bool:
+    return enqueue_task(
+        task_type=TASK_TYPE_TIMELINE_FAN_OUT,
+        payload={"post_id": int(post_id)},
+        source=source,
+    )
+
+
+def enqueue_account_purge_task(*, username: str, source: str) -> bool:
+    return enqueue_task(
+        task_type=TASK_TYPE_ACCOUNT_PURGE,
+        payload={"username": username},
+        source=source,
+    )
+
+
+def enqueue_typeahead_index_build_task(*, source: str) -> bool:
+    return enqueue_task(
+        task_type=TASK_TYPE_TYPEAHEAD_INDEX_BUILD,
+        payload={},
+        source=source,
+    )
+
+
 def enqueue_task(*, task_type: str, payload: dict, source: str) -> bool:
     if not _is_enabled():
         return False
@@ -309,20 +449,26 @@ def enqueue_task(*, task_type: str, payload: dict, source: str) -> bool:
     }
     queue_name = _queue_name()
 
+    metrics_key = _metrics_key()
     try:
-        _enqueue_redis_client().rpush(queue_name, json.dumps(task_envelope))
-        duration_ms = int((time.perf_counter() - started_at) * 1000)
-        queue_depth = _queue_depth_safe(queue_name)
-        _increment_metric("enqueue_success_total")
-        _increment_metric("enqueue_latency_ms_total", max(0, duration_ms))
-        _set_metric("queue_depth_last", queue_depth)
-        _set_metric("last_enqueue_at", datetime.now(timezone.utc).isoformat())
-        _set_metric("last_enqueue_task_type", task_type)
+        # RPUSH returns the new list length, so the depth gauge is free; every
+        # metric below is buffered and flushed in batches.
+        queue_depth = _enqueue_redis_client().rpush(queue_name, json.dumps(task_envelope))
+        duration_ms = (time.perf_counter() - started_at) * 1000
+        async_task_metrics.increment(metrics_key, "enqueue_success_total")
+        async_task_metrics.increment(metrics_key, "enqueue_latency_ms_total", max(0, int(duration_ms)))
+        async_task_metrics.set_gauge(metrics_key, "queue_depth_last", queue_depth)
+        async_task_metrics.set_gauge(
+            metrics_key, "last_enqueue_at", datetime.now(timezone.utc).isoformat()
+        )
+        async_task_metrics.set_gauge(metrics_key, "last_enqueue_task_type", task_type)
+        _record_latency("enqueue", task_type, duration_ms)
         return True
     except Exception as exc:
-        duration_ms = int((time.perf_counter() - started_at) * 1000)
-        _increment_metric("enqueue_failed_total")
-        _increment_metric("enqueue_latency_ms_total", max(0, duration_ms))
+        duration_ms = (time.perf_counter() - started_at) * 1000
+        async_task_metrics.increment(metrics_key, "enqueue_failed_total")
+        async_task_metrics.increment(metrics_key, "enqueue_latency_ms_total", max(0, int(duration_ms)))
+        _record_latency("enqueue", task_type, duration_ms)
         _logger().warning(
             "async_task_enqueue_failed type=%s source=%s queue=%s error=%s",
             task_type,
@@ -333,17 +479,44 @@ def enqueue_task(*, task_type: str, payload: dict, source: str) -> bool:
         return False
 
 
-def process_one_pending_task(*, block_timeout_seconds: int | None = None) -> bool:
-    task = _dequeue_task(block_timeout_seconds=block_timeout_seconds)
+_last_reclaim_at = 0.0
+
+
+def process_one_pending_task(
+    *,
+    block_timeout_seconds: int | None = None,
+    worker_id: str | None = None,
+) -> bool:
+    global _last_reclaim_at
+
+    now = time.monotonic()
+    if now - _last_reclaim_at >= _reaper_interval_seconds():
+        reclaim_expired_tasks()
+        _last_reclaim_at = now
+
+    task = _dequeue_task(block_timeout_seconds=block_timeout_seconds, worker_id=worker_id)
     if task is None:
         return False
 
+    process_task_envelope(task)
+    return True
+
+
+def process_task_envelope(task: dict) -> bool:
+    # The lease is released once the task either succeeded or was handed to
+    # the retry/dead-letter queues. Callers that batch acks pop it first.
+    lease = task.pop(LEASE_FIELD, None)
+    started_at = time.perf_counter()
+    succeeded = True
+    renewal = _renewing_leases([lease]) if lease else nullcontext()
     try:
-        _process_task(task)
+        with renewal:
+            _process_task(task)
         _increment_metric("process_success_total")
         _set_metric("last_processed_task_type", task.get("task_type"))
         _set_metric("last_processed_at", datetime.now(timezone.utc).isoformat())
     except Exception as exc:
+        succeeded = False
         _increment_metric("process_failed_total")
         _logger().exception(
             "async_task_failed id=%s type=%s attempt=%s error=%s",
@@ -353,33 +526,165 @@ def process_one_pending_task(*, block_timeout_seconds: int | None = None) -> boo
             exc,
         )
         _requeue_if_needed(task, exc)
-    return True
+    finally:
+        _record_latency(
+            "process",
+            task.get("task_type"),
+            (time.perf_counter() - started_at) * 1000,
+        )
+    if lease:
+        ack_tasks([lease])
+    return succeeded
 
 
-def _dequeue_task(*, block_timeout_seconds: int | None):
-    queue_name = _queue_name()
-    _promote_due_retry_tasks(max_items=100)
-    timeout = (
-        _block_timeout_seconds()
-        if block_timeout_seconds is None
-        else max(0, int(block_timeout_seconds))
+def _lease_member(processing_key: str, raw_item: str) -> str:
+    return f"{processing_key}{_LEASE_MEMBER_SEPARATOR}{raw_item}"
+
+
+def _decode_raw(raw_item):
+    if isinstance(raw_item, bytes):
+        return raw_item.decode("utf-8")
+    return raw_item
+
+
+def _move_to_processing(
+    queue_name: str,
+    processing_key: str,
+    max_items: int,
+    ack_raw_items: list,
+) -> list:
+    deadline = time.time() + _visibility_timeout_seconds()
+    eval_fn = getattr(redis_client, "eval", None)
+    if eval_fn is not None:
+        try:
+            return list(
+                eval_fn(
+                    DEQUEUE_LEASED_TASKS_LUA,
+                    3,
+                    queue_name,
+                    processing_key,
+                    _leases_key(),
+                    max_items,
+                    deadline,
+                    *ack_raw_items,
+                )
+                or []
+            )
+        except Exception as exc:
+            _logger().warning("async_task_dequeue_lua_failed queue=%s error=%s", queue_name, exc)
+
+    pipe = redis_client.pipeline()
+    for raw_item in ack_raw_items:
+        pipe.lrem(processing_key, 1, raw_item)
+        pipe.zrem(_leases_key(), _lease_member(processing_key, raw_item))
+    for _ in range(max_items):
+        pipe.lmove(queue_name, processing_key, "LEFT", "RIGHT")
+    results = pipe.execute()[len(ack_raw_items) * 2:]
+    raw_items = [raw for raw in results if raw is not None]
+    if raw_items:
+        redis_client.zadd(
+            _leases_key(),
+            {_lease_member(processing_key, _decode_raw(raw)): deadline for raw in raw_items},
+        )
+    return raw_items
+
+
+def _blocking_move(queue_name: str, processing_key: str, timeout: int):
+    if hasattr(redis_client, "blmove") and getattr(redis_client, "eval", None) is not None:
+        # BLMOVE of the tail onto itself only waits for a task without taking
+        # it; the task is then claimed together with its lease by the dequeue
+        # script, so no task can sit in a processing list without a lease.
+        if redis_client.blmove(queue_name, queue_name, timeout, "RIGHT", "RIGHT") is None:
+            return None
+        raw_items = _move_to_processing(queue_name, processing_key, 1, [])
+        return raw_items[0] if raw_items else None
+
+    raw_item = None
+    if hasattr(redis_client, "blmove"):
+        raw_item = redis_client.blmove(queue_name, processing_key, timeout, "LEFT", "RIGHT")
+    else:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            raw_item = redis_client.lmove(queue_name, processing_key, "LEFT", "RIGHT")
+            if raw_item is not None:
+                break
+            time.sleep(0.1)
+    if raw_item is not None:
+        redis_client.zadd(
+            _leases_key(),
+            {
+                _lease_member(processing_key, _decode_raw(raw_item)): (
+                    time.time() + _visibility_timeout_seconds()
+                )
+            },
+        )
+    return raw_item
+
+
+def _parse_task_envelope(raw_item):
+    try:
+        parsed = json.loads(raw_item)
+    except Exception:
+        _logger().warning("async_task_invalid_json payload=%r", raw_item)
+        return None
+
+    if not isinstance(parsed, dict):
+        _logger().warning("async_task_invalid_envelope payload=%r", parsed)
+        return None
+    return parsed
+
+
+def _resolve_block_timeout(block_timeout_seconds: int | None) -> int:
+    if block_timeout_seconds is None:
+        return _block_timeout_seconds()
+    return max(0, int(block_timeout_seconds))
+
+
+def _dequeue_task(*, block_timeout_seconds: int | None, worker_id: str | None = None):
+    tasks = dequeue_tasks(
+        max_items=1,
+        block_timeout_seconds=block_timeout_seconds,
+        worker_id=worker_id,
     )
+    return tasks[0] if tasks else None
+
+
+def dequeue_tasks(
+    *,
+    max_items: int,
+    block_timeout_seconds: int | None = None,
+    promote_retries: bool = True,
+    worker_id: str | None = None,
+    ack_leases: list[dict] | None = None,
+) -> list[dict]:
+    # At-least-once delivery: tasks are moved (not popped) into this worker's
+    # processing list with a visibility deadline, so a crash mid-task leaves
+    # them for reclaim_expired_tasks. A non-empty queue yields up to max_items
+    # tasks in one round trip; only an empty queue blocks for a single item.
+    # Leases in ack_leases are released in that same round trip.
+    max_items = max(1, int(max_items))
+    queue_name = _queue_name()
+    processing_key = _processing_list_name(worker_id or _default_worker_id())
+    if promote_retries:
+        _promote_due_retry_tasks(max_items=100)
+    timeout = _resolve_block_timeout(block_timeout_seconds)
+
+    ack_raw_items = []
+    foreign_leases = []
+    for lease in ack_leases or []:
+        if lease and lease.get("processing_key") == processing_key:
+            ack_raw_items.append(lease["raw"])
+        elif lease:
+            foreign_leases.append(lease)
+    if foreign_leases:
+        ack_tasks(foreign_leases)
 
     try:
-        raw_item = None
-        if timeout > 0 and hasattr(redis_client, "blpop"):
-            raw = redis_client.blpop(queue_name, timeout=timeout)
-            if raw:
-                raw_item = raw[1]
-        elif timeout > 0:
-            deadline = time.monotonic() + timeout
-            while time.monotonic() < deadline:
-                raw_item = redis_client.lpop(queue_name)
-                if raw_item is not None:
-                    break
-                time.sleep(0.1)
-        else:
-            raw_item = redis_client.lpop(queue_name)
+        raw_items = _move_to_processing(queue_name, processing_key, max_items, ack_raw_items)
+        if not raw_items and timeout > 0:
+            raw_item = _blocking_move(queue_name, processing_key, timeout)
+            if raw_item is not None:
+                raw_items = [raw_item]
     except Exception as exc:
         _increment_metric("dequeue_failed_total")
         _logger().warning(
@@ -387,24 +692,184 @@ def _dequeue_task(*, block_timeout_seconds: int | None):
             queue_name,
             exc,
         )
-        return None
+        return []
+
+    tasks = []
+    invalid_leases = []
+    for raw_item in raw_items:
+        raw_item = _decode_raw(raw_item)
+        lease = {"processing_key": processing_key, "raw": raw_item}
+        parsed = _parse_task_envelope(raw_item)
+        if parsed is None:
+            invalid_leases.append(lease)
+            continue
+        parsed[LEASE_FIELD] = lease
+        tasks.append(parsed)
+    if invalid_leases:
+        ack_tasks(invalid_leases)
+    return tasks
+
+
+def ack_tasks(leases: list[dict]) -> int:
+    leases = [lease for lease in leases or [] if lease]
+    if not leases:
+        return 0
+    try:
+        pipe = redis_client.pipeline()
+        for lease in leases:
+            pipe.lrem(lease["processing_key"], 1, lease["raw"])
+            pipe.zrem(_leases_key(), _lease_member(lease["processing_key"], lease["raw"]))
+        pipe.execute()
+        return len(leases)
+    except Exception as exc:
+        # An unacked task is redelivered after its visibility timeout.
+        _increment_metric("ack_failed_total")
+        _logger().warning("async_task_ack_failed count=%s error=%s", len(leases), exc)
+        return 0
 
-    if raw_item is None:
-        return None
 
-    if isinstance(raw_item, bytes):
-        raw_item = raw_item.decode("utf-8")
+def extend_leases(leases: list[dict]) -> int:
+    """Moves the visibility deadline of still-held ``leases`` a full timeout ahead."""
+    leases = [lease for lease in leases or [] if lease]
+    if not leases:
+        return 0
+    deadline = time.time() + _visibility_timeout_seconds()
+    try:
+        # XX: a lease acked or reclaimed in the meantime must not come back.
+        redis_client.zadd(
+            _leases_key(),
+            {_lease_member(lease["processing_key"], lease["raw"]): deadline for lease in leases},
+            xx=True,
+        )
+        return len(leases)
+    except Exception as exc:
+        _increment_metric("lease_renew_failed_total")
+        _logger().warning("async_task_lease_renew_failed count=%s error=%s", len(leases), exc)
+        return 0
+
+
+@contextmanager
+def _renewing_leases(leases: list[dict]):
+    # Keeps the leases alive from a background thread while the caller runs
+    # the task, so a handler slower than the visibility timeout is not
+    # reclaimed and run a second time.
+    interval = lease_renewal_interval_seconds()
+    app = current_app._get_current_object() if has_app_context() else None
+    stop = threading.Event()
 
+    def _renew():
+        with app.app_context() if app is not None else nullcontext():
+            while not stop.wait(interval):
+                extend_leases(leases)
+
+    renewer = threading.Thread(target=_renew, name="async-task-lease-renewal", daemon=True)
+    renewer.start()
     try:
-        parsed = json.loads(raw_item)
-    except Exception:
-        _logger().warning("async_task_invalid_json payload=%r", raw_item)
-        return None
+        yield
+    finally:
+        stop.set()
+        renewer.join()
+
+
+def _expired_lease_members(now_epoch: float, max_items: int) -> list:
+    leases_key = _leases_key()
+    if hasattr(redis_client, "zrangebyscore"):
+        return redis_client.zrangebyscore(  # type: ignore[attr-defined]
+            leases_key,
+            min="-inf",
+            max=now_epoch,
+            start=0,
+            num=max_items,
+        )
+    return [
+        member
+        for member, score in redis_client.zrange(leases_key, 0, max_items - 1, withscores=True)
+        if float(score) <= now_epoch
+    ]
 
-    if not isinstance(parsed, dict):
-        _logger().warning("async_task_invalid_envelope payload=%r", parsed)
+
+def _reclaim_expired_tasks_lua(queue_name: str, now_epoch: float, max_items: int):
+    eval_fn = getattr(redis_client, "eval", None)
+    if eval_fn is None:
+        return None
+    try:
+        return int(
+            eval_fn(
+                RECLAIM_EXPIRED_TASKS_LUA,
+                2,
+                _leases_key(),
+                queue_name,
+                now_epoch,
+                max_items,
+            )
+            or 0
+        )
+    except Exception as exc:
+        _logger().warning("async_task_reclaim_lua_failed queue=%s error=%s", queue_name, exc)
         return None
-    return parsed
+
+
+def _reclaim_expired_tasks_python(queue_name: str, now_epoch: float, max_items: int) -> int:
+    reclaimed = 0
+    for member in _expired_lease_members(now_epoch, max_items):
+        member = _decode_raw(member)
+        processing_key, separator, raw_item = member.partition(_LEASE_MEMBER_SEPARATOR)
+        if separator and int(redis_client.lrem(processing_key, 1, raw_item) or 0) > 0:
+            redis_client.lpush(queue_name, raw_item)
+            reclaimed += 1
+        redis_client.zrem(_leases_key(), member)
+    return reclaimed
+
+
+def reclaim_expired_tasks(*, max_items: int = 100) -> int:
+    # Only tasks with an expired lease are touched; the rest of the queue and
+    # healthy workers' processing lists are left alone.
+    max_items = max(1, int(max_items))
+    now_epoch = time.time()
+    queue_name = _queue_name()
+    try:
+        reclaimed = _reclaim_expired_tasks_lua(queue_name, now_epoch, max_items)
+        if reclaimed is None:
+            reclaimed = _reclaim_expired_tasks_python(queue_name, now_epoch, max_items)
+    except Exception as exc:
+        _increment_metric("reclaim_failed_total")
+        _logger().warning("async_task_reclaim_failed queue=%s error=%s", queue_name, exc)
+        return 0
+
+    if reclaimed:
+        _increment_metric("reclaimed_total", reclaimed)
+        _logger().warning("async_task_reclaimed_expired queue=%s count=%s", queue_name, reclaimed)
+    return reclaimed
+
+
+def recover_processing_list(worker_id: str) -> int:
+    # A restarted worker with a stable id returns whatever it held before the
+    # crash without waiting for the visibility timeout.
+    processing_key = _processing_list_name(worker_id)
+    queue_name = _queue_name()
+    try:
+        raw_items = [_decode_raw(raw) for raw in redis_client.lrange(processing_key, 0, -1) or []]
+        if not raw_items:
+            return 0
+        pipe = redis_client.pipeline()
+        for raw_item in reversed(raw_items):
+            pipe.lpush(queue_name, raw_item)
+            pipe.zrem(_leases_key(), _lease_member(processing_key, raw_item))
+        pipe.delete(processing_key)
+        pipe.execute()
+    except Exception as exc:
+        _logger().warning(
+            "async_task_processing_recover_failed worker_id=%s error=%s",
+            worker_id,
+            exc,
+        )
+        return 0
+    _increment_metric("reclaimed_total", len(raw_items))
+    return len(raw_items)
+
+
+def promote_due_retry_tasks(*, max_items: int = 100):
+    _promote_due_retry_tasks(max_items=max_items)
 
 
 def _process_task(task: dict):
@@ -425,6 +890,15 @@ def _process_task(task: dict):
     if task_type == TASK_TYPE_MEDIA_POST_PROCESS:
         _handle_media_post_process(payload)
         return
+    if task_type == TASK_TYPE_TIMELINE_FAN_OUT:
+        _handle_timeline_fan_out(payload)
+        return
+    if task_type == TASK_TYPE_ACCOUNT_PURGE:
+        _handle_account_purge(payload)
+        return
+    if task_type == TASK_TYPE_TYPEAHEAD_INDEX_BUILD:
+        _handle_typeahead_index_build(payload)
+        return
 
     _logger().warning(
         "async_task_unknown_type id=%s type=%s",
@@ -463,17 +937,47 @@ def _handle_cleanup(payload: dict):
 
 
 def _handle_media_post_process(payload: dict):
+    from app.services import media_variants
+
     post_id = payload.get("post_id")
     media_items = payload.get("media_items")
     if not isinstance(media_items, list):
         media_items = []
+    if post_id is None:
+        return
+    processed = media_variants.process_post_media(int(post_id))
     _logger().info(
-        "media_post_process_task post_id=%s media_items=%s",
+        "media_post_process_task post_id=%s media_items=%s processed=%s",
         post_id,
         len(media_items),
+        processed,
     )
 
 
+def _handle_timeline_fan_out(payload: dict):
+    from app.services import timeline_service
+
+    post_id = payload.get("post_id")
+    if post_id is None:
+        return
+    timeline_service.fan_out_post(int(post_id))
+
+
+def _handle_account_purge(payload: dict):
+    from app.services import account_purge_service
+
+    username = payload.get("username")
+    if not username:
+        return
+    account_purge_service.run_purge(str(username))
+
+
+def _handle_typeahead_index_build(_payload: dict):
+    from app.services import typeahead_service
+
+    typeahead_service.build_index()
+
+
 def _requeue_if_needed(task: dict, error: Exception):
     attempt = int(task.get("attempt", 0))
     if attempt >= _max_retries():
@@ -539,6 +1043,13 @@ def _requeue_if_needed(task: dict, error: Exception):
             _record_failed_task(next_task, push_exc)
 
 
+def _in_flight_count_safe() -> int:
+    try:
+        return int(redis_client.zcard(_leases_key()) or 0)
+    except Exception:
+        return 0
+
+
 def _retry_queue_depth_safe() -> int:
     queue_name = _retry_queue_name()
     try:
@@ -653,7 +1164,9 @@ def should_fallback_inline(*, task_type: str | None = None) -> bool:
 
 
 def get_operational_snapshot() -> dict:
+    flush_metrics(force=True)
     metrics = {}
+    histogram_fields = {}
     try:
         raw_metrics = redis_client.hgetall(_metrics_key()) or {}
     except Exception:
@@ -662,6 +1175,9 @@ def get_operational_snapshot() -> dict:
     for key, value in raw_metrics.items():
         normalized_key = key.decode("utf-8") if isinstance(key, bytes) else str(key)
         normalized_value = value.decode("utf-8") if isinstance(value, bytes) else value
+        if normalized_key.startswith(async_task_metrics.LATENCY_HISTOGRAM_PREFIX):
+            histogram_fields[normalized_key] = normalized_value
+            continue
         metrics[normalized_key] = normalized_value
 
     process_success = int(metrics.get("process_success_total", 0) or 0)
@@ -675,8 +1191,10 @@ def get_operational_snapshot() -> dict:
         "queue_depth": _queue_depth_safe(_queue_name()),
         "retry_queue_depth": _retry_queue_depth_safe(),
         "failed_queue_depth": _queue_depth_safe(_failed_queue_name()),
+        "in_flight_count": _in_flight_count_safe(),
         "active_worker_count": get_active_worker_count(),
         "process_failure_rate": failure_rate,
+        "latency_histograms": async_task_metrics.summarize_latency_histograms(histogram_fields),
         "metrics": metrics,
     }
 
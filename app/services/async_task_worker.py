@@ -0,0 +1,211 @@
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from app.services import async_task_service
+
+
+logger = logging.getLogger(__name__)
+
+_IDLE_WAIT_SECONDS = 0.05
+
+
+def _positive_int(value, fallback: int) -> int:
+    try:
+        normalized = int(value)
+    except (TypeError, ValueError):
+        return fallback
+    return normalized if normalized > 0 else fallback
+
+
+class AsyncTaskWorkerPool:
+    """Runs queued async tasks on a thread pool.
+
+    Tasks are prefetched in batches of up to ``prefetch`` envelopes and each
+    one is processed in its own app context. Leases of finished tasks ride
+    along with the next dequeue, so acking costs no extra round trip.
+    ``request_stop`` stops dequeuing; ``run`` then returns once every
+    prefetched task has finished and been acked.
+    """
+
+    def __init__(
+        self,
+        app,
+        *,
+        worker_id: str,
+        concurrency: int | None = None,
+        prefetch: int | None = None,
+        block_timeout_seconds: int | None = None,
+        source: str = "async_task_worker_pool",
+    ):
+        self.app = app
+        self.worker_id = worker_id
+        self.source = source
+        self.concurrency = _positive_int(
+            concurrency if concurrency is not None else app.config.get("ASYNC_TASK_WORKER_CONCURRENCY"),
+            1,
+        )
+        self.prefetch = _positive_int(
+            prefetch if prefetch is not None else app.config.get("ASYNC_TASK_WORKER_PREFETCH"),
+            self.concurrency,
+        )
+        self.block_timeout_seconds = block_timeout_seconds
+        self.retry_promote_interval_seconds = max(
+            float(app.config.get("ASYNC_TASK_RETRY_PROMOTE_INTERVAL_SECONDS", 1.0) or 0.0),
+            0.0,
+        )
+        self.reaper_interval_seconds = max(
+            float(app.config.get("ASYNC_TASK_REAPER_INTERVAL_SECONDS", 5) or 0.0),
+            0.0,
+        )
+        self.heartbeat_interval_seconds = max(
+            float(app.config.get("ASYNC_TASK_WORKER_HEARTBEAT_STALE_SECONDS", 30)) / 3,
+            1.0,
+        )
+        # Leases of fetched tasks are renewed until they are acked, including
+        # tasks still waiting in the prefetch buffer.
+        self.lease_renewal_interval_seconds = max(
+            float(app.config.get("ASYNC_TASK_VISIBILITY_TIMEOUT_SECONDS", 300) or 300.0) / 3,
+            _IDLE_WAIT_SECONDS,
+        )
+        self.processed = 0
+        self._stop_event = threading.Event()
+        self._processed_lock = threading.Lock()
+        self._last_heartbeat_at = 0.0
+        self._last_retry_promote_at = 0.0
+        self._last_reap_at = 0.0
+        self._pending_acks = []
+        self._held_leases = {}
+        self._last_lease_renewal_at = time.monotonic()
+
+    @property
+    def stopping(self) -> bool:
+        return self._stop_event.is_set()
+
+    def request_stop(self):
+        self._stop_event.set()
+
+    def _run_task(self, task: dict):
+        lease = task.pop(async_task_service.LEASE_FIELD, None)
+        with self.app.app_context():
+            async_task_service.process_task_envelope(task)
+        with self._processed_lock:
+            self.processed += 1
+            if lease:
+                self._pending_acks.append(lease)
+
+    def _take_pending_acks(self) -> list[dict]:
+        with self._processed_lock:
+            leases, self._pending_acks = self._pending_acks, []
+            for lease in leases:
+                self._held_leases.pop((lease["processing_key"], lease["raw"]), None)
+        return leases
+
+    def _hold_leases(self, tasks: list[dict]):
+        with self._processed_lock:
+            for task in tasks:
+                lease = task.get(async_task_service.LEASE_FIELD)
+                if lease:
+                    self._held_leases[(lease["processing_key"], lease["raw"])] = lease
+
+    def _renew_leases(self):
+        now = time.monotonic()
+        if now - self._last_lease_renewal_at < self.lease_renewal_interval_seconds:
+            return
+        self._last_lease_renewal_at = now
+        with self._processed_lock:
+            leases = list(self._held_leases.values())
+        if leases:
+            with self.app.app_context():
+                async_task_service.extend_leases(leases)
+
+    def _flush_acks(self):
+        leases = self._take_pending_acks()
+        if leases:
+            with self.app.app_context():
+                async_task_service.ack_tasks(leases)
+
+    def _housekeeping(self):
+        now = time.monotonic()
+        if now - self._last_heartbeat_at >= self.heartbeat_interval_seconds:
+            async_task_service.record_worker_heartbeat(
+                worker_id=self.worker_id,
+                source=self.source,
+            )
+            self._last_heartbeat_at = now
+        if now - self._last_retry_promote_at >= self.retry_promote_interval_seconds:
+            async_task_service.promote_due_retry_tasks(max_items=100)
+            self._last_retry_promote_at = now
+        if now - self._last_reap_at >= self.reaper_interval_seconds:
+            async_task_service.reclaim_expired_tasks()
+            self._last_reap_at = now
+
+    def _fetch(self, limit: int, *, block: bool) -> list[dict]:
+        with self.app.app_context():
+            self._housekeeping()
+            tasks = async_task_service.dequeue_tasks(
+                max_items=limit,
+                block_timeout_seconds=self.block_timeout_seconds if block else 0,
+                promote_retries=False,
+                worker_id=self.worker_id,
+                ack_leases=self._take_pending_acks(),
+            )
+        self._hold_leases(tasks)
+        return tasks
+
+    def run(self, *, max_tasks: int | None = None) -> int:
+        dispatched = 0
+        in_flight = set()
+        outstanding_limit = max(self.concurrency, self.prefetch)
+        with self.app.app_context():
+            recovered = async_task_service.recover_processing_list(self.worker_id)
+        if recovered:
+            logger.warning(
+                "async_task_worker_pool_recovered id=%s tasks=%s",
+                self.worker_id,
+                recovered,
+            )
+
+        with ThreadPoolExecutor(
+            max_workers=self.concurrency,
+            thread_name_prefix=f"async-task-{self.worker_id}",
+        ) as executor:
+            while not self._stop_event.is_set():
+                if max_tasks is not None and dispatched >= max_tasks:
+                    break
+
+                fetched = []
+                if len(in_flight) < self.concurrency:
+                    limit = min(self.prefetch, outstanding_limit - len(in_flight))
+                    if max_tasks is not None:
+                        limit = min(limit, max_tasks - dispatched)
+                    # Only block on Redis when nothing is running, otherwise a
+                    # finished task would wait out the whole poll timeout.
+                    fetched = self._fetch(limit, block=not in_flight)
+                    for task in fetched:
+                        in_flight.add(executor.submit(self._run_task, task))
+                    dispatched += len(fetched)
+
+                if in_flight:
+                    _done, in_flight = wait(
+                        in_flight,
+                        timeout=0 if fetched else _IDLE_WAIT_SECONDS,
+                        return_when=FIRST_COMPLETED,
+                    )
+                self._renew_leases()
+
+            if in_flight:
+                logger.info(
+                    "async_task_worker_pool_draining id=%s in_flight=%s",
+                    self.worker_id,
+                    len(in_flight),
+                )
+                while in_flight:
+                    _done, in_flight = wait(in_flight, timeout=self.lease_renewal_interval_seconds)
+                    self._renew_leases()
+
+        self._flush_acks()
+        with self.app.app_context():
+            async_task_service.flush_metrics(force=True)
+        return self.processed
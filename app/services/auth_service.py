@@ -15,7 +15,8 @@ from app.db import db
 from app.extensions import redis_client as redis_backend
 from app.repositories import pending_registration_repository, user_repository
 from app.repositories import follow_repository, group_repository
-from app.services import password_security
+from app.services import password_hash_pool, password_security
+from app.services import typeahead_service
 
 
 PENDING_REGISTRATION_TTL_SECONDS = 30 * 60
@@ -26,9 +27,25 @@ _SYMBOL_PATTERN = re.compile(r"[^A-Za-z0-9]")
 
 
 class AuthError(ValueError):
-    def __init__(self, message: str, status_code: int = 400):
+    def __init__(self, message: str, status_code: int = 400, retry_after_seconds: int | None = None):
         super().__init__(message)
         self.status_code = status_code
+        self.retry_after_seconds = retry_after_seconds
+
+
+def _busy_error(error: password_hash_pool.PasswordHashingBusyError) -> AuthError:
+    return AuthError(
+        "Server is busy. Try again shortly.",
+        status_code=503,
+        retry_after_seconds=error.retry_after_seconds,
+    )
+
+
+def _hash_password(password: str) -> str:
+    try:
+        return password_security.hash_password(password)
+    except password_hash_pool.PasswordHashingBusyError as e:
+        raise _busy_error(e) from e
 
 
 def _require_non_empty_string(value):
@@ -275,7 +292,7 @@ def reset_login_rate_limit_state():
 
 def hash_password_for_storage(password: str) -> str:
     validated_password = _validate_password_strength(password)
-    return password_security.hash_password(validated_password)
+    return _hash_password(validated_password)
 
 
 def _normalize_register_fields(username, password, public_key, name):
@@ -318,13 +335,14 @@ def register(username, password, public_key, name=None):
         # Keep legacy behavior for old clients that expect 400 from /register.
         raise AuthError("Username already exists", status_code=400)
 
-    password_hash = password_security.hash_password(password)
-    user_repository.create_user(
+    password_hash = _hash_password(password)
+    user = user_repository.create_user(
         username=username,
         password_hash=password_hash,
         public_key=public_key,
         name=resolved_name,
     )
+    typeahead_service.index_user(user.id, user.username, resolved_name)
 
 
 def start_registration(username, password, public_key, name=None, client_nonce=None):
@@ -348,7 +366,7 @@ def start_registration(username, password, public_key, name=None, client_nonce=N
     now = datetime.utcnow()
     expires_at = now + timedelta(seconds=PENDING_REGISTRATION_TTL_SECONDS)
     registration_id = secrets.token_urlsafe(24)
-    password_hash = password_security.hash_password(password)
+    password_hash = _hash_password(password)
 
     if client_nonce:
         existing_same_nonce = pending_registration_repository.get_by_username_and_client_nonce(
@@ -410,7 +428,7 @@ def confirm_registration(registration_id):
         raise AuthError("Username already exists", status_code=409)
 
     try:
-        user_repository.create_user(
+        user = user_repository.create_user(
             username=pending.username,
             password_hash=pending.password_hash,
             public_key=pending.public_key,
@@ -422,6 +440,7 @@ def confirm_registration(registration_id):
     except Exception:
         db.session.rollback()
         raise
+    typeahead_service.index_user(user.id, user.username, pending.name)
 
 
 def authenticate_user_credentials(username, password):
@@ -438,7 +457,11 @@ def authenticate_user_credentials(username, password):
         _record_login_failure(username)
         raise AuthError("Invalid username or password", status_code=401)
 
-    if not password_security.verify_and_upgrade_user_password(user, password):
+    try:
+        is_valid = password_security.verify_and_upgrade_user_password(user, password)
+    except password_hash_pool.PasswordHashingBusyError as e:
+        raise _busy_error(e) from e
+    if not is_valid:
         _record_login_failure(username)
         raise AuthError("Invalid username or password", status_code=401)
 
@@ -0,0 +1,264 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from flask import current_app
+
+from app.db import db
+from app.extensions import redis_client as redis_module
+from app.models.profile_model import Profile
+from app.models.user_model import User
+
+logger = logging.getLogger(__name__)
+
+# One JSON author card per user, expiring after AUTHOR_CARD_CACHE_TTL_SECONDS,
+# so a lost invalidation heals on its own and departed users leave nothing.
+AUTHOR_CARD_KEY_PREFIX = "author_card:"
+# user id -> generation of their card, bumped by every invalidation.
+AUTHOR_CARD_GENERATION_KEY_PREFIX = "author_card_gen:"
+
+# KEYS: generation keys, then card keys. ARGV: ttl, then (generation, card)
+# per user. A card is only written while its generation is the one read before
+# the database load, so a load that raced an invalidation is dropped.
+_STORE_CARDS_LUA = """
+local n = #KEYS / 2
+for i = 1, n do
+    local generation = redis.call('get', KEYS[i]) or '0'
+    if generation == ARGV[2 * i] then
+        redis.call('set', KEYS[n + i], ARGV[2 * i + 1], 'EX', ARGV[1])
+    end
+end
+return 1
+"""
+
+# user id -> (card, loaded_at). Other processes only learn about an
+# invalidation from Redis, so entries here live for a few seconds at most.
+_local_cards: "OrderedDict[int, tuple[dict, float]]" = OrderedDict()
+_local_cards_lock = Lock()
+
+
+def _client():
+    return redis_module.redis_client
+
+
+def _decode(value):
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="ignore")
+    return value
+
+
+def _card_key(user_id: int) -> str:
+    return f"{AUTHOR_CARD_KEY_PREFIX}{int(user_id)}"
+
+
+def _generation_key(user_id: int) -> str:
+    return f"{AUTHOR_CARD_GENERATION_KEY_PREFIX}{int(user_id)}"
+
+
+def _ttl_seconds() -> int:
+    return max(int(current_app.config.get("AUTHOR_CARD_CACHE_TTL_SECONDS", 3600)), 1)
+
+
+def _local_ttl_seconds() -> float:
+    return max(float(current_app.config.get("AUTHOR_CARD_LOCAL_TTL_SECONDS", 10)), 0.0)
+
+
+def _local_max_entries() -> int:
+    return max(int(current_app.config.get("AUTHOR_CARD_LOCAL_MAX_ENTRIES", 20000)), 0)
+
+
+def _normalize_user_ids(user_ids) -> list[int]:
+    normalized = set()
+    for user_id in user_ids or ():
+        try:
+            normalized.add(int(user_id))
+        except (TypeError, ValueError):
+            continue
+    return sorted(normalized)
+
+
+def _local_get(user_ids: list[int]) -> dict[int, dict]:
+    ttl_seconds = _local_ttl_seconds()
+    now = time.monotonic()
+    found = {}
+    with _local_cards_lock:
+        for user_id in user_ids:
+            entry = _local_cards.get(user_id)
+            if entry is None:
+                continue
+            card, loaded_at = entry
+            if now - loaded_at > ttl_seconds:
+                _local_cards.pop(user_id, None)
+                continue
+            _local_cards.move_to_end(user_id)
+            found[user_id] = card
+    return found
+
+
+def _local_store(cards: dict[int, dict]):
+    max_entries = _local_max_entries()
+    if max_entries <= 0 or _local_ttl_seconds() <= 0:
+        return
+    now = time.monotonic()
+    with _local_cards_lock:
+        for user_id, card in cards.items():
+            _local_cards[user_id] = (card, now)
+            _local_cards.move_to_end(user_id)
+        while len(_local_cards) > max_entries:
+            _local_cards.popitem(last=False)
+
+
+def _redis_get(user_ids: list[int]) -> dict[int, dict]:
+    try:
+        values = _client().mget([_card_key(user_id) for user_id in user_ids])
+    except Exception as exc:
+        logger.warning("Failed to read author cards from Redis: %s", exc)
+        return {}
+
+    found = {}
+    for user_id, raw_value in zip(user_ids, values or []):
+        if raw_value is None:
+            continue
+        try:
+            card = json.loads(_decode(raw_value))
+        except (TypeError, ValueError):
+            continue
+        if isinstance(card, dict):
+            found[user_id] = card
+    return found
+
+
+def _redis_generations(user_ids: list[int]) -> dict[int, str] | None:
+    try:
+        values = _client().mget([_generation_key(user_id) for user_id in user_ids])
+    except Exception as exc:
+        logger.warning("Failed to read author card generations from Redis: %s", exc)
+        return None
+    return {user_id: _decode(value) or "0" for user_id, value in zip(user_ids, values or [])}
+
+
+def _redis_store(cards: dict[int, dict], generations: dict[int, str]):
+    user_ids = [user_id for user_id in cards if user_id in generations]
+    if not user_ids:
+        return
+    client = _client()
+    ttl_seconds = _ttl_seconds()
+    try:
+        try:
+            args = [ttl_seconds]
+            for user_id in user_ids:
+                args.extend((generations[user_id], json.dumps(cards[user_id])))
+            client.eval(
+                _STORE_CARDS_LUA,
+                len(user_ids) * 2,
+                *[_generation_key(user_id) for user_id in user_ids],
+                *[_card_key(user_id) for user_id in user_ids],
+                *args,
+            )
+        except Exception:
+            # Without scripting the generations are checked again right before
+            # the write, which leaves only a short window.
+            current = _redis_generations(user_ids) or {}
+            pipe = client.pipeline()
+            for user_id in user_ids:
+                if current.get(user_id) == generations[user_id]:
+                    pipe.set(_card_key(user_id), json.dumps(cards[user_id]), ex=ttl_seconds)
+            pipe.execute()
+    except Exception as exc:
+        logger.warning("Failed to store author cards in Redis: %s", exc)
+
+
+def _load_cards(user_ids: list[int]) -> dict[int, dict]:
+    rows = (
+        db.session.query(
+            User.id,
+            User.username,
+            User.badge,
+            Profile.name,
+            Profile.image_object_name,
+            Profile.profile_image_shape,
+        )
+        .outerjoin(Profile, Profile.user_id == User.id)
+        .filter(User.id.in_(user_ids))
+        .all()
+    )
+    return {
+        int(row.id): {
+            "id": int(row.id),
+            "username": row.username,
+            "badge": row.badge,
+            "name": row.name,
+            "image_object_name": row.image_object_name,
+            "profile_image_shape": row.profile_image_shape or "circle",
+        }
+        for row in rows
+    }
+
+
+def get_cards(user_ids) -> dict[int, dict]:
+    """Author cards by user id: username, badge, name, avatar object and shape.
+
+    Checks this process, then one MGET, then one users/profiles query for the
+    rest. Users that no longer exist are left out of the result; "name" is
+    None for a user without a profile row. The returned dicts are shared, so
+    callers copy fields out rather than mutating them.
+    """
+    normalized_ids = _normalize_user_ids(user_ids)
+    if not normalized_ids:
+        return {}
+
+    cards = _local_get(normalized_ids)
+    missing = [user_id for user_id in normalized_ids if user_id not in cards]
+    if missing:
+        from_redis = _redis_get(missing)
+        _local_store(from_redis)
+        cards.update(from_redis)
+        missing = [user_id for user_id in missing if user_id not in from_redis]
+    if missing:
+        # Read before the load: a card is only cached under the generation it
+        # was loaded at.
+        generations = _redis_generations(missing)
+        from_database = _load_cards(missing)
+        if generations is not None:
+            _redis_store(from_database, generations)
+        _local_store(from_database)
+        cards.update(from_database)
+    return cards
+
+
+def get_card(user_id) -> dict | None:
+    normalized_ids = _normalize_user_ids([user_id])
+    if not normalized_ids:
+        return None
+    return get_cards(normalized_ids).get(normalized_ids[0])
+
+
+def invalidate(*user_ids):
+    """Drops cards after a username, badge, profile, suspension or account change.
+
+    Call after the change is committed. Bumping the generation keeps a read
+    that loaded the old row before the commit from caching it again.
+    """
+    normalized_ids = _normalize_user_ids(user_ids)
+    if not normalized_ids:
+        return
+    with _local_cards_lock:
+        for user_id in normalized_ids:
+            _local_cards.pop(user_id, None)
+    # The counters never expire: one that restarted from 0 could let a racing
+    # read store its old card again.
+    try:
+        pipe = _client().pipeline()
+        for user_id in normalized_ids:
+            pipe.incrby(_generation_key(user_id), 1)
+        pipe.delete(*[_card_key(user_id) for user_id in normalized_ids])
+        pipe.execute()
+    except Exception as exc:
+        logger.warning("Failed to invalidate author cards user_ids=%s: %s", normalized_ids, exc)
+
+
+def clear():
+    with _local_cards_lock:
+        _local_cards.clear()
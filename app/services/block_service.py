@@ -1,6 +1,7 @@
 from flask import current_app, has_request_context, request
 
 from app.repositories import block_repository, user_repository
+from app.services import presence_audience_service, timeline_service
 
 
 def _build_media_url(object_name: str | None):
@@ -33,6 +34,10 @@ def block_by_username(blocker_username: str, blocked_username: str) -> dict:
         raise ValueError("You cannot block yourself")
 
     created = block_repository.create_block(blocker.id, blocked.id)
+    if created:
+        timeline_service.prune_author(blocker.id, blocked.id)
+        timeline_service.prune_author(blocked.id, blocker.id)
+        presence_audience_service.invalidate_presence_subscribers(blocker.username, blocked.username)
     return {
         "created": created,
         "blocker_id": blocker.id,
@@ -54,6 +59,8 @@ def unblock_by_username(blocker_username: str, blocked_username: str) -> dict:
         raise ValueError("You cannot unblock yourself")
 
     removed = block_repository.delete_block(blocker.id, blocked.id)
+    if removed:
+        presence_audience_service.invalidate_presence_subscribers(blocker.username, blocked.username)
     return {
         "removed": removed,
         "blocker_id": blocker.id,
@@ -92,6 +99,22 @@ def hidden_user_ids_for_viewer(viewer_username: str | None) -> set[int]:
     return block_repository.get_hidden_user_ids_for_viewer(viewer.id)
 
 
+def hidden_usernames_for_viewer(viewer_username: str | None) -> set[str]:
+    """Usernames the viewer blocked or was blocked by.
+
+    Built from the cached hidden id set and author cards, so checking a batch
+    of usernames costs no per-target query.
+    """
+    if not viewer_username:
+        return set()
+
+    viewer = user_repository.get_by_username(viewer_username)
+    if not viewer or getattr(viewer, "is_suspended", False):
+        return set()
+
+    return block_repository.get_hidden_usernames_for_viewer(viewer.id)
+
+
 def get_blocked_users_page(
     blocker_username: str,
     page: int,
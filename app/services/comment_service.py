@@ -4,10 +4,9 @@ from flask import current_app, has_app_context, has_request_context, request
 
 from app.db import db
 from app.models.comment_model import Comment
-from app.models.profile_model import Profile
-from app.models.user_model import User
 from app.models.vote_model import Vote
 from app.repositories import user_repository
+from app.services import author_card_cache
 from app.repositories.comment_repository import create_comment, get_comments_by_post
 from app.repositories.comment_repository import (
     get_comment_subtree_for_roots,
@@ -136,14 +135,8 @@ def get_comments_tree_by_post(post_id: int, page: int, page_size: int):
         return []
 
     raw_comments = get_comment_subtree_for_roots(post_id, root_ids)
-    author_ids = {comment.author_id for comment in raw_comments}
-    users = User.query.filter(User.id.in_(author_ids)).all() if author_ids else []
-    profiles = Profile.query.filter(Profile.user_id.in_(author_ids)).all() if author_ids else []
-
-    user_by_id = {user.id: user for user in users}
-    profile_by_user_id = {profile.user_id: profile for profile in profiles}
-
-    all_comments = [serialize_comment(c, user_by_id, profile_by_user_id) for c in raw_comments]
+    cards = author_card_cache.get_cards({comment.author_id for comment in raw_comments})
+    all_comments = [serialize_comment(c, cards) for c in raw_comments]
 
     tree = build_comment_tree(all_comments)
     comments_by_id = {comment["id"]: comment for comment in tree}
@@ -160,31 +153,24 @@ def get_comments_tree_by_post(post_id: int, page: int, page_size: int):
     return paged_roots
 
 
-def serialize_comment(comment, user_by_id=None, profile_by_user_id=None):
-    user_by_id = user_by_id or {}
-    profile_by_user_id = profile_by_user_id or {}
+def serialize_comment(comment, cards=None):
     author_id = comment.author_id
-    user = user_by_id.get(author_id)
-    profile = profile_by_user_id.get(author_id)
+    card = (cards or {}).get(author_id)
 
-    username = user.username if user else f"user-{author_id}"
-    name = profile.name if profile else username
+    username = card["username"] if card else f"user-{author_id}"
+    name = card["name"] if card and card["name"] is not None else username
 
     profile_image_url = None
-    if profile and profile.image_object_name:
-        profile_image_url = _build_media_url(profile.image_object_name)
+    if card and card["image_object_name"]:
+        profile_image_url = _build_media_url(card["image_object_name"])
 
     author_payload = {
         "id": author_id,
         "username": username,
         "name": name,
-        "badge": user.badge if user else None,
+        "badge": card["badge"] if card else None,
         "profile_image_url": profile_image_url,
-        "profile_image_shape": (
-            profile.profile_image_shape
-            if profile and profile.profile_image_shape
-            else "circle"
-        ),
+        "profile_image_shape": card["profile_image_shape"] if card else "circle",
     }
 
     return {
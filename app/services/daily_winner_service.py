@@ -11,6 +11,7 @@ from app.db import db
 from app.models.post_model import Post
 from app.models.user_model import User
 from app.repositories.daily_winner_repository import list_recent_post_scores
+from app.services import author_card_cache
 
 _DAILY_WINNER_LOCK_KEY = 90421001
 
@@ -44,11 +45,14 @@ def run_daily_winner_selection(
             "window_start": window_start.isoformat(),
         }
 
+    # Everyone whose badge may change in this run, for author card invalidation.
+    badge_holder_ids = _daily_winner_badge_holder_ids()
     existing_winner = Post.query.filter_by(daily_winner_at=cycle_end).first()
     if existing_winner:
         _set_current_winner(existing_winner)
         badge_result = _apply_daily_winner_badge_assignment(existing_winner.author_id)
         db.session.commit()
+        author_card_cache.invalidate(*badge_holder_ids, existing_winner.author_id)
         return {
             "status": "already_selected",
             "source": source,
@@ -70,6 +74,7 @@ def run_daily_winner_selection(
         _clear_current_winner_state()
         _clear_daily_winner_badges()
         db.session.commit()
+        author_card_cache.invalidate(*badge_holder_ids)
         return {
             "status": "no_candidates",
             "source": source,
@@ -92,6 +97,7 @@ def run_daily_winner_selection(
     winner_post.daily_winner_at = cycle_end
     badge_result = _apply_daily_winner_badge_assignment(winner_post.author_id)
     db.session.commit()
+    author_card_cache.invalidate(*badge_holder_ids, winner_post.author_id)
 
     return {
         "status": "selected",
@@ -146,6 +152,13 @@ def _clear_current_winner_state():
     )
 
 
+def _daily_winner_badge_holder_ids() -> list[int]:
+    return [
+        row[0]
+        for row in db.session.query(User.id).filter(User.badge == DAILY_WINNER_BADGE).all()
+    ]
+
+
 def _clear_daily_winner_badges():
     (
         User.query
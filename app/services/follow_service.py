@@ -9,6 +9,9 @@ from app.repositories.follow_repository import (
     get_following_usernames,
     is_following,
 )
+from app.services import presence_audience_service
+from app.services import timeline_service
+from app.services import typeahead_service
 
 
 MAX_FOLLOW_LIST_LIMIT = 100
@@ -49,7 +52,12 @@ def follow_by_username(follower_username: str, following_username: str) -> bool:
     if follower.id == target.id:
         raise ValueError("You cannot follow yourself")
 
-    return create_follow(follower.id, target.id)
+    created = create_follow(follower.id, target.id)
+    if created:
+        presence_audience_service.invalidate_presence_subscribers(target.username)
+        typeahead_service.invalidate_following(follower.id)
+        timeline_service.backfill_author(follower.id, target.id)
+    return created
 
 
 def unfollow_by_username(follower_username: str, following_username: str) -> bool:
@@ -61,7 +69,12 @@ def unfollow_by_username(follower_username: str, following_username: str) -> boo
     if follower.id == target.id:
         raise ValueError("You cannot unfollow yourself")
 
-    return delete_follow(follower.id, target.id)
+    removed = delete_follow(follower.id, target.id)
+    if removed:
+        presence_audience_service.invalidate_presence_subscribers(target.username)
+        typeahead_service.invalidate_following(follower.id)
+        timeline_service.prune_author(follower.id, target.id)
+    return removed
 
 
 def get_following_for_username(username: str):
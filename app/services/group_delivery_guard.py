@@ -40,23 +40,10 @@ class GroupDeliveryGuard:
             self.snapshot_is_stale = True
 
     def can_dispatch_to(self, username):
+        # The version is checked once when the guard is built, not per member;
+        # the member set comes from the (group, version) cache.
         normalized_username = (username or "").strip()
         if self.group_id is None or not normalized_username:
             return False
 
-        self._refresh_if_version_changed()
         return normalized_username in self._member_usernames
-
-    def _refresh_if_version_changed(self):
-        if self.group_id is None:
-            return
-
-        latest_version = group_repository.get_membership_version(self.group_id)
-        if latest_version == self.current_membership_version:
-            return
-
-        self.current_membership_version = latest_version
-        self.snapshot_is_stale = True
-        self._member_usernames = set(
-            group_repository.get_group_member_usernames(self.group_id)
-        )
@@ -4,6 +4,7 @@ from app.models.group_model import Group
 from app.models.profile_model import Profile
 from app.repositories import user_repository, group_repository, message_repository
 from app.repositories.follow_repository import is_following
+from app.services import presence_audience_service
 
 
 MAX_GROUP_NAME_LENGTH = 120
@@ -192,6 +193,7 @@ def create_group(creator_username: str, group_name: str, member_usernames: list[
         group_repository.add_member(group.id, member_id)
 
     group_repository.bump_membership_version(group.id)
+    presence_audience_service.invalidate_group_presence_subscribers(group.id)
     return _format_group(group)
 
 
@@ -222,24 +224,27 @@ def get_group_unread_summary(username: str):
         raise ValueError("User not found")
 
     groups = group_repository.get_groups_for_user(user.id)
+    summaries = message_repository.get_group_unread_summaries_for_user(
+        username,
+        [group.id for group in groups],
+    )
     unread_groups = []
     total = 0
 
     for group in groups:
-        pending = message_repository.peek_group_messages_for_user(username, group.id)
-        if not pending:
+        summary = summaries.get(group.id)
+        if not summary or summary["count"] <= 0:
             continue
 
-        total += len(pending)
-        latest = pending[-1]
+        total += summary["count"]
         unread_groups.append(
             {
                 "group_id": group.id,
                 "group_name": group.name,
-                "count": len(pending),
-                "last_type": latest.get("type", "text"),
-                "last_timestamp": latest.get("timestamp", ""),
-                "last_sender": latest.get("from", "Someone"),
+                "count": summary["count"],
+                "last_type": summary["last_type"],
+                "last_timestamp": summary["last_timestamp"],
+                "last_sender": summary["last_sender"] or "Someone",
             }
         )
 
@@ -361,6 +366,7 @@ def add_members_to_group(requester_username: str, group_id: int, target_username
 
     if added_usernames:
         group_repository.bump_membership_version(group_id)
+        presence_audience_service.invalidate_group_presence_subscribers(group_id)
 
     return {
         "added": added_usernames,
@@ -395,6 +401,10 @@ def remove_member_from_group(requester_username: str, group_id: int, target_user
         if not removed:
             raise ValueError("You are not a member of this group")
         group_repository.bump_membership_version(group_id)
+        presence_audience_service.invalidate_group_presence_subscribers(
+            group_id,
+            extra_usernames=[requester.username],
+        )
         return True
 
     if group.creator_id != requester.id:
@@ -404,6 +414,10 @@ def remove_member_from_group(requester_username: str, group_id: int, target_user
     if not removed:
         raise ValueError("User is not a member of this group")
     group_repository.bump_membership_version(group_id)
+    presence_audience_service.invalidate_group_presence_subscribers(
+        group_id,
+        extra_usernames=[target.username],
+    )
     return True
 
 
@@ -419,8 +433,10 @@ def delete_group(requester_username: str, group_id: int):
     if group.creator_id != requester.id:
         raise NotGroupCreatorError("Only the group creator can delete the group")
 
+    member_usernames = group_repository.get_group_member_usernames(group_id)
     group_repository.delete_group(group_id)
     group_repository.clear_membership_version(group_id)
+    presence_audience_service.invalidate_presence_subscribers(*member_usernames)
     return True
 
 
@@ -0,0 +1,250 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+
+from flask import current_app
+
+from app.extensions import redis_client as redis_module
+
+logger = logging.getLogger(__name__)
+
+MEDIA_CACHE_INVALIDATION_CHANNEL = "media:cache_invalidations"
+
+
+@dataclass
+class CachedMediaObject:
+    object_name: str
+    etag: str | None
+    content_type: str
+    last_modified: object
+    body: bytes
+    validated_at: float
+
+    @property
+    def size(self) -> int:
+        return len(self.body)
+
+
+_entries: "OrderedDict[str, CachedMediaObject]" = OrderedDict()
+_entries_lock = Lock()
+_total_bytes = 0
+_stats = {
+    "hits": 0,
+    "revalidated_hits": 0,
+    "misses": 0,
+    "stale_evictions": 0,
+    "capacity_evictions": 0,
+    "stores": 0,
+    "rejected_too_large": 0,
+}
+
+
+def _is_enabled() -> bool:
+    return bool(current_app.config.get("MEDIA_HOT_CACHE_ENABLED", True))
+
+
+def _max_bytes() -> int:
+    return max(int(current_app.config.get("MEDIA_HOT_CACHE_MAX_BYTES", 64 * 1024 * 1024)), 0)
+
+
+def _max_object_bytes() -> int:
+    return max(int(current_app.config.get("MEDIA_HOT_CACHE_MAX_OBJECT_BYTES", 256 * 1024)), 0)
+
+
+def _revalidate_seconds() -> float:
+    return max(float(current_app.config.get("MEDIA_HOT_CACHE_REVALIDATE_SECONDS", 60)), 0.0)
+
+
+def _normalize_etag(etag) -> str | None:
+    if etag is None:
+        return None
+    value = str(etag).strip().strip('"')
+    return value or None
+
+
+def _drop_locked(object_name: str):
+    global _total_bytes
+    entry = _entries.pop(object_name, None)
+    if entry is not None:
+        _total_bytes -= entry.size
+    return entry
+
+
+def is_cacheable_size(size) -> bool:
+    if not _is_enabled() or size is None:
+        return False
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        return False
+    return 0 <= size <= min(_max_object_bytes(), _max_bytes())
+
+
+def get(object_name: str, *, etag=None) -> CachedMediaObject | None:
+    # Without an etag only entries validated within the revalidation window are
+    # returned, so hot objects skip MinIO entirely. With an etag (fresh from
+    # stat_object) the entry is returned only if it still matches.
+    if not _is_enabled():
+        return None
+
+    now = time.monotonic()
+    normalized_etag = _normalize_etag(etag)
+    with _entries_lock:
+        entry = _entries.get(object_name)
+        if entry is None:
+            _stats["misses"] += 1
+            return None
+
+        if normalized_etag is None:
+            if now - entry.validated_at > _revalidate_seconds():
+                _stats["misses"] += 1
+                return None
+            _stats["hits"] += 1
+        elif entry.etag != normalized_etag:
+            _drop_locked(object_name)
+            _stats["stale_evictions"] += 1
+            return None
+        else:
+            entry.validated_at = now
+            _stats["revalidated_hits"] += 1
+
+        _entries.move_to_end(object_name)
+        return entry
+
+
+def put(
+    object_name: str,
+    *,
+    etag,
+    content_type: str | None,
+    last_modified,
+    body: bytes,
+) -> bool:
+    global _total_bytes
+
+    if not is_cacheable_size(len(body)):
+        with _entries_lock:
+            _stats["rejected_too_large"] += 1
+        return False
+
+    entry = CachedMediaObject(
+        object_name=object_name,
+        etag=_normalize_etag(etag),
+        content_type=content_type or "application/octet-stream",
+        last_modified=last_modified,
+        body=bytes(body),
+        validated_at=time.monotonic(),
+    )
+    max_bytes = _max_bytes()
+    with _entries_lock:
+        _drop_locked(object_name)
+        while _entries and _total_bytes + entry.size > max_bytes:
+            _, evicted = _entries.popitem(last=False)
+            _total_bytes -= evicted.size
+            _stats["capacity_evictions"] += 1
+        _entries[object_name] = entry
+        _total_bytes += entry.size
+        _stats["stores"] += 1
+    return True
+
+
+def _evict(object_names):
+    with _entries_lock:
+        for object_name in object_names:
+            _drop_locked(object_name)
+
+
+def invalidate(object_name: str | None, *, publish: bool = True):
+    """Drops the local entry and tells the other processes to drop theirs."""
+    invalidate_many([object_name], publish=publish)
+
+
+def invalidate_many(object_names, *, publish: bool = True):
+    object_names = [object_name for object_name in object_names or () if object_name]
+    if not object_names:
+        return
+
+    _evict(object_names)
+    if not publish:
+        return
+    try:
+        redis_module.redis_client.publish(
+            MEDIA_CACHE_INVALIDATION_CHANNEL,
+            json.dumps({"object_names": object_names}),
+        )
+    except Exception as exc:
+        # Other processes keep serving the object until their revalidation
+        # window ends.
+        logger.warning(
+            "Failed to publish media cache invalidation count=%s: %s",
+            len(object_names),
+            exc,
+        )
+
+
+def handle_invalidation_message(message) -> list[str] | None:
+    if not isinstance(message, dict) or message.get("type") != "message":
+        return None
+    data = message.get("data")
+    if isinstance(data, bytes):
+        data = data.decode("utf-8", errors="ignore")
+    try:
+        object_names = json.loads(data).get("object_names")
+    except (TypeError, ValueError, AttributeError):
+        return None
+    if not isinstance(object_names, list):
+        return None
+    object_names = [object_name for object_name in object_names if isinstance(object_name, str) and object_name]
+    _evict(object_names)
+    return object_names
+
+
+def drop_entries():
+    """Empties the cache without resetting its counters."""
+    global _total_bytes
+    with _entries_lock:
+        _entries.clear()
+        _total_bytes = 0
+
+
+def listen_for_invalidations(should_stop=lambda: False):
+    """Blocks on the invalidation channel, evicting objects changed on other nodes."""
+    pubsub = redis_module.redis_client.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(MEDIA_CACHE_INVALIDATION_CHANNEL)
+    try:
+        # Messages published while this node was disconnected are lost;
+        # entries cached before the reconnect are dropped instead.
+        drop_entries()
+        while not should_stop():
+            message = pubsub.get_message(timeout=1.0)
+            if message:
+                handle_invalidation_message(message)
+    finally:
+        pubsub.close()
+
+
+def clear():
+    global _total_bytes
+    with _entries_lock:
+        _entries.clear()
+        _total_bytes = 0
+        for key in _stats:
+            _stats[key] = 0
+
+
+def get_stats() -> dict:
+    with _entries_lock:
+        stats = dict(_stats)
+        stats["entries"] = len(_entries)
+        stats["bytes"] = _total_bytes
+    stats["max_bytes"] = _max_bytes()
+    stats["max_object_bytes"] = _max_object_bytes()
+    stats["enabled"] = _is_enabled()
+    lookups = stats["hits"] + stats["revalidated_hits"] + stats["misses"] + stats["stale_evictions"]
+    stats["hit_ratio"] = (
+        round((stats["hits"] + stats["revalidated_hits"]) / lookups, 4) if lookups else 0.0
+    )
+    return stats
@@ -0,0 +1,164 @@
+import hashlib
+import logging
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from threading import Lock
+
+from flask import current_app
+
+from app.extensions.minio_client import forget_bucket
+
+logger = logging.getLogger(__name__)
+
+# Shared by every request in the process, so concurrent posts cannot open more
+# than MEDIA_UPLOAD_MAX_WORKERS uploads against the pooled MinIO client.
+_executor: ThreadPoolExecutor | None = None
+_executor_workers = 0
+_executor_lock = Lock()
+
+
+class UploadChecksumError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class UploadItem:
+    object_name: str
+    stream: object
+    length: int
+    content_type: str
+
+
+@dataclass(frozen=True)
+class UploadedObject:
+    object_name: str
+    size: int
+    md5: str
+
+
+class _HashingReader:
+    """Wraps an upload stream and hashes each chunk as MinIO reads it."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._md5 = hashlib.md5(usedforsecurity=False)
+        self.size = 0
+
+    def read(self, size=-1):
+        chunk = self._stream.read(size)
+        self._md5.update(chunk)
+        self.size += len(chunk)
+        return chunk
+
+    def hexdigest(self) -> str:
+        return self._md5.hexdigest()
+
+
+def _max_workers() -> int:
+    return max(int(current_app.config.get("MEDIA_UPLOAD_MAX_WORKERS", 8)), 1)
+
+
+def _part_size() -> int:
+    # S3 rejects multipart parts under 5 MiB.
+    minimum = 5 * 1024 * 1024
+    return max(int(current_app.config.get("MEDIA_UPLOAD_PART_SIZE_BYTES", minimum)), minimum)
+
+
+def _verify_etag() -> bool:
+    return bool(current_app.config.get("MEDIA_UPLOAD_VERIFY_ETAG", True))
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor, _executor_workers
+
+    max_workers = _max_workers()
+    with _executor_lock:
+        if _executor is None or _executor_workers != max_workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="media-upload")
+            _executor_workers = max_workers
+        return _executor
+
+
+def _upload_one(client, bucket: str, item: UploadItem, part_size: int, verify_etag: bool) -> UploadedObject:
+    reader = _HashingReader(item.stream)
+    upload_kwargs = {
+        "bucket_name": bucket,
+        "object_name": item.object_name,
+        "data": reader,
+        "length": item.length,
+        "content_type": item.content_type,
+    }
+    if item.length == -1:
+        upload_kwargs["part_size"] = part_size
+
+    result = client.put_object(**upload_kwargs)
+    md5 = reader.hexdigest()
+    # A single-part ETag is the MD5 of the body; multipart ETags end in "-<parts>".
+    etag = str(getattr(result, "etag", "") or "").strip('"').lower()
+    if verify_etag and len(etag) == 32 and etag != md5:
+        raise UploadChecksumError(f"Checksum mismatch for {item.object_name}")
+    return UploadedObject(object_name=item.object_name, size=reader.size, md5=md5)
+
+
+def remove_objects(client, bucket: str, object_names):
+    for object_name in object_names:
+        try:
+            client.remove_object(bucket, object_name)
+        except Exception as exc:
+            logger.warning("media_upload_cleanup_failed object=%s error=%s", object_name, exc)
+
+
+def remove_objects_bulk(client, bucket: str, object_names) -> list[str]:
+    """Removes ``object_names`` with multi-object DELETE requests (1000 keys each).
+
+    Returns the names that could not be removed; objects that are already
+    gone count as removed.
+    """
+    from minio.deleteobjects import DeleteObject
+
+    failed = []
+    # The SDK sends the requests lazily, while the error iterator is consumed.
+    for error in client.remove_objects(bucket, [DeleteObject(name) for name in object_names]):
+        if error.code in {"NoSuchKey", "NoSuchObject"}:
+            continue
+        logger.warning("media_bulk_remove_failed object=%s code=%s", error.name, error.code)
+        failed.append(error.name)
+    return failed
+
+
+def upload_objects(client, bucket: str, items: list[UploadItem]) -> list[UploadedObject]:
+    """Uploads ``items`` concurrently and returns them in the same order.
+
+    If any upload fails, uploads not yet started are cancelled, every object of
+    the batch is removed and the first error is raised, so a post never keeps
+    part of its media.
+    """
+    if not items:
+        return []
+
+    part_size = _part_size()
+    verify_etag = _verify_etag()
+    try:
+        if len(items) == 1:
+            return [_upload_one(client, bucket, items[0], part_size, verify_etag)]
+
+        executor = _get_executor()
+        futures = [
+            executor.submit(_upload_one, client, bucket, item, part_size, verify_etag)
+            for item in items
+        ]
+        _done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in pending:
+            future.cancel()
+        # Cleanup must not race uploads that are still running.
+        wait(pending)
+        for future in futures:
+            if not future.cancelled() and future.exception() is not None:
+                raise future.exception()
+        return [future.result() for future in futures]
+    except Exception:
+        forget_bucket(client, bucket)
+        remove_objects(client, bucket, [item.object_name for item in items])
+        raise
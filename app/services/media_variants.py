@@ -0,0 +1,280 @@
+import base64
+import io
+import json
+import logging
+import math
+import os
+from dataclasses import dataclass
+
+from flask import current_app
+
+from app.db import db
+from app.extensions.minio_client import get_minio_client
+from app.models.media_model import Media
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is only needed where the media worker runs.
+    Image = None
+    ImageOps = None
+
+logger = logging.getLogger(__name__)
+
+VARIANT_MIME_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"}
+# GIFs keep their animation only in the original, so they get no variants.
+SOURCE_MIME_TYPES = {"image/jpeg", "image/jpg", "image/png", "image/webp"}
+
+
+@dataclass(frozen=True)
+class RenderedVariant:
+    width: int
+    height: int
+    body: bytes
+
+
+@dataclass(frozen=True)
+class RenderedImage:
+    width: int
+    height: int
+    placeholder: str
+    variants: list[RenderedVariant]
+
+
+def _widths() -> list[int]:
+    return sorted({int(width) for width in current_app.config.get("MEDIA_VARIANT_WIDTHS", [320, 640, 1080])})
+
+
+def _format() -> str:
+    variant_format = str(current_app.config.get("MEDIA_VARIANT_FORMAT", "webp")).lower()
+    return variant_format if variant_format in VARIANT_MIME_TYPES else "webp"
+
+
+def _quality() -> int:
+    return min(max(int(current_app.config.get("MEDIA_VARIANT_QUALITY", 78)), 1), 100)
+
+
+def _max_source_pixels() -> int:
+    return max(int(current_app.config.get("MEDIA_VARIANT_MAX_SOURCE_PIXELS", 50_000_000)), 1)
+
+
+def _placeholder_width() -> int:
+    return min(max(int(current_app.config.get("MEDIA_PLACEHOLDER_WIDTH", 16)), 4), 64)
+
+
+def variant_object_name(object_name: str, width: int, variant_format: str) -> str:
+    stem = object_name.rsplit(".", 1)[0] if "." in object_name.rsplit("/", 1)[-1] else object_name
+    return f"{stem}_w{int(width)}.{variant_format}"
+
+
+def _scaled_size(width: int, height: int, target_width: int) -> tuple[int, int]:
+    return target_width, max(1, round(height * target_width / width))
+
+
+def _encode(image, variant_format: str, quality: int) -> bytes:
+    output = io.BytesIO()
+    if variant_format == "jpeg":
+        if image.mode != "RGB":
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A") if "A" in image.getbands() else None)
+            image = background
+        image.save(output, format="JPEG", quality=quality, optimize=True, progressive=True)
+    else:
+        image.save(output, format="WEBP", quality=quality, method=4)
+    return output.getvalue()
+
+
+def render_image(
+    body: bytes,
+    *,
+    widths: list[int],
+    variant_format: str,
+    quality: int,
+    placeholder_width: int,
+    max_source_pixels: int,
+) -> RenderedImage:
+    """Decodes ``body`` once and returns its displayed size, placeholder and variants.
+
+    Only widths smaller than the original are produced. Raises ValueError for
+    data Pillow cannot decode or images above ``max_source_pixels``.
+    """
+    if Image is None:
+        raise RuntimeError("Pillow is not installed")
+
+    try:
+        with Image.open(io.BytesIO(body)) as source:
+            source_width, source_height = source.size
+            if source_width * source_height > max_source_pixels:
+                raise ValueError(f"Image too large: {source_width}x{source_height}")
+            width, height = source_width, source_height
+            if source.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+                width, height = height, width
+
+            target_widths = [target for target in widths if target < width]
+            # JPEG can decode at 1/2..1/8 scale for free; keep enough pixels
+            # for the largest variant (or the placeholder).
+            scale = max(target_widths + [min(placeholder_width, width)]) / width
+            source.draft(
+                "RGB",
+                (math.ceil(source_width * scale), math.ceil(source_height * scale)),
+            )
+            image = ImageOps.exif_transpose(source)
+            image.load()
+    except (OSError, SyntaxError, Image.DecompressionBombError) as exc:
+        raise ValueError(f"Unreadable image: {exc}") from exc
+
+    if image.mode not in ("RGB", "RGBA"):
+        has_alpha = "A" in image.getbands() or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+    variants = []
+    current = image
+    # Largest first, each step resizing the previous result.
+    for target_width in sorted(target_widths, reverse=True):
+        current = current.resize(
+            _scaled_size(width, height, target_width),
+            Image.Resampling.LANCZOS,
+            reducing_gap=3.0,
+        )
+        variants.append(
+            RenderedVariant(
+                width=current.width,
+                height=current.height,
+                body=_encode(current, variant_format, quality),
+            )
+        )
+    variants.reverse()
+
+    tiny = current.resize(
+        _scaled_size(width, height, min(placeholder_width, width)),
+        Image.Resampling.BILINEAR,
+    )
+    tiny_body = _encode(tiny, "webp", 30)
+    placeholder = "data:image/webp;base64," + base64.b64encode(tiny_body).decode("ascii")
+    return RenderedImage(width=width, height=height, placeholder=placeholder, variants=variants)
+
+
+def _is_local(object_name: str) -> bool:
+    return object_name.startswith("static/")
+
+
+def _local_path(object_name: str) -> str:
+    relative_path = object_name[len("static/"):]
+    static_root = os.path.realpath(current_app.static_folder)
+    absolute_path = os.path.realpath(os.path.join(static_root, relative_path))
+    if not absolute_path.startswith(static_root + os.sep):
+        raise ValueError(f"Invalid local media path: {object_name}")
+    return absolute_path
+
+
+def _read_original(minio, bucket: str, object_name: str) -> bytes:
+    if _is_local(object_name):
+        with open(_local_path(object_name), "rb") as handle:
+            return handle.read()
+
+    response = minio.get_object(bucket_name=bucket, object_name=object_name)
+    try:
+        return response.read()
+    finally:
+        response.close()
+        response.release_conn()
+
+
+def _write_variant(minio, bucket: str, object_name: str, body: bytes, mime_type: str):
+    if _is_local(object_name):
+        with open(_local_path(object_name), "wb") as handle:
+            handle.write(body)
+        return
+
+    minio.put_object(
+        bucket_name=bucket,
+        object_name=object_name,
+        data=io.BytesIO(body),
+        length=len(body),
+        content_type=mime_type,
+    )
+
+
+def process_media(media: Media, *, minio=None) -> bool:
+    """Renders and stores the variants of one image; returns False if skipped.
+
+    Storage errors propagate so the task is retried; images that cannot be
+    decoded are recorded with no variants and are not tried again.
+    """
+    if media.variants_json is not None:
+        return False
+    if (media.mime_type or "").split(";", 1)[0].strip().lower() not in SOURCE_MIME_TYPES:
+        return False
+
+    bucket = current_app.config["MINIO_BUCKET"]
+    if minio is None and not _is_local(media.object_name):
+        minio = get_minio_client()
+
+    variant_format = _format()
+    mime_type = VARIANT_MIME_TYPES[variant_format]
+    body = _read_original(minio, bucket, media.object_name)
+    try:
+        rendered = render_image(
+            body,
+            widths=_widths(),
+            variant_format=variant_format,
+            quality=_quality(),
+            placeholder_width=_placeholder_width(),
+            max_source_pixels=_max_source_pixels(),
+        )
+    except ValueError as exc:
+        logger.warning("media_variants_skipped media_id=%s error=%s", media.id, exc)
+        media.variants_json = "[]"
+        db.session.commit()
+        return False
+
+    stored_variants = []
+    for variant in rendered.variants:
+        object_name = variant_object_name(media.object_name, variant.width, variant_format)
+        _write_variant(minio, bucket, object_name, variant.body, mime_type)
+        stored_variants.append(
+            {
+                "width": variant.width,
+                "height": variant.height,
+                "object_name": object_name,
+                "mime_type": mime_type,
+            }
+        )
+
+    media.width = rendered.width
+    media.height = rendered.height
+    media.placeholder = rendered.placeholder
+    media.variants_json = json.dumps(stored_variants)
+    db.session.commit()
+    return True
+
+
+def process_post_media(post_id: int) -> int:
+    """Generates variants for every unprocessed image of a post.
+
+    Each image is committed on its own, so a retried task skips the ones
+    already done. Returns the number of images processed.
+    """
+    pending = (
+        Media.query
+        .filter(Media.post_id == int(post_id), Media.variants_json.is_(None))
+        .order_by(Media.id.asc())
+        .all()
+    )
+    processed = 0
+    minio = None
+    for media in pending:
+        if minio is None and not _is_local(media.object_name):
+            minio = get_minio_client()
+        if process_media(media, minio=minio):
+            processed += 1
+    return processed
+
+
+def parse_variants(variants_json: str | None) -> list[dict]:
+    if not variants_json:
+        return []
+    try:
+        variants = json.loads(variants_json)
+    except (TypeError, ValueError):
+        return []
+    return [variant for variant in variants if isinstance(variant, dict)] if isinstance(variants, list) else []
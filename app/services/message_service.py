@@ -6,7 +6,7 @@ import uuid
 
 from flask import current_app, has_request_context, request
 
-from app.extensions.minio_client import get_minio_client
+from app.extensions.minio_client import ensure_bucket, get_minio_client
 from app.repositories import block_repository, message_repository, user_repository
 from app.services.media_security import (
     is_allowed_declared_mimetype,
@@ -345,8 +345,7 @@ def upload_message_attachment(username: str, file_storage, upload_scope: str = "
     try:
         try:
             minio = get_minio_client()
-            if not minio.bucket_exists(bucket):
-                minio.make_bucket(bucket)
+            ensure_bucket(minio, bucket)
         except Exception as exc:
             _log_attachment_upload(
                 level="warning",
@@ -559,6 +558,16 @@ def get_group_pending_count(username, group_id):
     return message_repository.get_group_pending_count(username, group_id)
 
 
+def get_group_pending_counts_for_user(username, group_ids):
+    return message_repository.get_group_pending_counts_for_user(username, group_ids)
+
+
+def peek_group_messages_first_pages_for_user(username, group_ids, limit=100):
+    return message_repository.peek_group_messages_first_pages_for_user(
+        username, group_ids, limit=limit
+    )
+
+
 def purge_group_delivery_for_user(group_id, username):
     return message_repository.purge_group_delivery_for_user(
         group_id=group_id,
@@ -21,9 +21,11 @@ def _chat_last_key(username: str, contact: str) -> str:
 
 
 def _read_inbox_messages(username: str):
-    key = f"inbox:{username}"
+    from app.repositories import message_repository
+
+    key = message_repository._inbox_index_payload_key(username)  # noqa: SLF001
     try:
-        messages = redis_client.lrange(key, 0, -1)
+        messages = redis_client.hvals(key)
     except Exception:
         return []
     decoded = []
@@ -34,6 +36,8 @@ def _read_inbox_messages(username: str):
             continue
         if isinstance(msg, dict):
             decoded.append(msg)
+    # Hash values come back unordered; the last message per sender must win.
+    decoded.sort(key=lambda msg: str(msg.get("timestamp", "")))
     return decoded
 
 
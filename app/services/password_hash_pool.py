@@ -0,0 +1,165 @@
+import logging
+import threading
+import time
+
+from flask import current_app, has_app_context
+
+from app.extensions import redis_client as redis_module
+from app.services import async_task_metrics
+
+logger = logging.getLogger(__name__)
+
+# Argon2 runs at most AUTH_HASH_POOL_MAX_CONCURRENCY at a time per process;
+# up to AUTH_HASH_POOL_MAX_QUEUE callers wait for a slot, the rest are refused.
+_slots: threading.BoundedSemaphore | None = None
+_slots_size = 0
+_state_lock = threading.Lock()
+_waiting = 0
+_running = 0
+
+
+class PasswordHashingBusyError(Exception):
+    def __init__(self, message: str = "Password hashing is busy", retry_after_seconds: int = 1):
+        super().__init__(message)
+        self.retry_after_seconds = retry_after_seconds
+
+
+def _config(name: str, default):
+    if not has_app_context():
+        return default
+    return current_app.config.get(name, default)
+
+
+def _max_concurrency() -> int:
+    return max(int(_config("AUTH_HASH_POOL_MAX_CONCURRENCY", 2)), 1)
+
+
+def _max_queue() -> int:
+    return max(int(_config("AUTH_HASH_POOL_MAX_QUEUE", 32)), 0)
+
+
+def _queue_timeout_seconds() -> float:
+    return max(float(_config("AUTH_HASH_POOL_QUEUE_TIMEOUT_SECONDS", 5.0)), 0.0)
+
+
+def _metrics_key() -> str:
+    return str(_config("AUTH_HASH_POOL_METRICS_KEY", "auth:password_hash:metrics"))
+
+
+def _get_slots() -> threading.BoundedSemaphore:
+    global _slots, _slots_size
+
+    size = _max_concurrency()
+    with _state_lock:
+        # Holders of the old semaphore release into it, so resizing is safe.
+        if _slots is None or _slots_size != size:
+            _slots = threading.BoundedSemaphore(size)
+            _slots_size = size
+        return _slots
+
+
+def _eventlet_tpool():
+    """eventlet's OS thread pool when the process runs on green threads."""
+    try:
+        from eventlet import patcher, tpool
+    except ImportError:
+        return None
+    return tpool if patcher.is_monkey_patched("thread") else None
+
+
+def _flush_metrics(*, force: bool = False):
+    interval = float(_config("ASYNC_TASK_METRICS_FLUSH_INTERVAL_SECONDS", 5.0))
+    if not force and not async_task_metrics.flush_due(interval):
+        return
+    try:
+        async_task_metrics.flush(redis_module.redis_client)
+    except Exception:
+        # Metrics are best-effort and must never fail a login.
+        return
+
+
+def _reject(operation: str, reason: str):
+    async_task_metrics.increment(_metrics_key(), f"rejected_total:{operation}:{reason}")
+    _flush_metrics()
+    logger.warning("password_hash_rejected operation=%s reason=%s", operation, reason)
+    raise PasswordHashingBusyError(retry_after_seconds=max(1, round(_queue_timeout_seconds())))
+
+
+def run(operation: str, fn, *args):
+    """Runs one Argon2 (or PBKDF2/scrypt) call without blocking other requests.
+
+    Under eventlet the call moves to eventlet's OS thread pool, so only the
+    calling greenlet waits; argon2-cffi releases the GIL while hashing. Plain
+    threaded servers already run requests on OS threads and call ``fn``
+    directly. Either way the number of concurrent hashes is bounded, and
+    PasswordHashingBusyError is raised when the wait queue is full or a slot
+    does not free up within AUTH_HASH_POOL_QUEUE_TIMEOUT_SECONDS.
+    """
+    global _waiting, _running
+
+    slots = _get_slots()
+    with _state_lock:
+        if _waiting >= _max_queue() and _running >= _slots_size:
+            queue_full = True
+        else:
+            queue_full = False
+            _waiting += 1
+    if queue_full:
+        _reject(operation, "queue_full")
+
+    queued_at = time.perf_counter()
+    try:
+        acquired = slots.acquire(timeout=_queue_timeout_seconds())
+    finally:
+        with _state_lock:
+            _waiting -= 1
+    wait_ms = (time.perf_counter() - queued_at) * 1000
+    if not acquired:
+        _reject(operation, "timeout")
+
+    with _state_lock:
+        _running += 1
+    started_at = time.perf_counter()
+    try:
+        tpool = _eventlet_tpool()
+        if tpool is not None:
+            return tpool.execute(fn, *args)
+        return fn(*args)
+    finally:
+        duration_ms = (time.perf_counter() - started_at) * 1000
+        with _state_lock:
+            _running -= 1
+        slots.release()
+        metrics_key = _metrics_key()
+        async_task_metrics.observe_latency(metrics_key, "password_hash_wait", operation, wait_ms)
+        async_task_metrics.observe_latency(metrics_key, "password_hash", operation, duration_ms)
+        _flush_metrics()
+
+
+def get_operational_snapshot() -> dict:
+    _flush_metrics(force=True)
+    metrics = {}
+    histogram_fields = {}
+    try:
+        raw_metrics = redis_module.redis_client.hgetall(_metrics_key()) or {}
+    except Exception:
+        raw_metrics = {}
+    for key, value in raw_metrics.items():
+        normalized_key = key.decode("utf-8") if isinstance(key, bytes) else str(key)
+        normalized_value = value.decode("utf-8") if isinstance(value, bytes) else value
+        if normalized_key.startswith(async_task_metrics.LATENCY_HISTOGRAM_PREFIX):
+            histogram_fields[normalized_key] = normalized_value
+        else:
+            metrics[normalized_key] = normalized_value
+
+    with _state_lock:
+        running, waiting = _running, _waiting
+    return {
+        "backend": "eventlet_tpool" if _eventlet_tpool() is not None else "inline",
+        "max_concurrency": _max_concurrency(),
+        "max_queue": _max_queue(),
+        "running": running,
+        "waiting": waiting,
+        "latency_histograms": async_task_metrics.summarize_latency_histograms(histogram_fields),
+        "metrics": metrics,
+    }
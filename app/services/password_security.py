@@ -1,4 +1,5 @@
 import hmac
+import time
 from dataclasses import dataclass
 
 from argon2 import PasswordHasher
@@ -7,11 +8,14 @@ from flask import current_app
 from werkzeug.security import check_password_hash
 
 from app.db import db
+from app.extensions import redis_client as redis_module
 from app.models.pending_registration_model import PendingRegistration
 from app.models.user_model import User
+from app.services import password_hash_pool
 
 
 ARGON2_PREFIX = "$argon2id$"
+PASSWORD_MIGRATION_LOCK_KEY = "auth:password_migration:lock"
 _password_hasher: PasswordHasher | None = None
 _password_hasher_signature: tuple[int, int, int, int, int] | None = None
 
@@ -63,7 +67,15 @@ def _is_probable_werkzeug_hash(value: str | None) -> bool:
 
 
 def hash_password(password: str) -> str:
-    return _password_hasher_instance().hash(f"{password}{_pepper()}")
+    """Argon2id hash of ``password``; raises PasswordHashingBusyError under overload."""
+    return password_hash_pool.run("hash", _password_hasher_instance().hash, f"{password}{_pepper()}")
+
+
+def _verify_argon2(hasher: PasswordHasher, stored_hash: str, candidate: str) -> bool:
+    try:
+        return hasher.verify(stored_hash, candidate)
+    except (VerifyMismatchError, InvalidHashError):
+        return False
 
 
 def verify_password(stored_hash: str | None, candidate_password: str) -> PasswordVerificationResult:
@@ -72,9 +84,13 @@ def verify_password(stored_hash: str | None, candidate_password: str) -> Passwor
 
     if is_argon2_hash(stored_hash):
         hasher = _password_hasher_instance()
-        try:
-            hasher.verify(stored_hash, f"{candidate_password}{_pepper()}")
-        except (VerifyMismatchError, InvalidHashError):
+        if not password_hash_pool.run(
+            "verify",
+            _verify_argon2,
+            hasher,
+            stored_hash,
+            f"{candidate_password}{_pepper()}",
+        ):
             return PasswordVerificationResult(is_valid=False, needs_upgrade=False)
         return PasswordVerificationResult(
             is_valid=True,
@@ -82,7 +98,12 @@ def verify_password(stored_hash: str | None, candidate_password: str) -> Passwor
         )
 
     if _is_probable_werkzeug_hash(stored_hash):
-        is_valid = check_password_hash(stored_hash, candidate_password)
+        is_valid = password_hash_pool.run(
+            "verify_legacy",
+            check_password_hash,
+            stored_hash,
+            candidate_password,
+        )
         return PasswordVerificationResult(is_valid=is_valid, needs_upgrade=is_valid)
 
     # Legacy plaintext password compatibility path for pre-hash users.
@@ -96,7 +117,11 @@ def verify_and_upgrade_user_password(user: User, candidate_password: str) -> boo
         return False
 
     if result.needs_upgrade:
-        user.password_hash = hash_password(candidate_password)
+        try:
+            user.password_hash = hash_password(candidate_password)
+        except password_hash_pool.PasswordHashingBusyError:
+            # The login still succeeds; a later one upgrades the hash.
+            return True
         try:
             db.session.commit()
         except Exception:
@@ -104,37 +129,90 @@ def verify_and_upgrade_user_password(user: User, candidate_password: str) -> boo
     return True
 
 
-def migrate_plaintext_passwords() -> int:
-    if not current_app.config.get("AUTH_PASSWORD_MIGRATION_ENABLED", True):
-        return 0
-
-    batch_size = int(current_app.config.get("AUTH_PASSWORD_MIGRATION_BATCH_SIZE", 1000))
-
-    users = (
-        User.query
-        .filter(~User.password_hash.like(f"{ARGON2_PREFIX}%"))
-        .limit(batch_size)
-        .all()
-    )
-    pending_rows = (
-        PendingRegistration.query
-        .filter(~PendingRegistration.password_hash.like(f"{ARGON2_PREFIX}%"))
+def _migrate_batch(model, last_id: int, batch_size: int) -> tuple[int, int | None]:
+    rows = (
+        db.session.query(model.id, model.password_hash)
+        .filter(model.id > last_id, ~model.password_hash.like(f"{ARGON2_PREFIX}%"))
+        .order_by(model.id.asc())
         .limit(batch_size)
         .all()
     )
+    # Release the read transaction while hashing.
+    db.session.commit()
 
     migrated_count = 0
-    for user in users:
-        if not _is_probable_werkzeug_hash(user.password_hash):
-            user.password_hash = hash_password(user.password_hash)
-            migrated_count += 1
+    for row_id, stored_hash in rows:
+        # Werkzeug hashes are upgraded on the user's next login.
+        if not stored_hash or _is_probable_werkzeug_hash(stored_hash):
+            continue
+        new_hash = hash_password(stored_hash)
+        # Compare-and-set, so a password changed meanwhile is not overwritten.
+        migrated_count += (
+            model.query
+            .filter(model.id == row_id, model.password_hash == stored_hash)
+            .update({model.password_hash: new_hash}, synchronize_session=False)
+        )
+        db.session.commit()
 
-    for row in pending_rows:
-        if not _is_probable_werkzeug_hash(row.password_hash):
-            row.password_hash = hash_password(row.password_hash)
-            migrated_count += 1
+    return migrated_count, (rows[-1][0] if rows else None)
 
-    if migrated_count:
-        db.session.commit()
 
+def migrate_plaintext_passwords(*, pause_seconds: float = 0.0, on_batch=None) -> int:
+    """Hashes legacy plaintext passwords of users and pending registrations.
+
+    Rows are read in id order, AUTH_PASSWORD_MIGRATION_BATCH_SIZE at a time,
+    and every hash goes through the hashing pool. ``on_batch`` is called after
+    each batch. Safe to stop and run again.
+    """
+    if not current_app.config.get("AUTH_PASSWORD_MIGRATION_ENABLED", True):
+        return 0
+
+    batch_size = max(int(current_app.config.get("AUTH_PASSWORD_MIGRATION_BATCH_SIZE", 1000)), 1)
+    migrated_count = 0
+    for model in (User, PendingRegistration):
+        last_id = 0
+        while True:
+            batch_count, last_id = _migrate_batch(model, last_id, batch_size)
+            migrated_count += batch_count
+            if last_id is None:
+                break
+            if on_batch is not None:
+                on_batch()
+            if pause_seconds > 0:
+                time.sleep(pause_seconds)
     return migrated_count
+
+
+def run_background_password_migration() -> int:
+    """Runs migrate_plaintext_passwords in one process of the deployment."""
+    client = redis_module.redis_client
+    lock_seconds = max(int(current_app.config.get("AUTH_PASSWORD_MIGRATION_LOCK_SECONDS", 600)), 10)
+    try:
+        if not client.set(PASSWORD_MIGRATION_LOCK_KEY, "1", nx=True, ex=lock_seconds):
+            return 0
+    except Exception:
+        # Without Redis every process migrates; compare-and-set keeps that safe.
+        client = None
+
+    def _extend_lock():
+        if client is None:
+            return
+        try:
+            client.expire(PASSWORD_MIGRATION_LOCK_KEY, lock_seconds)
+        except Exception:
+            return
+
+    try:
+        return migrate_plaintext_passwords(
+            pause_seconds=max(
+                float(current_app.config.get("AUTH_PASSWORD_MIGRATION_BATCH_PAUSE_SECONDS", 0.2)),
+                0.0,
+            ),
+            on_batch=_extend_lock,
+        )
+    finally:
+        if client is not None:
+            try:
+                client.delete(PASSWORD_MIGRATION_LOCK_KEY)
+            except Exception:
+                pass
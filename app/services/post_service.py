@@ -1,14 +1,17 @@
+import base64
+import json
 import os
 import uuid
 import time
 import mimetypes
+from datetime import datetime
 from flask import current_app, has_app_context, has_request_context, request
 from minio.error import S3Error
-from sqlalchemy import func, or_
+from sqlalchemy import and_, func, or_
 from sqlalchemy.orm import selectinload
 
 from app.extensions import redis_client as redis_backend
-from app.extensions.minio_client import get_minio_client
+from app.extensions.minio_client import ensure_bucket, get_minio_client
 from app.models.comment_model import Comment
 from app.models.follow_model import Follow
 from app.models.media_model import Media
@@ -20,9 +23,14 @@ from app.models.user_model import User
 from app.models.vote_model import Vote
 from app.repositories.post_repository import create_post_by_username
 from app.repositories.media_repository import add_media
-from app.repositories import user_repository
+from app.repositories import block_repository, user_repository
 from app.services import block_service
 from app.services import async_task_service
+from app.services import author_card_cache
+from app.services import media_cache
+from app.services import media_upload
+from app.services import media_variants
+from app.services import timeline_service
 from app.services.media_security import (
     is_blocked_declared_mimetype,
     normalize_mimetype,
@@ -50,6 +58,10 @@ class ConcurrentPostUploadError(Exception):
     pass
 
 
+class InvalidCursorError(ValueError):
+    pass
+
+
 def _is_media_not_found(error: S3Error) -> bool:
     return error.code in {"NoSuchKey", "NoSuchBucket", "NoSuchObject"}
 
@@ -65,6 +77,7 @@ def _delete_media_object(object_name: str | None):
             os.remove(absolute_path)
         return
 
+    media_cache.invalidate(object_name)
     bucket = current_app.config["MINIO_BUCKET"]
     minio = get_minio_client()
     try:
@@ -97,38 +110,24 @@ def _build_author_maps(author_ids: set[int]):
     if not author_ids:
         return {}, {}
 
-    user_rows = (
-        db.session.query(User.id, User.username, User.badge)
-        .filter(User.id.in_(author_ids))
-        .all()
-    )
-    profile_rows = (
-        db.session.query(
-            Profile.user_id,
-            Profile.name,
-            Profile.image_object_name,
-            Profile.profile_image_shape,
-        )
-        .filter(Profile.user_id.in_(author_ids))
-        .all()
-    )
-
+    cards = author_card_cache.get_cards(author_ids)
     user_by_id = {
         user_id: {
             "id": user_id,
-            "username": username,
-            "badge": badge,
+            "username": card["username"],
+            "badge": card["badge"],
         }
-        for user_id, username, badge in user_rows
+        for user_id, card in cards.items()
     }
     profile_by_user_id = {
         user_id: {
             "user_id": user_id,
-            "name": name,
-            "image_object_name": image_object_name,
-            "profile_image_shape": profile_image_shape or "circle",
+            "name": card["name"],
+            "image_object_name": card["image_object_name"],
+            "profile_image_shape": card["profile_image_shape"],
         }
-        for user_id, name, image_object_name, profile_image_shape in profile_rows
+        for user_id, card in cards.items()
+        if card["name"] is not None
     }
     return user_by_id, profile_by_user_id
 
@@ -221,6 +220,19 @@ def _serialize_media_item(
         "display_name": media.display_name,
         "title": media.title,
         "artist": media.artist,
+        "width": media.width,
+        "height": media.height,
+        "placeholder": media.placeholder,
+        "variants": [
+            {
+                "url": _build_media_url(variant["object_name"]),
+                "width": variant.get("width"),
+                "height": variant.get("height"),
+                "mime_type": variant.get("mime_type"),
+            }
+            for variant in media_variants.parse_variants(media.variants_json)
+            if variant.get("object_name")
+        ],
     }
     if playlist_adders_by_media_id is not None:
         payload["playlist_adders"] = playlist_adders_by_media_id.get(media.id, [])
@@ -277,7 +289,9 @@ def _build_visible_quoted_posts(
         .options(selectinload(Post.media))
     )
     if hidden_user_ids:
-        query = query.filter(~Post.author_id.in_(hidden_user_ids))
+        query = query.filter(
+            block_repository.hidden_user_filter(Post.author_id, viewer_user_id, hidden_user_ids)
+        )
 
     return {post.id: post for post in query.all()}
 
@@ -379,6 +393,127 @@ def _build_vote_map(post_ids: set[int], viewer_user_id: int | None):
     return {vote.target_id: vote.value for vote in votes}
 
 
+def encode_post_cursor(created_at: datetime, post_id: int) -> str:
+    raw = json.dumps({"t": created_at.isoformat(), "id": int(post_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_post_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(data["t"]), int(data["id"])
+    except (TypeError, ValueError, KeyError, UnicodeError):
+        raise InvalidCursorError("Invalid cursor") from None
+
+
+def parse_include_total(value) -> bool:
+    if value is None:
+        return True
+
+    if isinstance(value, bool):
+        return value
+
+    if isinstance(value, (int, float)):
+        return bool(value)
+
+    if isinstance(value, str):
+        normalized = value.strip().lower()
+        if normalized in {"true", "1", "yes", "on"}:
+            return True
+        if normalized in {"false", "0", "no", "off"}:
+            return False
+
+    raise ValueError("include_total must be a boolean")
+
+
+def resolve_include_total(cursor: str | None, raw_include_total) -> bool:
+    # Cursor mode skips the count unless it is asked for; offset mode counts by default.
+    if cursor is not None and raw_include_total is None:
+        return False
+    return parse_include_total(raw_include_total)
+
+
+def _select_post_page(id_query, *, page: int, limit: int, cursor: str | None):
+    # Keyset on (created_at, id) when a cursor is given, so deep pages walk the
+    # created_at index from the cursor instead of skipping OFFSET rows. One
+    # extra row tells whether there is a next page.
+    query = id_query.with_entities(Post.id, Post.created_at)
+    offset = (page - 1) * limit
+    if cursor is not None:
+        offset = 0
+    if cursor:
+        cursor_created_at, cursor_post_id = decode_post_cursor(cursor)
+        # The plain <= bound is redundant but lets the planner seek the index;
+        # the OR alone makes it scan.
+        query = query.filter(
+            Post.created_at <= cursor_created_at,
+            or_(
+                Post.created_at < cursor_created_at,
+                and_(Post.created_at == cursor_created_at, Post.id < cursor_post_id),
+            ),
+        )
+    rows = (
+        query
+        .order_by(Post.created_at.desc(), Post.id.desc())
+        .offset(offset)
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_post_cursor(rows[-1][1], rows[-1][0]) if has_more else None
+    return [row[0] for row in rows], next_cursor
+
+
+def _cached_post_total(cache_key: str, id_query) -> int:
+    ttl_seconds = int(current_app.config.get("POSTS_TOTAL_CACHE_TTL_SECONDS", 60))
+    client = redis_backend.redis_client
+    try:
+        cached = client.get(cache_key)
+        if cached is not None:
+            return int(cached)
+    except Exception:
+        pass
+
+    total = (
+        id_query.with_entities(func.count(Post.id))
+        .order_by(None)
+        .scalar()
+        or 0
+    )
+    try:
+        client.set(cache_key, total, ex=ttl_seconds)
+    except Exception:
+        pass
+    return total
+
+
+def _post_total(id_query, *, cursor: str | None, cache_key: str):
+    if cursor is None:
+        return (
+            id_query.with_entities(func.count(Post.id))
+            .order_by(None)
+            .scalar()
+            or 0
+        )
+    return _cached_post_total(cache_key, id_query)
+
+
+def _post_page_response(*, page, limit, cursor, total, posts, next_cursor):
+    response = {
+        "page": page if cursor is None else None,
+        "limit": limit,
+        "total": total,
+        "posts": posts,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
+    }
+    if cursor is not None and total is not None:
+        response["total_approximate"] = True
+    return response
+
+
 def _log_feed_timing(
     *,
     endpoint: str,
@@ -682,6 +817,59 @@ def _store_media_locally(file_storage, post_id: int, extension: str) -> str:
     return "static/" + "/".join(relative_parts)
 
 
+def _store_post_media(post_id: int, validated_files: list[tuple]) -> list[str]:
+    """Stores a post's files and returns their object names in the same order.
+
+    All files go to MinIO concurrently; if any of them fails, none is kept
+    there and the whole set is written to local storage instead.
+    """
+    bucket = current_app.config["MINIO_BUCKET"]
+    try:
+        minio = get_minio_client()
+        ensure_bucket(minio, bucket)
+        items = []
+        for file, mimetype, extension, *_ in validated_files:
+            stream, length = _get_stream_and_length(file)
+            items.append(
+                media_upload.UploadItem(
+                    object_name=f"posts/{post_id}/{uuid.uuid4()}.{extension}",
+                    stream=stream,
+                    length=length,
+                    content_type=mimetype,
+                )
+            )
+        return [uploaded.object_name for uploaded in media_upload.upload_objects(minio, bucket, items)]
+    except Exception as e:
+        if not bool(current_app.config.get("MEDIA_LOCAL_FALLBACK_ENABLED", True)):
+            db.session.rollback()
+            raise MediaStorageError("Media storage is unavailable") from e
+
+    try:
+        return [
+            _store_media_locally(file, post_id, extension)
+            for file, _, extension, *_ in validated_files
+        ]
+    except Exception as e:
+        db.session.rollback()
+        raise MediaStorageError("Media storage is unavailable") from e
+
+
+def _queue_media_post_process(post_id: int, media_items: list[dict]):
+    if async_task_service.enqueue_media_post_process_task(
+        post_id=post_id,
+        media_items=media_items,
+        source="post_service.create_post_with_media",
+    ):
+        return
+    if not async_task_service.should_fallback_inline():
+        return
+    try:
+        media_variants.process_post_media(post_id)
+    except Exception as exc:
+        db.session.rollback()
+        current_app.logger.warning("media_variants_inline_failed post_id=%s error=%s", post_id, exc)
+
+
 def _resolve_visible_quoted_post_for_author(
     quoted_post_id: int | None,
     author_username: str,
@@ -702,7 +890,9 @@ def _resolve_visible_quoted_post_for_author(
         )
     )
     if hidden_user_ids:
-        query = query.filter(~Post.author_id.in_(hidden_user_ids))
+        query = query.filter(
+            block_repository.hidden_user_filter(Post.author_id, viewer_user_id, hidden_user_ids)
+        )
 
     quoted_post = query.first()
     if not quoted_post:
@@ -820,55 +1010,11 @@ def create_post_with_media(
 
         media_post_process_items = []
         if validated_files:
-            minio = None
-            bucket = current_app.config["MINIO_BUCKET"]
-            local_fallback_enabled = bool(
-                current_app.config.get("MEDIA_LOCAL_FALLBACK_ENABLED", True)
-            )
-            use_local_storage = False
-
-            try:
-                minio = get_minio_client()
-                bucket_exists = minio.bucket_exists(bucket)
-                if not bucket_exists:
-                    minio.make_bucket(bucket)
-            except Exception as e:
-                if not local_fallback_enabled:
-                    db.session.rollback()
-                    raise MediaStorageError("Media storage is unavailable") from e
-                use_local_storage = True
-
-            for file, mimetype, extension, display_name, title, artist in validated_files:
-                object_name = None
-
-                if not use_local_storage:
-                    try:
-                        object_name = f"posts/{post.id}/{uuid.uuid4()}.{extension}"
-                        stream, length = _get_stream_and_length(file)
-                        upload_kwargs = {
-                            "bucket_name": bucket,
-                            "object_name": object_name,
-                            "data": stream,
-                            "length": length,
-                            "content_type": mimetype,
-                        }
-                        if length == -1:
-                            upload_kwargs["part_size"] = 10 * 1024 * 1024
-
-                        minio.put_object(**upload_kwargs)
-                    except Exception as e:
-                        if not local_fallback_enabled:
-                            db.session.rollback()
-                            raise MediaStorageError("Media storage is unavailable") from e
-                        use_local_storage = True
-
-                if use_local_storage:
-                    try:
-                        object_name = _store_media_locally(file, post.id, extension)
-                    except Exception as e:
-                        db.session.rollback()
-                        raise MediaStorageError("Media storage is unavailable") from e
-
+            object_names = _store_post_media(post.id, validated_files)
+            for (file, mimetype, _, display_name, title, artist), object_name in zip(
+                validated_files,
+                object_names,
+            ):
                 add_media(
                     post_id=post.id,
                     object_name=object_name,
@@ -886,21 +1032,75 @@ def create_post_with_media(
 
         db.session.commit()
         if media_post_process_items:
-            async_task_service.enqueue_media_post_process_task(
-                post_id=post.id,
-                media_items=media_post_process_items,
-                source="post_service.create_post_with_media",
-            )
+            _queue_media_post_process(post.id, media_post_process_items)
+        try:
+            timeline_service.publish_post(post.id, source="post_service.create_post_with_media")
+        except Exception as exc:
+            current_app.logger.warning("timeline_publish_failed post_id=%s error=%s", post.id, exc)
         return {"post_id": post.id}
     finally:
         _release_upload_lock(lock_handle)
 
 
+def hydrate_posts(
+    post_ids: list[int],
+    *,
+    viewer_user_id: int | None,
+    hidden_user_ids: set[int],
+) -> list[dict]:
+    """Serializes already-filtered post ids in the given order with batched lookups."""
+    posts = (
+        Post.query
+        .filter(Post.id.in_(post_ids))
+        .options(selectinload(Post.media))
+        .all()
+    )
+    posts_by_id = {post.id: post for post in posts}
+    ordered_posts = [
+        posts_by_id[post_id]
+        for post_id in post_ids
+        if post_id in posts_by_id
+    ]
+
+    quoted_posts_by_id = _build_visible_quoted_posts(
+        ordered_posts,
+        viewer_user_id=viewer_user_id,
+        hidden_user_ids=hidden_user_ids,
+    )
+    author_ids = {
+        post.author_id
+        for post in ordered_posts
+    } | {
+        quoted_post.author_id
+        for quoted_post in quoted_posts_by_id.values()
+    }
+    user_by_id, profile_by_user_id = _build_author_maps(author_ids)
+    playlist_adders_by_media_id = _build_playlist_adders_by_media(ordered_posts)
+    vote_by_post_id = _build_vote_map(
+        post_ids=set(post_ids),
+        viewer_user_id=viewer_user_id,
+    )
+
+    result = []
+    for post in ordered_posts:
+        payload = _serialize_post(
+            post,
+            user_by_id,
+            profile_by_user_id,
+            playlist_adders_by_media_id=playlist_adders_by_media_id,
+            quoted_posts_by_id=quoted_posts_by_id,
+        )
+        payload["viewer_vote"] = int(vote_by_post_id.get(post.id, 0))
+        result.append(payload)
+    return result
+
+
 def get_posts(
     page: int,
     limit: int,
     viewer_username: str | None = None,
     include_total: bool = True,
+    cursor: str | None = None,
 ):
     page = max(1, int(page or 1))
     limit = max(1, min(int(limit or 10), 50))
@@ -915,7 +1115,9 @@ def get_posts(
         _post_visibility_filter(viewer_user_id),
     ]
     if hidden_user_ids:
-        filter_conditions.append(~Post.author_id.in_(hidden_user_ids))
+        filter_conditions.append(
+            block_repository.hidden_user_filter(Post.author_id, viewer_user_id, hidden_user_ids)
+        )
 
     query = (
         db.session.query(Post.id)
@@ -923,24 +1125,20 @@ def get_posts(
         .filter(*filter_conditions)
     )
 
+    paged_post_ids, next_cursor = _select_post_page(
+        query,
+        page=page,
+        limit=limit,
+        cursor=cursor,
+    )
     total = None
     if include_total:
-        total = (
-            query.with_entities(func.count(Post.id))
-            .order_by(None)
-            .scalar()
-            or 0
+        total = _post_total(
+            query,
+            cursor=cursor,
+            cache_key=f"posts:total:feed:{viewer_user_id or 0}",
         )
 
-    offset = (page - 1) * limit
-    paged_post_ids = [
-        row[0]
-        for row in query
-        .order_by(Post.created_at.desc(), Post.id.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
-    ]
     if not paged_post_ids:
         _log_feed_timing(
             endpoint="posts_feed",
@@ -950,57 +1148,20 @@ def get_posts(
             rows=0,
             started_at=started_at,
         )
-        return {
-            "page": page,
-            "limit": limit,
-            "total": total,
-            "posts": [],
-        }
-
-    posts = (
-        Post.query
-        .filter(Post.id.in_(paged_post_ids))
-        .options(selectinload(Post.media))
-        .all()
-    )
-    posts_by_id = {post.id: post for post in posts}
-    ordered_posts = [
-        posts_by_id[post_id]
-        for post_id in paged_post_ids
-        if post_id in posts_by_id
-    ]
+        return _post_page_response(
+            page=page,
+            limit=limit,
+            cursor=cursor,
+            total=total,
+            posts=[],
+            next_cursor=None,
+        )
 
-    quoted_posts_by_id = _build_visible_quoted_posts(
-        ordered_posts,
+    result = hydrate_posts(
+        paged_post_ids,
         viewer_user_id=viewer_user_id,
         hidden_user_ids=hidden_user_ids,
     )
-    author_ids = {
-        post.author_id
-        for post in ordered_posts
-    } | {
-        quoted_post.author_id
-        for quoted_post in quoted_posts_by_id.values()
-    }
-    post_ids = set(paged_post_ids)
-    user_by_id, profile_by_user_id = _build_author_maps(author_ids)
-    playlist_adders_by_media_id = _build_playlist_adders_by_media(ordered_posts)
-    vote_by_post_id = _build_vote_map(
-        post_ids=post_ids,
-        viewer_user_id=viewer_user_id,
-    )
-
-    result = []
-    for post in ordered_posts:
-        payload = _serialize_post(
-            post,
-            user_by_id,
-            profile_by_user_id,
-            playlist_adders_by_media_id=playlist_adders_by_media_id,
-            quoted_posts_by_id=quoted_posts_by_id,
-        )
-        payload["viewer_vote"] = int(vote_by_post_id.get(post.id, 0))
-        result.append(payload)
 
     _log_feed_timing(
         endpoint="posts_feed",
@@ -1011,12 +1172,14 @@ def get_posts(
         started_at=started_at,
     )
 
-    return {
-        "page": page,
-        "limit": limit,
-        "total": total,
-        "posts": result
-    }
+    return _post_page_response(
+        page=page,
+        limit=limit,
+        cursor=cursor,
+        total=total,
+        posts=result,
+        next_cursor=next_cursor,
+    )
 
 
 def get_post(post_id: int, viewer_username: str | None = None):
@@ -1035,7 +1198,9 @@ def get_post(post_id: int, viewer_username: str | None = None):
         .options(selectinload(Post.media))
     )
     if hidden_user_ids:
-        query = query.filter(~Post.author_id.in_(hidden_user_ids))
+        query = query.filter(
+            block_repository.hidden_user_filter(Post.author_id, viewer_user_id, hidden_user_ids)
+        )
 
     post = query.first()
     if not post:
@@ -1073,6 +1238,8 @@ def get_posts_by_username(
     page: int,
     limit: int,
     viewer_username: str | None = None,
+    include_total: bool = True,
+    cursor: str | None = None,
 ):
     user = user_repository.get_by_username(username)
     if not user or getattr(user, "is_suspended", False):
@@ -1096,80 +1263,44 @@ def get_posts_by_username(
         )
     )
 
-    total = (
-        base_query.with_entities(func.count(Post.id))
-        .order_by(None)
-        .scalar()
-        or 0
+    paged_post_ids, next_cursor = _select_post_page(
+        base_query,
+        page=page,
+        limit=limit,
+        cursor=cursor,
     )
-    offset = (page - 1) * limit
-    paged_post_ids = [
-        row[0]
-        for row in base_query
-        .with_entities(Post.id)
-        .order_by(Post.created_at.desc(), Post.id.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
-    ]
+    total = None
+    if include_total:
+        total = _post_total(
+            base_query,
+            cursor=cursor,
+            cache_key=f"posts:total:profile:{user.id}:{viewer_user_id or 0}",
+        )
 
     if not paged_post_ids:
-        return {
-            "page": page,
-            "limit": limit,
-            "total": total,
-            "posts": [],
-        }
-
-    posts = (
-        Post.query
-        .filter(Post.id.in_(paged_post_ids))
-        .options(selectinload(Post.media))
-        .all()
-    )
-    posts_by_id = {post.id: post for post in posts}
-    ordered_posts = [
-        posts_by_id[post_id]
-        for post_id in paged_post_ids
-        if post_id in posts_by_id
-    ]
+        return _post_page_response(
+            page=page,
+            limit=limit,
+            cursor=cursor,
+            total=total,
+            posts=[],
+            next_cursor=None,
+        )
 
-    hidden_user_ids = block_service.hidden_user_ids_for_viewer(viewer_username)
-    quoted_posts_by_id = _build_visible_quoted_posts(
-        ordered_posts,
-        viewer_user_id=viewer_user_id,
-        hidden_user_ids=hidden_user_ids,
-    )
-    author_ids = {post.author_id for post in ordered_posts} | {
-        quoted_post.author_id
-        for quoted_post in quoted_posts_by_id.values()
-    }
-    post_ids = set(paged_post_ids)
-    user_by_id, profile_by_user_id = _build_author_maps(author_ids)
-    playlist_adders_by_media_id = _build_playlist_adders_by_media(ordered_posts)
-    vote_by_post_id = _build_vote_map(
-        post_ids=post_ids,
+    serialized_posts = hydrate_posts(
+        paged_post_ids,
         viewer_user_id=viewer_user_id,
+        hidden_user_ids=block_service.hidden_user_ids_for_viewer(viewer_username),
     )
 
-    serialized_posts = []
-    for post in ordered_posts:
-        payload = _serialize_post(
-            post,
-            user_by_id,
-            profile_by_user_id,
-            playlist_adders_by_media_id=playlist_adders_by_media_id,
-            quoted_posts_by_id=quoted_posts_by_id,
-        )
-        payload["viewer_vote"] = int(vote_by_post_id.get(post.id, 0))
-        serialized_posts.append(payload)
-
-    return {
-        "page": page,
-        "limit": limit,
-        "total": total,
-        "posts": serialized_posts
-    }
+    return _post_page_response(
+        page=page,
+        limit=limit,
+        cursor=cursor,
+        total=total,
+        posts=serialized_posts,
+        next_cursor=next_cursor,
+    )
 
 
 def delete_post_by_username(post_id: int, username: str):
@@ -0,0 +1,139 @@
+import logging
+
+from flask import current_app
+
+from app.extensions import redis_client as redis_module
+from app.repositories import block_repository, follow_repository, group_repository, message_repository
+from app.repositories import user_repository
+
+logger = logging.getLogger(__name__)
+
+PRESENCE_SUBSCRIBERS_PREFIX = "presence:subscribers:"
+# Stored alongside real members so an empty audience is still a cache hit.
+_EMPTY_AUDIENCE_MARKER = "__none__"
+
+
+def _client():
+    return redis_module.redis_client
+
+
+def _normalize_username(username):
+    if isinstance(username, bytes):
+        username = username.decode("utf-8", errors="ignore")
+    if not isinstance(username, str):
+        return ""
+    return username.strip()
+
+
+def _subscribers_key(username):
+    return f"{PRESENCE_SUBSCRIBERS_PREFIX}{username}"
+
+
+def _cache_ttl_seconds():
+    return max(int(current_app.config.get("PRESENCE_SUBSCRIBERS_CACHE_TTL_SECONDS", 300)), 1)
+
+
+def _conversation_partner_limit():
+    return max(int(current_app.config.get("PRESENCE_SUBSCRIBERS_MAX_CONVERSATIONS", 1000)), 1)
+
+
+def _load_subscribers_from_db(username):
+    user = user_repository.get_by_username(username)
+    if not user or getattr(user, "is_suspended", False):
+        return set()
+
+    subscribers = set(follow_repository.get_follower_usernames(user.id))
+    subscribers.update(group_repository.get_co_member_usernames(user.id))
+    # A block keeps the follow and the shared groups, but not presence.
+    subscribers -= block_repository.get_hidden_usernames_for_viewer(user.id)
+    subscribers.discard(username)
+    return subscribers
+
+
+def _without_hidden_users(username, usernames):
+    if not usernames:
+        return usernames
+    user = user_repository.get_by_username(username)
+    if not user:
+        return set()
+    return usernames - block_repository.get_hidden_usernames_for_viewer(user.id)
+
+
+def _load_cached_subscribers(username):
+    client = _client()
+    key = _subscribers_key(username)
+    cached = {_normalize_username(member) for member in client.smembers(key) or set()}
+    if cached:
+        cached.discard(_EMPTY_AUDIENCE_MARKER)
+        return cached
+
+    subscribers = _load_subscribers_from_db(username)
+    pipe = client.pipeline()
+    pipe.sadd(key, *(subscribers or {_EMPTY_AUDIENCE_MARKER}))
+    pipe.expire(key, _cache_ttl_seconds())
+    pipe.execute()
+    return subscribers
+
+
+def get_presence_subscribers(username):
+    # Followers and members of shared groups come from a cached set; private
+    # conversation partners are read live from the contact timestamp index.
+    # Users in a block relation with ``username`` are left out of both.
+    normalized_username = _normalize_username(username)
+    if not normalized_username:
+        return set()
+
+    try:
+        subscribers = _load_cached_subscribers(normalized_username)
+    except Exception as exc:
+        logger.warning(
+            "Failed to load cached presence subscribers for username=%s: %s",
+            normalized_username,
+            exc,
+        )
+        subscribers = _load_subscribers_from_db(normalized_username)
+
+    try:
+        partners = set(
+            message_repository.get_conversation_partner_usernames(
+                normalized_username,
+                limit=_conversation_partner_limit(),
+            )
+        ) - subscribers
+        subscribers.update(_without_hidden_users(normalized_username, partners))
+    except Exception as exc:
+        logger.warning(
+            "Failed to load conversation partners for presence username=%s: %s",
+            normalized_username,
+            exc,
+        )
+
+    subscribers.discard(normalized_username)
+    return subscribers
+
+
+def invalidate_presence_subscribers(*usernames):
+    keys = [
+        _subscribers_key(username)
+        for username in {_normalize_username(raw) for raw in usernames}
+        if username
+    ]
+    if not keys:
+        return
+    try:
+        _client().delete(*keys)
+    except Exception as exc:
+        logger.warning("Failed to invalidate presence subscribers for %s user(s): %s", len(keys), exc)
+
+
+def invalidate_group_presence_subscribers(group_id, extra_usernames=()):
+    try:
+        member_usernames = group_repository.get_group_member_usernames(group_id)
+    except Exception as exc:
+        logger.warning(
+            "Failed to load group members for presence invalidation group_id=%s: %s",
+            group_id,
+            exc,
+        )
+        member_usernames = []
+    invalidate_presence_subscribers(*member_usernames, *extra_usernames)
@@ -24,10 +24,14 @@ from app.models.report_model import PostReport
 from app.models.user_model import User
 from app.models.vote_model import Vote
 from app.repositories import profile_video_repository, user_repository
-from app.repositories import message_repository
+from app.repositories import group_repository
 from app.repositories.follow_repository import count_followers, count_following
 from app.repositories.profile_repository import create_profile_for_user, get_by_user_id
+from app.services import account_purge_service
+from app.services import author_card_cache
 from app.services import block_service
+from app.services import media_cache
+from app.services import typeahead_service
 from app.services.media_security import (
     is_blocked_declared_mimetype,
     normalize_mimetype,
@@ -134,6 +138,7 @@ def _delete_media_object(object_name: str | None):
             os.remove(absolute_path)
         return
 
+    media_cache.invalidate(object_name)
     bucket = current_app.config["MINIO_BUCKET"]
     minio = get_minio_client()
     try:
@@ -379,6 +384,9 @@ def update_profile(
         )
 
     db.session.commit()
+    author_card_cache.invalidate(user.id)
+    if name is not None:
+        typeahead_service.index_user(user.id, user.username, profile.name)
 
     if old_image_object_name and old_image_object_name != profile.image_object_name:
         try:
@@ -404,12 +412,16 @@ def get_profile_posts(
     page: int,
     limit: int,
     viewer_username: str | None = None,
+    include_total: bool = True,
+    cursor: str | None = None,
 ):
     return get_posts_by_username(
         username=username,
         page=page,
         limit=limit,
         viewer_username=viewer_username,
+        include_total=include_total,
+        cursor=cursor,
     )
 
 
@@ -466,12 +478,8 @@ def delete_account(username: str):
         raise ValueError("User not found")
 
     user_id = int(user.id)
-    all_usernames = [
-        row[0]
-        for row in db.session.query(User.username).all()
-        if row and row[0]
-    ]
     media_object_names = _collect_account_media_object_names(user_id)
+    member_group_ids = group_repository.get_group_ids_for_user(user_id)
 
     user_post_ids = [
         int(row[0])
@@ -517,11 +525,6 @@ def delete_account(username: str):
     for object_name in media_object_names:
         _delete_media_object(object_name)
 
-    message_repository.purge_user_data(
-        username=username,
-        candidate_usernames=all_usernames,
-    )
-
     try:
         if removable_comment_ids:
             Vote.query.filter(
@@ -633,3 +636,18 @@ def delete_account(username: str):
     except Exception:
         db.session.rollback()
         raise
+    # Messages and chat state are purged after the account is gone, in the
+    # background when the task queue is up.
+    account_purge_service.start_purge(
+        username,
+        group_ids=member_group_ids,
+        source="delete_account",
+    )
+    typeahead_service.remove_user(user_id)
+    author_card_cache.invalidate(user_id)
+    created_group_id_set = set(created_group_ids)
+    for group_id in member_group_ids:
+        if group_id in created_group_id_set:
+            group_repository.clear_membership_version(group_id)
+        else:
+            group_repository.bump_membership_version(group_id)
@@ -1,21 +1,31 @@
 import logging
+import os
 import time
 from datetime import datetime, timedelta
 
 from flask import current_app, has_app_context
+from sqlalchemy import and_, or_, select
 
 from app.config import Config
 from app.db import db
+from app.extensions import redis_client as redis_module
+from app.extensions.minio_client import get_minio_client
 from app.models.admin_model import AdminUser
 from app.models.comment_model import Comment
 from app.models.follow_model import Follow
 from app.models.media_model import Media
+from app.models.playlist_track_model import PlaylistTrack
 from app.models.post_model import Post
 from app.models.profile_model import Profile
 from app.models.report_model import PostReport
 from app.models.user_model import User
 from app.models.vote_model import Vote
 from app.repositories import report_repository
+from app.services import author_card_cache
+from app.services import media_cache
+from app.services import media_upload
+from app.services import media_variants
+from app.services import typeahead_service
 
 
 REPORT_STATUS_PENDING = "pending"
@@ -47,6 +57,10 @@ ADMIN_DECISIONS = (
     ADMIN_DECISION_DELETE_ACCOUNT,
 )
 
+# Object names of purged media, scored by queue time. Storage is cleaned
+# after the rows are committed, in bulk, and failures are retried next run.
+MEDIA_DELETION_QUEUE_KEY = "moderation_cleanup:media_deletions"
+
 _last_cleanup_at = None
 
 
@@ -91,6 +105,18 @@ def _cleanup_batch_size(override: int | None = None):
     return max(int(Config.MODERATION_CLEANUP_BATCH_SIZE), 1)
 
 
+def _purge_chunk_size():
+    if has_app_context():
+        return max(int(current_app.config.get("MODERATION_CLEANUP_PURGE_CHUNK_SIZE", 500)), 1)
+    return max(int(Config.MODERATION_CLEANUP_PURGE_CHUNK_SIZE), 1)
+
+
+def _media_removal_batch_size():
+    if has_app_context():
+        return max(int(current_app.config.get("MODERATION_CLEANUP_MEDIA_REMOVAL_BATCH_SIZE", 1000)), 1)
+    return max(int(Config.MODERATION_CLEANUP_MEDIA_REMOVAL_BATCH_SIZE), 1)
+
+
 def _cleanup_logger():
     if has_app_context():
         return current_app.logger
@@ -379,6 +405,7 @@ def handle_report_by_admin(
     )
 
     now = datetime.utcnow()
+    suspended_user_id = None
 
     if normalized_decision == ADMIN_DECISION_DELETE_POST:
         post = Post.query.get(report.post_id)
@@ -408,6 +435,7 @@ def handle_report_by_admin(
             report_id=report.id,
             now=now,
         )
+        suspended_user_id = target_user.id
 
     report.status = REPORT_STATUS_HANDLED
     report.admin_decision = normalized_decision
@@ -417,69 +445,233 @@ def handle_report_by_admin(
     report.decision_expires_at = _report_expiry_from(now)
 
     db.session.commit()
+    if suspended_user_id is not None:
+        typeahead_service.remove_user(suspended_user_id)
+        author_card_cache.invalidate(suspended_user_id)
     return report
 
 
-def _hard_delete_post(post: Post):
-    comment_ids = [
-        row[0]
-        for row in db.session.query(Comment.id).filter(Comment.post_id == post.id).all()
-    ]
+def _media_object_names(post_ids: list[int]) -> list[str]:
+    """Original and variant object names of the media of ``post_ids``."""
+    object_names = []
+    for object_name, variants_json in (
+        db.session.query(Media.object_name, Media.variants_json)
+        .filter(Media.post_id.in_(post_ids))
+        .all()
+    ):
+        if object_name:
+            object_names.append(object_name)
+        object_names.extend(
+            variant["object_name"]
+            for variant in media_variants.parse_variants(variants_json)
+            if variant.get("object_name")
+        )
+    return object_names
+
 
-    if comment_ids:
-        Vote.query.filter(
-            Vote.target_type == "comment",
-            Vote.target_id.in_(comment_ids),
-        ).delete(synchronize_session=False)
+def _delete_post_rows(post_ids: list[int]) -> int:
+    """Deletes a batch of posts with their votes, comments, media and reports.
 
-    Comment.query.filter_by(post_id=post.id).delete(synchronize_session=False)
-    Vote.query.filter(
-        Vote.target_type == "post",
-        Vote.target_id == post.id,
+    One statement per table for the whole batch; returns the rows affected.
+    """
+    comment_ids = select(Comment.id).where(Comment.post_id.in_(post_ids)).scalar_subquery()
+    media_ids = select(Media.id).where(Media.post_id.in_(post_ids)).scalar_subquery()
+
+    rows = Vote.query.filter(
+        or_(
+            and_(Vote.target_type == "comment", Vote.target_id.in_(comment_ids)),
+            and_(Vote.target_type == "post", Vote.target_id.in_(post_ids)),
+        )
     ).delete(synchronize_session=False)
-    Post.query.filter(
-        Post.quoted_post_id == post.id
+    rows += Comment.query.filter(
+        Comment.post_id.in_(post_ids)
+    ).delete(synchronize_session=False)
+    rows += PlaylistTrack.query.filter(
+        PlaylistTrack.media_id.in_(media_ids)
+    ).delete(synchronize_session=False)
+    rows += Post.query.filter(
+        Post.quoted_post_id.in_(post_ids)
     ).update(
         {Post.quoted_post_id: None},
         synchronize_session=False,
     )
-    Media.query.filter_by(post_id=post.id).delete(synchronize_session=False)
-    PostReport.query.filter_by(post_id=post.id).delete(synchronize_session=False)
-    db.session.delete(post)
-
-
-def _hard_delete_user(user: User):
-    user_posts = Post.query.filter_by(author_id=user.id).all()
-    for post in user_posts:
-        _hard_delete_post(post)
-
-    authored_comment_ids = [
-        row[0]
-        for row in db.session.query(Comment.id).filter(Comment.author_id == user.id).all()
-    ]
-    if authored_comment_ids:
-        Vote.query.filter(
-            Vote.target_type == "comment",
-            Vote.target_id.in_(authored_comment_ids),
-        ).delete(synchronize_session=False)
-
-    Comment.query.filter_by(author_id=user.id).delete(synchronize_session=False)
-    Vote.query.filter_by(user_id=user.id).delete(synchronize_session=False)
-    Follow.query.filter(
-        (Follow.follower_id == user.id) | (Follow.following_id == user.id)
+    rows += Media.query.filter(
+        Media.post_id.in_(post_ids)
+    ).delete(synchronize_session=False)
+    rows += PostReport.query.filter(
+        PostReport.post_id.in_(post_ids)
+    ).delete(synchronize_session=False)
+    rows += Post.query.filter(
+        Post.id.in_(post_ids)
+    ).delete(synchronize_session=False)
+    return rows
+
+
+def _hard_delete_posts(post_ids: list[int]) -> int:
+    """Purges ``post_ids`` in chunks, one transaction per chunk.
+
+    Media objects are queued for removal once their rows are committed.
+    Returns the rows affected.
+    """
+    rows = 0
+    chunk_size = _purge_chunk_size()
+    for offset in range(0, len(post_ids), chunk_size):
+        chunk = post_ids[offset:offset + chunk_size]
+        object_names = _media_object_names(chunk)
+        rows += _delete_post_rows(chunk)
+        db.session.commit()
+        _queue_media_deletions(object_names)
+    return rows
+
+
+def _hard_delete_users(user_ids: list[int]) -> tuple[int, int]:
+    """Purges suspended users and everything they own.
+
+    Their posts go first, a chunk per transaction, so a prolific account never
+    holds locks for the whole purge; a run that stops midway continues on the
+    next cleanup because the users are still due. Returns (posts, rows).
+    """
+    posts_deleted = 0
+    rows = 0
+    chunk_size = _purge_chunk_size()
+    while True:
+        post_ids = [
+            row[0]
+            for row in (
+                db.session.query(Post.id)
+                .filter(Post.author_id.in_(user_ids))
+                .order_by(Post.id.asc())
+                .limit(chunk_size)
+                .all()
+            )
+        ]
+        if not post_ids:
+            break
+        rows += _hard_delete_posts(post_ids)
+        posts_deleted += len(post_ids)
+
+    authored_comment_ids = (
+        select(Comment.id).where(Comment.author_id.in_(user_ids)).scalar_subquery()
+    )
+    rows += Vote.query.filter(
+        or_(
+            and_(Vote.target_type == "comment", Vote.target_id.in_(authored_comment_ids)),
+            Vote.user_id.in_(user_ids),
+        )
+    ).delete(synchronize_session=False)
+    rows += Comment.query.filter(
+        Comment.author_id.in_(user_ids)
     ).delete(synchronize_session=False)
-    Profile.query.filter_by(user_id=user.id).delete(synchronize_session=False)
-    PostReport.query.filter(
-        PostReport.handled_by_admin_id == user.id
+    rows += Follow.query.filter(
+        Follow.follower_id.in_(user_ids) | Follow.following_id.in_(user_ids)
+    ).delete(synchronize_session=False)
+    rows += Profile.query.filter(
+        Profile.user_id.in_(user_ids)
+    ).delete(synchronize_session=False)
+    rows += PostReport.query.filter(
+        PostReport.handled_by_admin_id.in_(user_ids)
     ).update(
         {PostReport.handled_by_admin_id: None},
         synchronize_session=False,
     )
-    PostReport.query.filter(
-        PostReport.reporter_id == user.id
+    rows += PostReport.query.filter(
+        PostReport.reporter_id.in_(user_ids)
+    ).delete(synchronize_session=False)
+    rows += AdminUser.query.filter(
+        AdminUser.user_id.in_(user_ids)
+    ).delete(synchronize_session=False)
+    rows += User.query.filter(
+        User.id.in_(user_ids)
     ).delete(synchronize_session=False)
-    AdminUser.query.filter_by(user_id=user.id).delete(synchronize_session=False)
-    db.session.delete(user)
+    db.session.commit()
+    return posts_deleted, rows
+
+
+def _queue_media_deletions(object_names: list[str]):
+    if not object_names:
+        return
+    now = time.time()
+    try:
+        redis_module.redis_client.zadd(
+            MEDIA_DELETION_QUEUE_KEY,
+            {object_name: now for object_name in object_names},
+        )
+    except Exception as exc:
+        # The rows are already committed, so the log is the only record left
+        # of these objects; it lists every name for a manual removal.
+        _cleanup_logger().error(
+            "moderation_cleanup_media_queue_failed count=%s objects=%s error=%s",
+            len(object_names),
+            ",".join(object_names),
+            exc,
+        )
+
+
+def _remove_local_media(object_name: str):
+    relative_path = object_name[len("static/"):]
+    absolute_path = os.path.join(current_app.static_folder, relative_path)
+    if os.path.isfile(absolute_path):
+        os.remove(absolute_path)
+
+
+def _drain_media_deletions() -> tuple[int, int | None]:
+    """Removes queued media objects in bulk; returns (removed, left in the queue).
+
+    Objects that fail stay queued and are retried on the next cleanup run.
+    Storage or Redis being unreachable ends the pass; the queue size is None
+    when Redis is.
+    """
+    client = redis_module.redis_client
+    batch_size = _media_removal_batch_size()
+    removed = 0
+    try:
+        # Failed names stay at the front of the queue, so the next batch starts after them.
+        offset = 0
+        while True:
+            batch = [
+                name.decode("utf-8") if isinstance(name, bytes) else name
+                for name in client.zrange(MEDIA_DELETION_QUEUE_KEY, offset, offset + batch_size - 1)
+            ]
+            if not batch:
+                break
+
+            failed = set()
+            storage_down = False
+            remote_names = []
+            media_cache.invalidate_many(batch)
+            for object_name in batch:
+                if not object_name.startswith("static/"):
+                    remote_names.append(object_name)
+                    continue
+                try:
+                    _remove_local_media(object_name)
+                except OSError:
+                    failed.add(object_name)
+            if remote_names:
+                try:
+                    failed.update(
+                        media_upload.remove_objects_bulk(
+                            get_minio_client(),
+                            current_app.config["MINIO_BUCKET"],
+                            remote_names,
+                        )
+                    )
+                except Exception as exc:
+                    _cleanup_logger().warning("moderation_cleanup_media_removal_failed error=%s", exc)
+                    failed.update(remote_names)
+                    storage_down = True
+
+            done = [object_name for object_name in batch if object_name not in failed]
+            if done:
+                client.zrem(MEDIA_DELETION_QUEUE_KEY, *done)
+            removed += len(done)
+            offset += len(failed)
+            if storage_down or len(batch) < batch_size:
+                break
+        return removed, int(client.zcard(MEDIA_DELETION_QUEUE_KEY) or 0)
+    except Exception as exc:
+        _cleanup_logger().warning("moderation_cleanup_media_queue_unavailable error=%s", exc)
+        return removed, None
 
 
 def run_scheduled_cleanup_with_metrics(
@@ -498,88 +690,118 @@ def run_scheduled_cleanup_with_metrics(
                 "force": bool(force),
                 "batch_size": _cleanup_batch_size(batch_size),
                 "users_deleted": 0,
+                "user_posts_deleted": 0,
                 "posts_deleted": 0,
                 "reports_deleted": 0,
                 "rows_processed": 0,
+                "rows_deleted": 0,
+                "rows_per_sec": 0.0,
+                "media_objects_removed": 0,
+                "media_objects_pending": 0,
                 "duration_ms": 0,
             }
 
     started_at = time.perf_counter()
     limit = _cleanup_batch_size(batch_size)
     users_deleted = 0
+    user_posts_deleted = 0
     posts_deleted = 0
-    reports_deleted = 0
+    rows_deleted = 0
+    purged_user_ids = []
     try:
-        due_users = (
-            User.query
-            .filter(
-                User.is_suspended.is_(True),
-                User.purge_after.isnot(None),
-                User.purge_after <= now,
+        purged_user_ids = [
+            row[0]
+            for row in (
+                db.session.query(User.id)
+                .filter(
+                    User.is_suspended.is_(True),
+                    User.purge_after.isnot(None),
+                    User.purge_after <= now,
+                )
+                .order_by(User.purge_after.asc(), User.id.asc())
+                .limit(limit)
+                .all()
             )
-            .order_by(User.purge_after.asc(), User.id.asc())
-            .limit(limit)
-            .all()
-        )
-        for user in due_users:
-            _hard_delete_user(user)
-            users_deleted += 1
-
-        due_posts = (
-            Post.query
-            .filter(
-                Post.is_hidden.is_(True),
-                Post.purge_after.isnot(None),
-                Post.purge_after <= now,
+        ]
+        if purged_user_ids:
+            user_posts_deleted, user_rows = _hard_delete_users(purged_user_ids)
+            users_deleted = len(purged_user_ids)
+            rows_deleted += user_rows
+
+        due_post_ids = [
+            row[0]
+            for row in (
+                db.session.query(Post.id)
+                .filter(
+                    Post.is_hidden.is_(True),
+                    Post.purge_after.isnot(None),
+                    Post.purge_after <= now,
+                )
+                .order_by(Post.purge_after.asc(), Post.id.asc())
+                .limit(limit)
+                .all()
             )
-            .order_by(Post.purge_after.asc(), Post.id.asc())
-            .limit(limit)
-            .all()
-        )
-        for post in due_posts:
-            _hard_delete_post(post)
-            posts_deleted += 1
+        ]
+        if due_post_ids:
+            rows_deleted += _hard_delete_posts(due_post_ids)
+            posts_deleted = len(due_post_ids)
 
-        expired_reports = report_repository.list_expired_handled(now, limit=limit)
-        for report in expired_reports:
-            db.session.delete(report)
-            reports_deleted += 1
-
-        changes = users_deleted + posts_deleted + reports_deleted
-        if changes:
+        reports_deleted = report_repository.delete_expired_handled(now, limit=limit)
+        if reports_deleted:
             db.session.commit()
-        _last_cleanup_at = now
-        duration_ms = int((time.perf_counter() - started_at) * 1000)
-        logger.info(
-            "moderation_cleanup completed force=%s batch_size=%s rows=%s users=%s posts=%s reports=%s duration_ms=%s",
-            force,
-            limit,
-            changes,
-            users_deleted,
-            posts_deleted,
-            reports_deleted,
-            duration_ms,
-        )
-        return {
-            "skipped": False,
-            "force": bool(force),
-            "batch_size": limit,
-            "users_deleted": users_deleted,
-            "posts_deleted": posts_deleted,
-            "reports_deleted": reports_deleted,
-            "rows_processed": changes,
-            "duration_ms": duration_ms,
-        }
+        rows_deleted += reports_deleted
     except Exception:
         db.session.rollback()
         duration_ms = int((time.perf_counter() - started_at) * 1000)
         logger.exception(
-            "moderation_cleanup failed force=%s batch_size=%s duration_ms=%s",
+            "moderation_cleanup failed force=%s batch_size=%s rows_deleted=%s duration_ms=%s",
             force,
             limit,
+            rows_deleted,
             duration_ms,
         )
         raise
+    finally:
+        # Chunks committed before a failure are gone too.
+        author_card_cache.invalidate(*purged_user_ids)
+
+    media_objects_removed, media_objects_pending = _drain_media_deletions()
+    changes = users_deleted + posts_deleted + reports_deleted
+    _last_cleanup_at = now
+    duration_seconds = time.perf_counter() - started_at
+    duration_ms = int(duration_seconds * 1000)
+    rows_per_sec = round(rows_deleted / duration_seconds, 1) if duration_seconds > 0 else 0.0
+    logger.info(
+        "moderation_cleanup completed force=%s batch_size=%s rows=%s users=%s user_posts=%s posts=%s "
+        "reports=%s rows_deleted=%s rows_per_sec=%s media_removed=%s media_pending=%s duration_ms=%s",
+        force,
+        limit,
+        changes,
+        users_deleted,
+        user_posts_deleted,
+        posts_deleted,
+        reports_deleted,
+        rows_deleted,
+        rows_per_sec,
+        media_objects_removed,
+        media_objects_pending,
+        duration_ms,
+    )
+    return {
+        "skipped": False,
+        "force": bool(force),
+        "batch_size": limit,
+        "users_deleted": users_deleted,
+        "user_posts_deleted": user_posts_deleted,
+        "posts_deleted": posts_deleted,
+        "reports_deleted": reports_deleted,
+        "rows_processed": changes,
+        "rows_deleted": rows_deleted,
+        "rows_per_sec": rows_per_sec,
+        "media_objects_removed": media_objects_removed,
+        "media_objects_pending": media_objects_pending,
+        "duration_ms": duration_ms,
+    }
 
 
 def run_scheduled_cleanup(force: bool = False):
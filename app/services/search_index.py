@@ -0,0 +1,340 @@
+"""In-process inverted index used for search when the database has no text index.
+
+PostgreSQL serves search from the pg_trgm / tsvector GIN indexes declared in
+``app.performance_indexes``. Other dialects (SQLite in development and tests)
+get this index instead: usernames and profile names are indexed by trigram,
+post text by word. The index only produces candidate ids; callers re-check
+every candidate in SQL, so stale postings left behind by edits or deletes can
+never leak into results.
+
+Each process builds its index lazily on the first search and keeps it fresh
+from ORM flush events, so writes made by other processes are only seen after a
+restart. That is fine for the single-process SQLite setup it exists for.
+"""
+
+import heapq
+import logging
+import re
+from array import array
+from bisect import bisect_left
+from threading import Lock
+
+from sqlalchemy import event, inspect as sa_inspect, select
+
+from app.models.post_model import Post
+from app.models.profile_model import Profile
+from app.models.user_model import User
+
+logger = logging.getLogger(__name__)
+
+# Matches how PostgreSQL's default text-search parser splits words.
+_WORD_RE = re.compile(r"[^\W_]+")
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_EXPANSIONS = 512
+
+
+def tokenize(value) -> list[str]:
+    if not value:
+        return []
+    return _WORD_RE.findall(str(value).lower())
+
+
+def trigrams(value) -> set[str]:
+    value = str(value or "").lower()
+    return {value[index:index + 3] for index in range(len(value) - 2)}
+
+
+class InvertedIndex:
+    """Maps terms to append-only id postings; removed ids are tombstoned."""
+
+    def __init__(self):
+        self._postings: dict[str, array] = {}
+        self._removed: set[int] = set()
+        self._vocabulary: list[str] = []
+        self._vocabulary_dirty = False
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._postings)
+
+    def add(self, doc_id: int, terms):
+        doc_id = int(doc_id)
+        with self._lock:
+            self._removed.discard(doc_id)
+            for term in set(terms):
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = array("q")
+                    self._postings[term] = postings
+                    self._vocabulary_dirty = True
+                postings.append(doc_id)
+
+    def remove(self, doc_id: int):
+        with self._lock:
+            self._removed.add(int(doc_id))
+
+    def _ids_for(self, term: str) -> set[int]:
+        postings = self._postings.get(term)
+        return set(postings) if postings is not None else set()
+
+    def _prefix_terms(self, prefix: str) -> list[str]:
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_dirty = False
+        start = bisect_left(self._vocabulary, prefix)
+        matched = []
+        for term in self._vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            matched.append(term)
+        return matched
+
+    def match_all(self, terms) -> set[int]:
+        with self._lock:
+            ordered = sorted(set(terms), key=lambda term: len(self._postings.get(term, ())))
+            if not ordered:
+                return set()
+            matched = self._ids_for(ordered[0])
+            for term in ordered[1:]:
+                if not matched:
+                    break
+                matched.intersection_update(self._postings.get(term, ()))
+            return matched - self._removed
+
+    def _newest(self, postings_lists, limit: int, seen: set[int]) -> list[int]:
+        # Postings are appended in id order, so walking them backwards yields
+        # the newest ids first without materializing the whole list.
+        if len(postings_lists) == 1:
+            ordered = reversed(postings_lists[0])
+        else:
+            ordered = heapq.merge(*(reversed(postings) for postings in postings_lists), reverse=True)
+        newest = []
+        for doc_id in ordered:
+            if len(newest) >= limit:
+                break
+            if doc_id in seen or doc_id in self._removed:
+                continue
+            seen.add(doc_id)
+            newest.append(doc_id)
+        return newest
+
+    def search_words(self, words: list[str], limit: int) -> tuple[list[int], int]:
+        """Returns up to ``limit`` ranked ids and an estimated match count.
+
+        Every word must match exactly except the last, which also matches as a
+        prefix (search-as-you-type). Ids containing the last word verbatim rank
+        above prefix-only matches, newest first within each tier.
+        """
+        if not words or limit <= 0:
+            return [], 0
+        head, last = words[:-1], words[-1]
+        with self._lock:
+            prefix_terms = []
+            if len(last) >= MIN_PREFIX_LENGTH:
+                prefix_terms = [term for term in self._prefix_terms(last) if term != last]
+
+            if not head:
+                exact_postings = self._postings.get(last)
+                seen = set()
+                ranked = self._newest([exact_postings], limit, seen) if exact_postings is not None else []
+                if len(ranked) < limit and prefix_terms:
+                    ranked.extend(self._newest(
+                        [self._postings[term] for term in prefix_terms],
+                        limit - len(ranked),
+                        seen,
+                    ))
+                estimated = len(exact_postings or ()) + sum(len(self._postings[term]) for term in prefix_terms)
+                return ranked, estimated
+
+            matched = None
+            for term in sorted(set(head), key=lambda term: len(self._postings.get(term, ()))):
+                if matched is None:
+                    matched = self._ids_for(term)
+                else:
+                    matched.intersection_update(self._postings.get(term, ()))
+                if not matched:
+                    return [], 0
+            matched.difference_update(self._removed)
+
+            exact = matched.intersection(self._postings.get(last, ()))
+            prefix_only = set()
+            for term in prefix_terms:
+                prefix_only.update(matched.intersection(self._postings[term]))
+            prefix_only.difference_update(exact)
+            ranked = heapq.nlargest(limit, exact)
+            if len(ranked) < limit:
+                ranked.extend(heapq.nlargest(limit - len(ranked), prefix_only))
+            return ranked, len(exact) + len(prefix_only)
+
+
+class SearchIndex:
+    def __init__(self):
+        self.users = InvertedIndex()
+        self.posts = InvertedIndex()
+        self.built = False
+        self.build_lock = Lock()
+
+
+_indexes: dict[str, SearchIndex] = {}
+_indexes_lock = Lock()
+
+
+def _index_key(bind) -> str:
+    return str(bind.engine.url)
+
+
+def supports_native_search(bind) -> bool:
+    return bind.dialect.name == "postgresql"
+
+
+def _user_terms(username, profile_name) -> set[str]:
+    return trigrams(username) | trigrams(profile_name)
+
+
+def _build(index: SearchIndex, session, batch_size: int):
+    last_id = 0
+    while True:
+        rows = session.execute(
+            select(User.id, User.username, Profile.name)
+            .outerjoin(Profile, Profile.user_id == User.id)
+            .where(User.id > last_id)
+            .order_by(User.id.asc())
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        for user_id, username, profile_name in rows:
+            index.users.add(user_id, _user_terms(username, profile_name))
+        last_id = rows[-1][0]
+
+    last_id = 0
+    while True:
+        rows = session.execute(
+            select(Post.id, Post.text)
+            .where(Post.id > last_id)
+            .order_by(Post.id.asc())
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        for post_id, text in rows:
+            index.posts.add(post_id, tokenize(text))
+        last_id = rows[-1][0]
+
+
+def get_index(session, batch_size: int = 5000) -> SearchIndex:
+    bind = session.get_bind()
+    key = _index_key(bind)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = SearchIndex()
+            _indexes[key] = index
+    if not index.built:
+        with index.build_lock:
+            if not index.built:
+                _build(index, session, max(int(batch_size), 1))
+                index.built = True
+                logger.info(
+                    "search_index_built url=%s user_terms=%s post_terms=%s",
+                    bind.engine.url.render_as_string(hide_password=True),
+                    len(index.users),
+                    len(index.posts),
+                )
+    return index
+
+
+def _built_index_for(connection) -> SearchIndex | None:
+    if supports_native_search(connection):
+        return None
+    index = _indexes.get(_index_key(connection))
+    if index is None or not index.built:
+        return None
+    return index
+
+
+def _text_changed(target, name: str) -> bool:
+    return sa_inspect(target).attrs[name].history.has_changes()
+
+
+def _profile_name_for(connection, user_id):
+    return connection.execute(
+        select(Profile.name).where(Profile.user_id == user_id)
+    ).scalar()
+
+
+def _username_for(connection, user_id):
+    return connection.execute(
+        select(User.username).where(User.id == user_id)
+    ).scalar()
+
+
+def _index_post(connection, target):
+    index = _built_index_for(connection)
+    if index is not None and target.id is not None:
+        index.posts.add(target.id, tokenize(target.text))
+
+
+def _index_user(connection, user_id, username, profile_name):
+    index = _built_index_for(connection)
+    if index is not None and user_id is not None:
+        index.users.add(user_id, _user_terms(username, profile_name))
+
+
+@event.listens_for(Post, "after_insert")
+def _post_inserted(_mapper, connection, target):
+    _index_post(connection, target)
+
+
+@event.listens_for(Post, "after_update")
+def _post_updated(_mapper, connection, target):
+    # Votes, hides and winner flags also update posts; only text matters here.
+    if _text_changed(target, "text"):
+        _index_post(connection, target)
+
+
+@event.listens_for(Post, "after_delete")
+def _post_deleted(_mapper, connection, target):
+    index = _built_index_for(connection)
+    if index is not None and target.id is not None:
+        index.posts.remove(target.id)
+
+
+@event.listens_for(User, "after_insert")
+def _user_inserted(_mapper, connection, target):
+    _index_user(connection, target.id, target.username, None)
+
+
+@event.listens_for(User, "after_update")
+def _user_updated(_mapper, connection, target):
+    if _text_changed(target, "username"):
+        _index_user(
+            connection,
+            target.id,
+            target.username,
+            _profile_name_for(connection, target.id),
+        )
+
+
+@event.listens_for(User, "after_delete")
+def _user_deleted(_mapper, connection, target):
+    index = _built_index_for(connection)
+    if index is not None and target.id is not None:
+        index.users.remove(target.id)
+
+
+@event.listens_for(Profile, "after_insert")
+@event.listens_for(Profile, "after_update")
+def _profile_saved(_mapper, connection, target):
+    if _text_changed(target, "name"):
+        _index_user(
+            connection,
+            target.user_id,
+            _username_for(connection, target.user_id),
+            target.name,
+        )
+
+
+def reset():
+    with _indexes_lock:
+        _indexes.clear()
@@ -1,10 +1,15 @@
+from flask import current_app
+from sqlalchemy import case, func, literal_column, select
 from sqlalchemy.orm import joinedload
 
+from app.db import db
+from app.models.follow_model import Follow
 from app.models.user_model import User
 from app.models.profile_model import Profile
 from app.models.post_model import Post
 from app.models.vote_model import Vote
-from app.services import block_service
+from app.repositories import block_repository
+from app.services import block_service, search_index, typeahead_service
 from app.services.post_service import (
     _build_author_maps,
     _build_playlist_adders_by_media,
@@ -53,6 +58,45 @@ def _build_vote_map(posts: list[Post], viewer_user_id: int | None):
     return {vote.target_id: vote.value for vote in votes}
 
 
+def _total_cap() -> int:
+    return max(int(current_app.config.get("SEARCH_TOTAL_CAP", 1000)), 1)
+
+
+def _index_batch_size() -> int:
+    return max(int(current_app.config.get("SEARCH_INDEX_BUILD_BATCH_SIZE", 5000)), 1)
+
+
+def _uses_native_search() -> bool:
+    return search_index.supports_native_search(db.session.get_bind())
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _capped_total(id_query, cap: int) -> tuple[int, bool]:
+    # Counting stops at cap + 1 rows instead of walking every match.
+    matched = db.session.execute(
+        select(func.count()).select_from(id_query.limit(cap + 1).subquery())
+    ).scalar() or 0
+    return min(matched, cap), matched > cap
+
+
+def _user_rank(normalized_query: str, escaped: str):
+    # Exact username, then username prefix, then name prefix, then substring;
+    # shorter usernames are closer matches within each tier.
+    return (
+        case(
+            (func.lower(User.username) == normalized_query, 0),
+            (User.username.ilike(f"{escaped}%", escape="\\"), 1),
+            (Profile.name.ilike(f"{escaped}%", escape="\\"), 2),
+            else_=3,
+        ),
+        func.length(User.username),
+        User.id.asc(),
+    )
+
+
 def search_users(
     query: str,
     page: int,
@@ -62,23 +106,49 @@ def search_users(
     if limit > 50:
         limit = 50
 
-    pattern = f"%{query}%"
+    normalized_query = query.strip().lower()
+    escaped = _escape_like(normalized_query)
+    pattern = f"%{escaped}%"
+    cap = _total_cap()
     hidden_user_ids = block_service.hidden_user_ids_for_viewer(viewer_username)
 
     base_query = (
         User.query
         .outerjoin(Profile, Profile.user_id == User.id)
         .filter(User.is_suspended.is_(False))
-        .filter(
-            (User.username.ilike(pattern)) | (Profile.name.ilike(pattern))
-        )
-        .order_by(User.id.asc())
     )
+    if _uses_native_search():
+        # Each branch can use its own pg_trgm GIN index.
+        base_query = base_query.filter(
+            User.id.in_(
+                select(User.id).where(User.username.ilike(pattern, escape="\\"))
+                .union(select(Profile.user_id).where(Profile.name.ilike(pattern, escape="\\")))
+            )
+        )
+    else:
+        query_trigrams = search_index.trigrams(normalized_query)
+        if query_trigrams:
+            index = search_index.get_index(db.session, _index_batch_size())
+            candidate_ids = index.users.match_all(query_trigrams)
+            if not candidate_ids:
+                return {"page": page, "limit": limit, "total": 0, "total_capped": False, "users": []}
+            base_query = base_query.filter(User.id.in_(candidate_ids))
+        base_query = base_query.filter(
+            User.username.ilike(pattern, escape="\\") | Profile.name.ilike(pattern, escape="\\")
+        )
     if hidden_user_ids:
-        base_query = base_query.filter(~User.id.in_(hidden_user_ids))
+        base_query = base_query.filter(
+            block_repository.hidden_user_filter(User.id, _viewer_user_id(viewer_username), hidden_user_ids)
+        )
 
-    total = base_query.count()
-    users = base_query.offset((page - 1) * limit).limit(limit).all()
+    total, total_capped = _capped_total(base_query.with_entities(User.id), cap)
+    users = (
+        base_query
+        .order_by(*_user_rank(normalized_query, escaped))
+        .offset((page - 1) * limit)
+        .limit(limit)
+        .all()
+    )
 
     user_ids = {u.id for u in users}
     profiles = Profile.query.filter(Profile.user_id.in_(user_ids)).all() if user_ids else []
@@ -88,10 +158,107 @@ def search_users(
         "page": page,
         "limit": limit,
         "total": total,
+        "total_capped": total_capped,
         "users": [_serialize_user(u, profile_by_user_id.get(u.id)) for u in users],
     }
 
 
+def _visible_posts_query(viewer_user_id: int | None, hidden_user_ids):
+    base_query = (
+        Post.query
+        .join(User, User.id == Post.author_id)
+        .filter(
+            Post.is_hidden.is_(False),
+            User.is_suspended.is_(False),
+            _post_visibility_filter(viewer_user_id),
+        )
+    )
+    if hidden_user_ids:
+        base_query = base_query.filter(
+            block_repository.hidden_user_filter(Post.author_id, viewer_user_id, hidden_user_ids)
+        )
+    return base_query
+
+
+def _native_post_ids(words: list[str], viewer_user_id, hidden_user_ids, page, limit, cap):
+    # Must render exactly like the ix_posts_text_search expression index.
+    document = func.to_tsvector(literal_column("'simple'"), Post.text)
+    terms = [*words[:-1], f"{words[-1]}:*"]
+    ts_query = func.to_tsquery(literal_column("'simple'"), " & ".join(terms))
+    matched = _visible_posts_query(viewer_user_id, hidden_user_ids).filter(
+        document.op("@@")(ts_query)
+    )
+    total, total_capped = _capped_total(matched.with_entities(Post.id), cap)
+    page_ids = [
+        post_id
+        for (post_id,) in matched
+        .with_entities(Post.id)
+        .order_by(func.ts_rank_cd(document, ts_query).desc(), Post.created_at.desc())
+        .offset((page - 1) * limit)
+        .limit(limit)
+        .all()
+    ]
+    return page_ids, total, total_capped
+
+
+def _visible_candidate_ids(candidate_ids: list[int], words: list[str], viewer_user_id, hidden_user_ids):
+    # Without ANALYZE stats SQLite drives "id IN (...)" plus the visibility
+    # predicates through ix_posts_feed_visible_created and walks every visible
+    # post, so candidates are read by primary key alone and the rules of
+    # _post_visibility_filter are applied here instead.
+    rows = [
+        row
+        for row in db.session.execute(
+            select(Post.id, Post.author_id, Post.text, Post.is_hidden, Post.followers_only)
+            .where(Post.id.in_(candidate_ids))
+        ).all()
+        if not row.is_hidden
+        and row.author_id not in hidden_user_ids
+        and all(word in (row.text or "").lower() for word in words)
+    ]
+    author_ids = {row.author_id for row in rows}
+    if not author_ids:
+        return set()
+
+    suspended_ids = set(
+        db.session.execute(
+            select(User.id).where(User.id.in_(author_ids), User.is_suspended.is_(True))
+        ).scalars()
+    )
+    readable_author_ids = set()
+    if viewer_user_id is not None:
+        readable_author_ids.add(viewer_user_id)
+        if any(row.followers_only for row in rows):
+            readable_author_ids.update(
+                db.session.execute(
+                    select(Follow.following_id).where(
+                        Follow.follower_id == viewer_user_id,
+                        Follow.following_id.in_(author_ids),
+                    )
+                ).scalars()
+            )
+    return {
+        row.id
+        for row in rows
+        if row.author_id not in suspended_ids
+        and (not row.followers_only or row.author_id in readable_author_ids)
+    }
+
+
+def _indexed_post_ids(words: list[str], viewer_user_id, hidden_user_ids, page, limit, cap):
+    index = search_index.get_index(db.session, _index_batch_size())
+    # Post ids increase with creation time, so the index ranks newest first.
+    ranked, estimated_matches = index.posts.search_words(words, cap)
+    if not ranked:
+        return [], 0, False
+
+    visible_ids = _visible_candidate_ids(ranked, words, viewer_user_id, hidden_user_ids)
+    ordered_ids = [post_id for post_id in ranked if post_id in visible_ids]
+    total_capped = estimated_matches > cap
+    start = (page - 1) * limit
+    return ordered_ids[start:start + limit], len(ordered_ids), total_capped
+
+
 def search_posts(
     query: str,
     page: int,
@@ -101,27 +268,35 @@ def search_posts(
     if limit > 50:
         limit = 50
 
-    pattern = f"%{query}%"
     viewer_user_id = _viewer_user_id(viewer_username)
     hidden_user_ids = block_service.hidden_user_ids_for_viewer(viewer_username)
+    words = search_index.tokenize(query)
+    cap = _total_cap()
 
-    base_query = (
-        Post.query
-        .join(User, User.id == Post.author_id)
-        .options(joinedload(Post.media))
-        .filter(
-            Post.is_hidden.is_(False),
-            User.is_suspended.is_(False),
-            _post_visibility_filter(viewer_user_id),
+    page_ids, total, total_capped = [], 0, False
+    if words:
+        find_ids = _native_post_ids if _uses_native_search() else _indexed_post_ids
+        page_ids, total, total_capped = find_ids(
+            words,
+            viewer_user_id,
+            hidden_user_ids,
+            page,
+            limit,
+            cap,
         )
-        .filter(Post.text.ilike(pattern))
-        .order_by(Post.created_at.desc())
-    )
-    if hidden_user_ids:
-        base_query = base_query.filter(~Post.author_id.in_(hidden_user_ids))
 
-    total = base_query.count()
-    posts = base_query.offset((page - 1) * limit).limit(limit).all()
+    posts_by_id = {
+        post.id: post
+        for post in (
+            Post.query
+            .options(joinedload(Post.media))
+            .filter(Post.id.in_(page_ids))
+            .all()
+            if page_ids
+            else []
+        )
+    }
+    posts = [posts_by_id[post_id] for post_id in page_ids if post_id in posts_by_id]
 
     quoted_posts_by_id = _build_visible_quoted_posts(
         posts,
@@ -152,6 +327,7 @@ def search_posts(
         "page": page,
         "limit": limit,
         "total": total,
+        "total_capped": total_capped,
         "posts": serialized_posts,
     }
 
@@ -175,6 +351,26 @@ def search_all(
         "limit": limit,
         "users": users_result["users"],
         "users_total": users_result["total"],
+        "users_total_capped": users_result["total_capped"],
         "posts": posts_result["posts"],
         "posts_total": posts_result["total"],
+        "posts_total_capped": posts_result["total_capped"],
+    }
+
+
+def typeahead_users(
+    query: str,
+    limit: int,
+    viewer_username: str | None = None,
+):
+    normalized_limit = typeahead_service.normalize_limit(limit)
+    hidden_user_ids = block_service.hidden_user_ids_for_viewer(viewer_username)
+    return {
+        "query": query,
+        "limit": normalized_limit,
+        "users": typeahead_service.complete(
+            query,
+            limit=normalized_limit,
+            exclude_ids=hidden_user_ids,
+        ),
     }
@@ -30,7 +30,9 @@ from app.repositories.story_repository import (
     set_story_like,
 )
 from app.services import activity_notification_service
+from app.services import media_cache
 from app.services import message_service
+from app.services import typeahead_service
 from app.services.post_service import _get_mp4_duration_seconds
 from app.services.media_security import normalize_mimetype
 from app.db import db
@@ -208,6 +210,7 @@ def _delete_story_media_object(media_url: str | None):
             os.remove(absolute_path)
         return
 
+    media_cache.invalidate(object_name)
     bucket = current_app.config["MINIO_BUCKET"]
     minio = get_minio_client()
     try:
@@ -323,19 +326,41 @@ def _resolve_allowed_mentions(*, poster_username: str, mention_usernames: list[s
     return allowed_ids
 
 
-def get_mention_candidates(
-    *,
-    username: str,
-    query: str = "",
-    limit: int = DEFAULT_STORY_MENTION_SUGGESTION_LIMIT,
-):
+def _mention_candidates_from_cache(username: str, normalized_query: str, limit: int):
+    poster_id = typeahead_service.resolve_user_id(username)
+    if poster_id is None:
+        return None
+
+    cards = typeahead_service.get_cards(typeahead_service.get_following_ids(poster_id))
+    usernames = [
+        card["username"]
+        for card in cards.values()
+        if card.get("username") and card["id"] != poster_id
+    ]
+    if normalized_query:
+        usernames = [item for item in usernames if normalized_query in item.lower()]
+
+        def _rank(item):
+            lowered = item.lower()
+            if lowered == normalized_query:
+                tier = 0
+            elif lowered.startswith(normalized_query):
+                tier = 1
+            else:
+                tier = 2
+            return tier, len(item), item
+
+        usernames.sort(key=_rank)
+    else:
+        usernames.sort()
+    return usernames[:limit]
+
+
+def _mention_candidates_from_db(username: str, normalized_query: str, limit: int):
     poster = user_repository.get_by_username(username)
     if not poster:
         raise ValueError("User not found")
 
-    normalized_query = (query or "").strip().lower()
-    normalized_limit = _story_mention_suggestion_limit(limit)
-
     base_query = (
         db.session.query(User.username)
         .join(Follow, Follow.following_id == User.id)
@@ -366,8 +391,29 @@ def get_mention_candidates(
     else:
         base_query = base_query.order_by(User.username.asc())
 
-    rows = base_query.limit(normalized_limit).all()
-    usernames = [row.username for row in rows if row.username]
+    rows = base_query.limit(limit).all()
+    return [row.username for row in rows if row.username]
+
+
+def get_mention_candidates(
+    *,
+    username: str,
+    query: str = "",
+    limit: int = DEFAULT_STORY_MENTION_SUGGESTION_LIMIT,
+):
+    normalized_query = (query or "").strip().lower()
+    normalized_limit = _story_mention_suggestion_limit(limit)
+
+    # Followed users and their cards come from the typeahead index in Redis;
+    # SQL is only used when the poster is not indexed or Redis is unavailable.
+    usernames = None
+    try:
+        usernames = _mention_candidates_from_cache(username, normalized_query, normalized_limit)
+    except Exception as exc:
+        current_app.logger.warning("Story mention typeahead lookup failed for %s: %s", username, exc)
+    if usernames is None:
+        usernames = _mention_candidates_from_db(username, normalized_query, normalized_limit)
+
     return {
         "query": query or "",
         "limit": normalized_limit,
@@ -0,0 +1,324 @@
+import logging
+from datetime import timezone
+
+from flask import current_app
+from sqlalchemy import select
+
+from app.db import db
+from app.extensions import redis_client as redis_module
+from app.models.follow_model import Follow
+from app.models.post_model import Post
+from app.models.user_model import User
+from app.repositories import block_repository, user_repository
+from app.services import async_task_service, typeahead_service
+
+logger = logging.getLogger(__name__)
+
+# user id -> sorted set of post ids scored by created_at epoch, newest kept.
+TIMELINE_KEY_PREFIX = "timeline:home:"
+# Present while a timeline is maintained; fan-out skips users without it, so
+# inactive users cost no memory and are rebuilt from the database on read.
+TIMELINE_READY_KEY_PREFIX = "timeline:home_ready:"
+# Authors over the fan-out follower limit; their posts are merged in on read.
+TIMELINE_FAN_OUT_ON_READ_AUTHORS_KEY = "timeline:fan_out_on_read_authors"
+
+
+def _client():
+    return redis_module.redis_client
+
+
+def _timeline_key(user_id: int) -> str:
+    return f"{TIMELINE_KEY_PREFIX}{int(user_id)}"
+
+
+def _ready_key(user_id: int) -> str:
+    return f"{TIMELINE_READY_KEY_PREFIX}{int(user_id)}"
+
+
+def _max_entries() -> int:
+    return max(int(current_app.config.get("TIMELINE_MAX_ENTRIES", 800)), 1)
+
+
+def _ttl_seconds() -> int:
+    return max(int(current_app.config.get("TIMELINE_TTL_SECONDS", 3 * 24 * 60 * 60)), 1)
+
+
+def _fan_out_max_followers() -> int:
+    return max(int(current_app.config.get("TIMELINE_FAN_OUT_MAX_FOLLOWERS", 10000)), 1)
+
+
+def _fan_out_batch_size() -> int:
+    return max(int(current_app.config.get("TIMELINE_FAN_OUT_BATCH_SIZE", 1000)), 1)
+
+
+def _backfill_posts() -> int:
+    return max(int(current_app.config.get("TIMELINE_BACKFILL_POSTS", 50)), 0)
+
+
+def _score(created_at) -> float:
+    return created_at.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _decode(value):
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="ignore")
+    return value
+
+
+def _recent_post_rows(author_ids, limit: int):
+    author_ids = [int(author_id) for author_id in author_ids]
+    if not author_ids or limit <= 0:
+        return []
+    return db.session.execute(
+        select(Post.id, Post.created_at)
+        .join(User, User.id == Post.author_id)
+        .where(
+            Post.author_id.in_(author_ids),
+            Post.is_hidden.is_(False),
+            User.is_suspended.is_(False),
+        )
+        .order_by(Post.created_at.desc(), Post.id.desc())
+        .limit(limit)
+    ).all()
+
+
+def _queue_add(pipe, user_id: int, entries: dict):
+    key = _timeline_key(user_id)
+    pipe.zadd(key, entries)
+    # Keep the newest TIMELINE_MAX_ENTRIES.
+    pipe.zremrangebyrank(key, 0, -(_max_entries() + 1))
+    pipe.expire(key, _ttl_seconds())
+
+
+def rebuild_timeline(user_id: int) -> int:
+    """Seeds one user's timeline from the database (fan-out on read)."""
+    author_ids = typeahead_service.get_following_ids(user_id) | {int(user_id)}
+    hidden_user_ids = block_repository.get_hidden_user_ids_for_viewer(int(user_id))
+    rows = _recent_post_rows(author_ids - hidden_user_ids, _max_entries())
+
+    client = _client()
+    pipe = client.pipeline()
+    pipe.delete(_timeline_key(user_id))
+    if rows:
+        _queue_add(pipe, user_id, {str(post_id): _score(created_at) for post_id, created_at in rows})
+    pipe.set(_ready_key(user_id), "1", ex=_ttl_seconds())
+    pipe.execute()
+    return len(rows)
+
+
+def publish_post(post_id: int, *, source: str):
+    """Queues fan-out of a new post to its author's followers."""
+    if async_task_service.enqueue_timeline_fan_out_task(post_id=post_id, source=source):
+        return
+    if async_task_service.should_fallback_inline():
+        fan_out_post(post_id)
+
+
+def fan_out_post(post_id: int) -> int:
+    post = db.session.get(Post, int(post_id))
+    if post is None or post.is_hidden:
+        return 0
+
+    client = _client()
+    author_id = int(post.author_id)
+    entry = {str(post.id): _score(post.created_at)}
+    follower_count = (
+        db.session.query(Follow.id).filter(Follow.following_id == author_id).count()
+    )
+    if follower_count > _fan_out_max_followers():
+        # Too many followers to write on every post; readers merge these in.
+        client.sadd(TIMELINE_FAN_OUT_ON_READ_AUTHORS_KEY, author_id)
+        user_ids = [author_id]
+    else:
+        client.srem(TIMELINE_FAN_OUT_ON_READ_AUTHORS_KEY, author_id)
+        user_ids = [author_id] + [
+            int(follower_id)
+            for follower_id in db.session.execute(
+                select(Follow.follower_id).where(Follow.following_id == author_id)
+            ).scalars()
+        ]
+
+    written = 0
+    batch_size = _fan_out_batch_size()
+    for offset in range(0, len(user_ids), batch_size):
+        batch = user_ids[offset:offset + batch_size]
+        pipe = client.pipeline()
+        for user_id in batch:
+            pipe.exists(_ready_key(user_id))
+        ready = pipe.execute()
+
+        pipe = client.pipeline()
+        for user_id, is_ready in zip(batch, ready):
+            if is_ready:
+                _queue_add(pipe, user_id, entry)
+                written += 1
+        pipe.execute()
+    return written
+
+
+def backfill_author(user_id: int, author_id: int):
+    """Adds a newly followed author's recent posts; call after a follow."""
+    try:
+        client = _client()
+        if not client.exists(_ready_key(user_id)):
+            return
+        rows = _recent_post_rows([author_id], _backfill_posts())
+        if not rows:
+            return
+        pipe = client.pipeline()
+        _queue_add(pipe, user_id, {str(post_id): _score(created_at) for post_id, created_at in rows})
+        pipe.execute()
+    except Exception as exc:
+        logger.warning("Failed to backfill timeline user_id=%s author_id=%s: %s", user_id, author_id, exc)
+
+
+def prune_author(user_id: int, author_id: int):
+    """Drops an author's posts from one timeline; call after unfollow or block."""
+    try:
+        client = _client()
+        if not client.exists(_ready_key(user_id)):
+            return
+        post_ids = [
+            str(post_id)
+            for post_id in db.session.execute(
+                select(Post.id)
+                .where(Post.author_id == int(author_id))
+                .order_by(Post.created_at.desc())
+                .limit(_max_entries())
+            ).scalars()
+        ]
+        if post_ids:
+            client.zrem(_timeline_key(user_id), *post_ids)
+    except Exception as exc:
+        logger.warning("Failed to prune timeline user_id=%s author_id=%s: %s", user_id, author_id, exc)
+
+
+def _fan_out_on_read_rows(following_ids: set[int], limit: int):
+    pulled_author_ids = {
+        int(_decode(author_id))
+        for author_id in _client().smembers(TIMELINE_FAN_OUT_ON_READ_AUTHORS_KEY) or set()
+    } & following_ids
+    return _recent_post_rows(pulled_author_ids, limit)
+
+
+def _visible_post_ids(post_ids: list[int], viewer_user_id: int, hidden_user_ids: set[int]) -> set[int]:
+    from app.services import post_service
+
+    if not post_ids:
+        return set()
+    # Timeline entries can outlive an unfollow (a racing fan-out, a failed or
+    # partial prune), so followers-only posts are checked again here.
+    query = (
+        select(Post.id)
+        .join(User, User.id == Post.author_id)
+        .where(
+            Post.id.in_(post_ids),
+            Post.is_hidden.is_(False),
+            User.is_suspended.is_(False),
+            post_service._post_visibility_filter(viewer_user_id),
+        )
+    )
+    if hidden_user_ids:
+        query = query.where(
+            block_repository.hidden_user_filter(Post.author_id, viewer_user_id, hidden_user_ids)
+        )
+    return set(db.session.execute(query).scalars())
+
+
+def _cached_window_ids(user_id: int, window: int) -> list[int]:
+    """The newest ``window`` post ids from the Redis timeline and pulled authors."""
+    client = _client()
+    if not client.exists(_ready_key(user_id)):
+        rebuild_timeline(user_id)
+    else:
+        client.expire(_ready_key(user_id), _ttl_seconds())
+
+    entries = {
+        int(_decode(member)): float(score)
+        for member, score in client.zrevrange(_timeline_key(user_id), 0, window - 1, withscores=True)
+    }
+    following_ids = typeahead_service.get_following_ids(user_id)
+    for post_id, created_at in _fan_out_on_read_rows(following_ids, window):
+        entries.setdefault(int(post_id), _score(created_at))
+    return [
+        post_id
+        for post_id, _score_value in sorted(entries.items(), key=lambda item: (item[1], item[0]), reverse=True)
+    ][:window]
+
+
+def _database_window_ids(user_id: int, window: int, hidden_user_ids: set[int]) -> list[int]:
+    """Fan-out on read straight from the database, used while Redis is unavailable."""
+    author_ids = set(
+        db.session.execute(
+            select(Follow.following_id).where(Follow.follower_id == int(user_id))
+        ).scalars()
+    ) | {int(user_id)}
+    return [int(post_id) for post_id, _created_at in _recent_post_rows(author_ids - hidden_user_ids, window)]
+
+
+def get_home_timeline(viewer_username: str, page: int, limit: int) -> dict:
+    from app.services import post_service
+
+    viewer = user_repository.get_by_username(viewer_username)
+    if not viewer or getattr(viewer, "is_suspended", False):
+        raise ValueError("User not found")
+
+    page = max(1, int(page or 1))
+    limit = max(1, min(int(limit or 10), 50))
+    start = (page - 1) * limit
+    # Every visible post up to the end of this page, plus one to detect more.
+    needed = start + limit + 1
+    hidden_user_ids = block_repository.get_hidden_user_ids_for_viewer(viewer.id)
+    from_cache = True
+    window = needed
+    # post id -> visible, so a widened window only checks the new ids.
+    checked = {}
+    while True:
+        if from_cache:
+            try:
+                ordered_ids = _cached_window_ids(viewer.id, window)
+            except Exception as exc:
+                logger.warning(
+                    "Home timeline cache unavailable user_id=%s, reading from the database: %s",
+                    viewer.id,
+                    exc,
+                )
+                from_cache = False
+        if not from_cache:
+            ordered_ids = _database_window_ids(viewer.id, window, hidden_user_ids)
+
+        unchecked_ids = [post_id for post_id in ordered_ids if post_id not in checked]
+        visible_ids = _visible_post_ids(unchecked_ids, viewer.id, hidden_user_ids)
+        for post_id in unchecked_ids:
+            checked[post_id] = post_id in visible_ids
+        visible_ordered = [post_id for post_id in ordered_ids if checked[post_id]]
+        # Stale entries do not count towards the page; read further until it
+        # is full or the timeline is exhausted.
+        if len(visible_ordered) >= needed or len(ordered_ids) < window:
+            break
+        window += max(needed - len(visible_ordered), limit) * 2
+
+    stale_ids = [str(post_id) for post_id, visible in checked.items() if not visible]
+    if stale_ids and from_cache:
+        # Hidden, deleted or blocked posts leave the timeline on first read.
+        try:
+            _client().zrem(_timeline_key(viewer.id), *stale_ids)
+        except Exception as exc:
+            logger.warning("Failed to drop stale timeline entries user_id=%s: %s", viewer.id, exc)
+
+    page_ids = visible_ordered[start:start + limit]
+    posts = (
+        post_service.hydrate_posts(
+            page_ids,
+            viewer_user_id=viewer.id,
+            hidden_user_ids=hidden_user_ids,
+        )
+        if page_ids
+        else []
+    )
+    return {
+        "page": page,
+        "limit": limit,
+        "posts": posts,
+        "has_more": len(visible_ordered) > start + limit,
+    }
@@ -0,0 +1,382 @@
+import json
+import logging
+import uuid
+
+from flask import current_app
+from sqlalchemy import case, func, or_, select
+
+from app.db import db
+from app.extensions import redis_client as redis_module
+from app.models.follow_model import Follow
+from app.models.profile_model import Profile
+from app.models.user_model import User
+from app.services import async_task_service
+
+logger = logging.getLogger(__name__)
+
+# Every member scores 0 so ZRANGEBYLEX walks them in byte order:
+# "<lowercased username, name or name word>\x00<user id>".
+TYPEAHEAD_TERMS_KEY = "typeahead:terms"
+# user id -> {"id", "username", "name"} card, also used to drop stale terms.
+TYPEAHEAD_CARDS_KEY = "typeahead:cards"
+TYPEAHEAD_USER_IDS_KEY = "typeahead:user_ids"
+TYPEAHEAD_READY_KEY = "typeahead:ready"
+TYPEAHEAD_BUILD_LOCK_KEY = "typeahead:build_lock"
+# Set while a build is queued, so a missing index queues one build, not one per request.
+TYPEAHEAD_BUILD_REQUESTED_KEY = "typeahead:build_requested"
+TYPEAHEAD_FOLLOWING_PREFIX = "typeahead:following:"
+
+_TERM_SEPARATOR = "\x00"
+# Sorts after any UTF-8 continuation of the prefix.
+_LEX_UPPER = "\U0010ffff"
+# Stored alongside real ids so an empty following set is still a cache hit.
+_EMPTY_FOLLOWING_MARKER = "__none__"
+_BUILD_LOCK_SECONDS = 120
+
+_REFRESH_BUILD_LOCK_LUA = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_BUILD_LOCK_LUA = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def _client():
+    return redis_module.redis_client
+
+
+def _decode(value):
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="ignore")
+    return value
+
+
+def _max_limit() -> int:
+    return max(int(current_app.config.get("TYPEAHEAD_MAX_LIMIT", 20)), 1)
+
+
+def _scan_limit() -> int:
+    return max(int(current_app.config.get("TYPEAHEAD_SCAN_LIMIT", 200)), 1)
+
+
+def _build_batch_size() -> int:
+    return max(int(current_app.config.get("TYPEAHEAD_BUILD_BATCH_SIZE", 1000)), 1)
+
+
+def _following_ttl_seconds() -> int:
+    return max(int(current_app.config.get("TYPEAHEAD_FOLLOWING_CACHE_TTL_SECONDS", 300)), 1)
+
+
+def normalize_limit(limit) -> int:
+    try:
+        parsed = int(limit)
+    except (TypeError, ValueError):
+        parsed = 10
+    return min(max(parsed, 1), _max_limit())
+
+
+def normalize_query(value) -> str:
+    if not isinstance(value, str):
+        return ""
+    return " ".join(value.lower().split())
+
+
+def _terms_for(username: str, name: str | None) -> set[str]:
+    terms = {normalize_query(username), normalize_query(name)}
+    terms.update(normalize_query(name).split(" "))
+    terms.discard("")
+    return terms
+
+
+def _members_for(card: dict) -> set[str]:
+    return {
+        f"{term}{_TERM_SEPARATOR}{card['id']}"
+        for term in _terms_for(card["username"], card.get("name"))
+    }
+
+
+def _load_cards(client, user_ids) -> dict[int, dict]:
+    user_ids = [int(user_id) for user_id in user_ids]
+    if not user_ids:
+        return {}
+    cards = {}
+    for user_id, raw in zip(user_ids, client.hmget(TYPEAHEAD_CARDS_KEY, user_ids)):
+        if not raw:
+            continue
+        try:
+            cards[user_id] = json.loads(_decode(raw))
+        except (TypeError, ValueError):
+            continue
+    return cards
+
+
+def _queue_index_user(pipe, card: dict, previous: dict | None):
+    if previous:
+        stale = _members_for(previous) - _members_for(card)
+        if stale:
+            pipe.zrem(TYPEAHEAD_TERMS_KEY, *stale)
+        if previous["username"] != card["username"]:
+            pipe.hdel(TYPEAHEAD_USER_IDS_KEY, previous["username"])
+    pipe.zadd(TYPEAHEAD_TERMS_KEY, {member: 0 for member in _members_for(card)})
+    pipe.hset(TYPEAHEAD_CARDS_KEY, card["id"], json.dumps(card, separators=(",", ":")))
+    pipe.hset(TYPEAHEAD_USER_IDS_KEY, card["username"], card["id"])
+
+
+def index_user(user_id: int, username: str, name: str | None = None):
+    """Adds or refreshes one user; call after registration or a profile rename."""
+    if user_id is None or not username:
+        return
+    card = {"id": int(user_id), "username": username, "name": name or username}
+    try:
+        client = _client()
+        previous = _load_cards(client, [card["id"]]).get(card["id"])
+        pipe = client.pipeline()
+        _queue_index_user(pipe, card, previous)
+        pipe.execute()
+    except Exception as exc:
+        logger.warning("Failed to index typeahead user_id=%s: %s", user_id, exc)
+
+
+def remove_user(user_id: int):
+    """Drops one user; call after suspension or account deletion."""
+    if user_id is None:
+        return
+    try:
+        client = _client()
+        previous = _load_cards(client, [user_id]).get(int(user_id))
+        pipe = client.pipeline()
+        if previous:
+            pipe.zrem(TYPEAHEAD_TERMS_KEY, *_members_for(previous))
+            pipe.hdel(TYPEAHEAD_USER_IDS_KEY, previous["username"])
+        pipe.hdel(TYPEAHEAD_CARDS_KEY, int(user_id))
+        pipe.delete(f"{TYPEAHEAD_FOLLOWING_PREFIX}{int(user_id)}")
+        pipe.execute()
+    except Exception as exc:
+        logger.warning("Failed to remove typeahead user_id=%s: %s", user_id, exc)
+
+
+def rebuild_index(keep_lock=None) -> int:
+    client = _client()
+    batch_size = _build_batch_size()
+    indexed = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(User.id, User.username, Profile.name)
+            .outerjoin(Profile, Profile.user_id == User.id)
+            .where(User.id > last_id, User.is_suspended.is_(False))
+            .order_by(User.id.asc())
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        pipe = client.pipeline()
+        for user_id, username, name in rows:
+            _queue_index_user(pipe, {"id": int(user_id), "username": username, "name": name or username}, None)
+        pipe.execute()
+        indexed += len(rows)
+        last_id = rows[-1][0]
+        if keep_lock is not None:
+            keep_lock()
+    client.set(TYPEAHEAD_READY_KEY, "1")
+    return indexed
+
+
+def _refresh_build_lock(client, token: str):
+    try:
+        refreshed = client.eval(_REFRESH_BUILD_LOCK_LUA, 1, TYPEAHEAD_BUILD_LOCK_KEY, token, _BUILD_LOCK_SECONDS)
+    except Exception:
+        refreshed = _decode(client.get(TYPEAHEAD_BUILD_LOCK_KEY)) == token and client.expire(
+            TYPEAHEAD_BUILD_LOCK_KEY, _BUILD_LOCK_SECONDS
+        )
+    if not refreshed:
+        raise RuntimeError("typeahead build lock lost")
+
+
+def _release_build_lock(client, token: str):
+    try:
+        client.eval(_RELEASE_BUILD_LOCK_LUA, 1, TYPEAHEAD_BUILD_LOCK_KEY, token)
+    except Exception:
+        if _decode(client.get(TYPEAHEAD_BUILD_LOCK_KEY)) == token:
+            client.delete(TYPEAHEAD_BUILD_LOCK_KEY)
+
+
+def build_index() -> int | None:
+    """Backfills the whole index under a lock; run by the async worker or the CLI.
+
+    Returns the users indexed, or None when another build holds the lock.
+    """
+    client = _client()
+    token = uuid.uuid4().hex
+    if not client.set(TYPEAHEAD_BUILD_LOCK_KEY, token, nx=True, ex=_BUILD_LOCK_SECONDS):
+        logger.info("typeahead_index_build_locked")
+        return None
+    try:
+        indexed = rebuild_index(keep_lock=lambda: _refresh_build_lock(client, token))
+        logger.info("typeahead_index_built users=%s", indexed)
+        return indexed
+    finally:
+        _release_build_lock(client, token)
+        client.delete(TYPEAHEAD_BUILD_REQUESTED_KEY)
+
+
+def request_index_build() -> bool:
+    """Queues one index build for the async worker; never builds on the caller's thread."""
+    try:
+        if not _client().set(TYPEAHEAD_BUILD_REQUESTED_KEY, "1", nx=True, ex=_BUILD_LOCK_SECONDS):
+            return False
+    except Exception as exc:
+        logger.warning("Failed to request a typeahead index build: %s", exc)
+        return False
+    if async_task_service.enqueue_typeahead_index_build_task(source="typeahead"):
+        return True
+    logger.warning("typeahead_index_build_not_queued run=migrate_build_typeahead_index.py")
+    return False
+
+
+def _index_ready(client) -> bool:
+    # Lookups are served from SQL until a complete index exists.
+    if client.get(TYPEAHEAD_READY_KEY):
+        return True
+    request_index_build()
+    return False
+
+
+def resolve_user_id(username: str) -> int | None:
+    """The indexed id of ``username``; None when unknown or the index is not built yet."""
+    if not username:
+        return None
+    client = _client()
+    if not _index_ready(client):
+        return None
+    raw = client.hget(TYPEAHEAD_USER_IDS_KEY, username)
+    return int(_decode(raw)) if raw else None
+
+
+def get_cards(user_ids) -> dict[int, dict]:
+    return _load_cards(_client(), user_ids)
+
+
+def get_following_ids(user_id: int) -> set[int]:
+    client = _client()
+    key = f"{TYPEAHEAD_FOLLOWING_PREFIX}{int(user_id)}"
+    cached = {_decode(member) for member in client.smembers(key) or set()}
+    if cached:
+        cached.discard(_EMPTY_FOLLOWING_MARKER)
+        return {int(member) for member in cached}
+
+    following_ids = {
+        int(following_id)
+        for following_id in db.session.execute(
+            select(Follow.following_id).where(Follow.follower_id == int(user_id))
+        ).scalars()
+    }
+    pipe = client.pipeline()
+    pipe.sadd(key, *(following_ids or {_EMPTY_FOLLOWING_MARKER}))
+    pipe.expire(key, _following_ttl_seconds())
+    pipe.execute()
+    return following_ids
+
+
+def invalidate_following(user_id: int):
+    if user_id is None:
+        return
+    try:
+        _client().delete(f"{TYPEAHEAD_FOLLOWING_PREFIX}{int(user_id)}")
+    except Exception as exc:
+        logger.warning("Failed to invalidate typeahead following user_id=%s: %s", user_id, exc)
+
+
+def _rank(card: dict, prefix: str):
+    username = card["username"].lower()
+    if username == prefix:
+        tier = 0
+    elif username.startswith(prefix):
+        tier = 1
+    else:
+        tier = 2
+    return tier, len(username), username
+
+
+def _complete_from_index(client, prefix: str, limit: int, excluded: set[int]) -> list[dict]:
+    members = client.zrangebylex(
+        TYPEAHEAD_TERMS_KEY,
+        f"[{prefix}",
+        f"[{prefix}{_LEX_UPPER}",
+        start=0,
+        num=_scan_limit(),
+    )
+    candidate_ids = {}
+    for member in members:
+        _term, _, raw_id = _decode(member).rpartition(_TERM_SEPARATOR)
+        try:
+            user_id = int(raw_id)
+        except ValueError:
+            continue
+        if user_id not in excluded:
+            candidate_ids[user_id] = None
+
+    cards = _load_cards(client, candidate_ids)
+    ranked = sorted(cards.values(), key=lambda card: _rank(card, prefix))
+    return ranked[:limit]
+
+
+def _complete_from_db(prefix: str, limit: int, excluded: set[int]) -> list[dict]:
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    lower_username = func.lower(User.username)
+    lower_name = func.lower(Profile.name)
+    query = (
+        select(User.id, User.username, Profile.name)
+        .outerjoin(Profile, Profile.user_id == User.id)
+        .where(
+            User.is_suspended.is_(False),
+            or_(
+                lower_username.like(f"{escaped}%", escape="\\"),
+                lower_name.like(f"{escaped}%", escape="\\"),
+                lower_name.like(f"% {escaped}%", escape="\\"),
+            ),
+        )
+        .order_by(
+            case(
+                (lower_username == prefix, 0),
+                (lower_username.like(f"{escaped}%", escape="\\"), 1),
+                else_=2,
+            ),
+            func.length(User.username).asc(),
+            lower_username.asc(),
+        )
+        .limit(limit)
+    )
+    if excluded:
+        query = query.where(User.id.not_in(excluded))
+    return [
+        {"id": int(user_id), "username": username, "name": name or username}
+        for user_id, username, name in db.session.execute(query).all()
+    ]
+
+
+def complete(query: str, *, limit: int = 10, exclude_ids=()) -> list[dict]:
+    """Returns up to ``limit`` cards whose username, name or a name word starts with ``query``.
+
+    Served from the Redis index; the SQL prefix query answers while the index
+    is being built or when Redis is unavailable.
+    """
+    prefix = normalize_query(query)
+    limit = normalize_limit(limit)
+    if not prefix:
+        return []
+
+    excluded = {int(user_id) for user_id in exclude_ids}
+    try:
+        client = _client()
+        if _index_ready(client):
+            return _complete_from_index(client, prefix, limit, excluded)
+    except Exception as exc:
+        logger.warning("Typeahead index lookup failed for %r: %s", prefix, exc)
+    return _complete_from_db(prefix, limit, excluded)
@@ -4,15 +4,17 @@ import threading
 from datetime import datetime, timedelta, timezone
 from uuid import uuid4
 from flask_jwt_extended import decode_token
-from flask_socketio import emit, join_room
+from flask_socketio import emit, join_room, leave_room
 
 from app.extensions.extensions import socketio
 from app.extensions import redis_client as redis_module
 from app.services import message_service
 from app.services import activity_notification_service
 from app.services import async_task_service
+from app.services import block_service
 from app.services import group_notification_service
 from app.services import notification_service
+from app.services import presence_audience_service
 from app.services.group_delivery_guard import GroupDeliveryGuard
 
 logger = logging.getLogger(__name__)
@@ -20,13 +22,17 @@ logger = logging.getLogger(__name__)
 _registered = False
 _user_sids = {}
 _sid_group_rooms = {}
+# sid -> usernames whose presence watch room the socket joined.
+_sid_presence_watches = {}
 _presence_state_lock = threading.Lock()
 _presence_maintenance_started = False
 
 PRESENCE_ONLINE_USERS_KEY = "presence:online_users"
 PRESENCE_RECENTLY_ONLINE_KEY = "presence:recently_online"
-PRESENCE_CONNECTIONS_PREFIX = "presence:connections:"
-PRESENCE_CONNECTION_TOKEN_PREFIX = "presence:connection_token:"
+# Room joined by sockets that opted in to a specific user's status changes.
+PRESENCE_WATCH_ROOM_PREFIX = "presence_watch:"
+# Sorted set per user: member = connection token, score = expiry (epoch seconds).
+PRESENCE_CONNECTIONS_PREFIX = "presence:connection_expiry:"
 _PROCESS_INSTANCE_ID = uuid4().hex
 _presence_connection_ttl_seconds = 75
 _presence_heartbeat_interval_seconds = 20
@@ -46,6 +52,18 @@ def _extract_access_token(auth):
     return request.args.get("token")
 
 
+def _wants_bulk_group_pending(auth):
+    # Clients opt into the single `pending_group_messages_bulk` frame; older
+    # clients keep receiving one `pending_group_messages` frame per group.
+    if isinstance(auth, dict) and "pending_group_bulk" in auth:
+        value = auth.get("pending_group_bulk")
+    else:
+        value = request.args.get("pending_group_bulk")
+    if isinstance(value, str):
+        return value.strip().lower() in {"1", "true", "yes", "on"}
+    return bool(value)
+
+
 def _presence_client():
     return redis_module.redis_client
 
@@ -71,10 +89,6 @@ def _presence_connections_key(username):
     return f"{PRESENCE_CONNECTIONS_PREFIX}{username}"
 
 
-def _presence_connection_token_key(token):
-    return f"{PRESENCE_CONNECTION_TOKEN_PREFIX}{token}"
-
-
 def _presence_connection_token(sid):
     if not isinstance(sid, str) or not sid.strip():
         return ""
@@ -101,47 +115,118 @@ def _resolve_positive_int(value, default_value, minimum):
     return max(minimum, parsed_value)
 
 
-def _cleanup_user_connection_tokens(username):
-    normalized_username = _normalize_username(username)
-    if not normalized_username:
-        return 0
+PRESENCE_STATUS_LUA = """
+local online_users_key = KEYS[1]
+local now = tonumber(ARGV[1])
+local counts = {}
 
-    try:
-        client = _presence_client()
-        connections_key = _presence_connections_key(normalized_username)
-        raw_tokens = client.smembers(connections_key) or set()
-        stale_tokens = []
-
-        for raw_token in raw_tokens:
-            token = _decode_redis_value(raw_token).strip()
-            if not token:
-                stale_tokens.append(raw_token)
-                continue
+for i = 2, #KEYS do
+    local connections_key = KEYS[i]
+    local username = ARGV[i]
+    redis.call('ZREMRANGEBYSCORE', connections_key, '-inf', now)
+    local active = redis.call('ZCARD', connections_key)
+    if active > 0 then
+        redis.call('SADD', online_users_key, username)
+    else
+        redis.call('DEL', connections_key)
+        redis.call('SREM', online_users_key, username)
+    end
+    table.insert(counts, active)
+end
+
+return counts
+"""
 
-            token_owner = _decode_redis_value(
-                client.get(_presence_connection_token_key(token))
-            ).strip()
-            if token_owner != normalized_username:
-                stale_tokens.append(token)
 
-        if stale_tokens:
-            client.srem(connections_key, *stale_tokens)
+def _normalize_usernames(usernames):
+    normalized = []
+    seen = set()
+    for raw_username in usernames or ():
+        username = _normalize_username(_decode_redis_value(raw_username))
+        if not username or username in seen:
+            continue
+        seen.add(username)
+        normalized.append(username)
+    return normalized
 
-        active_connections = int(client.scard(connections_key) or 0)
-        if active_connections > 0:
-            client.sadd(PRESENCE_ONLINE_USERS_KEY, normalized_username)
-            return active_connections
 
-        client.delete(connections_key)
-        client.srem(PRESENCE_ONLINE_USERS_KEY, normalized_username)
-        return 0
+def _active_connection_counts_lua(client, usernames, now):
+    eval_fn = getattr(client, "eval", None)
+    if eval_fn is None:
+        return None
+
+    keys = [PRESENCE_ONLINE_USERS_KEY]
+    keys.extend(_presence_connections_key(username) for username in usernames)
+    try:
+        raw_counts = eval_fn(
+            PRESENCE_STATUS_LUA,
+            len(keys),
+            *keys,
+            now,
+            *usernames,
+        )
+    except Exception:
+        return None
+
+    return [int(count or 0) for count in raw_counts or []]
+
+
+def _active_connection_counts_python(client, usernames, now):
+    pipe = client.pipeline()
+    for username in usernames:
+        connections_key = _presence_connections_key(username)
+        pipe.zremrangebyscore(connections_key, "-inf", now)
+        pipe.zcard(connections_key)
+    results = pipe.execute()
+    counts = [int(results[index * 2 + 1] or 0) for index in range(len(usernames))]
+
+    pipe = client.pipeline()
+    for username, active in zip(usernames, counts):
+        if active > 0:
+            pipe.sadd(PRESENCE_ONLINE_USERS_KEY, username)
+        else:
+            pipe.delete(_presence_connections_key(username))
+            pipe.srem(PRESENCE_ONLINE_USERS_KEY, username)
+    pipe.execute()
+    return counts
+
+
+def _active_connection_counts(usernames):
+    # Prunes expired connection tokens and reconciles the online-users set for
+    # every username in one server-side call (two pipelines without EVAL).
+    normalized = _normalize_usernames(usernames)
+    if not normalized:
+        return {}
+
+    now = datetime.now(timezone.utc).timestamp()
+    try:
+        client = _presence_client()
+        counts = _active_connection_counts_lua(client, normalized, now)
+        if counts is None or len(counts) != len(normalized):
+            counts = _active_connection_counts_python(client, normalized, now)
     except Exception as exc:
         logger.warning(
-            "Failed to cleanup presence tokens for username=%s: %s",
-            normalized_username,
+            "Failed to resolve presence for %s user(s): %s",
+            len(normalized),
             exc,
         )
+        return {username: 0 for username in normalized}
+
+    return dict(zip(normalized, counts))
+
+
+def _cleanup_user_connection_tokens(username):
+    normalized_username = _normalize_username(username)
+    if not normalized_username:
         return 0
+    return _active_connection_counts([normalized_username]).get(normalized_username, 0)
+
+
+def _queue_presence_connection_refresh(pipe, username, connection_token, expires_at):
+    connections_key = _presence_connections_key(username)
+    pipe.zadd(connections_key, {connection_token: expires_at})
+    pipe.expire(connections_key, _presence_connection_ttl_seconds * 2)
+    pipe.sadd(PRESENCE_ONLINE_USERS_KEY, username)
 
 
 def _refresh_presence_connection(username, sid, touch_recently_online=True):
@@ -152,13 +237,14 @@ def _refresh_presence_connection(username, sid, touch_recently_online=True):
 
     try:
         client = _presence_client()
-        client.sadd(_presence_connections_key(normalized_username), connection_token)
-        client.setex(
-            _presence_connection_token_key(connection_token),
-            _presence_connection_ttl_seconds,
+        pipe = client.pipeline()
+        _queue_presence_connection_refresh(
+            pipe,
             normalized_username,
+            connection_token,
+            datetime.now(timezone.utc).timestamp() + _presence_connection_ttl_seconds,
         )
-        client.sadd(PRESENCE_ONLINE_USERS_KEY, normalized_username)
+        pipe.execute()
         if touch_recently_online:
             _touch_recently_online(normalized_username)
         return True
@@ -195,8 +281,7 @@ def _set_user_offline(username, sid):
     try:
         client = _presence_client()
         if connection_token:
-            client.srem(_presence_connections_key(normalized_username), connection_token)
-            client.delete(_presence_connection_token_key(connection_token))
+            client.zrem(_presence_connections_key(normalized_username), connection_token)
         _touch_recently_online(normalized_username)
         active_after = _cleanup_user_connection_tokens(normalized_username)
         return active_before > 0 and active_after <= 0
@@ -376,64 +461,20 @@ def get_users_online_status(usernames):
     if not isinstance(usernames, (list, tuple, set)):
         return {}
 
-    normalized = []
-    seen = set()
-    for raw_username in usernames:
-        username = _normalize_username(raw_username)
-        if not username or username in seen:
-            continue
-        seen.add(username)
-        normalized.append(username)
-
-    if not normalized:
-        return {}
-
-    status_by_username = {username: False for username in normalized}
-
-    try:
-        client = _presence_client()
-        pipe = client.pipeline()
-        for username in normalized:
-            pipe.sismember(PRESENCE_ONLINE_USERS_KEY, username)
-        memberships = pipe.execute()
-    except Exception as exc:
-        logger.warning("Failed to batch fetch online presence: %s", exc)
-        return {
-            username: is_user_online(username)
-            for username in normalized
-        }
-
-    for username, is_member in zip(normalized, memberships):
-        if not is_member:
-            continue
-        status_by_username[username] = _cleanup_user_connection_tokens(username) > 0
-
-    return status_by_username
+    counts = _active_connection_counts(usernames)
+    return {username: count > 0 for username, count in counts.items()}
 
 
 def get_online_usernames():
     try:
-        client = _presence_client()
-        usernames = set()
-        raw_usernames = list(client.smembers(PRESENCE_ONLINE_USERS_KEY) or set())
-        stale_usernames = []
-        for raw_username in raw_usernames:
-            username = _decode_redis_value(raw_username).strip()
-            if not username:
-                continue
-            if _cleanup_user_connection_tokens(username) > 0:
-                usernames.add(username)
-            else:
-                stale_usernames.append(username)
-
-        if stale_usernames:
-            client.srem(PRESENCE_ONLINE_USERS_KEY, *stale_usernames)
-
-        return sorted(usernames)
+        raw_usernames = _presence_client().smembers(PRESENCE_ONLINE_USERS_KEY) or set()
     except Exception as exc:
         logger.warning("Failed to fetch online usernames from presence store: %s", exc)
         return []
 
+    counts = _active_connection_counts(raw_usernames)
+    return sorted(username for username, count in counts.items() if count > 0)
+
 
 def get_group_online_users_payload(group_id):
     try:
@@ -487,6 +528,54 @@ def get_group_online_users_payload(group_id):
         return None
 
 
+def _presence_watch_room(username):
+    return f"{PRESENCE_WATCH_ROOM_PREFIX}{username}"
+
+
+def evict_user_from_presence_watch(username, target_username):
+    """Makes this process's sockets of ``username`` stop watching ``target_username``."""
+    normalized_username = _normalize_username(username)
+    normalized_target = _normalize_username(target_username)
+    if not normalized_username or not normalized_target:
+        return 0
+
+    room_name = _presence_watch_room(normalized_target)
+    with _presence_state_lock:
+        sids = list(_user_sids.get(normalized_username, set()))
+        for sid in sids:
+            watched = _sid_presence_watches.get(sid)
+            if watched is not None:
+                watched.discard(normalized_target)
+    evicted = 0
+    for sid in sids:
+        try:
+            socketio.server.leave_room(sid, room_name, namespace="/")
+            evicted += 1
+        except Exception as exc:
+            logger.warning(
+                "Failed to evict sid %s for user %s from room %s: %s",
+                sid, normalized_username, room_name, exc,
+            )
+    return evicted
+
+
+def _emit_user_status_changed(username, online, skip_sid=None):
+    # Delivered to the user's followers, conversation partners and shared group
+    # members plus explicit watchers, instead of every connected socket.
+    normalized_username = _normalize_username(username)
+    if not normalized_username:
+        return
+
+    rooms = [_presence_watch_room(normalized_username)]
+    rooms.extend(sorted(presence_audience_service.get_presence_subscribers(normalized_username)))
+    socketio.emit(
+        "user_status",
+        {"username": normalized_username, "online": bool(online)},
+        to=rooms,
+        skip_sid=skip_sid,
+    )
+
+
 def _emit_group_presence_changed(username, online):
     normalized_username = _normalize_username(username)
     if not normalized_username:
@@ -498,7 +587,7 @@ def _emit_group_presence_changed(username, online):
         user = user_repository.get_by_username(normalized_username)
         if not user:
             return
-        user_payload = _build_group_user_payload(normalized_username)
+        user_payload = _build_group_user_payload(normalized_username, user.id)
         if not user_payload:
             return
 
@@ -521,28 +610,23 @@ def _emit_group_presence_changed(username, online):
         )
 
 
-def _build_group_user_payload(username):
+def _build_group_user_payload(username, user_id):
     normalized_username = _normalize_username(username)
     if not normalized_username:
         return None
 
     try:
-        from app.repositories import profile_repository, user_repository
+        from app.services import author_card_cache
 
-        user = user_repository.get_by_username(normalized_username)
-        if not user:
+        card = author_card_cache.get_card(user_id)
+        if not card:
             return None
-        profile = profile_repository.get_by_user_id(user.id)
         return {
-            "user_id": str(user.id),
+            "user_id": str(card["id"]),
             "username": normalized_username,
-            "badge": user.badge,
-            "profile_image_url": _build_profile_image_url(
-                profile.image_object_name if profile else None
-            ),
-            "profile_image_shape": (
-                profile.profile_image_shape if profile and profile.profile_image_shape else "circle"
-            ),
+            "badge": card["badge"],
+            "profile_image_url": _build_profile_image_url(card["image_object_name"]),
+            "profile_image_shape": card["profile_image_shape"],
         }
     except Exception as exc:
         logger.warning(
@@ -681,21 +765,36 @@ def _snapshot_local_connections():
 
 def _refresh_local_presence_connections():
     connection_snapshot = _snapshot_local_connections()
-    touched_usernames = set()
-    for username, sid_list in connection_snapshot:
-        if not sid_list:
-            continue
-        touched_usernames.add(username)
-        for sid in sid_list:
-            _refresh_presence_connection(
-                username=username,
-                sid=sid,
-                touch_recently_online=False,
-            )
-        _cleanup_user_connection_tokens(username)
+    if not connection_snapshot:
+        return
 
-    for username in touched_usernames:
-        _touch_recently_online(username)
+    expires_at = datetime.now(timezone.utc).timestamp() + _presence_connection_ttl_seconds
+    touched_usernames = []
+    try:
+        pipe = _presence_client().pipeline()
+        for username, sid_list in connection_snapshot:
+            connection_tokens = [
+                token for token in (_presence_connection_token(sid) for sid in sid_list) if token
+            ]
+            if not connection_tokens:
+                continue
+            touched_usernames.append(username)
+            for connection_token in connection_tokens:
+                _queue_presence_connection_refresh(pipe, username, connection_token, expires_at)
+        pipe.execute()
+    except Exception as exc:
+        logger.warning("Failed to refresh local presence connections: %s", exc)
+        return
+
+    _active_connection_counts(touched_usernames)
+    seen_at = datetime.now(timezone.utc).timestamp()
+    try:
+        _presence_client().zadd(
+            PRESENCE_RECENTLY_ONLINE_KEY,
+            {username: seen_at for username in touched_usernames},
+        )
+    except Exception as exc:
+        logger.warning("Failed to update recently-online presence in bulk: %s", exc)
 
 
 def _cleanup_online_presence_sample():
@@ -706,19 +805,8 @@ def _cleanup_online_presence_sample():
         logger.warning("Failed to load online presence set for cleanup: %s", exc)
         return
 
-    stale_usernames = []
-    for raw_username in raw_usernames[:_presence_cleanup_batch_size]:
-        username = _decode_redis_value(raw_username).strip()
-        if not username:
-            continue
-        if _cleanup_user_connection_tokens(username) <= 0:
-            stale_usernames.append(username)
-
-    if stale_usernames:
-        try:
-            client.srem(PRESENCE_ONLINE_USERS_KEY, *stale_usernames)
-        except Exception as exc:
-            logger.warning("Failed to prune stale usernames from online presence set: %s", exc)
+    # Expired users are dropped from the online set by the presence script itself.
+    _active_connection_counts(raw_usernames[:_presence_cleanup_batch_size])
 
 
 def _presence_maintenance_loop():
@@ -841,6 +929,68 @@ def register_socket_events():
         )
         return len(pending_group)
 
+    def _emit_pending_group_messages_on_connect(username, groups, bulk=False):
+        # Counts for every group come from one grouped query; first pages are
+        # only read for groups that actually have a backlog.
+        group_names = {group.id: group.name for group in groups}
+        if not group_names:
+            return 0
+
+        pending_counts = message_service.get_group_pending_counts_for_user(
+            username, list(group_names)
+        )
+        pending_group_ids = [
+            group_id for group_id in group_names if pending_counts.get(group_id, 0) > 0
+        ]
+        if not pending_group_ids:
+            return 0
+
+        pages = message_service.peek_group_messages_first_pages_for_user(
+            username,
+            pending_group_ids,
+            limit=_group_pending_batch_size(),
+        )
+        frames = []
+        for group_id in pending_group_ids:
+            pending_group = pages.get(group_id) or []
+            if not pending_group:
+                continue
+            remaining_count = pending_counts[group_id]
+            frames.append({
+                "group_id": group_id,
+                "group_name": group_names[group_id] or "Group Chat",
+                "messages": pending_group,
+                "has_more": remaining_count > len(pending_group),
+                "remaining_count": remaining_count,
+            })
+        if not frames:
+            return 0
+
+        if bulk:
+            emit("pending_group_messages_bulk", {"groups": frames})
+        else:
+            for frame in frames:
+                emit("pending_group_messages", frame)
+
+        for frame in frames:
+            transient_ids = [
+                (message or {}).get("message_id")
+                for message in frame["messages"]
+                if isinstance((message or {}).get("message_id"), str)
+            ]
+            if transient_ids:
+                message_service.ack_group_transient_messages(
+                    username, frame["group_id"], transient_ids
+                )
+        logger.info(
+            "Emitting pending group messages to %s on connect: groups=%d, messages=%d, bulk=%s",
+            username,
+            len(frames),
+            sum(len(frame["messages"]) for frame in frames),
+            bulk,
+        )
+        return len(frames)
+
     def _sync_group_read_state(username, group_id):
         pending_payloads = message_service.peek_group_messages_for_user(
             username,
@@ -964,11 +1114,11 @@ def register_socket_events():
                     group_room_name = f"group_{group.id}"
                     join_room(group_room_name)
                     _track_group_room_join(request.sid, group.id)
-                    _emit_pending_group_messages_chunk(
-                        username=username,
-                        group_id=group.id,
-                        group_name=group.name,
-                    )
+                _emit_pending_group_messages_on_connect(
+                    username,
+                    user_groups,
+                    bulk=_wants_bulk_group_pending(auth),
+                )
         except Exception as exc:
             logger.warning("Failed to emit pending group messages for %s: %s", username, exc)
 
@@ -1000,11 +1150,7 @@ def register_socket_events():
             },
         )
         if became_online:
-            socketio.emit(
-                "user_status",
-                {"username": username, "online": True},
-                skip_sid=request.sid,
-            )
+            _emit_user_status_changed(username, True, skip_sid=request.sid)
             _emit_group_presence_changed(username, True)
 
     @socketio.on("disconnect")
@@ -1013,10 +1159,11 @@ def register_socket_events():
         _unregister_user_sid(username, request.sid)
         with _presence_state_lock:
             _sid_group_rooms.pop(request.sid, None)
+            _sid_presence_watches.pop(request.sid, None)
         if username:
             became_offline = _set_user_offline(username, request.sid)
             if became_offline:
-                socketio.emit("user_status", {"username": username, "online": False})
+                _emit_user_status_changed(username, False)
                 _emit_group_presence_changed(username, False)
 
     @socketio.on("presence_heartbeat")
@@ -1040,11 +1187,7 @@ def register_socket_events():
             },
         )
         if (not was_online) and is_online_now:
-            socketio.emit(
-                "user_status",
-                {"username": username, "online": True},
-                skip_sid=request.sid,
-            )
+            _emit_user_status_changed(username, True, skip_sid=request.sid)
             _emit_group_presence_changed(username, True)
 
     @socketio.on("get_user_status")
@@ -1059,6 +1202,73 @@ def register_socket_events():
             {"username": target_username, "online": is_user_online(target_username)},
         )
 
+    @socketio.on("subscribe_user_status")
+    def handle_subscribe_user_status(data):
+        username = session.get("username")
+        if not username:
+            emit("message_error", {"error": "Unauthorized"})
+            return
+
+        raw_usernames = data.get("usernames") if isinstance(data, dict) else None
+        if not isinstance(raw_usernames, list):
+            emit("message_error", {"error": "Invalid payload"})
+            return
+
+        max_users = _resolve_positive_int(
+            current_app.config.get("PRESENCE_SUBSCRIBE_MAX_USERS", 200),
+            default_value=200,
+            minimum=1,
+        )
+        # Users in a block relation with the subscriber never share presence.
+        hidden_usernames = block_service.hidden_usernames_for_viewer(username)
+        requested = [
+            target
+            for target in _normalize_usernames(raw_usernames)
+            if target != username and target not in hidden_usernames
+        ]
+        # max_users bounds the rooms a socket watches in total, not per call.
+        with _presence_state_lock:
+            watched = _sid_presence_watches.setdefault(request.sid, set())
+            target_usernames = []
+            for target in requested:
+                if target not in watched:
+                    if len(watched) >= max_users:
+                        continue
+                    watched.add(target)
+                target_usernames.append(target)
+        for target_username in target_usernames:
+            join_room(_presence_watch_room(target_username))
+
+        status_by_username = get_users_online_status(target_usernames)
+        emit(
+            "user_status_bulk",
+            {
+                "statuses": [
+                    {"username": target, "online": bool(status_by_username.get(target))}
+                    for target in target_usernames
+                ],
+            },
+        )
+
+    @socketio.on("unsubscribe_user_status")
+    def handle_unsubscribe_user_status(data):
+        if not session.get("username"):
+            emit("message_error", {"error": "Unauthorized"})
+            return
+
+        raw_usernames = data.get("usernames") if isinstance(data, dict) else None
+        if not isinstance(raw_usernames, list):
+            emit("message_error", {"error": "Invalid payload"})
+            return
+
+        target_usernames = _normalize_usernames(raw_usernames)
+        with _presence_state_lock:
+            watched = _sid_presence_watches.get(request.sid)
+            if watched is not None:
+                watched.difference_update(target_usernames)
+        for target_username in target_usernames:
+            leave_room(_presence_watch_room(target_username))
+
     @socketio.on("send_message")
     def handle_send_message(data):
         sender = session.get("username")
@@ -1687,7 +1897,7 @@ def register_socket_events():
             emit("message_error", {"error": "Failed to verify group membership"})
             return
 
-        user_payload = _build_group_user_payload(username)
+        user_payload = _build_group_user_payload(username, user.id)
         if not user_payload:
             return
 
@@ -0,0 +1,55 @@
+"""
+One-time backfill: generate image variants and placeholders for existing posts.
+
+New media columns (width, height, placeholder, variants_json) are added on app
+startup. This script renders variants for post images that have none yet, in
+batches, using the same code as the media_post_process task. It can be stopped
+and re-run: processed images are skipped.
+
+Run from project root:
+    source venv/bin/activate
+    python migrate_add_media_variants.py [batch_size]
+"""
+
+import sys
+
+from app import create_app
+from app.models.media_model import Media
+from app.services import media_variants
+
+
+def migrate(batch_size: int = 200):
+    app = create_app()
+    with app.app_context():
+        processed = 0
+        failed = 0
+        last_id = 0
+        while True:
+            batch = (
+                Media.query
+                .filter(
+                    Media.id > last_id,
+                    Media.variants_json.is_(None),
+                    Media.mime_type.in_(sorted(media_variants.SOURCE_MIME_TYPES)),
+                )
+                .order_by(Media.id.asc())
+                .limit(batch_size)
+                .all()
+            )
+            if not batch:
+                break
+            for media in batch:
+                last_id = media.id
+                try:
+                    if media_variants.process_media(media):
+                        processed += 1
+                except Exception as exc:
+                    failed += 1
+                    print(f"[!] media {media.id} ({media.object_name}): {exc}")
+            print(f"[…] processed={processed} failed={failed} last_media_id={last_id}")
+
+        print(f"[✓] Generated variants for {processed} images ({failed} failed).")
+
+
+if __name__ == "__main__":
+    migrate(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+One-time backfill of the account purge reverse indexes.
+
+Deliveries now record which inboxes hold a sender's pending messages
+(`sender_inboxes:*`, `sender_group_inboxes:*`) and who has a user as a contact
+(`contact_owners:*`). This scans the existing inboxes once so that purges of
+accounts with older pending messages find them too. Safe to re-run.
+"""
+
+from app import create_app
+from app.repositories import message_repository
+
+
+def main():
+    app = create_app(role="worker")
+    with app.app_context():
+        stats = message_repository.build_purge_indexes()
+
+        print("Purge index backfill completed")
+        print(f"Private inboxes indexed: {stats['private_inboxes']}")
+        print(f"Group inboxes indexed: {stats['group_inboxes']}")
+        print(f"Contact lists indexed: {stats['contacts']}")
+
+
+if __name__ == "__main__":
+    main()
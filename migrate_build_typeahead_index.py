@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Builds the typeahead index (`typeahead:*` keys in Redis).
+
+Requests answer typeahead from SQL until the index is complete. A missing index
+queues a build for the async worker; run this to build it right away instead,
+e.g. after a Redis flush or on deployments without async workers. Safe to re-run.
+"""
+
+from app import create_app
+from app.services import typeahead_service
+
+
+def main():
+    app = create_app(role="worker")
+    with app.app_context():
+        indexed = typeahead_service.build_index()
+
+        if indexed is None:
+            print("Another typeahead index build is running")
+        else:
+            print("Typeahead index build completed")
+            print(f"Users indexed: {indexed}")
+
+
+if __name__ == "__main__":
+    main()
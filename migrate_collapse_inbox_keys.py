@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+One-time migration for the collapsed Redis inbox layout.
+
+Pending messages used to live in three places per inbox: a list, an id set and
+the order zset + payload hash index. Only the index is read or written now; this
+folds any remaining lists into it and deletes the lists and id sets.
+"""
+
+from app import create_app
+from app.repositories import message_repository
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        stats = message_repository.migrate_legacy_inbox_keys()
+
+        print("Inbox key collapse completed")
+        print(f"Legacy inbox lists migrated: {stats['lists_migrated']}")
+        print(f"Messages indexed from lists: {stats['messages_indexed']}")
+        print(f"Legacy id sets dropped: {stats['id_sets_dropped']}")
+
+
+if __name__ == "__main__":
+    main()
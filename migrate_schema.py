@@ -0,0 +1,70 @@
+"""
+Apply schema migrations once per deploy, before workers restart.
+
+Workers compare the schema fingerprint with one query on startup and skip all
+reflection when it matches. Run this with SCHEMA_AUTO_MIGRATE=false on the
+workers so only this step changes the schema.
+
+Run from project root:
+    source venv/bin/activate
+    python migrate_schema.py            # apply pending migrations
+    python migrate_schema.py --status   # show fingerprint and pending ids
+    python migrate_schema.py --force    # re-run every (idempotent) step
+"""
+
+import argparse
+
+from flask import Flask
+
+from app import SCHEMA_MIGRATION_STEPS, apply_schema_migrations
+from app import schema_migrations
+from app.config import Config
+from app.db import db
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="Apply or inspect schema migrations.")
+    parser.add_argument("--status", action="store_true", help="Print state and exit.")
+    parser.add_argument("--force", action="store_true", help="Run every step again.")
+    return parser.parse_args()
+
+
+def _status():
+    expected = schema_migrations.compute_fingerprint(db.metadata, SCHEMA_MIGRATION_STEPS)
+    recorded = schema_migrations.read_fingerprint(db.engine)
+    try:
+        applied = schema_migrations.applied_migration_ids(db.session)
+    except Exception:
+        db.session.rollback()
+        applied = set()
+    pending = [
+        step.migration_id
+        for step in SCHEMA_MIGRATION_STEPS
+        if not step.repeatable and step.migration_id not in applied
+    ]
+    print(f"expected fingerprint: {expected}")
+    print(f"recorded fingerprint: {recorded or '-'}")
+    print(f"pending migrations:   {', '.join(pending) or '-'}")
+    print("[✓] Schema is current." if recorded == expected else "[!] Schema is out of date.")
+
+
+def main():
+    args = _parse_args()
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    db.init_app(app)
+    with app.app_context():
+        if args.status:
+            _status()
+            return
+        expected = schema_migrations.compute_fingerprint(db.metadata, SCHEMA_MIGRATION_STEPS)
+        with schema_migrations.migration_lock(db.engine):
+            if not args.force and schema_migrations.read_fingerprint(db.engine) == expected:
+                print("[✓] Schema is current. Nothing to migrate.")
+                return
+            ran = apply_schema_migrations(force=args.force)
+        print(f"[✓] Applied: {', '.join(ran)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Startup profile for one app role: boot time, peak RSS and import time per module.
+
+Boots ``create_app(role)`` in a fresh interpreter under ``python -X importtime``
+and prints the slowest modules by self and cumulative import time, so a new
+top-level import in a worker path shows up before it reaches production.
+
+Run from project root:
+    python profile_startup.py --role worker [--top 25] [--prefix app.]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Runs in the child; the last stdout line is the JSON report.
+BOOT_PROBE = """
+import json, resource, sys, time
+started_at = time.perf_counter()
+from app import create_app
+app = create_app(sys.argv[1])
+boot_ms = (time.perf_counter() - started_at) * 1000
+print(json.dumps({
+    "boot_ms": boot_ms,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "modules": len(sys.modules),
+    "blueprints": len(app.blueprints),
+}))
+"""
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="Profile create_app() for one role.")
+    parser.add_argument("--role", default=os.getenv("APP_ROLE", "web"))
+    parser.add_argument("--top", type=int, default=25, help="Modules to list per table.")
+    parser.add_argument(
+        "--prefix",
+        default="",
+        help="Only list modules starting with this prefix, e.g. 'app.'.",
+    )
+    return parser.parse_args()
+
+
+def profile_role(role: str, *, import_time: bool = True, env: dict | None = None) -> dict:
+    """Boots ``role`` in a subprocess; returns boot_ms, max_rss_kb, modules and imports."""
+    command = [sys.executable]
+    if import_time:
+        command += ["-X", "importtime"]
+    command += ["-c", BOOT_PROBE, role]
+    child_env = dict(os.environ)
+    child_env.setdefault("ASYNC_TASK_SKIP_STARTUP_WORKER_CHECK", "true")
+    child_env.update(env or {})
+    result = subprocess.run(
+        command,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=child_env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"create_app(role={role!r}) failed:\n{result.stderr[-4000:]}")
+
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    imports = []
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        imports.append((name.strip(), int(self_us), int(cumulative_us)))
+    report["imports"] = imports
+    return report
+
+
+def main() -> int:
+    args = _parse_args()
+    report = profile_role(args.role)
+    imports = [item for item in report["imports"] if item[0].startswith(args.prefix)]
+
+    print(
+        f"role={args.role} boot_ms={report['boot_ms']:.0f} "
+        f"max_rss_mb={report['max_rss_kb'] / 1024:.1f} modules={report['modules']} "
+        f"blueprints={report['blueprints']}"
+    )
+    print("(boot_ms includes -X importtime overhead; benchmark_startup_roles.py measures without it)")
+    for title, column in (("self", 1), ("cumulative", 2)):
+        print(f"\nslowest imports by {title} time")
+        for name, self_us, cumulative_us in sorted(imports, key=lambda item: item[column], reverse=True)[: args.top]:
+            print(f"  {self_us / 1000:8.1f} ms self {cumulative_us / 1000:8.1f} ms cumulative  {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,5 +1,6 @@
 import argparse
 import os
+import signal
 from uuid import uuid4
 
 
@@ -10,6 +11,7 @@ os.environ.setdefault("ASYNC_TASK_SKIP_STARTUP_WORKER_CHECK", "true")
 
 from app import create_app  # noqa: E402
 from app.services import async_task_service  # noqa: E402
+from app.services.async_task_worker import AsyncTaskWorkerPool  # noqa: E402
 
 
 def _parse_args():
@@ -36,7 +38,22 @@ def _parse_args():
     parser.add_argument(
         "--worker-id",
         default=None,
-        help="Stable worker identifier used for startup health checks.",
+        help=(
+            "Stable worker identifier used for startup health checks. A restarted worker "
+            "with the same id requeues tasks left in its processing list."
+        ),
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="Tasks processed in parallel. Defaults to ASYNC_TASK_WORKER_CONCURRENCY.",
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=None,
+        help="Tasks fetched per queue round trip. Defaults to ASYNC_TASK_WORKER_PREFETCH.",
     )
     parser.add_argument(
         "--health-log-every",
@@ -47,24 +64,68 @@ def _parse_args():
     return parser.parse_args()
 
 
+def _log_health(app, label, worker_id, processed):
+    snapshot = async_task_service.get_operational_snapshot()
+    app.logger.info(
+        "%s id=%s processed=%s active_workers=%s queue_depth=%s retry_depth=%s failed_depth=%s failure_rate=%.3f",
+        label,
+        worker_id,
+        processed,
+        snapshot["active_worker_count"],
+        snapshot["queue_depth"],
+        snapshot["retry_queue_depth"],
+        snapshot["failed_queue_depth"],
+        snapshot["process_failure_rate"],
+    )
+
+
 def main():
     args = _parse_args()
-    app = create_app()
+    app = create_app(role="worker")
     processed = 0
     startup_snapshot_logged = False
     worker_id = (args.worker_id or "").strip() or f"worker-{uuid4().hex[:12]}"
     health_log_every = max(1, int(args.health_log_every or 50))
 
+    pool = AsyncTaskWorkerPool(
+        app,
+        worker_id=worker_id,
+        concurrency=args.concurrency,
+        prefetch=args.prefetch,
+        block_timeout_seconds=args.block_timeout_seconds,
+        source="run_async_worker",
+    )
+
+    def _request_stop(signum, _frame):
+        app.logger.info("Async worker id=%s received signal=%s, draining", worker_id, signum)
+        pool.request_stop()
+
+    signal.signal(signal.SIGTERM, _request_stop)
+    signal.signal(signal.SIGINT, _request_stop)
+
     app.logger.info(
-        "Starting async task worker id=%s once=%s max_tasks=%s block_timeout=%s queue_enabled=%s",
+        "Starting async task worker id=%s once=%s max_tasks=%s block_timeout=%s "
+        "concurrency=%s prefetch=%s queue_enabled=%s",
         worker_id,
         args.once,
         args.max_tasks,
         args.block_timeout_seconds,
+        pool.concurrency,
+        pool.prefetch,
         app.config.get("ASYNC_TASKS_ENABLED", False),
     )
 
-    while True:
+    if not args.once and (pool.concurrency > 1 or pool.prefetch > 1):
+        with app.app_context():
+            _log_health(app, "Async worker health", worker_id, processed)
+        processed = pool.run(
+            max_tasks=max(1, args.max_tasks) if args.max_tasks is not None else None
+        )
+        with app.app_context():
+            _log_health(app, "Async worker stopped", worker_id, processed)
+        return
+
+    while not pool.stopping:
         with app.app_context():
             active_workers = async_task_service.record_worker_heartbeat(
                 worker_id=worker_id,
@@ -72,6 +133,7 @@ def main():
             )
             did_process = async_task_service.process_one_pending_task(
                 block_timeout_seconds=args.block_timeout_seconds,
+                worker_id=worker_id,
             )
             if not startup_snapshot_logged:
                 snapshot = async_task_service.get_operational_snapshot()
@@ -36,7 +36,7 @@ def _parse_args():
 
 def main():
     args = _parse_args()
-    app = create_app()
+    app = create_app(role="cleanup")
     default_interval = max(
         int(app.config.get("MODERATION_CLEANUP_INTERVAL_SECONDS", 300)),
         10,
@@ -0,0 +1,86 @@
+"""
+Drain-time benchmark for the async task worker pool.
+
+Queues a burst of group side-effect tasks whose handler sleeps to mimic the
+I/O-bound fanout work (DB reads, socket emits, push calls) and measures how
+long AsyncTaskWorkerPool takes to empty the queue at several pool sizes.
+
+Run:
+    python3 tests/benchmark_async_worker_pool.py
+"""
+
+import json
+import os
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask import Flask  # noqa: E402
+
+from tests.fake_redis import FakeRedis  # noqa: E402
+
+
+def _fill_queue(client, queue_name, count, task_type):
+    for index in range(count):
+        client.rpush(
+            queue_name,
+            json.dumps({
+                "task_id": f"burst-{index}",
+                "task_type": task_type,
+                "payload": {"group_id": 1, "sender": "alice", "message_payload": {}},
+                "attempt": 0,
+            }),
+        )
+
+
+def main():
+    from app.services import async_task_service
+    from app.services.async_task_worker import AsyncTaskWorkerPool
+
+    task_count = 400
+    handler_io_seconds = 0.01
+    pool_sizes = (1, 2, 4, 8, 16)
+
+    app = Flask(__name__)
+    app.config["ASYNC_TASK_QUEUE_NAME"] = "bench:async:queue"
+
+    def _fanout_handler(_payload):
+        time.sleep(handler_io_seconds)
+
+    print(f"tasks={task_count} handler_io_ms={handler_io_seconds * 1000:.0f}")
+    baseline_seconds = None
+    for pool_size in pool_sizes:
+        client = FakeRedis()
+        _fill_queue(
+            client,
+            "bench:async:queue",
+            task_count,
+            async_task_service.TASK_TYPE_GROUP_MESSAGE_SIDE_EFFECTS,
+        )
+        pool = AsyncTaskWorkerPool(
+            app,
+            worker_id=f"bench-{pool_size}",
+            concurrency=pool_size,
+            block_timeout_seconds=0,
+        )
+        with patch.object(async_task_service, "redis_client", client):
+            with patch.object(
+                async_task_service,
+                "_handle_group_message_side_effects",
+                side_effect=_fanout_handler,
+            ):
+                started_at = time.perf_counter()
+                pool.run(max_tasks=task_count)
+                elapsed = time.perf_counter() - started_at
+
+        baseline_seconds = baseline_seconds or elapsed
+        print(
+            f"concurrency={pool_size:<3} drain_s={elapsed:.3f} "
+            f"tasks_per_s={task_count / elapsed:.0f} speedup={baseline_seconds / elapsed:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
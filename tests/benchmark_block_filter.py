@@ -0,0 +1,141 @@
+"""
+Feed benchmark for viewers with 0, 100 and 10k blocks.
+
+Loads synthetic users, posts and blocks into a temporary SQLite database (with
+the managed performance indexes) and times post_service.get_posts (page 1, no
+total) per viewer. The "uncached" variant is the previous behaviour: the
+blocks table is read on every request and the hidden ids always go into a
+NOT IN list. The "cached" variant reads the hidden set from Redis and switches
+to subqueries on blocks past BLOCK_HIDDEN_INLINE_LIMIT ids. SQLite already
+turns a literal IN list into an ephemeral index; PostgreSQL compares each row
+against the whole list, so the 10k gap is wider there.
+
+Run:
+    python3 tests/benchmark_block_filter.py [post_count]
+"""
+
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tests.fake_redis import FakeRedis  # noqa: E402
+
+
+USER_COUNT = 12_000
+LIMIT = 20
+ROUNDS = 30
+# viewer username -> number of users it blocks.
+VIEWERS = {"viewer0": 0, "viewer100": 100, "viewer10k": 10_000}
+
+
+def _fill_database(db_path: str, post_count: int):
+    rng = random.Random(7)
+    started = datetime(2026, 1, 1)
+    usernames = [f"user{user_id}" for user_id in range(1, USER_COUNT + 1)]
+    usernames[:len(VIEWERS)] = list(VIEWERS)
+
+    connection = sqlite3.connect(db_path)
+    connection.executemany(
+        "INSERT INTO users (id, username, password_hash, created_at, public_key, is_suspended) "
+        "VALUES (?, ?, 'x', ?, 'pk', 0)",
+        [(user_id, username, started.isoformat(sep=" ")) for user_id, username in enumerate(usernames, start=1)],
+    )
+    connection.executemany(
+        "INSERT INTO posts (id, author_id, text, created_at, followers_only, is_hidden, is_daily_winner) "
+        "VALUES (?, ?, ?, ?, 0, 0, 0)",
+        [
+            (
+                post_id,
+                rng.randint(1, USER_COUNT),
+                f"post {post_id}",
+                (started + timedelta(seconds=post_id)).isoformat(sep=" ") + ".000000",
+            )
+            for post_id in range(1, post_count + 1)
+        ],
+    )
+    blocks = []
+    for viewer_id, block_count in enumerate(VIEWERS.values(), start=1):
+        candidates = range(len(VIEWERS) + 1, USER_COUNT + 1)
+        blocks.extend((viewer_id, blocked_id) for blocked_id in rng.sample(candidates, block_count))
+    connection.executemany(
+        "INSERT INTO blocks (blocker_id, blocked_id, created_at) VALUES (?, ?, ?)",
+        [(blocker_id, blocked_id, started.isoformat(sep=" ")) for blocker_id, blocked_id in blocks],
+    )
+    connection.commit()
+    connection.close()
+
+
+def _time(run):
+    samples = []
+    for _ in range(ROUNDS):
+        started_at = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - started_at) * 1000)
+    return samples
+
+
+def main():
+    post_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    db_fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(db_fd)
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+    os.environ.setdefault("GROUP_MEMBERSHIP_CACHE_PUBSUB_ENABLED", "false")
+    os.environ.setdefault("MEDIA_HOT_CACHE_PUBSUB_ENABLED", "false")
+
+    from app import create_app
+    from app.db import db
+    from app.extensions import redis_client as redis_module
+    from app.performance_indexes import ensure_performance_indexes
+    from app.repositories import block_repository
+    from app.services import post_service
+
+    try:
+        with patch.object(redis_module, "redis_client", FakeRedis()):
+            app = create_app()
+            with app.app_context():
+                db.create_all()
+            _fill_database(db_path, post_count)
+            with app.app_context():
+                ensure_performance_indexes(db.session, db.engine)
+                db.session.execute(db.text("ANALYZE"))
+
+                print(f"posts={post_count} users={USER_COUNT} limit={LIMIT}")
+                for viewer in VIEWERS:
+                    def feed(viewer=viewer):
+                        return post_service.get_posts(1, LIMIT, include_total=False, viewer_username=viewer)
+
+                    with (
+                        patch.object(
+                            block_repository,
+                            "get_hidden_user_ids_for_viewer",
+                            block_repository._load_hidden_user_ids,
+                        ),
+                        patch.dict(app.config, {"BLOCK_HIDDEN_INLINE_LIMIT": USER_COUNT}),
+                    ):
+                        uncached = feed()
+                        uncached_samples = _time(feed)
+                    cached = feed()
+                    assert [post["id"] for post in uncached["posts"]] == [post["id"] for post in cached["posts"]]
+                    cached_samples = _time(feed)
+
+                    for name, samples in (("uncached", uncached_samples), ("cached", cached_samples)):
+                        print(
+                            f"{viewer:<10} {name:<9} "
+                            f"p50_ms={statistics.median(samples):.2f} max_ms={max(samples):.2f}"
+                        )
+    finally:
+        if os.path.exists(db_path):
+            os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Fanout cost benchmark for group inbox writes.
+
+Pushes one group message to N recipients against an in-memory Redis stand-in
+that counts commands and stored bytes. The "copies" variant is the previous
+layout (a full JSON copy per recipient in the list and the payload hash, plus
+RPUSH/HSET/SADD/ZADD and four EXPIREs each); the "shared" variant is
+push_group_messages_to_members, which stores the ciphertext once and a small
+key record per recipient. With a real Redis the shared variant is one EVAL
+per 500 recipients instead of a pipeline of 8 commands per recipient.
+
+Run:
+    python3 tests/benchmark_group_fanout.py [member_count] [ciphertext_bytes]
+"""
+
+import json
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tests.fake_redis import FakePipeline, FakeRedis  # noqa: E402
+
+
+class CountingPipeline(FakePipeline):
+    def execute(self):
+        self._redis.commands += len(self._commands)
+        return super().execute()
+
+
+class CountingRedis(FakeRedis):
+    def __init__(self):
+        super().__init__()
+        self.commands = 0
+
+    def pipeline(self):
+        return CountingPipeline(self)
+
+    def stored_bytes(self):
+        total = sum(len(value) for value in self._strings.values())
+        total += sum(len(item) for values in self._lists.values() for item in values)
+        total += sum(len(value) for values in self._hashes.values() for value in values.values())
+        return total
+
+
+def _legacy_push(message_repository, redis, group_id, recipients, payload):
+    message_id = payload["message_id"]
+    score = message_repository._timestamp_score(payload.get("timestamp"))
+    ttl = message_repository.GROUP_INBOX_TTL_SECONDS
+    pipe = redis.pipeline()
+    for username in recipients:
+        recipient_payload = dict(payload)
+        recipient_key = payload["encrypted_keys"][username]
+        recipient_payload["encrypted_key"] = recipient_key
+        recipient_payload["encrypted_keys"] = {username: recipient_key}
+        data = json.dumps(
+            message_repository.build_group_message_payload_for_recipient(recipient_payload, username)
+        )
+        list_key = f"group_user_inbox:{username}:{group_id}"
+        payload_key = message_repository._group_inbox_index_payload_key(username, group_id)
+        ids_key = f"group_inbox_ids:{username}:{group_id}"
+        order_key = message_repository._group_inbox_index_order_key(username, group_id)
+        pipe.rpush(list_key, data)
+        pipe.expire(list_key, ttl)
+        pipe.hset(payload_key, message_id, data)
+        pipe.sadd(ids_key, message_id)
+        pipe.zadd(order_key, {message_id: score})
+        pipe.expire(payload_key, ttl)
+        pipe.expire(ids_key, ttl)
+        pipe.expire(order_key, ttl)
+    pipe.execute()
+
+
+def main():
+    member_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    ciphertext_bytes = int(sys.argv[2]) if len(sys.argv) > 2 else 2048
+
+    from app.repositories import message_repository
+
+    recipients = [f"member{index}" for index in range(member_count)]
+    payload = message_repository.build_group_message_payload(
+        sender="sender",
+        group_id=1,
+        encrypted_message="c" * ciphertext_bytes,
+        encrypted_keys={username: "k" * 344 for username in ["sender", *recipients]},
+    )
+
+    for name in ("copies", "shared"):
+        redis = CountingRedis()
+        with patch.object(message_repository, "redis_client", redis):
+            if name == "copies":
+                _legacy_push(message_repository, redis, 1, recipients, payload)
+            else:
+                # No app context: skips the SQL recipient rows, Redis writes only.
+                message_repository.push_group_messages_to_members(1, recipients, payload)
+        print(
+            f"{name:<7} members={member_count} commands={redis.commands} "
+            f"stored_kb={redis.stored_bytes() / 1024:.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Wall-time benchmark for storing an 8-image post.
+
+Uploads eight files of mixed sizes to a MinIO stand-in that sleeps for a
+fixed request latency plus size / bandwidth, the way a slow MinIO holds a
+connection. The "sequential" variant is the previous loop (bucket_exists, then
+one put_object after another); the "pipeline" variant is
+media_upload.upload_objects behind ensure_bucket. The largest file alone is
+printed for reference: the pipeline should finish close to it.
+
+Run:
+    python3 tests/benchmark_media_upload.py [latency_ms] [bandwidth_mb_s]
+"""
+
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask import Flask  # noqa: E402
+
+
+FILE_SIZES_KB = (180, 240, 320, 400, 520, 760, 980, 1600)
+ROUNDS = 5
+
+
+class SlowMinio:
+    def __init__(self, latency_seconds: float, bytes_per_second: float):
+        self.latency_seconds = latency_seconds
+        self.bytes_per_second = bytes_per_second
+
+    def bucket_exists(self, bucket_name):
+        time.sleep(self.latency_seconds)
+        return True
+
+    def put_object(self, bucket_name, object_name, data, length, content_type, **kwargs):
+        body = data.read(length)
+        time.sleep(self.latency_seconds + len(body) / self.bytes_per_second)
+
+    def remove_object(self, bucket_name, object_name):
+        time.sleep(self.latency_seconds)
+
+
+def _items(media_upload):
+    return [
+        media_upload.UploadItem(
+            object_name=f"posts/1/{index}.webp",
+            stream=io.BytesIO(b"x" * size_kb * 1024),
+            length=size_kb * 1024,
+            content_type="image/webp",
+        )
+        for index, size_kb in enumerate(FILE_SIZES_KB)
+    ]
+
+
+def _sequential(client, items):
+    if not client.bucket_exists("media"):
+        raise RuntimeError("bucket missing")
+    for item in items:
+        client.put_object(
+            bucket_name="media",
+            object_name=item.object_name,
+            data=item.stream,
+            length=item.length,
+            content_type=item.content_type,
+        )
+
+
+def _time(run):
+    samples = []
+    for _ in range(ROUNDS):
+        started_at = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - started_at) * 1000)
+    return samples
+
+
+def main():
+    latency_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 20.0
+    bandwidth_mb_s = float(sys.argv[2]) if len(sys.argv) > 2 else 20.0
+
+    from app.extensions.minio_client import ensure_bucket
+    from app.services import media_upload
+
+    client = SlowMinio(latency_ms / 1000, bandwidth_mb_s * 1024 * 1024)
+    app = Flask(__name__)
+    app.config.update(MEDIA_UPLOAD_MAX_WORKERS=8)
+    with app.app_context():
+        largest = max(FILE_SIZES_KB)
+        print(
+            f"files={len(FILE_SIZES_KB)} total_kb={sum(FILE_SIZES_KB)} "
+            f"latency_ms={latency_ms:.0f} bandwidth_mb_s={bandwidth_mb_s:.0f}"
+        )
+
+        def pipeline():
+            ensure_bucket(client, "media")
+            media_upload.upload_objects(client, "media", _items(media_upload))
+
+        for name, run in (
+            ("sequential", lambda: _sequential(client, _items(media_upload))),
+            ("pipeline", pipeline),
+            (
+                "largest_file",
+                lambda: client.put_object(
+                    "media", "largest", io.BytesIO(b"x" * largest * 1024), largest * 1024, "image/webp"
+                ),
+            ),
+        ):
+            samples = _time(run)
+            print(f"{name:<13} p50_ms={statistics.median(samples):.0f} max_ms={max(samples):.0f}")
+
+
+if __name__ == "__main__":
+    main()
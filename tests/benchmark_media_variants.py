@@ -0,0 +1,83 @@
+"""
+Image variant benchmark: render time and feed bytes per scroll.
+
+Builds a photo-sized JPEG (smooth gradients plus sensor-like noise), renders
+its variants with media_variants.render_image and prints the time per image
+and the size of each output. "Feed bytes" is what a phone downloads for one
+scroll of FEED_PAGE image posts: the original versus the 640 px variant it
+now requests, plus the inline placeholders.
+
+Run:
+    python3 tests/benchmark_media_variants.py [width] [height]
+"""
+
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask import Flask  # noqa: E402
+from PIL import Image, ImageFilter  # noqa: E402
+
+
+FEED_PAGE = 20
+ROUNDS = 5
+WIDTHS = [320, 640, 1080]
+
+
+def _photo(width: int, height: int) -> bytes:
+    # Detail at several scales, so downscaled variants keep texture like a photo.
+    bands = []
+    for step in (48, 12, 3):
+        coarse = Image.effect_noise((width // step, height // step), 70)
+        bands.append(coarse.resize((width, height), Image.Resampling.BICUBIC))
+    gradient = Image.linear_gradient("L").resize((width, height))
+    image = Image.merge("RGB", (
+        Image.blend(bands[0], gradient, 0.4),
+        Image.blend(bands[1], bands[0], 0.5),
+        Image.blend(bands[2], gradient, 0.3).filter(ImageFilter.SMOOTH),
+    ))
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=90)
+    return output.getvalue()
+
+
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 4032
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else 3024
+
+    from app.services import media_variants
+
+    body = _photo(width, height)
+    app = Flask(__name__)
+    with app.app_context():
+        samples = []
+        for _ in range(ROUNDS):
+            started_at = time.perf_counter()
+            rendered = media_variants.render_image(
+                body,
+                widths=WIDTHS,
+                variant_format="webp",
+                quality=78,
+                placeholder_width=16,
+                max_source_pixels=50_000_000,
+            )
+            samples.append((time.perf_counter() - started_at) * 1000)
+
+    print(f"original {width}x{height} bytes={len(body)}")
+    print(f"render   p50_ms={statistics.median(samples):.0f} max_ms={max(samples):.0f}")
+    for variant in rendered.variants:
+        print(f"variant  {variant.width}x{variant.height} bytes={len(variant.body)}")
+    print(f"placeholder chars={len(rendered.placeholder)}")
+
+    feed_variant = next(variant for variant in rendered.variants if variant.width == 640)
+    before = len(body) * FEED_PAGE
+    after = (len(feed_variant.body) + len(rendered.placeholder)) * FEED_PAGE
+    print(f"feed bytes per {FEED_PAGE} posts: original={before} w640={after} ratio={before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Moderation cleanup of one prolific suspended account: per-post deletes versus
+the set-based purge.
+
+Seeds a temporary SQLite database with a suspended user who has 2000 posts (or [posts]),
+each with media, comments and votes, and purges it twice. "per_post" is the
+previous behaviour (six or seven statements per post, all in one transaction);
+"set_based" is run_scheduled_cleanup_with_metrics, which deletes a chunk of
+posts per statement and commits per chunk. Reports statements, rows/sec and
+wall time. Storage is faked; only the purge itself is measured.
+
+Run:
+    python3 tests/benchmark_moderation_cleanup.py [posts]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tests.fake_redis import FakeRedis  # noqa: E402
+
+
+class _FakeMinio:
+    def remove_objects(self, _bucket, delete_objects):
+        list(delete_objects)
+        return iter(())
+
+
+def _seed(db, posts):
+    from app.models.comment_model import Comment
+    from app.models.media_model import Media
+    from app.models.post_model import Post
+    from app.models.user_model import User
+    from app.models.vote_model import Vote
+
+    spammer = User(
+        username="spammer",
+        password_hash="hash",
+        public_key="pk-spammer",
+        is_suspended=True,
+        purge_after=datetime.utcnow() - timedelta(seconds=1),
+    )
+    reader = User(username="reader", password_hash="hash", public_key="pk-reader")
+    db.session.add_all([spammer, reader])
+    db.session.flush()
+    for idx in range(posts):
+        post = Post(author_id=spammer.id, text=f"spam {idx}")
+        db.session.add(post)
+        db.session.flush()
+        comment = Comment(post_id=post.id, author_id=reader.id, text="reply")
+        db.session.add(comment)
+        db.session.add(Media(post_id=post.id, object_name=f"posts/{idx}.jpg", mime_type="image/jpeg"))
+        db.session.flush()
+        db.session.add(Vote(user_id=reader.id, target_type="post", target_id=post.id, value=1))
+        db.session.add(Vote(user_id=reader.id, target_type="comment", target_id=comment.id, value=1))
+    db.session.commit()
+    return spammer.id
+
+
+def _per_post_purge(db, user_id):
+    """The cleanup before the set-based purge, kept here as the baseline."""
+    from app.models.comment_model import Comment
+    from app.models.media_model import Media
+    from app.models.post_model import Post
+    from app.models.report_model import PostReport
+    from app.models.user_model import User
+    from app.models.vote_model import Vote
+
+    for post in Post.query.filter_by(author_id=user_id).all():
+        comment_ids = [row[0] for row in db.session.query(Comment.id).filter(Comment.post_id == post.id)]
+        if comment_ids:
+            Vote.query.filter(
+                Vote.target_type == "comment",
+                Vote.target_id.in_(comment_ids),
+            ).delete(synchronize_session=False)
+        Comment.query.filter_by(post_id=post.id).delete(synchronize_session=False)
+        Vote.query.filter(Vote.target_type == "post", Vote.target_id == post.id).delete(
+            synchronize_session=False
+        )
+        Post.query.filter(Post.quoted_post_id == post.id).update(
+            {Post.quoted_post_id: None},
+            synchronize_session=False,
+        )
+        Media.query.filter_by(post_id=post.id).delete(synchronize_session=False)
+        PostReport.query.filter_by(post_id=post.id).delete(synchronize_session=False)
+        db.session.delete(post)
+    Vote.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    User.query.filter_by(id=user_id).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def main():
+    posts = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    db_fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(db_fd)
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+    from flask import Flask
+    from sqlalchemy import event
+
+    from app.config import Config
+    from app.db import db
+    from app.extensions import redis_client as redis_module
+    from app.services import report_service
+
+    statements = []
+
+    try:
+        app = Flask(__name__)
+        app.config.from_object(Config)
+        db.init_app(app)
+        with app.app_context(), patch.object(redis_module, "redis_client", FakeRedis()), patch.object(
+            report_service, "get_minio_client", return_value=_FakeMinio()
+        ):
+            db.create_all()
+            event.listen(db.engine, "before_cursor_execute", lambda *_args: statements.append(1))
+
+            for name in ("per_post", "set_based"):
+                user_id = _seed(db, posts)
+                statements.clear()
+                started_at = time.perf_counter()
+                if name == "per_post":
+                    _per_post_purge(db, user_id)
+                    rows_per_sec = None
+                else:
+                    stats = report_service.run_scheduled_cleanup_with_metrics(force=True)
+                    rows_per_sec = stats["rows_per_sec"]
+                elapsed_ms = (time.perf_counter() - started_at) * 1000
+                print(
+                    f"{name:<10} posts={posts} statements={len(statements)} "
+                    f"ms={elapsed_ms:.0f}" + (f" rows_per_sec={rows_per_sec}" if rows_per_sec else "")
+                )
+                db.session.execute(db.metadata.tables["users"].delete())
+                db.session.commit()
+    finally:
+        if os.path.exists(db_path):
+            os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
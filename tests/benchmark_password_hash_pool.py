@@ -0,0 +1,88 @@
+"""
+Event-loop stall during a login burst under eventlet.
+
+Monkey-patches eventlet like the production Socket.IO worker, starts a
+heartbeat greenlet that wakes every TICK_MS (a stand-in for socket delivery),
+and runs LOGINS concurrent Argon2id verifications with the production cost
+(64 MiB, t=3, p=4). "inline" calls argon2 on the hub thread as before;
+"pool" goes through password_hash_pool (eventlet tpool, bounded). The
+heartbeat's worst gap is how long every socket on the worker froze.
+
+Run:
+    python3 tests/benchmark_password_hash_pool.py [logins]
+"""
+
+import eventlet
+
+eventlet.monkey_patch()
+
+import os  # noqa: E402
+import statistics  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from argon2 import PasswordHasher  # noqa: E402
+from flask import Flask  # noqa: E402
+
+
+TICK_MS = 5
+
+
+def _burst(app, hasher, stored_hash, logins, verify):
+    gaps = []
+    stop = eventlet.event.Event()
+
+    def heartbeat():
+        last = time.perf_counter()
+        while not stop.ready():
+            eventlet.sleep(TICK_MS / 1000)
+            now = time.perf_counter()
+            gaps.append((now - last) * 1000 - TICK_MS)
+            last = now
+
+    def login():
+        with app.app_context():
+            verify(hasher, stored_hash)
+
+    beat = eventlet.spawn(heartbeat)
+    eventlet.sleep(0.05)
+    started_at = time.perf_counter()
+    pool = eventlet.GreenPool()
+    for _ in range(logins):
+        pool.spawn(login)
+    pool.waitall()
+    elapsed_ms = (time.perf_counter() - started_at) * 1000
+    stop.send()
+    beat.wait()
+    return elapsed_ms, gaps
+
+
+def main():
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+
+    from app.services import password_hash_pool
+
+    hasher = PasswordHasher(time_cost=3, memory_cost=65536, parallelism=4)
+    stored_hash = hasher.hash("correct horse")
+    app = Flask(__name__)
+    app.config.update(AUTH_HASH_POOL_MAX_CONCURRENCY=2, AUTH_HASH_POOL_MAX_QUEUE=64)
+
+    def inline(hasher, stored_hash):
+        hasher.verify(stored_hash, "correct horse")
+
+    def pooled(hasher, stored_hash):
+        password_hash_pool.run("verify", hasher.verify, stored_hash, "correct horse")
+
+    print(f"logins={logins} argon2=t3/m64MiB/p4 tick_ms={TICK_MS}")
+    for name, verify in (("inline", inline), ("pool", pooled)):
+        elapsed_ms, gaps = _burst(app, hasher, stored_hash, logins, verify)
+        print(
+            f"{name:<7} burst_ms={elapsed_ms:.0f} "
+            f"stall_p50_ms={statistics.median(gaps):.1f} stall_max_ms={max(gaps):.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Deep-page benchmark for the public posts feed.
+
+Loads synthetic posts into a temporary SQLite database (with the managed
+performance indexes) and times post_service.get_posts for page 1 and page
+500 in offset mode against the same pages reached with a keyset cursor. The
+cursor for page 500 is built from the last post of page 499, the way a client
+would receive it as next_cursor. Cursor-mode totals come from the per-viewer
+cached count (POSTS_TOTAL_CACHE_TTL_SECONDS).
+
+Run:
+    python3 tests/benchmark_post_pagination.py [post_count]
+"""
+
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tests.fake_redis import FakeRedis  # noqa: E402
+
+
+AUTHOR_COUNT = 2000
+LIMIT = 20
+DEEP_PAGE = 500
+ROUNDS = 30
+
+
+def _fill_database(db_path: str, post_count: int):
+    rng = random.Random(5)
+    started = datetime(2026, 1, 1)
+    connection = sqlite3.connect(db_path)
+    connection.executemany(
+        "INSERT INTO users (id, username, password_hash, created_at, public_key, is_suspended) "
+        "VALUES (?, ?, 'x', ?, 'pk', 0)",
+        [(user_id, f"author{user_id}", started.isoformat(sep=" ")) for user_id in range(1, AUTHOR_COUNT + 1)],
+    )
+    connection.executemany(
+        "INSERT INTO posts (id, author_id, text, created_at, followers_only, is_hidden, is_daily_winner) "
+        "VALUES (?, ?, ?, ?, ?, 0, 0)",
+        [
+            (
+                post_id,
+                rng.randint(1, AUTHOR_COUNT),
+                f"post {post_id}",
+                # Whole seconds, so many posts share a timestamp.
+                (started + timedelta(seconds=post_id // 3)).isoformat(sep=" ") + ".000000",
+                int(rng.random() < 0.1),
+            )
+            for post_id in range(1, post_count + 1)
+        ],
+    )
+    connection.commit()
+    connection.close()
+
+
+def _time(run):
+    samples = []
+    for _ in range(ROUNDS):
+        started_at = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - started_at) * 1000)
+    return samples
+
+
+def main():
+    post_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    db_fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(db_fd)
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+    os.environ.setdefault("GROUP_MEMBERSHIP_CACHE_PUBSUB_ENABLED", "false")
+    os.environ.setdefault("MEDIA_HOT_CACHE_PUBSUB_ENABLED", "false")
+
+    from app import create_app
+    from app.db import db
+    from app.extensions import redis_client as redis_module
+    from app.performance_indexes import ensure_performance_indexes
+    from app.services import post_service
+
+    try:
+        with patch.object(redis_module, "redis_client", FakeRedis()):
+            app = create_app()
+            with app.app_context():
+                db.create_all()
+            _fill_database(db_path, post_count)
+            with app.app_context():
+                ensure_performance_indexes(db.session, db.engine)
+                db.session.execute(db.text("ANALYZE"))
+
+                before_deep = post_service.get_posts(DEEP_PAGE - 1, LIMIT, include_total=False)
+                deep_cursor = post_service.encode_post_cursor(
+                    datetime.fromisoformat(before_deep["posts"][-1]["created_at"].rstrip("Z")),
+                    before_deep["posts"][-1]["id"],
+                )
+                offset_deep = post_service.get_posts(DEEP_PAGE, LIMIT, include_total=False)
+                cursor_deep = post_service.get_posts(1, LIMIT, include_total=False, cursor=deep_cursor)
+                assert [post["id"] for post in offset_deep["posts"]] == [
+                    post["id"] for post in cursor_deep["posts"]
+                ]
+
+                print(f"posts={post_count} limit={LIMIT}")
+                for name, run in (
+                    ("offset_p1_total", lambda: post_service.get_posts(1, LIMIT)),
+                    ("offset_p1", lambda: post_service.get_posts(1, LIMIT, include_total=False)),
+                    (f"offset_p{DEEP_PAGE}", lambda: post_service.get_posts(DEEP_PAGE, LIMIT, include_total=False)),
+                    ("cursor_p1", lambda: post_service.get_posts(1, LIMIT, include_total=False, cursor="")),
+                    # Counted once, then read from the cached total.
+                    ("cursor_p1_total", lambda: post_service.get_posts(1, LIMIT, cursor="")),
+                    (
+                        f"cursor_p{DEEP_PAGE}",
+                        lambda: post_service.get_posts(1, LIMIT, include_total=False, cursor=deep_cursor),
+                    ),
+                ):
+                    samples = _time(run)
+                    print(
+                        f"{name:<16} p50_ms={statistics.median(samples):.2f} "
+                        f"max_ms={max(samples):.2f}"
+                    )
+    finally:
+        if os.path.exists(db_path):
+            os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Round-trip benchmark for group presence lookups.
+
+Compares the legacy per-token layout (SMEMBERS + GET per token + SREM/SCARD/SADD
+per user) with the sorted-set presence engine in app.socket_events.
+
+Run:
+    python3 tests/benchmark_presence_lookup.py
+"""
+
+import os
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tests.fake_redis import FakePipeline, FakeRedis  # noqa: E402
+
+
+class CountingPipeline(FakePipeline):
+    def execute(self):
+        self._redis.round_trips += 1
+        self._redis.in_pipeline = True
+        try:
+            return super().execute()
+        finally:
+            self._redis.in_pipeline = False
+
+
+class CountingRedis(FakeRedis):
+    # Every direct command and every pipeline execute counts as one round trip.
+    _COUNTED = {
+        "get", "set", "setex", "sadd", "srem", "scard", "smembers", "sismember",
+        "delete", "zadd", "zcard", "zrem", "zremrangebyscore",
+    }
+
+    def __init__(self):
+        super().__init__()
+        self.round_trips = 0
+        self.in_pipeline = False
+
+    def pipeline(self):
+        return CountingPipeline(self)
+
+    def __getattribute__(self, name):
+        if name in CountingRedis._COUNTED:
+            original = super().__getattribute__(name)
+            redis = self
+
+            def _counted(*args, **kwargs):
+                if not redis.in_pipeline:
+                    redis.round_trips += 1
+                return original(*args, **kwargs)
+
+            return _counted
+        return super().__getattribute__(name)
+
+
+def legacy_is_online(client, username):
+    connections_key = f"presence:connections:{username}"
+    stale = []
+    for token in client.smembers(connections_key):
+        if client.get(f"presence:connection_token:{token}") != username:
+            stale.append(token)
+    if stale:
+        client.srem(connections_key, *stale)
+    active = client.scard(connections_key)
+    if active > 0:
+        client.sadd("presence:online_users", username)
+    else:
+        client.delete(connections_key)
+        client.srem("presence:online_users", username)
+    return active > 0
+
+
+def legacy_group_status(client, usernames):
+    pipe = client.pipeline()
+    for username in usernames:
+        pipe.sismember("presence:online_users", username)
+    memberships = pipe.execute()
+    return {
+        username: bool(is_member) and legacy_is_online(client, username)
+        for username, is_member in zip(usernames, memberships)
+    }
+
+
+def main():
+    import app.socket_events as socket_events
+    from app.extensions import redis_client as redis_module
+
+    member_count = 500
+    connections_per_member = 2
+    loops = 20
+    usernames = [f"member{i}" for i in range(member_count)]
+
+    legacy = CountingRedis()
+    for username in usernames:
+        legacy.sadd("presence:online_users", username)
+        for conn in range(connections_per_member):
+            token = f"node:{username}:{conn}"
+            legacy.sadd(f"presence:connections:{username}", token)
+            legacy.setex(f"presence:connection_token:{token}", 75, username)
+
+    engine = CountingRedis()
+    with patch.object(redis_module, "redis_client", engine):
+        for username in usernames:
+            for conn in range(connections_per_member):
+                socket_events._refresh_presence_connection(
+                    username,
+                    f"{username}-{conn}",
+                    touch_recently_online=False,
+                )
+
+        legacy.round_trips = 0
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            legacy_group_status(legacy, usernames)
+        t1 = time.perf_counter()
+        legacy_round_trips = legacy.round_trips / loops
+
+        engine.round_trips = 0
+        t2 = time.perf_counter()
+        for _ in range(loops):
+            socket_events.get_users_online_status(usernames)
+        t3 = time.perf_counter()
+        engine_round_trips = engine.round_trips / loops
+
+    print(f"members={member_count} connections_per_member={connections_per_member} loops={loops}")
+    print(f"legacy_round_trips_per_lookup={legacy_round_trips:.0f}")
+    print(f"engine_round_trips_per_lookup={engine_round_trips:.0f} (1 with EVAL, 2 pipelined fallback)")
+    print(f"legacy_avg_ms={(t1 - t0) * 1000 / loops:.2f}")
+    print(f"engine_avg_ms={(t3 - t2) * 1000 / loops:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Throughput benchmark: list-pop queue vs the leased (at-least-once) queue.
+
+Both variants run the same AsyncTaskWorkerPool against an in-memory Redis that
+sleeps for a simulated network round trip on every command and pipeline. The
+"list" variant swaps dequeue_tasks for the old LPOP-based pop without leases or
+acks; the "leased" variant uses the real LMOVE + lease script with piggybacked acks.
+The Lua scripts are emulated in Python and cost one round trip, like EVAL.
+
+Also times reclaiming a single expired lease next to a deep queue, to show
+recovery does not scan the backlog.
+
+Run:
+    python3 tests/benchmark_reliable_queue.py
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask import Flask  # noqa: E402
+
+from tests.fake_redis import FakePipeline, FakeRedis  # noqa: E402
+
+
+ROUND_TRIP_SECONDS = 0.0002
+PREFETCH = 32
+
+
+class LatencyPipeline(FakePipeline):
+    def execute(self):
+        self._redis.round_trip()
+        with self._redis.lock:
+            self._redis.in_pipeline = True
+            try:
+                return super().execute()
+            finally:
+                self._redis.in_pipeline = False
+
+
+class LatencyRedis(FakeRedis):
+    _COMMANDS = {
+        "lpop", "rpush", "lpush", "llen", "lmove", "lrem", "lrange", "hincrby", "hset",
+        "hgetall", "zadd", "zrem", "zcard", "zrange", "zremrangebyscore", "delete",
+    }
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.RLock()
+        self.in_pipeline = False
+        self.round_trips = 0
+
+    def round_trip(self):
+        self.round_trips += 1
+        time.sleep(ROUND_TRIP_SECONDS)
+
+    def pipeline(self):
+        return LatencyPipeline(self)
+
+    def __getattribute__(self, name):
+        if name in LatencyRedis._COMMANDS:
+            original = super().__getattribute__(name)
+            redis = self
+
+            def _command(*args, **kwargs):
+                if not redis.in_pipeline:
+                    redis.round_trip()
+                with redis.lock:
+                    return original(*args, **kwargs)
+
+            return _command
+        return super().__getattribute__(name)
+
+    def eval(self, script, numkeys, *args):
+        from app.services import async_task_service
+
+        self.round_trip()
+        keys, argv = args[:numkeys], args[numkeys:]
+        with self.lock:
+            self.in_pipeline = True
+            try:
+                if script == async_task_service.DEQUEUE_LEASED_TASKS_LUA:
+                    for raw in argv[2:]:
+                        self.lrem(keys[1], 1, raw)
+                        self.zrem(keys[2], f"{keys[1]}\n{raw}")
+                    items = []
+                    for _ in range(int(argv[0])):
+                        raw = self.lmove(keys[0], keys[1], "LEFT", "RIGHT")
+                        if raw is None:
+                            break
+                        self.zadd(keys[2], {f"{keys[1]}\n{raw}": float(argv[1])})
+                        items.append(raw)
+                    return items
+                if script == async_task_service.RECLAIM_EXPIRED_TASKS_LUA:
+                    reclaimed = 0
+                    expired = [
+                        member
+                        for member, score in self.zrange(keys[0], 0, -1, withscores=True)
+                        if score <= float(argv[0])
+                    ][: int(argv[1])]
+                    for member in expired:
+                        processing_key, _, raw = member.partition("\n")
+                        if self.lrem(processing_key, 1, raw) > 0:
+                            self.lpush(keys[1], raw)
+                            reclaimed += 1
+                        self.zrem(keys[0], member)
+                    return reclaimed
+            finally:
+                self.in_pipeline = False
+        raise RuntimeError("unknown script")
+
+
+def _fill_queue(client, queue_name, count):
+    for index in range(count):
+        client.rpush(
+            queue_name,
+            json.dumps({
+                "task_id": f"task-{index}",
+                "task_type": "media_post_process",
+                "payload": {"post_id": index, "media_items": []},
+                "attempt": 0,
+            }),
+        )
+
+
+def _list_dequeue(client, async_task_service):
+    def _dequeue(*, max_items, block_timeout_seconds=None, promote_retries=True, worker_id=None,
+                 ack_leases=None):
+        raw_items = client.lpop(async_task_service._queue_name(), max_items) or []
+        return [json.loads(raw) for raw in raw_items]
+
+    return _dequeue
+
+
+def _drain(app, client, task_count, concurrency, *, leased):
+    from app.services import async_task_service
+    from app.services.async_task_worker import AsyncTaskWorkerPool
+
+    _fill_queue(client, "bench:async:queue", task_count)
+    client.round_trips = 0
+    pool = AsyncTaskWorkerPool(
+        app,
+        worker_id=f"bench-{'leased' if leased else 'list'}",
+        concurrency=concurrency,
+        prefetch=PREFETCH,
+        block_timeout_seconds=0,
+    )
+    with patch.object(async_task_service, "redis_client", client):
+        with patch.object(async_task_service, "_handle_media_post_process", return_value=None):
+            if leased:
+                started_at = time.perf_counter()
+                pool.run(max_tasks=task_count)
+                elapsed = time.perf_counter() - started_at
+            else:
+                with patch.object(
+                    async_task_service,
+                    "dequeue_tasks",
+                    side_effect=_list_dequeue(client, async_task_service),
+                ):
+                    started_at = time.perf_counter()
+                    pool.run(max_tasks=task_count)
+                    elapsed = time.perf_counter() - started_at
+    return elapsed, client.round_trips
+
+
+def main():
+    from app.services import async_task_service
+
+    task_count = 5000
+    concurrency = 8
+    runs = 5
+    app = Flask(__name__)
+    app.config["ASYNC_TASK_QUEUE_NAME"] = "bench:async:queue"
+
+    # Interleave runs and keep the best of each so scheduler noise from the
+    # simulated sleeps does not favour whichever variant ran first.
+    list_results = []
+    leased_results = []
+    for _ in range(runs):
+        list_results.append(_drain(app, LatencyRedis(), task_count, concurrency, leased=False))
+        leased_client = LatencyRedis()
+        leased_results.append(_drain(app, leased_client, task_count, concurrency, leased=True))
+    list_seconds, list_round_trips = min(list_results)
+    leased_seconds, leased_round_trips = min(leased_results)
+
+    print(
+        f"tasks={task_count} concurrency={concurrency} prefetch={PREFETCH} "
+        f"rtt_ms={ROUND_TRIP_SECONDS * 1000:.2f} best_of={runs}"
+    )
+    print(
+        f"list_tasks_per_s={task_count / list_seconds:.0f} "
+        f"round_trips_per_1k_tasks={list_round_trips * 1000 / task_count:.1f}"
+    )
+    print(
+        f"leased_tasks_per_s={task_count / leased_seconds:.0f} "
+        f"round_trips_per_1k_tasks={leased_round_trips * 1000 / task_count:.1f}"
+    )
+    print(f"leased_vs_list_throughput={list_seconds / leased_seconds * 100:.1f}%")
+    print(f"leftover_processing={leased_client.llen('bench:async:queue:processing:bench-leased')}")
+
+    backlog = LatencyRedis()
+    _fill_queue(backlog, "bench:async:queue", 100000)
+    with app.app_context():
+        with patch.object(async_task_service, "redis_client", backlog):
+            async_task_service.dequeue_tasks(max_items=1, block_timeout_seconds=0, worker_id="dead")
+            backlog.round_trips = 0
+            with patch.object(async_task_service.time, "time", return_value=time.time() + 3600):
+                started_at = time.perf_counter()
+                reclaimed = async_task_service.reclaim_expired_tasks()
+                elapsed = time.perf_counter() - started_at
+    print(
+        f"reclaim backlog=100000 reclaimed={reclaimed} round_trips={backlog.round_trips} "
+        f"ms={elapsed * 1000:.2f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
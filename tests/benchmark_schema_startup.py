@@ -0,0 +1,71 @@
+"""
+Schema step of create_app: full reflection pass versus fingerprint check.
+
+Creates a temporary SQLite database, migrates it once, then times the schema
+work a worker does on boot. "reflect" is the previous behaviour (create_all
+plus every _ensure_* step and the managed indexes, each inspecting the
+database); "fingerprint" is the new check (hash the models, one SELECT).
+PostgreSQL reflection costs one or more round trips per table and column
+lookup, so the gap there is larger than on a local file.
+
+Run:
+    python3 tests/benchmark_schema_startup.py
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+ROUNDS = 20
+
+
+def _time(run):
+    samples = []
+    for _ in range(ROUNDS):
+        started_at = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - started_at) * 1000)
+    return samples
+
+
+def main():
+    db_fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(db_fd)
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+    from flask import Flask
+
+    from app import SCHEMA_MIGRATION_STEPS, apply_schema_migrations
+    from app import schema_migrations
+    from app.config import Config
+    from app.db import db
+
+    try:
+        app = Flask(__name__)
+        app.config.from_object(Config)
+        db.init_app(app)
+        with app.app_context():
+            apply_schema_migrations()
+
+            def reflect():
+                apply_schema_migrations(force=True)
+
+            def fingerprint():
+                expected = schema_migrations.compute_fingerprint(db.metadata, SCHEMA_MIGRATION_STEPS)
+                assert schema_migrations.read_fingerprint(db.engine) == expected
+
+            print(f"tables={len(db.metadata.tables)} steps={len(SCHEMA_MIGRATION_STEPS)}")
+            for name, run in (("reflect", reflect), ("fingerprint", fingerprint)):
+                samples = _time(run)
+                print(f"{name:<12} p50_ms={statistics.median(samples):.1f} max_ms={max(samples):.1f}")
+    finally:
+        if os.path.exists(db_path):
+            os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Latency benchmark for post search at 1M posts.
+
+Fills a temporary SQLite database with synthetic posts (Zipf-distributed words)
+and times search_service.search_posts for a mix of common, rare, multi-word and
+search-as-you-type prefix queries. The "ilike" variant is the previous
+implementation, an ILIKE '%q%' scan plus an exact count(); the "indexed"
+variant uses the in-process inverted index with a capped total. PostgreSQL
+serves the same queries from the GIN indexes in app.performance_indexes.
+
+Run:
+    python3 tests/benchmark_search_index.py [post_count]
+"""
+
+import itertools
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tests.fake_redis import FakeRedis  # noqa: E402
+
+
+VOCABULARY_SIZE = 50000
+WORDS_PER_POST = (6, 14)
+AUTHOR_COUNT = 1000
+ROUNDS = 5
+
+
+def _word(rank: int) -> str:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    value = ""
+    rank += 26 * 26
+    while rank:
+        rank, digit = divmod(rank, 26)
+        value += letters[digit]
+    return value
+
+
+def _fill_database(db_path: str, post_count: int):
+    rng = random.Random(7)
+    vocabulary = [_word(rank) for rank in range(VOCABULARY_SIZE)]
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(VOCABULARY_SIZE)))
+    started_at = datetime(2026, 1, 1)
+
+    connection = sqlite3.connect(db_path)
+    connection.executemany(
+        "INSERT INTO users (id, username, password_hash, created_at, public_key, is_suspended) "
+        "VALUES (?, ?, 'x', ?, 'pk', 0)",
+        [
+            (user_id, f"user{user_id}", started_at.isoformat(sep=" "))
+            for user_id in range(1, AUTHOR_COUNT + 1)
+        ],
+    )
+    batch = []
+    for post_id in range(1, post_count + 1):
+        words = rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(*WORDS_PER_POST))
+        batch.append((
+            post_id,
+            rng.randint(1, AUTHOR_COUNT),
+            " ".join(words),
+            (started_at + timedelta(seconds=post_id)).isoformat(sep=" "),
+        ))
+        if len(batch) == 50000:
+            connection.executemany(
+                "INSERT INTO posts (id, author_id, text, created_at, followers_only, is_hidden, is_daily_winner) "
+                "VALUES (?, ?, ?, ?, 0, 0, 0)",
+                batch,
+            )
+            batch = []
+    if batch:
+        connection.executemany(
+            "INSERT INTO posts (id, author_id, text, created_at, followers_only, is_hidden, is_daily_winner) "
+            "VALUES (?, ?, ?, ?, 0, 0, 0)",
+            batch,
+        )
+    connection.commit()
+    connection.close()
+    return vocabulary
+
+
+def _legacy_search_posts(query: str, limit: int = 10):
+    from app.models.post_model import Post
+    from app.models.user_model import User
+    from app.services.post_service import _post_visibility_filter
+
+    base_query = (
+        Post.query
+        .join(User, User.id == Post.author_id)
+        .filter(
+            Post.is_hidden.is_(False),
+            User.is_suspended.is_(False),
+            _post_visibility_filter(None),
+        )
+        .filter(Post.text.ilike(f"%{query}%"))
+        .order_by(Post.created_at.desc())
+    )
+    total = base_query.count()
+    posts = base_query.limit(limit).all()
+    return total, posts
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _time_queries(run, queries):
+    samples = []
+    for _ in range(ROUNDS):
+        for query in queries:
+            started_at = time.perf_counter()
+            run(query)
+            samples.append((time.perf_counter() - started_at) * 1000)
+    return samples
+
+
+def main():
+    post_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    db_fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(db_fd)
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+
+    from app import create_app
+    from app.db import db
+    from app.extensions import redis_client as redis_module
+    from app.services import search_service
+
+    try:
+        with patch.object(redis_module, "redis_client", FakeRedis()):
+            app = create_app()
+            with app.app_context():
+                db.create_all()
+
+            fill_started_at = time.perf_counter()
+            vocabulary = _fill_database(db_path, post_count)
+            print(f"posts={post_count} fill_s={time.perf_counter() - fill_started_at:.1f}")
+
+            queries = [
+                vocabulary[3],                          # very common word
+                vocabulary[40],                         # common word
+                vocabulary[2000],                       # mid-frequency word
+                vocabulary[40000],                      # rare word
+                f"{vocabulary[5]} {vocabulary[60]}",    # two words
+                vocabulary[900][:2],                    # typeahead prefix
+                vocabulary[12000][:3],                  # typeahead prefix
+            ]
+
+            with app.app_context():
+                build_started_at = time.perf_counter()
+                search_service.search_posts(vocabulary[0], 1, 10)
+                print(f"index_build_s={time.perf_counter() - build_started_at:.1f}")
+
+                variants = (
+                    ("ilike", lambda query: _legacy_search_posts(query)),
+                    ("indexed", lambda query: search_service.search_posts(query, 1, 10)),
+                )
+                for name, run in variants:
+                    samples = _time_queries(run, queries)
+                    print(
+                        f"{name:<8} queries={len(samples)} "
+                        f"p50_ms={statistics.median(samples):.1f} "
+                        f"p95_ms={_percentile(samples, 0.95):.1f} "
+                        f"max_ms={max(samples):.1f}"
+                    )
+    finally:
+        if os.path.exists(db_path):
+            os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
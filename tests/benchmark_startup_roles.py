@@ -0,0 +1,54 @@
+"""
+Cold-start benchmark for each app role.
+
+Boots create_app(role) in a fresh interpreter per round and reports boot time,
+peak RSS and loaded module count. "web" imports every blueprint and socket
+handler, as every process did before roles existed, so it is the baseline
+for the worker and cleanup roles.
+
+Run:
+    python3 tests/benchmark_startup_roles.py [rounds]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from profile_startup import profile_role  # noqa: E402
+
+
+ROLES = ("web", "socket", "worker", "cleanup")
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    db_fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(db_fd)
+    env = {
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        # Keep background threads from reaching for Redis during the measurement.
+        "GROUP_MEMBERSHIP_CACHE_PUBSUB_ENABLED": "false",
+        "MEDIA_HOT_CACHE_PUBSUB_ENABLED": "false",
+        "AUTH_PASSWORD_MIGRATION_ENABLED": "false",
+    }
+    try:
+        # The first boot migrates the empty database; later ones only check it.
+        profile_role("web", import_time=False, env=env)
+        for role in ROLES:
+            reports = [profile_role(role, import_time=False, env=env) for _ in range(rounds)]
+            boot_ms = [report["boot_ms"] for report in reports]
+            print(
+                f"{role:<8} boot_p50_ms={statistics.median(boot_ms):.0f} "
+                f"boot_max_ms={max(boot_ms):.0f} "
+                f"max_rss_mb={max(report['max_rss_kb'] for report in reports) / 1024:.1f} "
+                f"modules={reports[-1]['modules']} blueprints={reports[-1]['blueprints']}"
+            )
+    finally:
+        os.unlink(db_path)
+
+
+if __name__ == "__main__":
+    main()
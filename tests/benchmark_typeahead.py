@@ -0,0 +1,181 @@
+"""
+Server-time benchmark for typeahead completions.
+
+Loads synthetic users into a temporary SQLite database and times, per keystroke
+prefix, the old SQL lookup (LIKE over usernames, ranked in SQL) against
+typeahead_service.complete over the Redis sorted-set index. The Redis stand-in
+keeps each ZSET as a sorted list and answers ZRANGEBYLEX with bisect, like the
+skiplist walk Redis does; network round trips are not included.
+
+Run:
+    python3 tests/benchmark_typeahead.py [user_count]
+"""
+
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tests.fake_redis import FakeRedis  # noqa: E402
+
+
+SYLLABLES = ("ka", "lo", "mi", "ra", "to", "ne", "sa", "vi", "du", "el", "an", "or", "ix", "be")
+ROUNDS = 20
+
+
+class LexRedis(FakeRedis):
+    def __init__(self):
+        super().__init__()
+        self._lex = {}
+
+    def zadd(self, key, mapping):
+        ordered = self._lex.setdefault(key, [])
+        zset = self._sorted_sets.setdefault(key, {})
+        for member in mapping:
+            if member not in zset:
+                insort(ordered, member.encode("utf-8"))
+        return super().zadd(key, mapping)
+
+    def zrem(self, key, *members):
+        ordered = self._lex.get(key, [])
+        for member in members:
+            encoded = member.encode("utf-8")
+            index = bisect_left(ordered, encoded)
+            if index < len(ordered) and ordered[index] == encoded:
+                ordered.pop(index)
+        return super().zrem(key, *members)
+
+    def zrangebylex(self, key, min_value, max_value, start=None, num=None):
+        ordered = self._lex.get(key, [])
+        low = min_value[1:].encode("utf-8")
+        high = max_value[1:].encode("utf-8")
+        begin = bisect_left(ordered, low) if min_value.startswith("[") else bisect_right(ordered, low)
+        end = bisect_right(ordered, high) if max_value.startswith("[") else bisect_left(ordered, high)
+        if start is not None and num is not None:
+            begin += start
+            end = min(end, begin + num)
+        return [member.decode("utf-8") for member in ordered[begin:end]]
+
+
+def _username(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) + str(rng.randint(0, 999))
+
+
+def _fill_database(db_path: str, user_count: int):
+    rng = random.Random(11)
+    created_at = datetime(2026, 1, 1).isoformat(sep=" ")
+    usernames = set()
+    while len(usernames) < user_count:
+        usernames.add(_username(rng))
+    usernames = sorted(usernames)
+    rng.shuffle(usernames)
+
+    connection = sqlite3.connect(db_path)
+    connection.executemany(
+        "INSERT INTO users (id, username, password_hash, created_at, public_key, is_suspended) "
+        "VALUES (?, ?, 'x', ?, 'pk', 0)",
+        [(user_id, username, created_at) for user_id, username in enumerate(usernames, start=1)],
+    )
+    connection.executemany(
+        "INSERT INTO profiles (user_id, name, bio, profile_image_shape) VALUES (?, ?, '', 'circle')",
+        [
+            (user_id, f"{username[:4].title()} {rng.choice(SYLLABLES).title()}{rng.choice(SYLLABLES)}")
+            for user_id, username in enumerate(usernames, start=1)
+        ],
+    )
+    connection.commit()
+    connection.close()
+    return usernames
+
+
+def _sql_complete(prefix: str, limit: int = 10):
+    from sqlalchemy import case, func
+
+    from app.db import db
+    from app.models.user_model import User
+
+    lower_username = func.lower(User.username)
+    return (
+        db.session.query(User.username)
+        .filter(User.is_suspended.is_(False), lower_username.like(f"%{prefix}%"))
+        .order_by(
+            case((lower_username == prefix, 0), (lower_username.like(f"{prefix}%"), 1), else_=2),
+            func.length(User.username).asc(),
+            User.username.asc(),
+        )
+        .limit(limit)
+        .all()
+    )
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _time(run, prefixes):
+    samples = []
+    for _ in range(ROUNDS):
+        for prefix in prefixes:
+            started_at = time.perf_counter()
+            run(prefix)
+            samples.append((time.perf_counter() - started_at) * 1000)
+    return samples
+
+
+def main():
+    user_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    db_fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(db_fd)
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+
+    from app import create_app
+    from app.db import db
+    from app.extensions import redis_client as redis_module
+    from app.services import typeahead_service
+
+    try:
+        with patch.object(redis_module, "redis_client", LexRedis()):
+            app = create_app()
+            with app.app_context():
+                db.create_all()
+            usernames = _fill_database(db_path, user_count)
+
+            # Every keystroke of a few real usernames, 1 to 6 characters.
+            prefixes = [
+                username[:length]
+                for username in usernames[:10]
+                for length in range(1, 7)
+            ]
+            with app.app_context():
+                build_started_at = time.perf_counter()
+                typeahead_service.build_index()
+                print(f"users={user_count} index_build_s={time.perf_counter() - build_started_at:.1f}")
+
+                for name, run in (
+                    ("sql", _sql_complete),
+                    ("typeahead", lambda prefix: typeahead_service.complete(prefix, limit=10)),
+                ):
+                    samples = _time(run, prefixes)
+                    print(
+                        f"{name:<10} lookups={len(samples)} "
+                        f"p50_ms={statistics.median(samples):.3f} "
+                        f"p95_ms={_percentile(samples, 0.95):.3f} "
+                        f"max_ms={max(samples):.3f}"
+                    )
+    finally:
+        if os.path.exists(db_path):
+            os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -30,6 +30,7 @@ class FakeRedis:
         self._hashes = {}
         self._sorted_sets = {}
         self._strings = {}
+        self.published = []
 
     def clear(self):
         self._sets.clear()
@@ -37,10 +38,15 @@ class FakeRedis:
         self._hashes.clear()
         self._sorted_sets.clear()
         self._strings.clear()
+        self.published.clear()
 
     def pipeline(self):
         return FakePipeline(self)
 
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 0
+
     def expire(self, key, _seconds):
         return 1 if key in self._all_keys() else 0
 
@@ -55,6 +61,17 @@ class FakeRedis:
         for key in self.keys(pattern):
             yield key
 
+    def exists(self, *keys):
+        return sum(
+            1
+            for key in keys
+            if self._sets.get(key)
+            or self._lists.get(key)
+            or self._hashes.get(key)
+            or self._sorted_sets.get(key)
+            or key in self._strings
+        )
+
     def delete(self, *keys):
         removed = 0
         for key in keys:
@@ -70,6 +87,9 @@ class FakeRedis:
         self._strings[key] = value
         return True
 
+    def mget(self, keys):
+        return [self._strings.get(key) for key in keys]
+
     def get(self, key):
         return self._strings.get(key)
 
@@ -80,6 +100,14 @@ class FakeRedis:
         self._strings[key] = value
         return True
 
+    def incrby(self, key, amount=1):
+        next_value = int(self._strings.get(key) or 0) + int(amount)
+        self._strings[key] = str(next_value)
+        return next_value
+
+    def decrby(self, key, amount=1):
+        return self.incrby(key, -int(amount))
+
     # Set ops
     def sadd(self, key, *values):
         members = self._sets.setdefault(key, set())
@@ -112,11 +140,32 @@ class FakeRedis:
         arr.extend(values)
         return len(arr)
 
-    def lpop(self, key):
+    def lpush(self, key, *values):
+        arr = self._lists.setdefault(key, [])
+        for value in values:
+            arr.insert(0, value)
+        return len(arr)
+
+    def lmove(self, source, destination, src="LEFT", dest="RIGHT"):
+        arr = self._lists.get(source, [])
+        if not arr:
+            return None
+        value = arr.pop(0) if src == "LEFT" else arr.pop()
+        if dest == "LEFT":
+            self.lpush(destination, value)
+        else:
+            self.rpush(destination, value)
+        return value
+
+    def lpop(self, key, count=None):
         arr = self._lists.get(key, [])
         if not arr:
             return None
-        return arr.pop(0)
+        if count is None:
+            return arr.pop(0)
+        popped = arr[:count]
+        del arr[:count]
+        return popped
 
     def llen(self, key):
         return len(self._lists.get(key, []))
@@ -211,10 +260,12 @@ class FakeRedis:
         return next_value
 
     # Sorted set ops
-    def zadd(self, key, mapping):
+    def zadd(self, key, mapping, nx=False, xx=False):
         zset = self._sorted_sets.setdefault(key, {})
         added = 0
         for member, score in mapping.items():
+            if (nx and member in zset) or (xx and member not in zset):
+                continue
             if member not in zset:
                 added += 1
             zset[member] = float(score)
@@ -246,6 +297,18 @@ class FakeRedis:
             return sliced
         return [member for member, _score in sliced]
 
+    def zremrangebyrank(self, key, start, end):
+        items = self._zsorted(key, reverse=False)
+        if end < 0:
+            end = len(items) + end
+        if start < 0:
+            start = max(len(items) + start, 0)
+        to_remove = [member for member, _score in items[start:end + 1]]
+        zset = self._sorted_sets.get(key, {})
+        for member in to_remove:
+            del zset[member]
+        return len(to_remove)
+
     def zrem(self, key, *members):
         zset = self._sorted_sets.get(key, {})
         removed = 0
@@ -279,6 +342,32 @@ class FakeRedis:
             del zset[member]
         return len(to_remove)
 
+    def zrangebylex(self, key, min, max, start=None, num=None):
+        def _matches_low(member):
+            if min == "-":
+                return True
+            bound = min[1:].encode("utf-8")
+            return member >= bound if min.startswith("[") else member > bound
+
+        def _matches_high(member):
+            if max == "+":
+                return True
+            bound = max[1:].encode("utf-8")
+            return member <= bound if max.startswith("[") else member < bound
+
+        members = sorted(
+            self._sorted_sets.get(key, {}),
+            key=lambda member: member.encode("utf-8"),
+        )
+        matched = [
+            member
+            for member in members
+            if _matches_low(member.encode("utf-8")) and _matches_high(member.encode("utf-8"))
+        ]
+        if start is not None and num is not None:
+            matched = matched[start:start + num]
+        return matched
+
     def zcard(self, key):
         return len(self._sorted_sets.get(key, {}))
 
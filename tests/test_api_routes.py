@@ -29,9 +29,9 @@ class TestApiRoutes(unittest.TestCase):
 
         from app import create_app
         from app.db import db
-        from app.services import auth_service, message_service, story_service
+        from app.services import auth_service, author_card_cache, media_cache, message_service, story_service
         from app.models.comment_model import Comment
-        from app.repositories import message_repository
+        from app.repositories import block_repository, group_repository, message_repository
         from app.extensions import redis_client as redis_module
         import app.routes.contact_routes as contact_routes
         import app.socket_events as socket_events
@@ -41,6 +41,10 @@ class TestApiRoutes(unittest.TestCase):
         cls.db = db
         cls.auth_service = auth_service
         cls.message_service = message_service
+        cls.media_cache = media_cache
+        cls.author_card_cache = author_card_cache
+        cls.group_repository = group_repository
+        cls.block_repository = block_repository
         cls.story_service = story_service
         cls.Comment = Comment
         cls.socket_events = socket_events
@@ -74,6 +78,9 @@ class TestApiRoutes(unittest.TestCase):
             self.app.config["MEDIA_CONTENT_SNIFFING_ENABLED"] = False
         self.socket_events._user_sids.clear()
         self.fake_redis.clear()
+        self.media_cache.clear()
+        self.author_card_cache.clear()
+        self.group_repository.clear_membership_cache()
         uploads_dir = os.path.join(self.app.static_folder, "uploads")
         if os.path.isdir(uploads_dir):
             shutil.rmtree(uploads_dir)
@@ -113,6 +120,74 @@ class TestApiRoutes(unittest.TestCase):
             self.assertIsNotNone(user)
             return user.id
 
+    def test_startup_skips_schema_reflection_when_fingerprint_is_current(self):
+        import app as app_package
+        from app.config import Config
+
+        with self.app.app_context():
+            ran = app_package.apply_schema_migrations()
+            self.assertEqual(ran[0], "create_all")
+            self.assertIn("0014_user_badge", ran)
+            # Only repeatable steps run again once the ledger has the ids.
+            self.assertEqual(
+                app_package.apply_schema_migrations(),
+                ["create_all", "performance_indexes"],
+            )
+
+        with (
+            patch.object(app_package, "inspect", side_effect=AssertionError("reflected")),
+            patch("app.performance_indexes.inspect", side_effect=AssertionError("reflected")),
+            patch.object(self.db, "create_all", side_effect=AssertionError("create_all ran")),
+        ):
+            app_package.create_app()
+
+        with self.app.app_context():
+            self.db.session.execute(self.db.text("DELETE FROM schema_state"))
+            self.db.session.commit()
+        with patch.object(Config, "SCHEMA_AUTO_MIGRATE", False):
+            with self.assertRaises(RuntimeError):
+                app_package.create_app()
+
+    def test_concurrent_startup_migrations_do_not_collide(self):
+        import app as app_package
+        from app import schema_migrations
+
+        with self.app.app_context():
+            app_package.apply_schema_migrations()
+            current = schema_migrations.read_fingerprint(self.db.engine)
+            ledger_size = len(schema_migrations.applied_migration_ids(self.db.session))
+            # A worker that read the ledger before another one finished writing it.
+            with patch.object(schema_migrations, "applied_migration_ids", return_value=set()):
+                ran = app_package.apply_schema_migrations()
+            self.assertIn("0014_user_badge", ran)
+            self.assertEqual(len(schema_migrations.applied_migration_ids(self.db.session)), ledger_size)
+            self.assertEqual(
+                self.db.session.execute(self.db.text("SELECT COUNT(*) FROM schema_state")).scalar(),
+                1,
+            )
+
+        # Stale before the lock, current once it is held: nothing runs again.
+        with (
+            patch.object(schema_migrations, "read_fingerprint", side_effect=["stale", current]),
+            patch.object(app_package, "apply_schema_migrations", side_effect=AssertionError("migrated twice")),
+        ):
+            app_package.create_app()
+
+    def test_worker_role_skips_blueprints_and_schedulers(self):
+        import app as app_package
+
+        worker_app = app_package.create_app(role="worker")
+        self.assertEqual(worker_app.config["APP_ROLE"], "worker")
+        self.assertEqual(worker_app.blueprints, {})
+        self.assertEqual(len(self.app.blueprints), len(app_package.BLUEPRINTS))
+        self.assertEqual(
+            app_package.APP_ROLES["worker"].background_workers,
+            (app_package._start_group_membership_invalidation_listener,),
+        )
+        self.assertEqual(app_package.APP_ROLES["cleanup"].background_workers, ())
+        with self.assertRaises(RuntimeError):
+            app_package.create_app(role="scheduler")
+
     def test_auth_register_and_login_success(self):
         register_response = self.client.post(
             "/api/auth/register",
@@ -179,6 +254,60 @@ class TestApiRoutes(unittest.TestCase):
             self.assertIsNotNone(migrated_user)
             self.assertTrue(is_argon2_hash(migrated_user.password_hash))
 
+    def test_background_password_migration_hashes_plaintext_in_batches(self):
+        from werkzeug.security import generate_password_hash
+
+        for username in ("legacy_a", "legacy_b", "legacy_c", "werkzeug_user"):
+            self._register(username)
+
+        with self.app.app_context():
+            from app.models.user_model import User
+            from app.services import password_security
+
+            werkzeug_hash = generate_password_hash("pass123")
+            for user in User.query.all():
+                user.password_hash = werkzeug_hash if user.username == "werkzeug_user" else "pass123"
+            self.db.session.commit()
+
+            self.fake_redis.set(password_security.PASSWORD_MIGRATION_LOCK_KEY, "1")
+            self.assertEqual(password_security.run_background_password_migration(), 0)
+            self.fake_redis.delete(password_security.PASSWORD_MIGRATION_LOCK_KEY)
+
+            self.app.config["AUTH_PASSWORD_MIGRATION_BATCH_SIZE"] = 2
+            self.app.config["AUTH_PASSWORD_MIGRATION_BATCH_PAUSE_SECONDS"] = 0
+            try:
+                self.assertEqual(password_security.run_background_password_migration(), 3)
+            finally:
+                self.app.config["AUTH_PASSWORD_MIGRATION_BATCH_SIZE"] = 1000
+
+            self.db.session.expire_all()
+            hashes = {user.username: user.password_hash for user in User.query.all()}
+            self.assertEqual(hashes.pop("werkzeug_user"), werkzeug_hash)
+            self.assertTrue(all(password_security.is_argon2_hash(value) for value in hashes.values()))
+            self.assertIsNone(self.fake_redis.get(password_security.PASSWORD_MIGRATION_LOCK_KEY))
+
+        login_response = self.client.post(
+            "/api/auth/login",
+            json={"username": "legacy_b", "password": "pass123"},
+        )
+        self.assertEqual(login_response.status_code, 200)
+
+    def test_login_returns_503_when_password_hashing_is_busy(self):
+        from app.services import password_hash_pool
+
+        self._register("alice")
+        with patch.object(
+            password_hash_pool,
+            "run",
+            side_effect=password_hash_pool.PasswordHashingBusyError(retry_after_seconds=3),
+        ):
+            resp = self.client.post(
+                "/api/auth/login",
+                json={"username": "alice", "password": "pass123"},
+            )
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(resp.headers.get("Retry-After"), "3")
+
     def test_admin_login_migrates_legacy_plaintext_password_hash(self):
         self._register("admin")
         self._make_admin("admin")
@@ -431,6 +560,104 @@ class TestApiRoutes(unittest.TestCase):
             ["verified", "moderator", "staff", "post_of_the_day"],
         )
 
+    def test_admin_can_list_and_resume_failed_account_purge(self):
+        self._register("admin")
+        self._make_admin("admin")
+        self._register("alice")
+        self._register("bob")
+        admin_headers = self._auth_header("admin")
+
+        with self.app.app_context():
+            from app.repositories import message_repository
+
+            payload = message_repository.build_message_payload(
+                sender="alice",
+                encrypted_message="enc",
+                encrypted_key="k",
+            )
+            message_repository.push_message_payload("bob", payload)
+
+        from app.repositories import message_repository
+
+        with patch.object(
+            message_repository,
+            "purge_private_inboxes",
+            side_effect=RuntimeError("redis down"),
+        ):
+            delete_response = self.client.delete(
+                "/api/profiles/me",
+                headers=self._auth_header("alice"),
+            )
+        self.assertEqual(delete_response.status_code, 200)
+
+        listing = self.client.get("/admin/api/account-purges", headers=admin_headers)
+        self.assertEqual(listing.status_code, 200)
+        purge = listing.get_json()["purges"][0]
+        self.assertEqual(purge["username"], "alice")
+        self.assertEqual(purge["status"], "failed")
+        self.assertEqual(purge["phase"], "private_inboxes")
+        self.assertEqual(purge["private_inboxes_done"], 0)
+
+        resume = self.client.post(
+            "/admin/api/account-purges/alice/resume",
+            headers=admin_headers,
+        )
+        self.assertEqual(resume.status_code, 200)
+        self.assertTrue(resume.get_json()["started"])
+        self.assertEqual(resume.get_json()["purge"]["status"], "done")
+        self.assertEqual(resume.get_json()["purge"]["private_inboxes_done"], 1)
+        with self.app.app_context():
+            from app.repositories import message_repository
+
+            self.assertEqual(message_repository.peek_messages("bob"), [])
+
+        missing = self.client.post(
+            "/admin/api/account-purges/nobody/resume",
+            headers=admin_headers,
+        )
+        self.assertEqual(missing.status_code, 404)
+
+    def test_account_purge_stops_without_touching_a_lock_taken_over_by_another_run(self):
+        self._register("alice")
+        self._register("bob")
+
+        from app.repositories import message_repository
+        from app.services import account_purge_service
+
+        with self.app.app_context():
+            payload = message_repository.build_message_payload(
+                sender="alice",
+                encrypted_message="enc",
+                encrypted_key="k",
+            )
+            message_repository.push_message_payload("bob", payload)
+            purge_private_inboxes = message_repository.purge_private_inboxes
+
+            def _stalled_then_taken_over(username, owners):
+                # This run's lock expired mid-batch and a second run took it.
+                self.fake_redis.set(account_purge_service._lock_key(username), "other-run")
+                return purge_private_inboxes(username, owners)
+
+            with patch.object(
+                account_purge_service.async_task_service,
+                "enqueue_account_purge_task",
+                return_value=True,
+            ):
+                account_purge_service.start_purge("alice", source="test")
+            with patch.object(
+                message_repository,
+                "purge_private_inboxes",
+                side_effect=_stalled_then_taken_over,
+            ):
+                progress = account_purge_service.run_purge("alice")
+
+        self.assertEqual(progress["status"], "running")
+        self.assertEqual(progress["phase"], "private_inboxes")
+        self.assertEqual(
+            self.fake_redis.get(account_purge_service._lock_key("alice")),
+            "other-run",
+        )
+
     def test_admin_post_of_day_status_and_manual_run_endpoints(self):
         from flask_jwt_extended import create_access_token
         from app.models.admin_model import AdminUser
@@ -885,6 +1112,153 @@ class TestApiRoutes(unittest.TestCase):
         self.assertEqual(alice_message["encrypted_keys"], {"alice": "alice-history-key"})
         self.assertEqual(alice_message["encrypted_key"], "alice-history-key")
 
+    def test_group_dispatch_reads_members_once_per_membership_version(self):
+        import json
+
+        from sqlalchemy import event
+
+        with self.app.app_context():
+            from app.models.group_model import Group, GroupMember
+            from app.models.user_model import User
+            from app.repositories import group_repository, message_repository
+            from app.services import group_notification_service
+
+            users = [
+                User(username=f"member{index:02d}", password_hash="x", public_key="pk")
+                for index in range(40)
+            ]
+            self.db.session.add_all(users)
+            self.db.session.flush()
+            group = Group(name="big-group", creator_id=users[0].id)
+            self.db.session.add(group)
+            self.db.session.flush()
+            self.db.session.add_all(GroupMember(group_id=group.id, user_id=user.id) for user in users)
+            self.db.session.commit()
+            group_id = group.id
+            group_repository.bump_membership_version(group_id)
+            encrypted_keys = {user.username: f"key-{user.username}" for user in users}
+
+            statements = []
+            version_reads = []
+            real_hget = self.fake_redis.hget
+
+            def counting_hget(key, field):
+                if key == group_repository.GROUP_MEMBERSHIP_VERSION_HASH:
+                    version_reads.append(field)
+                return real_hget(key, field)
+
+            listener = lambda *args: statements.append(args[2])  # noqa: E731
+            event.listen(self.db.engine, "before_cursor_execute", listener)
+            try:
+                with patch.object(self.fake_redis, "hget", side_effect=counting_hget):
+                    for _ in range(2):
+                        payload = message_repository.build_group_message_payload(
+                            sender="member00",
+                            group_id=group_id,
+                            encrypted_message="enc-big-group",
+                            encrypted_keys=encrypted_keys,
+                        )
+                        delivered = group_notification_service.dispatch_group_message_side_effects(
+                            sender="member00",
+                            group_id=group_id,
+                            message_payload=payload,
+                        )
+                        self.assertEqual(delivered, 39)
+            finally:
+                event.remove(self.db.engine, "before_cursor_execute", listener)
+            self.assertEqual(len([statement for statement in statements if "group_members" in statement]), 1)
+            self.assertLessEqual(len(version_reads), 6)
+
+            removed = users[-1]
+            GroupMember.query.filter_by(group_id=group_id, user_id=removed.id).delete()
+            self.db.session.commit()
+            group_repository.bump_membership_version(group_id)
+            self.assertEqual(
+                self.fake_redis.published[-1],
+                (group_repository.GROUP_MEMBERSHIP_INVALIDATION_CHANNEL, json.dumps({"group_id": group_id})),
+            )
+            self.assertNotIn(removed.username, group_repository.get_group_member_usernames(group_id))
+            self.assertFalse(group_repository.is_member(group_id, removed.id))
+
+            snapshot = group_repository.get_membership_snapshot(group_id)
+            self.assertIs(group_repository.get_membership_snapshot(group_id), snapshot)
+            evicted = group_repository.handle_membership_invalidation_message(
+                {"type": "message", "data": json.dumps({"group_id": group_id})}
+            )
+            self.assertEqual(evicted, group_id)
+            self.assertIsNot(group_repository.get_membership_snapshot(group_id), snapshot)
+
+    def test_group_unread_summary_reads_counters_and_reconciles_from_database(self):
+        self._register("alice")
+        self._register("bob")
+        bob_headers = self._auth_header("bob")
+
+        with self.app.app_context():
+            from app.models.group_model import Group, GroupMember
+            from app.models.user_model import User
+            from app.repositories import message_repository
+
+            alice = User.query.filter_by(username="alice").first()
+            bob = User.query.filter_by(username="bob").first()
+            group = Group(name="unread-group", creator_id=alice.id)
+            self.db.session.add(group)
+            self.db.session.flush()
+            self.db.session.add(GroupMember(group_id=group.id, user_id=alice.id))
+            self.db.session.add(GroupMember(group_id=group.id, user_id=bob.id))
+            self.db.session.commit()
+            group_id = group.id
+
+            message_ids = []
+            for index in range(3):
+                payload = message_repository.build_group_message_payload(
+                    sender="alice",
+                    group_id=group_id,
+                    encrypted_message=f"enc-unread-{index}",
+                    encrypted_keys={"alice": "alice-key", "bob": "bob-key"},
+                    message_type="image" if index == 2 else "text",
+                )
+                message_repository.push_group_messages_to_members(group_id, ["bob"], payload)
+                message_ids.append(payload["message_id"])
+
+        def fail_peek(*_args, **_kwargs):
+            raise AssertionError("unread summary must not materialize pending payloads")
+
+        with patch.object(message_repository, "peek_group_messages_for_user", side_effect=fail_peek):
+            # First read has no reconciliation marker and rebuilds from the database.
+            response = self.client.get("/api/groups/unread", headers=bob_headers)
+            self.assertEqual(response.status_code, 200)
+            summary = response.get_json()
+            self.assertEqual(summary["total"], 3)
+            self.assertEqual(summary["groups"][0]["count"], 3)
+            self.assertEqual(summary["groups"][0]["last_type"], "image")
+            self.assertEqual(summary["groups"][0]["last_sender"], "alice")
+            self.assertIn(
+                message_repository.GROUP_UNREAD_RECONCILED_FIELD,
+                self.fake_redis.hgetall("group_chat:unread_count:bob"),
+            )
+
+            with self.app.app_context():
+                removed, _payloads = message_repository.ack_group_messages_with_payloads(
+                    "bob",
+                    group_id,
+                    message_ids[:2],
+                )
+            self.assertEqual(removed, 2)
+            self.assertEqual(self.fake_redis.hget("group_chat:unread_count:bob", str(group_id)), "1")
+            response = self.client.get("/api/groups/unread", headers=bob_headers)
+            self.assertEqual(response.get_json()["total"], 1)
+
+            # Drifted counters are replaced on the next reconciliation.
+            self.fake_redis.hset("group_chat:unread_count:bob", str(group_id), 9)
+            self.fake_redis.hset(
+                "group_chat:unread_count:bob",
+                message_repository.GROUP_UNREAD_RECONCILED_FIELD,
+                0,
+            )
+            response = self.client.get("/api/groups/unread", headers=bob_headers)
+            self.assertEqual(response.get_json()["total"], 1)
+            self.assertEqual(self.fake_redis.hget("group_chat:unread_count:bob", str(group_id)), "1")
+
     def test_group_history_excludes_messages_before_member_join(self):
         self._register("alice")
         self._register("bob")
@@ -1087,11 +1461,277 @@ class TestApiRoutes(unittest.TestCase):
         self.assertEqual(len(payload["posts"]), 1)
         self.assertEqual(payload["posts"][0]["text"], "skip total")
 
+    def test_list_posts_cursor_mode_walks_every_post_once(self):
+        self._register("alice")
+
+        with self.app.app_context():
+            from app.models.post_model import Post
+            from app.models.user_model import User
+
+            alice = User.query.filter_by(username="alice").first()
+            shared_created_at = datetime.utcnow() - timedelta(minutes=5)
+            # Three posts share a timestamp so the id tie-breaker is exercised.
+            self.db.session.add_all(
+                Post(
+                    author_id=alice.id,
+                    text=f"cursor {index}",
+                    created_at=shared_created_at if index < 3 else shared_created_at + timedelta(seconds=index),
+                )
+                for index in range(7)
+            )
+            self.db.session.commit()
+            expected_ids = [
+                post.id
+                for post in Post.query.order_by(Post.created_at.desc(), Post.id.desc()).all()
+            ]
+
+        seen_ids = []
+        cursor = ""
+        while cursor is not None:
+            response = self.client.get(f"/api/posts?limit=2&cursor={cursor}")
+            self.assertEqual(response.status_code, 200)
+            payload = response.get_json()
+            self.assertIsNone(payload["total"])
+            self.assertIsNone(payload["page"])
+            seen_ids.extend(post["id"] for post in payload["posts"])
+            self.assertEqual(payload["has_more"], payload["next_cursor"] is not None)
+            cursor = payload["next_cursor"]
+        self.assertEqual(seen_ids, expected_ids)
+
+        with_total = self.client.get("/api/posts?limit=2&cursor=&include_total=true").get_json()
+        self.assertEqual(with_total["total"], 7)
+        self.assertTrue(with_total["total_approximate"])
+
+        profile_ids = []
+        cursor = ""
+        while cursor is not None:
+            response = self.client.get(f"/api/profiles/alice/posts?limit=3&cursor={cursor}")
+            self.assertEqual(response.status_code, 200)
+            payload = response.get_json()
+            profile_ids.extend(post["id"] for post in payload["posts"])
+            cursor = payload["next_cursor"]
+        self.assertEqual(profile_ids, expected_ids)
+
+        self.assertEqual(self.client.get("/api/posts?cursor=not-a-cursor").status_code, 400)
+        self.assertEqual(self.client.get("/api/profiles/alice/posts?cursor=%%%").status_code, 400)
+
+    def test_home_timeline_fans_out_backfills_and_prunes(self):
+        for username in ("alice", "bob", "carol", "dave"):
+            self._register(username)
+        alice_headers = self._auth_header("alice")
+        bob_headers = self._auth_header("bob")
+        carol_headers = self._auth_header("carol")
+        dave_headers = self._auth_header("dave")
+
+        def create_post(headers, text):
+            response = self.client.post("/api/posts", json={"text": text}, headers=headers)
+            self.assertEqual(response.status_code, 201)
+            return response.get_json()["post_id"]
+
+        def timeline_texts():
+            response = self.client.get("/api/timeline?limit=20", headers=bob_headers)
+            self.assertEqual(response.status_code, 200)
+            return [post["text"] for post in response.get_json()["posts"]]
+
+        self.assertEqual(self.client.post("/api/follows/alice", headers=bob_headers).status_code, 200)
+        create_post(alice_headers, "alice before read")
+        # First read builds the timeline from the database.
+        self.assertEqual(timeline_texts(), ["alice before read"])
+
+        alice_post_id = create_post(alice_headers, "alice fanned out")
+        create_post(carol_headers, "carol unfollowed")
+        with self.app.app_context():
+            bob_id = self.auth_service.user_repository.get_by_username("bob").id
+        self.assertIsNotNone(self.fake_redis.zscore(f"timeline:home:{bob_id}", str(alice_post_id)))
+        self.assertEqual(timeline_texts(), ["alice fanned out", "alice before read"])
+
+        # Follow backfills the author's recent posts.
+        self.assertEqual(self.client.post("/api/follows/carol", headers=bob_headers).status_code, 200)
+        self.assertEqual(timeline_texts()[0], "carol unfollowed")
+
+        # Authors over the follower limit are merged in at read time.
+        self.assertEqual(self.client.post("/api/follows/carol", headers=dave_headers).status_code, 200)
+        self.app.config["TIMELINE_FAN_OUT_MAX_FOLLOWERS"] = 1
+        try:
+            carol_post_id = create_post(carol_headers, "carol pulled on read")
+        finally:
+            self.app.config["TIMELINE_FAN_OUT_MAX_FOLLOWERS"] = 10000
+        self.assertIsNone(self.fake_redis.zscore(f"timeline:home:{bob_id}", str(carol_post_id)))
+        self.assertEqual(timeline_texts()[0], "carol pulled on read")
+
+        self.assertEqual(self.client.delete("/api/follows/alice", headers=bob_headers).status_code, 200)
+        self.assertNotIn("alice fanned out", timeline_texts())
+
+        self.assertEqual(self.client.post("/api/blocks/carol", headers=bob_headers).status_code, 201)
+        self.assertEqual(timeline_texts(), [])
+
+    def test_home_timeline_rechecks_followers_only_and_survives_redis_outage(self):
+        self._register("alice")
+        self._register("bob")
+        alice_headers = self._auth_header("alice")
+        bob_headers = self._auth_header("bob")
+
+        self.assertEqual(self.client.post("/api/follows/alice", headers=bob_headers).status_code, 200)
+        self.assertEqual(self.client.get("/api/timeline", headers=bob_headers).status_code, 200)
+        for text, followers_only in (("public", False), ("followers", True)):
+            response = self.client.post(
+                "/api/posts",
+                json={"text": text, "followers_only": followers_only},
+                headers=alice_headers,
+            )
+            self.assertEqual(response.status_code, 201)
+
+        def timeline_texts():
+            response = self.client.get("/api/timeline?limit=20", headers=bob_headers)
+            self.assertEqual(response.status_code, 200)
+            return [post["text"] for post in response.get_json()["posts"]]
+
+        self.assertEqual(timeline_texts(), ["followers", "public"])
+
+        from app.services import timeline_service
+
+        # The entries stay behind when the unfollow's prune is lost.
+        with patch.object(timeline_service, "prune_author"):
+            self.assertEqual(self.client.delete("/api/follows/alice", headers=bob_headers).status_code, 200)
+        self.assertEqual(timeline_texts(), ["public"])
+
+        self.assertEqual(self.client.post("/api/follows/alice", headers=bob_headers).status_code, 200)
+        with patch.object(
+            timeline_service,
+            "_cached_window_ids",
+            side_effect=ConnectionError("redis down"),
+        ):
+            self.assertEqual(timeline_texts(), ["followers", "public"])
+
+    def test_home_timeline_pages_skip_stale_entries_at_the_top(self):
+        self._register("alice")
+        self._register("bob")
+        alice_headers = self._auth_header("alice")
+        bob_headers = self._auth_header("bob")
+
+        self.assertEqual(self.client.post("/api/follows/alice", headers=bob_headers).status_code, 200)
+        self.assertEqual(self.client.get("/api/timeline", headers=bob_headers).status_code, 200)
+        post_ids = []
+        for index in range(4):
+            response = self.client.post("/api/posts", json={"text": f"p{index}"}, headers=alice_headers)
+            self.assertEqual(response.status_code, 201)
+            post_ids.append(response.get_json()["post_id"])
+        # The two newest entries stay in bob's timeline after their posts are gone.
+        for post_id in post_ids[2:]:
+            self.assertEqual(self.client.delete(f"/api/posts/{post_id}", headers=alice_headers).status_code, 200)
+
+        def timeline_page(page):
+            response = self.client.get(f"/api/timeline?limit=2&page={page}", headers=bob_headers)
+            self.assertEqual(response.status_code, 200)
+            payload = response.get_json()
+            return [post["text"] for post in payload["posts"]], payload["has_more"]
+
+        self.assertEqual(timeline_page(1), (["p1", "p0"], False))
+        self.assertEqual(timeline_page(2), ([], False))
+
+        response = self.client.post("/api/posts", json={"text": "p4"}, headers=alice_headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(timeline_page(1), (["p4", "p1"], True))
+        self.assertEqual(timeline_page(2), (["p0"], False))
+
+    def test_author_cards_are_cached_and_invalidated_on_changes(self):
+        self._register("admin")
+        self._register("alice")
+        self._make_admin("admin")
+        admin_headers = self._auth_header("admin")
+        alice_headers = self._auth_header("alice")
+        alice_id = self._user_id("alice")
+
+        post_id = self.client.post(
+            "/api/posts",
+            json={"text": "card post"},
+            headers=alice_headers,
+        ).get_json()["post_id"]
+        self.client.post(
+            f"/api/posts/{post_id}/comments",
+            json={"text": "card comment"},
+            headers=alice_headers,
+        )
+
+        def authors():
+            post = self.client.get("/api/posts").get_json()["posts"][0]
+            comment = self.client.get(f"/api/posts/{post_id}/comments").get_json()[0]
+            return post["author"], comment["author"]
+
+        post_author, comment_author = authors()
+        self.assertEqual(post_author["username"], "alice")
+        self.assertEqual(comment_author, post_author)
+        self.assertIsNotNone(self.fake_redis.get(f"author_card:{alice_id}"))
+
+        # Both tiers answer without touching users/profiles.
+        with patch.object(self.author_card_cache, "_load_cards", side_effect=AssertionError):
+            self.assertEqual(authors()[0], post_author)
+            self.author_card_cache.clear()
+            self.assertEqual(authors()[0], post_author)
+
+        renamed = self.client.put("/api/profiles/me", json={"name": "Alice Cards"}, headers=alice_headers)
+        self.assertEqual(renamed.status_code, 200)
+        self.assertEqual([author["name"] for author in authors()], ["Alice Cards", "Alice Cards"])
+
+        badge = self.client.patch(
+            f"/admin/api/users/{alice_id}/badge",
+            headers=admin_headers,
+            json={"badge": "verified"},
+        )
+        self.assertEqual(badge.status_code, 200)
+        self.assertEqual([author["badge"] for author in authors()], ["verified", "verified"])
+
+    def test_author_card_load_racing_an_invalidation_is_not_cached(self):
+        self._register("alice")
+        alice_id = self._user_id("alice")
+        load_cards = self.author_card_cache._load_cards
+
+        def load_then_change_badge(user_ids):
+            # The old row is read, then a badge change commits and invalidates
+            # before the reader stores its card.
+            cards = load_cards(user_ids)
+            from app.models.user_model import User
+
+            User.query.filter_by(id=alice_id).update({User.badge: "verified"})
+            self.db.session.commit()
+            self.author_card_cache.invalidate(alice_id)
+            return cards
+
+        with self.app.app_context():
+            with patch.object(self.author_card_cache, "_load_cards", side_effect=load_then_change_badge):
+                stale_card = self.author_card_cache.get_card(alice_id)
+            self.assertNotEqual(stale_card["badge"], "verified")
+            self.assertIsNone(self.fake_redis.get(f"author_card:{alice_id}"))
+
+            self.author_card_cache.clear()
+            self.assertEqual(self.author_card_cache.get_card(alice_id)["badge"], "verified")
+            self.assertIsNotNone(self.fake_redis.get(f"author_card:{alice_id}"))
+
     def test_list_posts_rejects_invalid_include_total(self):
         response = self.client.get("/api/posts?include_total=invalid")
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.get_json()["error"], "include_total must be a boolean")
 
+    def test_profile_posts_share_include_total_parsing_with_list_posts(self):
+        self._register("alice")
+        with self.app.app_context():
+            from app.models.post_model import Post
+            from app.models.user_model import User
+
+            alice = User.query.filter_by(username="alice").first()
+            self.db.session.add(Post(author_id=alice.id, text="hello"))
+            self.db.session.commit()
+
+        response = self.client.get("/api/profiles/alice/posts?cursor=&include_total=invalid")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()["error"], "include_total must be a boolean")
+
+        offset_page = self.client.get("/api/profiles/alice/posts?include_total=off").get_json()
+        self.assertEqual(len(offset_page["posts"]), 1)
+        self.assertIsNone(offset_page["total"])
+        with_total = self.client.get("/api/profiles/alice/posts?cursor=&include_total=on").get_json()
+        self.assertEqual(with_total["total"], 1)
+
     def test_get_single_post_by_id(self):
         self._register("alice")
         headers = self._auth_header("alice")
@@ -1226,6 +1866,53 @@ class TestApiRoutes(unittest.TestCase):
         self.assertEqual(search_after_follow.status_code, 200)
         self.assertEqual(search_after_follow.get_json()["total"], 1)
 
+    def test_search_ranks_matches_and_caps_totals(self):
+        for username in ("malice", "alicia", "alice"):
+            self._register(username)
+        alice_headers = self._auth_header("alice")
+        for text in ("quarterly report draft", "reporting tools", "report", "unrelated"):
+            response = self.client.post("/api/posts", json={"text": text}, headers=alice_headers)
+            self.assertEqual(response.status_code, 201)
+
+        users = self.client.get("/api/search/users?q=ali").get_json()
+        self.assertEqual([item["username"] for item in users["users"]], ["alice", "alicia", "malice"])
+        self.assertEqual(users["total"], 3)
+        self.assertFalse(users["total_capped"])
+
+        posts = self.client.get("/api/search/posts?q=Report").get_json()
+        self.assertEqual(
+            [item["text"] for item in posts["posts"]],
+            ["report", "quarterly report draft", "reporting tools"],
+        )
+        self.assertEqual(posts["total"], 3)
+
+        two_words = self.client.get("/api/search/posts?q=quarterly%20rep").get_json()
+        self.assertEqual([item["text"] for item in two_words["posts"]], ["quarterly report draft"])
+
+        previous_cap = self.app.config["SEARCH_TOTAL_CAP"]
+        self.app.config["SEARCH_TOTAL_CAP"] = 2
+        self.addCleanup(self.app.config.__setitem__, "SEARCH_TOTAL_CAP", previous_cap)
+        capped = self.client.get("/api/search?q=report").get_json()
+        self.assertEqual(capped["posts_total"], 2)
+        self.assertTrue(capped["posts_total_capped"])
+
+    def test_search_index_follows_profile_renames_and_post_deletes(self):
+        self._register("alice")
+        alice_headers = self._auth_header("alice")
+        created = self.client.post("/api/posts", json={"text": "ephemeral note"}, headers=alice_headers)
+        self.assertEqual(created.status_code, 201)
+        self.assertEqual(self.client.get("/api/search/posts?q=ephemeral").get_json()["total"], 1)
+        self.assertEqual(self.client.get("/api/search/users?q=zebra").get_json()["total"], 0)
+
+        renamed = self.client.put("/api/profiles/me", json={"name": "Zebra Crossing"}, headers=alice_headers)
+        self.assertEqual(renamed.status_code, 200)
+        found = self.client.get("/api/search/users?q=zebra").get_json()
+        self.assertEqual([item["username"] for item in found["users"]], ["alice"])
+
+        deleted = self.client.delete(f"/api/posts/{created.get_json()['post_id']}", headers=alice_headers)
+        self.assertEqual(deleted.status_code, 200)
+        self.assertEqual(self.client.get("/api/search/posts?q=ephemeral").get_json()["total"], 0)
+
     def test_admin_posts_endpoint_lists_public_and_followers_only_posts(self):
         self._register("admin")
         self._register("alice")
@@ -1839,6 +2526,244 @@ class TestApiRoutes(unittest.TestCase):
         self.assertEqual(response.headers["ETag"], '"etag-789"')
         self.assertEqual(captured["get_object_calls"], 0)
 
+    def _fake_ranged_minio(self, payload, captured, etag="etag-range"):
+        class FakeStat:
+            content_type = "video/mp4"
+            size = len(payload)
+            last_modified = datetime(2026, 2, 25, 18, 0, 0, tzinfo=timezone.utc)
+
+        FakeStat.etag = etag
+
+        class FakeMinioObject:
+            def __init__(self, data):
+                self.data = data
+
+            def stream(self, chunk_size):
+                _ = chunk_size
+                yield self.data
+
+            def close(self):
+                pass
+
+            def release_conn(self):
+                pass
+
+        class FakeMinio:
+            def stat_object(self, **kwargs):
+                return FakeStat()
+
+            def get_object(self, bucket_name, object_name, offset=0, length=0):
+                captured.append((offset, length))
+                end = len(payload) if not length else offset + length
+                return FakeMinioObject(payload[offset:end])
+
+        return FakeMinio()
+
+    def test_media_route_serves_single_range_as_partial_content(self):
+        captured = []
+        fake_minio = self._fake_ranged_minio(b"0123456789", captured)
+
+        with patch("app.routes.main_routes.get_minio_client", return_value=fake_minio):
+            response = self.client.get(
+                "/media/posts/1/clip.mp4",
+                headers={"Range": "bytes=2-5"},
+            )
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(response.data, b"2345")
+            self.assertEqual(response.headers["Content-Range"], "bytes 2-5/10")
+            self.assertEqual(response.headers["Content-Length"], "4")
+            self.assertEqual(response.headers["Accept-Ranges"], "bytes")
+
+            suffix_response = self.client.get(
+                "/media/posts/1/clip.mp4",
+                headers={"Range": "bytes=-3"},
+            )
+            self.assertEqual(suffix_response.status_code, 206)
+            self.assertEqual(suffix_response.data, b"789")
+            self.assertEqual(suffix_response.headers["Content-Range"], "bytes 7-9/10")
+
+        self.assertEqual(captured, [(2, 4), (7, 3)])
+
+    def test_media_route_serves_multiple_ranges_as_multipart(self):
+        captured = []
+        fake_minio = self._fake_ranged_minio(b"0123456789", captured)
+
+        with patch("app.routes.main_routes.get_minio_client", return_value=fake_minio):
+            response = self.client.get(
+                "/media/posts/1/clip.mp4",
+                headers={"Range": "bytes=0-1,6-7"},
+            )
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.mimetype, "multipart/byteranges")
+        self.assertEqual(int(response.headers["Content-Length"]), len(response.data))
+        body = response.data.decode("latin-1")
+        self.assertIn("Content-Range: bytes 0-1/10\r\n\r\n01", body)
+        self.assertIn("Content-Range: bytes 6-7/10\r\n\r\n67", body)
+        self.assertEqual(captured, [(0, 2), (6, 2)])
+
+    def test_media_route_returns_416_for_unsatisfiable_range(self):
+        captured = []
+        fake_minio = self._fake_ranged_minio(b"0123456789", captured)
+
+        with patch("app.routes.main_routes.get_minio_client", return_value=fake_minio):
+            response = self.client.get(
+                "/media/posts/1/clip.mp4",
+                headers={"Range": "bytes=50-60"},
+            )
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response.headers["Content-Range"], "bytes */10")
+        self.assertEqual(captured, [])
+
+    def test_media_route_ignores_range_when_if_range_is_stale(self):
+        captured = []
+        fake_minio = self._fake_ranged_minio(b"0123456789", captured)
+
+        with patch("app.routes.main_routes.get_minio_client", return_value=fake_minio):
+            stale_response = self.client.get(
+                "/media/posts/1/clip.mp4",
+                headers={"Range": "bytes=2-5", "If-Range": '"old-etag"'},
+            )
+            self.assertEqual(stale_response.status_code, 200)
+            self.assertEqual(stale_response.data, b"0123456789")
+
+            fresh_response = self.client.get(
+                "/media/posts/1/clip.mp4",
+                headers={"Range": "bytes=2-5", "If-Range": '"etag-range"'},
+            )
+            self.assertEqual(fresh_response.status_code, 206)
+            self.assertEqual(fresh_response.data, b"2345")
+
+    def test_media_route_serves_small_objects_from_hot_cache(self):
+        captured = []
+        fake_minio = self._fake_ranged_minio(b"avatar-bytes", captured)
+        stat_calls = {"count": 0}
+        original_stat = fake_minio.stat_object
+
+        def counting_stat(**kwargs):
+            stat_calls["count"] += 1
+            return original_stat(**kwargs)
+
+        fake_minio.stat_object = counting_stat
+
+        with patch("app.routes.main_routes.get_minio_client", return_value=fake_minio):
+            first = self.client.get("/media/profiles/1/avatar.webp")
+            self.assertEqual(first.status_code, 200)
+            self.assertEqual(first.data, b"avatar-bytes")
+
+            second = self.client.get("/media/profiles/1/avatar.webp")
+            self.assertEqual(second.status_code, 200)
+            self.assertEqual(second.data, b"avatar-bytes")
+            self.assertEqual(second.headers["ETag"], '"etag-range"')
+
+            not_modified = self.client.get(
+                "/media/profiles/1/avatar.webp",
+                headers={"If-None-Match": '"etag-range"'},
+            )
+            self.assertEqual(not_modified.status_code, 304)
+
+            ranged = self.client.get(
+                "/media/profiles/1/avatar.webp",
+                headers={"Range": "bytes=0-5"},
+            )
+            self.assertEqual(ranged.status_code, 206)
+            self.assertEqual(ranged.data, b"avatar")
+
+        self.assertEqual(stat_calls["count"], 1)
+        self.assertEqual(captured, [(0, 0)])
+        with self.app.app_context():
+            stats = self.media_cache.get_stats()
+        self.assertEqual(stats["entries"], 1)
+        self.assertEqual(stats["bytes"], len(b"avatar-bytes"))
+        self.assertEqual(stats["hits"], 3)
+
+    def test_media_route_hot_cache_refetches_when_etag_changes(self):
+        self.app.config["MEDIA_HOT_CACHE_REVALIDATE_SECONDS"] = 0
+        try:
+            captured = []
+            with patch(
+                "app.routes.main_routes.get_minio_client",
+                return_value=self._fake_ranged_minio(b"old", captured, etag="v1"),
+            ):
+                self.assertEqual(self.client.get("/media/profiles/1/a.webp").data, b"old")
+            with patch(
+                "app.routes.main_routes.get_minio_client",
+                return_value=self._fake_ranged_minio(b"new", captured, etag="v2"),
+            ):
+                response = self.client.get("/media/profiles/1/a.webp")
+                self.assertEqual(response.data, b"new")
+                self.assertEqual(response.headers["ETag"], '"v2"')
+        finally:
+            self.app.config["MEDIA_HOT_CACHE_REVALIDATE_SECONDS"] = 60.0
+
+        self.assertEqual(captured, [(0, 0), (0, 0)])
+        with self.app.app_context():
+            self.assertEqual(self.media_cache.get_stats()["stale_evictions"], 1)
+
+    def test_media_hot_cache_evicts_least_recently_used_within_byte_budget(self):
+        self.app.config["MEDIA_HOT_CACHE_MAX_BYTES"] = 10
+        try:
+            with self.app.app_context():
+                for name in ("a", "b", "c"):
+                    self.assertTrue(
+                        self.media_cache.put(
+                            name,
+                            etag=name,
+                            content_type="image/webp",
+                            last_modified=None,
+                            body=b"1234",
+                        )
+                    )
+                    if name == "b":
+                        self.assertIsNotNone(self.media_cache.get("a"))
+                self.assertFalse(
+                    self.media_cache.put(
+                        "huge",
+                        etag="x",
+                        content_type="image/webp",
+                        last_modified=None,
+                        body=b"x" * 11,
+                    )
+                )
+                self.assertIsNotNone(self.media_cache.get("a"))
+                self.assertIsNone(self.media_cache.get("b"))
+                stats = self.media_cache.get_stats()
+        finally:
+            self.app.config["MEDIA_HOT_CACHE_MAX_BYTES"] = 64 * 1024 * 1024
+
+        self.assertEqual(stats["entries"], 2)
+        self.assertEqual(stats["bytes"], 8)
+        self.assertEqual(stats["capacity_evictions"], 1)
+        self.assertEqual(stats["rejected_too_large"], 1)
+
+    def test_media_hot_cache_invalidation_reaches_other_processes(self):
+        import json
+
+        with self.app.app_context():
+            for name in ("a", "b"):
+                self.media_cache.put(
+                    name,
+                    etag=name,
+                    content_type="image/webp",
+                    last_modified=None,
+                    body=b"1234",
+                )
+            self.media_cache.invalidate("a")
+            self.assertIsNone(self.media_cache.get("a"))
+            self.assertEqual(
+                self.fake_redis.published[-1],
+                (self.media_cache.MEDIA_CACHE_INVALIDATION_CHANNEL, json.dumps({"object_names": ["a"]})),
+            )
+
+            # Another process removed "b"; its broadcast evicts the local copy.
+            evicted = self.media_cache.handle_invalidation_message(
+                {"type": "message", "data": json.dumps({"object_names": ["b"]}).encode("utf-8")}
+            )
+            self.assertEqual(evicted, ["b"])
+            self.assertIsNone(self.media_cache.get("b"))
+            self.assertIsNone(self.media_cache.handle_invalidation_message({"type": "subscribe", "data": 1}))
+
     def test_create_post_rejects_more_than_8_media_files(self):
         self._register("alice")
         headers = self._auth_header("alice")
@@ -1910,6 +2835,116 @@ class TestApiRoutes(unittest.TestCase):
         self.assertEqual(resp.status_code, 400)
         self.assertEqual(resp.get_json()["error"], "Video must be 30 minutes or shorter")
 
+    def test_create_post_uploads_media_concurrently_and_cleans_up_on_failure(self):
+        import threading
+
+        self._register("alice")
+        headers = self._auth_header("alice")
+
+        class FakeMinio:
+            def __init__(self):
+                # Every file must be in flight at once to get past the barrier.
+                self.barrier = threading.Barrier(3, timeout=5)
+                self.bucket_checks = 0
+                self.stored = {}
+                self.removed = []
+                self.fail_on = None
+
+            def bucket_exists(self, *args, **kwargs):
+                self.bucket_checks += 1
+                return True
+
+            def put_object(self, **kwargs):
+                body = kwargs["data"].read(kwargs["length"])
+                self.barrier.wait()
+                if body == self.fail_on:
+                    raise RuntimeError("storage write failed")
+                self.stored[kwargs["object_name"]] = body
+
+            def remove_object(self, bucket_name, object_name):
+                self.removed.append(object_name)
+                self.stored.pop(object_name, None)
+
+        def create_post(text):
+            return self.client.post(
+                "/api/posts",
+                data={
+                    "text": text,
+                    "media": [
+                        (io.BytesIO(f"image-{index}".encode()), f"pic{index}.webp", "image/webp")
+                        for index in range(3)
+                    ],
+                },
+                headers=headers,
+                content_type="multipart/form-data",
+            )
+
+        fake_minio = FakeMinio()
+        with patch("app.services.post_service.get_minio_client", return_value=fake_minio):
+            self.assertEqual(create_post("parallel upload").status_code, 201)
+            self.assertEqual(sorted(fake_minio.stored.values()), [b"image-0", b"image-1", b"image-2"])
+
+            fake_minio.fail_on = b"image-1"
+            failed = create_post("partial failure")
+
+        self.assertEqual(fake_minio.bucket_checks, 1)
+        self.assertEqual(failed.status_code, 201)
+        self.assertEqual(len(fake_minio.removed), 3)
+        self.assertEqual(len(fake_minio.stored), 3)
+        failed_post = self.client.get("/api/posts").get_json()["posts"][0]
+        self.assertEqual(failed_post["id"], failed.get_json()["post_id"])
+        self.assertEqual(len(failed_post["media"]), 3)
+        self.assertTrue(all("/static/uploads/posts/" in media["url"] for media in failed_post["media"]))
+
+    def test_create_post_generates_image_variants_and_placeholder(self):
+        from PIL import Image
+
+        self._register("alice")
+        headers = self._auth_header("alice")
+
+        def encoded(size, image_format):
+            output = io.BytesIO()
+            Image.new("RGB", size, (200, 40, 40)).save(output, format=image_format)
+            output.seek(0)
+            return output
+
+        class FailingMinio:
+            def bucket_exists(self, *args, **kwargs):
+                raise RuntimeError("storage down")
+
+        with patch("app.services.post_service.get_minio_client", return_value=FailingMinio()):
+            resp = self.client.post(
+                "/api/posts",
+                data={
+                    "text": "variants",
+                    "media": [
+                        (encoded((1600, 1200), "JPEG"), "large.jpg", "image/jpeg"),
+                        (encoded((200, 100), "PNG"), "small.png", "image/png"),
+                    ],
+                },
+                headers=headers,
+                content_type="multipart/form-data",
+            )
+        self.assertEqual(resp.status_code, 201)
+
+        large, small = self.client.get("/api/posts").get_json()["posts"][0]["media"]
+        self.assertEqual((large["width"], large["height"]), (1600, 1200))
+        self.assertEqual(
+            [(variant["width"], variant["height"]) for variant in large["variants"]],
+            [(320, 240), (640, 480), (1080, 810)],
+        )
+        self.assertTrue(large["placeholder"].startswith("data:image/webp;base64,"))
+        for variant in large["variants"]:
+            self.assertEqual(variant["mime_type"], "image/webp")
+            self.assertIn(f"_w{variant['width']}.webp", variant["url"])
+            object_name = variant["url"].split("/static/", 1)[1]
+            with Image.open(os.path.join(self.app.static_folder, object_name)) as stored:
+                self.assertEqual(stored.size, (variant["width"], variant["height"]))
+
+        self.assertEqual((small["width"], small["height"]), (200, 100))
+        self.assertEqual(small["variants"], [])
+        self.assertTrue(small["placeholder"].startswith("data:image/webp;base64,"))
+
     def test_create_post_uses_local_fallback_when_media_storage_fails(self):
         self._register("alice")
         headers = self._auth_header("alice")
@@ -2107,6 +3142,8 @@ class TestApiRoutes(unittest.TestCase):
             self.assertIsNotNone(actor_profile)
             actor_profile.profile_image_shape = "pill"
             self.db.session.commit()
+            # Direct writes skip the service-level card invalidation.
+            self.author_card_cache.invalidate(actor_user.id)
 
         notifications_resp = self.client.get(
             "/api/activity-notifications?page=1&limit=20",
@@ -2827,6 +3864,90 @@ class TestApiRoutes(unittest.TestCase):
         unblocked_profile = self.client.get("/api/profiles/alice", headers=bob_headers)
         self.assertEqual(unblocked_profile.status_code, 200)
 
+    def test_block_removes_follower_and_conversation_partner_from_presence_audience(self):
+        from app.services import presence_audience_service
+
+        self._register("alice")
+        self._register("bob")
+        self._register("carol")
+        alice_headers = self._auth_header("alice")
+        bob_headers = self._auth_header("bob")
+        self.assertEqual(self.client.post("/api/follows/alice", headers=bob_headers).status_code, 200)
+        self.fake_redis.zadd("contact_ts:alice", {"carol": 1})
+
+        def audience():
+            with self.app.app_context():
+                return presence_audience_service.get_presence_subscribers("alice")
+
+        # The first read caches the follower set.
+        self.assertEqual(audience(), {"bob", "carol"})
+
+        self.assertEqual(self.client.post("/api/blocks/bob", headers=alice_headers).status_code, 201)
+        self.assertEqual(self.client.post("/api/blocks/alice", headers=self._auth_header("carol")).status_code, 201)
+        self.assertEqual(audience(), set())
+
+        self.assertEqual(self.client.delete("/api/blocks/bob", headers=alice_headers).status_code, 200)
+        self.assertEqual(audience(), {"bob"})
+
+    def test_hidden_user_ids_read_racing_a_block_does_not_cache_the_stale_set(self):
+        self._register("alice")
+        self._register("bob")
+        alice_id = self._user_id("alice")
+        bob_id = self._user_id("bob")
+
+        with self.app.app_context():
+            load_hidden_user_ids = self.block_repository._load_hidden_user_ids
+
+            def _load_then_block(viewer_user_id):
+                # The read finishes just before bob's block commits and
+                # invalidates, and caches what it read afterwards.
+                hidden_ids = load_hidden_user_ids(viewer_user_id)
+                self.block_repository.create_block(bob_id, alice_id)
+                return hidden_ids
+
+            with patch.object(self.block_repository, "_load_hidden_user_ids", side_effect=_load_then_block):
+                self.assertEqual(self.block_repository.get_hidden_user_ids_for_viewer(alice_id), set())
+
+            self.assertEqual(self.block_repository.get_hidden_user_ids_for_viewer(alice_id), {bob_id})
+
+    def test_hidden_user_ids_are_cached_and_heavy_blockers_use_anti_join(self):
+        for username in ("alice", "bob", "carol"):
+            self._register(username)
+        alice_headers = self._auth_header("alice")
+        for username in ("bob", "carol"):
+            self.client.post("/api/posts", json={"text": f"{username} post"}, headers=self._auth_header(username))
+        alice_id = self._user_id("alice")
+        bob_id = self._user_id("bob")
+
+        def feed_authors():
+            response = self.client.get("/api/posts", headers=alice_headers)
+            self.assertEqual(response.status_code, 200)
+            return sorted(post["author"]["username"] for post in response.get_json()["posts"])
+
+        self.assertEqual(feed_authors(), ["bob", "carol"])
+        self.assertEqual(self.fake_redis.smembers(f"blocks:hidden:{alice_id}:0"), {"__none__"})
+
+        self.assertEqual(self.client.post("/api/blocks/bob", headers=alice_headers).status_code, 201)
+        self.assertEqual(self.fake_redis.get(f"blocks:hidden_gen:{bob_id}"), "1")
+        self.assertEqual(feed_authors(), ["carol"])
+        self.assertEqual(self.fake_redis.smembers(f"blocks:hidden:{alice_id}:1"), {str(bob_id)})
+
+        # Cached: the blocks table is not read again.
+        with patch.object(self.block_repository, "_load_hidden_user_ids", side_effect=AssertionError):
+            self.assertEqual(feed_authors(), ["carol"])
+
+        # Any non-empty set takes the anti-join path with a zero inline limit.
+        self.app.config["BLOCK_HIDDEN_INLINE_LIMIT"] = 0
+        try:
+            self.assertEqual(feed_authors(), ["carol"])
+            search = self.client.get("/api/search/posts?q=post", headers=alice_headers)
+            self.assertEqual([post["author"]["username"] for post in search.get_json()["posts"]], ["carol"])
+        finally:
+            self.app.config["BLOCK_HIDDEN_INLINE_LIMIT"] = 500
+
+        self.assertEqual(self.client.delete("/api/blocks/bob", headers=alice_headers).status_code, 200)
+        self.assertEqual(feed_authors(), ["bob", "carol"])
+
     def test_follow_status_endpoint(self):
         self._register("alice")
         self._register("bob")
@@ -3384,6 +4505,14 @@ class TestApiRoutes(unittest.TestCase):
             self.assertIsNone(message_repository.get_message_metadata(private_message_id))
             self.assertIsNone(message_repository.get_message_metadata(incoming_message_id))
 
+            from app.services import account_purge_service
+
+            purge = account_purge_service.get_purge_progress("alice")
+            self.assertEqual(purge["status"], "done")
+            self.assertEqual(purge["source"], "delete_account")
+            self.assertEqual(purge["private_inboxes_done"], purge["private_inboxes_total"])
+            self.assertEqual(self.fake_redis.zcard("account_purge:alice:message_ids"), 0)
+
     def test_profile_posts_endpoint_returns_only_target_user_posts(self):
         self._register("alice")
         self._register("bob")
@@ -3818,6 +4947,127 @@ class TestApiRoutes(unittest.TestCase):
                 0,
             )
 
+    def test_report_cleanup_purges_large_account_in_chunks_and_removes_media_in_bulk(self):
+        self._register("spammer")
+        self._register("bob")
+
+        class FakeDeleteError:
+            def __init__(self, name, code):
+                self.name = name
+                self.code = code
+
+        class FakeMinio:
+            def __init__(self):
+                self.calls = []
+
+            def remove_objects(self, bucket, delete_objects):
+                names = [item.name for item in delete_objects]
+                self.calls.append((bucket, names))
+                return iter([FakeDeleteError("posts/gone.jpg", "NoSuchKey")])
+
+        with self.app.app_context():
+            from app.models.comment_model import Comment
+            from app.models.media_model import Media
+            from app.models.post_model import Post
+            from app.models.user_model import User
+            from app.models.vote_model import Vote
+            from app.services import report_service
+
+            spammer_id = self._user_id("spammer")
+            bob_id = self._user_id("bob")
+            post_ids = []
+            for idx in range(5):
+                post = Post(author_id=spammer_id, text=f"spam {idx}")
+                self.db.session.add(post)
+                self.db.session.flush()
+                post_ids.append(post.id)
+                self.db.session.add(
+                    Media(
+                        post_id=post.id,
+                        object_name=f"posts/spam-{idx}.jpg",
+                        mime_type="image/jpeg",
+                        variants_json=f'[{{"width": 320, "object_name": "posts/spam-{idx}_w320.webp"}}]',
+                    )
+                )
+                comment = Comment(post_id=post.id, author_id=bob_id, text="reply")
+                self.db.session.add(comment)
+                self.db.session.flush()
+                self.db.session.add(Vote(user_id=bob_id, target_type="comment", target_id=comment.id, value=1))
+                self.db.session.add(Vote(user_id=bob_id, target_type="post", target_id=post.id, value=1))
+            self.db.session.add(
+                Media(post_id=post_ids[0], object_name="posts/gone.jpg", mime_type="image/jpeg")
+            )
+            quoting_post = Post(author_id=bob_id, text="look", quoted_post_id=post_ids[0])
+            self.db.session.add(quoting_post)
+            spammer = self.db.session.get(User, spammer_id)
+            spammer.is_suspended = True
+            spammer.purge_after = datetime.utcnow() - timedelta(seconds=1)
+            self.db.session.commit()
+            quoting_post_id = quoting_post.id
+
+            fake_minio = FakeMinio()
+            self.app.config["MODERATION_CLEANUP_PURGE_CHUNK_SIZE"] = 2
+            try:
+                with patch.object(report_service, "get_minio_client", return_value=fake_minio):
+                    stats = report_service.run_scheduled_cleanup_with_metrics(force=True)
+            finally:
+                self.app.config.pop("MODERATION_CLEANUP_PURGE_CHUNK_SIZE", None)
+
+            self.assertEqual(stats["users_deleted"], 1)
+            self.assertEqual(stats["user_posts_deleted"], 5)
+            # 10 votes, 5 comments, 6 media, 1 quote reference, 5 posts, then the
+            # user and profile.
+            self.assertGreaterEqual(stats["rows_deleted"], 29)
+            self.assertGreater(stats["rows_per_sec"], 0)
+            self.assertEqual(stats["media_objects_removed"], 11)
+            self.assertEqual(stats["media_objects_pending"], 0)
+            self.assertEqual(len(fake_minio.calls), 1)
+            self.assertEqual(len(fake_minio.calls[0][1]), 11)
+            self.assertIn("posts/spam-3_w320.webp", fake_minio.calls[0][1])
+
+            self.assertIsNone(self.db.session.get(User, spammer_id))
+            self.assertEqual(Post.query.filter(Post.id.in_(post_ids)).count(), 0)
+            self.assertEqual(Media.query.count(), 0)
+            self.assertEqual(Comment.query.count(), 0)
+            self.assertEqual(Vote.query.count(), 0)
+            self.assertIsNone(self.db.session.get(Post, quoting_post_id).quoted_post_id)
+
+    def test_report_cleanup_logs_media_names_and_finishes_when_the_deletion_queue_is_down(self):
+        self._register("spammer")
+
+        with self.app.app_context():
+            from app.models.media_model import Media
+            from app.models.post_model import Post
+            from app.models.user_model import User
+            from app.services import report_service
+
+            spammer_id = self._user_id("spammer")
+            post = Post(author_id=spammer_id, text="spam")
+            self.db.session.add(post)
+            self.db.session.flush()
+            self.db.session.add(Media(post_id=post.id, object_name="posts/spam.jpg", mime_type="image/jpeg"))
+            spammer = self.db.session.get(User, spammer_id)
+            spammer.is_suspended = True
+            spammer.purge_after = datetime.utcnow() - timedelta(seconds=1)
+            self.db.session.commit()
+
+            with patch.object(
+                self.fake_redis, "zadd", side_effect=RuntimeError("redis down")
+            ), patch.object(
+                self.fake_redis, "zrange", side_effect=RuntimeError("redis down")
+            ), patch.object(report_service, "_last_cleanup_at", None), self.assertLogs(
+                self.app.logger, level="ERROR"
+            ) as logs:
+                stats = report_service.run_scheduled_cleanup_with_metrics(force=True)
+                last_cleanup_at = report_service._last_cleanup_at
+
+            self.assertEqual(stats["users_deleted"], 1)
+            self.assertEqual(stats["media_objects_removed"], 0)
+            self.assertIsNone(stats["media_objects_pending"])
+            self.assertIsNotNone(last_cleanup_at)
+            self.assertIn("posts/spam.jpg", "\n".join(logs.output))
+            self.assertIsNone(self.db.session.get(User, spammer_id))
+
     def test_crash_log_ingest_and_admin_deobfuscation(self):
         self._register("admin")
         self._register("alice")
@@ -4437,6 +5687,115 @@ class TestApiRoutes(unittest.TestCase):
         self.assertTrue(all(name.startswith("bob") for name in result_usernames[:5]))
         self.assertEqual(result_usernames[-1], "xbobtail")
 
+    def test_story_mention_candidates_skip_sql_once_cached(self):
+        from sqlalchemy import event
+
+        self._register("alice")
+        for username in ("bobalpha", "bobbravo", "carol"):
+            self._register(username)
+        with self.app.app_context():
+            from app.services import follow_service
+
+            from app.services import typeahead_service
+
+            follow_service.follow_by_username("alice", "bobalpha")
+            follow_service.follow_by_username("alice", "carol")
+            typeahead_service.build_index()
+
+            warm = self.story_service.get_mention_candidates(username="alice", query="bob")
+            self.assertEqual([item["username"] for item in warm["users"]], ["bobalpha"])
+
+            statements = []
+            listener = lambda *args: statements.append(args[2])  # noqa: E731
+            event.listen(self.db.engine, "before_cursor_execute", listener)
+            try:
+                cached = self.story_service.get_mention_candidates(username="alice", query="")
+            finally:
+                event.remove(self.db.engine, "before_cursor_execute", listener)
+            self.assertEqual([item["username"] for item in cached["users"]], ["bobalpha", "carol"])
+            self.assertEqual(statements, [])
+
+            follow_service.follow_by_username("alice", "bobbravo")
+            refreshed = self.story_service.get_mention_candidates(username="alice", query="bob")
+            self.assertEqual(
+                [item["username"] for item in refreshed["users"]],
+                ["bobalpha", "bobbravo"],
+            )
+
+    def test_typeahead_completes_prefixes_and_tracks_account_changes(self):
+        self._register("alice")
+        self._register("alicia")
+        self._register("malice")
+        self._register("zed")
+        with self.app.app_context():
+            from app.services import typeahead_service
+
+            typeahead_service.build_index()
+        self._register("bob")
+        zed_headers = self._auth_header("zed")
+        bob_headers = self._auth_header("bob")
+        renamed = self.client.put("/api/profiles/me", json={"name": "Zed Alpha"}, headers=zed_headers)
+        self.assertEqual(renamed.status_code, 200)
+
+        response = self.client.get("/api/search/typeahead?q=AL")
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual([item["username"] for item in body["users"]], ["alice", "alicia", "zed"])
+        self.assertEqual(body["users"][2]["name"], "Zed Alpha")
+
+        self.assertEqual(self.client.post("/api/blocks/alicia", headers=bob_headers).status_code, 201)
+        blocked_view = self.client.get("/api/search/typeahead?q=al", headers=bob_headers).get_json()
+        self.assertEqual([item["username"] for item in blocked_view["users"]], ["alice", "zed"])
+
+        self.client.put("/api/profiles/me", json={"name": "Zed Omega"}, headers=zed_headers)
+        self.assertEqual(
+            [item["username"] for item in self.client.get("/api/search/typeahead?q=alp").get_json()["users"]],
+            [],
+        )
+        self.assertEqual(
+            [item["username"] for item in self.client.get("/api/search/typeahead?q=ome").get_json()["users"]],
+            ["zed"],
+        )
+
+        alice_headers = self._auth_header("alice")
+        self.assertEqual(self.client.delete("/api/profiles/me", headers=alice_headers).status_code, 200)
+        after_delete = self.client.get("/api/search/typeahead?q=ali&limit=1").get_json()
+        self.assertEqual(after_delete["limit"], 1)
+        self.assertEqual([item["username"] for item in after_delete["users"]], ["alicia"])
+
+        self.assertEqual(self.client.get("/api/search/typeahead?q=").status_code, 400)
+
+    def test_typeahead_answers_from_sql_until_the_index_is_built_out_of_band(self):
+        self._register("alice")
+        self._register("alicia")
+        self._register("zed")
+        zed_headers = self._auth_header("zed")
+        self.client.put("/api/profiles/me", json={"name": "Zed Alpha"}, headers=zed_headers)
+
+        from app.services import async_task_service, typeahead_service
+
+        with patch.object(
+            async_task_service,
+            "enqueue_typeahead_index_build_task",
+            return_value=True,
+        ) as enqueue, patch.object(typeahead_service, "rebuild_index") as rebuild:
+            first = self.client.get("/api/search/typeahead?q=al").get_json()
+            second = self.client.get("/api/search/typeahead?q=ze").get_json()
+        self.assertEqual([item["username"] for item in first["users"]], ["alice", "alicia", "zed"])
+        self.assertEqual(first["users"][2]["name"], "Zed Alpha")
+        self.assertEqual([item["username"] for item in second["users"]], ["zed"])
+        # One queued build for both requests, none run on the request thread.
+        enqueue.assert_called_once()
+        rebuild.assert_not_called()
+
+        with self.app.app_context():
+            self.assertEqual(typeahead_service.build_index(), 3)
+        with patch.object(
+            self.fake_redis, "zrangebylex", side_effect=RuntimeError("redis down")
+        ):
+            outage = self.client.get("/api/search/typeahead?q=ali").get_json()
+        self.assertEqual([item["username"] for item in outage["users"]], ["alice", "alicia"])
+
     def test_story_reply_creates_dm_for_owner(self):
         self._register("alice")
         self._register("bob")
@@ -1,10 +1,13 @@
 import json
+import threading
+import time
 import unittest
 from unittest.mock import patch
 
 from flask import Flask
 
-from app.services import async_task_service
+from app.services import async_task_metrics, async_task_service
+from app.services.async_task_worker import AsyncTaskWorkerPool
 from tests.fake_redis import FakeRedis
 
 
@@ -28,6 +31,7 @@ class TestAsyncTaskService(unittest.TestCase):
         self.app.config["ASYNC_TASK_WORKER_HEARTBEAT_STALE_SECONDS"] = 60
         self.fake_redis = FakeRedis()
         async_task_service._enqueue_client = None
+        async_task_metrics.reset()
 
     def test_enqueue_task_writes_task_envelope(self):
         with self.app.app_context():
@@ -177,6 +181,232 @@ class TestAsyncTaskService(unittest.TestCase):
                     async_task_service.verify_worker_capacity_for_startup(source="test")
                 )
 
+    def _push_media_tasks(self, count):
+        for index in range(count):
+            self.fake_redis.rpush(
+                "test:async:queue",
+                json.dumps({
+                    "task_id": f"media-{index}",
+                    "task_type": async_task_service.TASK_TYPE_MEDIA_POST_PROCESS,
+                    "payload": {"post_id": index, "media_items": []},
+                    "attempt": 0,
+                }),
+            )
+
+    def test_dequeue_tasks_prefetches_batch_in_one_call(self):
+        self._push_media_tasks(5)
+
+        with self.app.app_context():
+            with patch.object(async_task_service, "redis_client", self.fake_redis):
+                tasks = async_task_service.dequeue_tasks(max_items=3, block_timeout_seconds=0)
+
+        self.assertEqual([task["task_id"] for task in tasks], ["media-0", "media-1", "media-2"])
+        self.assertEqual(self.fake_redis.llen("test:async:queue"), 2)
+
+    def test_worker_pool_processes_concurrently_and_drains_on_stop(self):
+        self._push_media_tasks(8)
+        started = []
+        release = threading.Event()
+        lock = threading.Lock()
+
+        def _slow_handler(payload):
+            with lock:
+                started.append(payload["post_id"])
+            release.wait(timeout=5)
+
+        pool = AsyncTaskWorkerPool(
+            self.app,
+            worker_id="pool-test",
+            concurrency=4,
+            block_timeout_seconds=0,
+        )
+        with patch.object(async_task_service, "redis_client", self.fake_redis):
+            with patch.object(
+                async_task_service,
+                "_handle_media_post_process",
+                side_effect=_slow_handler,
+            ):
+                runner = threading.Thread(target=pool.run)
+                runner.start()
+                deadline = time.monotonic() + 5
+                while len(started) < 4 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                pool.request_stop()
+                release.set()
+                runner.join(timeout=5)
+
+            with self.app.app_context():
+                snapshot = async_task_service.get_operational_snapshot()
+
+        self.assertFalse(runner.is_alive())
+        self.assertEqual(sorted(started), [0, 1, 2, 3])
+        self.assertEqual(pool.processed, 4)
+        # Tasks that were never fetched stay queued for the next worker.
+        self.assertEqual(self.fake_redis.llen("test:async:queue"), 4)
+        histogram = snapshot["latency_histograms"]["process"][
+            async_task_service.TASK_TYPE_MEDIA_POST_PROCESS
+        ]
+        self.assertEqual(histogram["count"], 4)
+        self.assertIsNotNone(histogram["p99_ms"])
+        self.assertFalse(
+            any(key.startswith("latency_hist:") for key in snapshot["metrics"])
+        )
+
+    def test_processed_task_is_acked_from_processing_list(self):
+        self._push_media_tasks(1)
+
+        with self.app.app_context():
+            with patch.object(async_task_service, "redis_client", self.fake_redis):
+                processed = async_task_service.process_one_pending_task(
+                    block_timeout_seconds=0,
+                    worker_id="worker-a",
+                )
+                snapshot = async_task_service.get_operational_snapshot()
+
+        self.assertTrue(processed)
+        self.assertEqual(self.fake_redis.llen("test:async:queue"), 0)
+        self.assertEqual(self.fake_redis.llen("test:async:queue:processing:worker-a"), 0)
+        self.assertEqual(self.fake_redis.zcard("test:async:queue:leases"), 0)
+        self.assertEqual(snapshot["in_flight_count"], 0)
+
+    def test_crashed_worker_task_is_reclaimed_after_visibility_timeout(self):
+        self._push_media_tasks(3)
+        self.app.config["ASYNC_TASK_VISIBILITY_TIMEOUT_SECONDS"] = 30
+
+        with self.app.app_context():
+            with patch.object(async_task_service, "redis_client", self.fake_redis):
+                # Worker takes a task and dies before acking it.
+                crashed = async_task_service.dequeue_tasks(
+                    max_items=1,
+                    block_timeout_seconds=0,
+                    worker_id="worker-crashed",
+                )
+                self.assertEqual(async_task_service.reclaim_expired_tasks(), 0)
+
+                with patch.object(async_task_service.time, "time", return_value=time.time() + 31):
+                    reclaimed = async_task_service.reclaim_expired_tasks()
+
+                redelivered = async_task_service.dequeue_tasks(
+                    max_items=1,
+                    block_timeout_seconds=0,
+                    worker_id="worker-b",
+                )
+
+        self.assertEqual(reclaimed, 1)
+        self.assertEqual(crashed[0]["task_id"], "media-0")
+        self.assertEqual(redelivered[0]["task_id"], "media-0")
+        self.assertEqual(self.fake_redis.llen("test:async:queue:processing:worker-crashed"), 0)
+        self.assertEqual(self.fake_redis.llen("test:async:queue"), 2)
+        self.assertEqual(self.fake_redis.zcard("test:async:queue:leases"), 1)
+
+    def _lease_time_left_after_slow_handler(self, run):
+        # The handler outlives half the visibility timeout and reports how far
+        # the lease deadline is ahead of it at that point.
+        self.app.config["ASYNC_TASK_VISIBILITY_TIMEOUT_SECONDS"] = 1
+        self._push_media_tasks(1)
+        time_left = []
+
+        def _slow_handler(_payload):
+            time.sleep(0.6)
+            leases = self.fake_redis.zrange("test:async:queue:leases", 0, -1, withscores=True)
+            time_left.append(leases[0][1] - time.time())
+
+        with patch.object(async_task_service, "redis_client", self.fake_redis):
+            with patch.object(
+                async_task_service,
+                "_handle_media_post_process",
+                side_effect=_slow_handler,
+            ):
+                run()
+        self.assertEqual(self.fake_redis.zcard("test:async:queue:leases"), 0)
+        return time_left[0]
+
+    def test_lease_is_renewed_while_a_slow_task_runs(self):
+        def _run():
+            with self.app.app_context():
+                async_task_service.process_one_pending_task(
+                    block_timeout_seconds=0,
+                    worker_id="worker-slow",
+                )
+
+        # Without renewal only ~0.4s of the 1s lease would be left.
+        self.assertGreater(self._lease_time_left_after_slow_handler(_run), 0.55)
+
+    def test_worker_pool_renews_leases_of_running_tasks(self):
+        def _run():
+            pool = AsyncTaskWorkerPool(
+                self.app,
+                worker_id="pool-slow",
+                concurrency=1,
+                block_timeout_seconds=0,
+            )
+            pool.run(max_tasks=1)
+
+        self.assertGreater(self._lease_time_left_after_slow_handler(_run), 0.55)
+
+    def test_restarted_worker_recovers_its_processing_list(self):
+        self._push_media_tasks(2)
+
+        with self.app.app_context():
+            with patch.object(async_task_service, "redis_client", self.fake_redis):
+                async_task_service.dequeue_tasks(
+                    max_items=2,
+                    block_timeout_seconds=0,
+                    worker_id="worker-stable",
+                )
+                recovered = async_task_service.recover_processing_list("worker-stable")
+
+        self.assertEqual(recovered, 2)
+        queued = [json.loads(raw)["task_id"] for raw in self.fake_redis.lrange("test:async:queue", 0, -1)]
+        self.assertEqual(queued, ["media-0", "media-1"])
+        self.assertEqual(self.fake_redis.zcard("test:async:queue:leases"), 0)
+
+    def test_enqueue_is_one_redis_command_and_metrics_flush_in_one_pipeline(self):
+        commands = []
+
+        class _RecordingRedis(FakeRedis):
+            def rpush(self, key, *values):
+                commands.append("rpush")
+                return super().rpush(key, *values)
+
+            def llen(self, key):
+                commands.append("llen")
+                return super().llen(key)
+
+            def hincrby(self, key, field, amount=1):
+                commands.append("hincrby")
+                return super().hincrby(key, field, amount)
+
+            def pipeline(self):
+                commands.append("pipeline")
+                return super().pipeline()
+
+        recording_redis = _RecordingRedis()
+        self.app.config["ASYNC_TASK_METRICS_FLUSH_INTERVAL_SECONDS"] = 60
+        with self.app.app_context():
+            with patch.object(async_task_service, "redis_client", recording_redis):
+                for _ in range(3):
+                    self.assertTrue(
+                        async_task_service.enqueue_activity_notification_event(
+                            {"event": "follow"},
+                            source="test",
+                        )
+                    )
+                self.assertEqual(commands, ["rpush", "rpush", "rpush"])
+
+                snapshot = async_task_service.get_operational_snapshot()
+
+        self.assertEqual(commands.count("pipeline"), 1)
+        self.assertEqual(int(snapshot["metrics"]["enqueue_success_total"]), 3)
+        self.assertEqual(int(snapshot["metrics"]["queue_depth_last"]), 3)
+        enqueue_latency = snapshot["latency_histograms"]["enqueue"]
+        self.assertEqual(
+            enqueue_latency[async_task_service.TASK_TYPE_ACTIVITY_NOTIFICATION]["count"],
+            3,
+        )
+        self.assertEqual(enqueue_latency["all"]["count"], 3)
+        self.assertIsNotNone(enqueue_latency["all"]["p95_ms"])
+
 
 if __name__ == "__main__":
     unittest.main()
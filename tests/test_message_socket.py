@@ -67,11 +67,17 @@ class TestSocketMessageFlow(unittest.TestCase):
             os.remove(cls.db_path)
 
     def setUp(self):
+        from app.repositories import group_repository
+        from app.services import author_card_cache
+
         self.fake_redis.clear()
+        group_repository.clear_membership_cache()
+        author_card_cache.clear()
         if hasattr(self.socket_events, "_presence_state_lock"):
             with self.socket_events._presence_state_lock:
                 self.socket_events._user_sids.clear()
                 self.socket_events._sid_group_rooms.clear()
+                self.socket_events._sid_presence_watches.clear()
         else:
             self.socket_events._user_sids.clear()
             self.socket_events._sid_group_rooms.clear()
@@ -86,6 +92,7 @@ class TestSocketMessageFlow(unittest.TestCase):
                 PrivateMessage,
                 PrivateMessageUserDelete,
             )
+            from app.models.follow_model import Follow
             from app.models.group_model import Group, GroupMember
 
             self.db.session.query(GroupMessageUserDelete).delete()
@@ -97,6 +104,7 @@ class TestSocketMessageFlow(unittest.TestCase):
             self.db.session.query(GroupMember).delete()
             self.db.session.query(Group).delete()
             self.db.session.query(Block).delete()
+            self.db.session.query(Follow).delete()
             self.db.session.commit()
         self.clients = []
 
@@ -108,15 +116,16 @@ class TestSocketMessageFlow(unittest.TestCase):
             with self.socket_events._presence_state_lock:
                 self.socket_events._user_sids.clear()
                 self.socket_events._sid_group_rooms.clear()
+                self.socket_events._sid_presence_watches.clear()
         else:
             self.socket_events._user_sids.clear()
             self.socket_events._sid_group_rooms.clear()
 
-    def _connect(self, token):
+    def _connect(self, token, **auth_extra):
         client = self.socketio.test_client(
             self.app,
             flask_test_client=self.app.test_client(),
-            auth={"token": token},
+            auth={"token": token, **auth_extra},
         )
         self.clients.append(client)
         self.assertTrue(client.is_connected())
@@ -147,7 +156,7 @@ class TestSocketMessageFlow(unittest.TestCase):
         client.emit("send_group_message", request_payload)
         return request_payload
 
-    def _presence_token_key_for_user(self, username):
+    def _expire_presence_token_for_user(self, username):
         if hasattr(self.socket_events, "_presence_state_lock"):
             with self.socket_events._presence_state_lock:
                 user_sids = set(self.socket_events._user_sids.get(username, set()))
@@ -155,8 +164,19 @@ class TestSocketMessageFlow(unittest.TestCase):
             user_sids = set(self.socket_events._user_sids.get(username, set()))
         self.assertTrue(user_sids)
         sid = next(iter(user_sids))
+        self._expire_presence_token(username, sid)
+
+    def _expire_presence_token(self, username, sid):
         token = self.socket_events._presence_connection_token(sid)
-        return self.socket_events._presence_connection_token_key(token)
+        connections_key = self.socket_events._presence_connections_key(username)
+        self.assertIsNotNone(self.fake_redis.zscore(connections_key, token))
+        self.fake_redis.zadd(connections_key, {token: 0})
+
+    def _follow(self, follower_username, following_username):
+        with self.app.app_context():
+            from app.services import follow_service
+
+            follow_service.follow_by_username(follower_username, following_username)
 
     def _create_group(self, name="group-alpha"):
         with self.app.app_context():
@@ -453,6 +473,52 @@ class TestSocketMessageFlow(unittest.TestCase):
         self.assertEqual(payload["messages"][0]["encrypted_keys"], {"bob": "bob-key"})
         self.assertEqual(payload["messages"][0]["encrypted_key"], "bob-key")
 
+    def test_group_pending_bulk_frame_covers_only_groups_with_backlog(self):
+        busy_group_id = self._create_group(name="busy-group")
+        quiet_group_id = self._create_group(name="quiet-group")
+
+        alice = self._connect(self.alice_token)
+        alice.get_received()
+        for index in range(3):
+            self._emit_group_message(
+                alice,
+                {
+                    "group_id": busy_group_id,
+                    "message": f"enc-bulk-{index}",
+                    "encrypted_keys": {"alice": "alice-key", "bob": "bob-key"},
+                },
+            )
+        alice.get_received()
+
+        previous_batch_size = self.app.config.get("SOCKET_PENDING_GROUP_BATCH_SIZE")
+        self.app.config["SOCKET_PENDING_GROUP_BATCH_SIZE"] = 2
+        self.addCleanup(
+            self.app.config.__setitem__,
+            "SOCKET_PENDING_GROUP_BATCH_SIZE",
+            previous_batch_size,
+        )
+        bob = self._connect(self.bob_token, pending_group_bulk=True)
+        bob_events = bob.get_received()
+
+        self.assertEqual(
+            [event for event in bob_events if event["name"] == "pending_group_messages"],
+            [],
+        )
+        bulk_events = [
+            event for event in bob_events if event["name"] == "pending_group_messages_bulk"
+        ]
+        self.assertEqual(len(bulk_events), 1)
+        groups = bulk_events[0]["args"][0]["groups"]
+        self.assertEqual([group["group_id"] for group in groups], [busy_group_id])
+        self.assertNotIn(quiet_group_id, [group["group_id"] for group in groups])
+        self.assertEqual(groups[0]["group_name"], "busy-group")
+        self.assertEqual(
+            [message["message"] for message in groups[0]["messages"]],
+            ["enc-bulk-0", "enc-bulk-1"],
+        )
+        self.assertTrue(groups[0]["has_more"])
+        self.assertEqual(groups[0]["remaining_count"], 3)
+
     def test_group_live_delivery_scopes_encrypted_key_per_recipient(self):
         group_id = self._create_group(name="recipient-scoped-group")
 
@@ -1552,6 +1618,7 @@ class TestSocketMessageFlow(unittest.TestCase):
         self.assertEqual(payload["message"], "[POST_SHARE]|42|alice|hello")
 
     def test_user_status_events_and_query(self):
+        self._follow("alice", "bob")
         alice = self._connect(self.alice_token)
         alice.get_received()
 
@@ -1570,7 +1637,111 @@ class TestSocketMessageFlow(unittest.TestCase):
         offline_events = [event for event in post_disconnect_events if event["name"] == "user_status"]
         self.assertTrue(any(e["args"][0]["username"] == "bob" and not e["args"][0]["online"] for e in offline_events))
 
+    def test_user_status_is_not_broadcast_to_unrelated_users(self):
+        self._follow("alice", "bob")
+        alice = self._connect(self.alice_token)
+        carol = self._connect(self.carol_token)
+        alice.get_received()
+        carol.get_received()
+
+        bob = self._connect(self.bob_token)
+        alice_status = [e for e in alice.get_received() if e["name"] == "user_status"]
+        carol_status = [e for e in carol.get_received() if e["name"] == "user_status"]
+        self.assertTrue(any(e["args"][0]["username"] == "bob" for e in alice_status))
+        self.assertFalse(any(e["args"][0]["username"] == "bob" for e in carol_status))
+
+        bob.disconnect()
+        carol_status = [e for e in carol.get_received() if e["name"] == "user_status"]
+        self.assertFalse(any(e["args"][0]["username"] == "bob" for e in carol_status))
+
+    def test_subscribe_user_status_opts_in_to_arbitrary_users(self):
+        carol = self._connect(self.carol_token)
+        carol.get_received()
+
+        carol.emit("subscribe_user_status", {"usernames": ["bob", "carol"]})
+        bulk_events = [e for e in carol.get_received() if e["name"] == "user_status_bulk"]
+        self.assertEqual(len(bulk_events), 1)
+        self.assertEqual(
+            bulk_events[0]["args"][0]["statuses"],
+            [{"username": "bob", "online": False}],
+        )
+
+        bob = self._connect(self.bob_token)
+        online_events = [e for e in carol.get_received() if e["name"] == "user_status"]
+        self.assertTrue(
+            any(e["args"][0]["username"] == "bob" and e["args"][0]["online"] for e in online_events)
+        )
+
+        carol.emit("unsubscribe_user_status", {"usernames": ["bob"]})
+        bob.disconnect()
+        offline_events = [e for e in carol.get_received() if e["name"] == "user_status"]
+        self.assertFalse(any(e["args"][0]["username"] == "bob" for e in offline_events))
+
+    def test_subscribe_user_status_skips_blocked_users_and_caps_rooms_per_socket(self):
+        client = self.app.test_client()
+        block_response = client.post(
+            "/api/blocks/carol",
+            headers={"Authorization": f"Bearer {self.bob_token}"},
+        )
+        self.assertEqual(block_response.status_code, 201)
+
+        previous_max = self.app.config.get("PRESENCE_SUBSCRIBE_MAX_USERS")
+        self.app.config["PRESENCE_SUBSCRIBE_MAX_USERS"] = 1
+        try:
+            carol = self._connect(self.carol_token)
+            carol.get_received()
+
+            carol.emit("subscribe_user_status", {"usernames": ["bob", "alice"]})
+            bulk_events = [e for e in carol.get_received() if e["name"] == "user_status_bulk"]
+            self.assertEqual(
+                bulk_events[0]["args"][0]["statuses"],
+                [{"username": "alice", "online": False}],
+            )
+
+            # The socket already watches one user; a second call adds no room.
+            carol.emit("subscribe_user_status", {"usernames": ["bob", "alice"]})
+            bulk_events = [e for e in carol.get_received() if e["name"] == "user_status_bulk"]
+            self.assertEqual(
+                bulk_events[0]["args"][0]["statuses"],
+                [{"username": "alice", "online": False}],
+            )
+
+            bob = self._connect(self.bob_token)
+            status_events = [e for e in carol.get_received() if e["name"] == "user_status"]
+            self.assertFalse(any(e["args"][0]["username"] == "bob" for e in status_events))
+            bob.disconnect()
+        finally:
+            if previous_max is None:
+                self.app.config.pop("PRESENCE_SUBSCRIBE_MAX_USERS", None)
+            else:
+                self.app.config["PRESENCE_SUBSCRIBE_MAX_USERS"] = previous_max
+
+    def test_block_stops_presence_to_followers_and_watchers(self):
+        self._follow("alice", "bob")
+        alice = self._connect(self.alice_token)
+        carol = self._connect(self.carol_token)
+        carol.emit("subscribe_user_status", {"usernames": ["bob"]})
+        alice.get_received()
+        carol.get_received()
+
+        client = self.app.test_client()
+        for blocked in ("alice", "carol"):
+            block_response = client.post(
+                f"/api/blocks/{blocked}",
+                headers={"Authorization": f"Bearer {self.bob_token}"},
+            )
+            self.assertEqual(block_response.status_code, 201)
+        alice.get_received()
+        carol.get_received()
+
+        bob = self._connect(self.bob_token)
+        bob.disconnect()
+        for watcher in (alice, carol):
+            status_events = [e for e in watcher.get_received() if e["name"] == "user_status"]
+            self.assertFalse(any(e["args"][0]["username"] == "bob" for e in status_events))
+
     def test_user_status_transition_waits_for_last_active_connection(self):
+        self._follow("alice", "bob")
         alice = self._connect(self.alice_token)
         alice.get_received()
 
@@ -1622,13 +1793,14 @@ class TestSocketMessageFlow(unittest.TestCase):
         )
 
     def test_presence_heartbeat_restores_expired_connection_token(self):
+        self._follow("alice", "bob")
         alice = self._connect(self.alice_token)
         bob = self._connect(self.bob_token)
 
         alice.get_received()
         bob.get_received()
 
-        self.fake_redis.delete(self._presence_token_key_for_user("bob"))
+        self._expire_presence_token_for_user("bob")
 
         alice.emit("get_user_status", {"username": "bob"})
         offline_status_events = [
@@ -1683,9 +1855,7 @@ class TestSocketMessageFlow(unittest.TestCase):
                 first_sid = next(iter(set(self.socket_events._user_sids.get("bob", set()))))
         else:
             first_sid = next(iter(self.socket_events._user_sids.get("bob", set())))
-        first_token = self.socket_events._presence_connection_token(first_sid)
-        first_token_key = self.socket_events._presence_connection_token_key(first_token)
-        self.fake_redis.delete(first_token_key)
+        self._expire_presence_token("bob", first_sid)
 
         alice.emit("get_user_status", {"username": "bob"})
         status_events = [event for event in alice.get_received() if event["name"] == "user_status"]
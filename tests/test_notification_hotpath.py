@@ -1,3 +1,4 @@
+import json
 import unittest
 from unittest.mock import patch
 
@@ -74,6 +75,178 @@ class TestNotificationHotPath(unittest.TestCase):
         self.assertEqual(removed, 1)
         self.assertEqual([item["message_id"] for item in removed_payloads], [payload["message_id"]])
 
+    def test_private_inbox_is_one_order_zset_and_one_payload_hash(self):
+        first = self._push_message("alice", "bob", 1)
+        second = self._push_message("carol", "bob", 2)
+
+        self.assertEqual(self.fake_redis.keys("inbox:*"), [])
+        self.assertEqual(self.fake_redis.keys("inbox_ids:*"), [])
+        self.assertEqual(self.fake_redis.zcard("inbox_order:bob"), 2)
+        self.assertEqual(self.fake_redis.hlen("inbox_payloads:bob"), 2)
+        self.assertEqual(self.message_repository.get_pending_count("bob"), 2)
+
+        removed = self.message_repository.ack_messages("bob", [first["message_id"]])
+        self.assertEqual(removed, 1)
+        self.assertEqual(
+            [item["message_id"] for item in self.message_repository.peek_messages("bob")],
+            [second["message_id"]],
+        )
+        self.assertEqual(self.fake_redis.zcard("inbox_order:bob"), 1)
+        self.assertEqual(self.fake_redis.hlen("inbox_payloads:bob"), 1)
+
+    def test_migrate_legacy_inbox_keys_indexes_lists_and_drops_id_sets(self):
+        legacy = self.message_repository.build_message_payload(
+            sender="alice",
+            encrypted_message="enc-legacy",
+            encrypted_key="key-legacy",
+            message_type="text",
+        )
+        self.fake_redis.rpush("inbox:bob", json.dumps(legacy))
+        self.fake_redis.sadd("inbox_ids:bob", legacy["message_id"])
+        self.fake_redis.rpush("group_user_inbox:bob:7", json.dumps({"message_id": "g-1", "timestamp": ""}))
+        self.fake_redis.sadd("group_inbox_ids:bob:7", "g-1")
+
+        stats = self.message_repository.migrate_legacy_inbox_keys()
+
+        self.assertEqual(stats, {"lists_migrated": 2, "messages_indexed": 2, "id_sets_dropped": 2})
+        self.assertEqual(self.fake_redis.keys("inbox:*"), [])
+        self.assertEqual(self.fake_redis.keys("inbox_ids:*"), [])
+        self.assertEqual(self.fake_redis.keys("group_user_inbox:*"), [])
+        self.assertEqual(self.fake_redis.keys("group_inbox_ids:*"), [])
+        self.assertEqual(
+            [item["message_id"] for item in self.message_repository.peek_messages("bob")],
+            [legacy["message_id"]],
+        )
+        self.assertEqual(self.fake_redis.zcard("group_inbox_order:bob:7"), 1)
+
+        self.assertEqual(
+            self.message_repository.migrate_legacy_inbox_keys(),
+            {"lists_migrated": 0, "messages_indexed": 0, "id_sets_dropped": 0},
+        )
+
+    def test_group_fanout_stores_one_shared_payload_and_small_key_records(self):
+        recipients = ["bob", "carol", "dave"]
+        payload = self.message_repository.build_group_message_payload(
+            sender="alice",
+            group_id=7,
+            encrypted_message="enc-" + "x" * 4096,
+            encrypted_keys={username: f"key-{username}" for username in ["alice", *recipients]},
+        )
+        message_id = payload["message_id"]
+
+        pushed = self.message_repository.push_group_messages_to_members(7, recipients, payload)
+        self.assertEqual(pushed, 3)
+
+        shared_keys = self.fake_redis.keys("group_message_payload:*")
+        self.assertEqual(shared_keys, [f"group_message_payload:7:{message_id}"])
+        self.assertNotIn("encrypted_keys", self.fake_redis.get(shared_keys[0]))
+        bob_record = self.fake_redis.hget("group_inbox_payloads:bob:7", message_id)
+        self.assertLess(len(bob_record), 256)
+        self.assertEqual(self.fake_redis.keys("group_user_inbox:*"), [])
+
+        pending = self.message_repository.peek_group_messages_for_user("bob", 7)
+        self.assertEqual(len(pending), 1)
+        self.assertEqual(pending[0]["message"], payload["message"])
+        self.assertEqual(pending[0]["encrypted_key"], "key-bob")
+        self.assertEqual(pending[0]["encrypted_keys"], {"bob": "key-bob"})
+        self.assertNotIn("recipient_key_records", pending[0])
+        unread = self.message_repository.get_group_unread_summaries_for_user("bob", [7])
+        self.assertEqual(unread[7]["count"], 1)
+        self.assertEqual(unread[7]["last_sender"], "alice")
+
+        removed, removed_payloads = self.message_repository.ack_group_messages_with_payloads(
+            "bob",
+            7,
+            [message_id],
+        )
+        self.assertEqual(removed, 1)
+        self.assertEqual(removed_payloads[0]["from"], "alice")
+        self.assertEqual(removed_payloads[0]["encrypted_key"], "key-bob")
+        self.assertEqual(self.message_repository.get_group_pending_count("bob", 7), 0)
+        self.assertEqual(self.message_repository.get_group_unread_summaries_for_user("bob", [7]), {})
+        self.assertEqual(self.message_repository.get_group_pending_count("carol", 7), 1)
+
+        self.fake_redis.delete(shared_keys[0])
+        self.assertEqual(self.message_repository.peek_group_messages_for_user("carol", 7), [])
+        self.assertEqual(self.message_repository.get_group_pending_count("carol", 7), 0)
+
+    def test_group_shared_payload_is_deleted_with_the_last_ack(self):
+        recipients = ["bob", "carol"]
+        payload = self.message_repository.build_group_message_payload(
+            sender="alice",
+            group_id=7,
+            encrypted_message="enc",
+            encrypted_keys={username: f"key-{username}" for username in ["alice", *recipients]},
+        )
+        message_id = payload["message_id"]
+        shared_key = f"group_message_payload:7:{message_id}"
+        self.message_repository.push_group_messages_to_members(7, recipients, payload)
+        self.assertEqual(self.fake_redis.get(f"group_message_refs:7:{message_id}"), "2")
+
+        self.message_repository.ack_group_messages("bob", 7, [message_id])
+        # A repeated ack is a no-op and must not release carol's reference.
+        self.message_repository.ack_group_messages("bob", 7, [message_id])
+        self.assertIsNotNone(self.fake_redis.get(shared_key))
+        self.assertEqual(len(self.message_repository.peek_group_messages_for_user("carol", 7)), 1)
+
+        self.message_repository.ack_group_messages("carol", 7, [message_id])
+        self.assertEqual(self.fake_redis.keys("group_message_payload:*"), [])
+        self.assertEqual(self.fake_redis.keys("group_message_refs:*"), [])
+
+    def test_payloads_without_message_id_are_rejected_instead_of_reported_delivered(self):
+        with self.assertRaises(ValueError):
+            self.message_repository.push_message_payload("bob", {"from": "alice", "message": "enc"})
+        with self.assertRaises(ValueError):
+            self.message_repository.push_group_messages_to_members(
+                7,
+                ["bob"],
+                {"from": "alice", "message": "enc", "encrypted_keys": {"bob": "key-bob"}},
+            )
+        self.assertEqual(self.fake_redis.keys("inbox_order:*"), [])
+        self.assertEqual(self.fake_redis.keys("group_inbox_order:*"), [])
+
+    def test_purge_user_data_uses_reverse_indexes_without_scanning(self):
+        alice_private = self._push_message("alice", "bob", 1)
+        carol_private = self._push_message("carol", "bob", 2)
+        self.message_repository.add_contact("bob", "alice")
+        group_payloads = {}
+        for sender in ("alice", "carol"):
+            payload = self.message_repository.build_group_message_payload(
+                sender=sender,
+                group_id=7,
+                encrypted_message=f"enc-{sender}",
+                encrypted_keys={"bob": "key-bob", "dave": "key-dave"},
+            )
+            self.message_repository.push_group_messages_to_members(7, ["bob", "dave"], payload)
+            group_payloads[sender] = payload
+        alice_group_id = group_payloads["alice"]["message_id"]
+
+        def fail_scan(*_args, **_kwargs):
+            raise AssertionError("account purge must not scan the keyspace")
+
+        with patch.object(self.message_repository, "_scan_keys", fail_scan):
+            self.message_repository.purge_user_data("alice")
+
+        bob_pending = self.message_repository.peek_messages("bob")
+        self.assertEqual(
+            [message["message_id"] for message in bob_pending],
+            [carol_private["message_id"]],
+        )
+        self.assertIsNone(self.fake_redis.hget("inbox_payloads:bob", alice_private["message_id"]))
+        self.assertNotIn("alice", self.message_repository.get_contacts("bob"))
+        for member in ("bob", "dave"):
+            pending = self.message_repository.peek_group_messages_for_user(member, 7)
+            self.assertEqual([message["from"] for message in pending], ["carol"])
+            unread = self.message_repository.get_group_unread_summaries_for_user(member, [7])
+            self.assertEqual(unread[7]["count"], 1)
+        self.assertIsNone(self.fake_redis.get(f"group_message_payload:7:{alice_group_id}"))
+        self.assertEqual(self.fake_redis.smembers("sender_inboxes:alice"), set())
+        self.assertEqual(self.fake_redis.smembers("sender_group_inboxes:alice"), set())
+        self.assertEqual(
+            self.fake_redis.smembers("sender_group_inboxes:carol"),
+            {"bob:7", "dave:7"},
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
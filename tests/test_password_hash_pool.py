@@ -0,0 +1,108 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+from flask import Flask
+
+from app.extensions import redis_client as redis_module
+from app.services import async_task_metrics, password_hash_pool
+from tests.fake_redis import FakeRedis
+
+
+class TestPasswordHashPool(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config["AUTH_HASH_POOL_MAX_CONCURRENCY"] = 2
+        self.app.config["AUTH_HASH_POOL_MAX_QUEUE"] = 1
+        self.app.config["AUTH_HASH_POOL_QUEUE_TIMEOUT_SECONDS"] = 5
+        self.app.config["AUTH_HASH_POOL_METRICS_KEY"] = "test:password_hash:metrics"
+        self.fake_redis = FakeRedis()
+        async_task_metrics.reset()
+
+    def _run_in_threads(self, count, fn):
+        results = []
+        errors = []
+
+        def _call():
+            with self.app.app_context():
+                try:
+                    results.append(password_hash_pool.run("hash", fn))
+                except password_hash_pool.PasswordHashingBusyError as exc:
+                    errors.append(exc)
+
+        threads = [threading.Thread(target=_call) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads, results, errors
+
+    def test_limits_concurrency_and_rejects_when_queue_is_full(self):
+        release = threading.Event()
+        lock = threading.Lock()
+        running = {"now": 0, "max": 0}
+        two_running = threading.Event()
+
+        def slow_hash():
+            with lock:
+                running["now"] += 1
+                running["max"] = max(running["max"], running["now"])
+                if running["now"] == 2:
+                    two_running.set()
+            release.wait(5)
+            with lock:
+                running["now"] -= 1
+            return "hashed"
+
+        with patch.object(redis_module, "redis_client", self.fake_redis):
+            threads, results, errors = self._run_in_threads(2, slow_hash)
+            self.assertTrue(two_running.wait(5))
+            # One caller may wait for a slot; the next one is refused at once.
+            waiting, waiting_results, _ = self._run_in_threads(1, slow_hash)
+            for _ in range(100):
+                if password_hash_pool._waiting == 1:
+                    break
+                threading.Event().wait(0.01)
+            with self.app.app_context():
+                with self.assertRaises(password_hash_pool.PasswordHashingBusyError) as ctx:
+                    password_hash_pool.run("hash", slow_hash)
+            self.assertGreaterEqual(ctx.exception.retry_after_seconds, 1)
+
+            release.set()
+            for thread in threads + waiting:
+                thread.join(5)
+
+            self.assertEqual(results + waiting_results, ["hashed"] * 3)
+            self.assertEqual(errors, [])
+            self.assertEqual(running["max"], 2)
+
+            with self.app.app_context():
+                snapshot = password_hash_pool.get_operational_snapshot()
+        self.assertEqual(snapshot["running"], 0)
+        self.assertEqual(snapshot["waiting"], 0)
+        self.assertEqual(snapshot["metrics"]["rejected_total:hash:queue_full"], "1")
+        self.assertEqual(snapshot["latency_histograms"]["password_hash"]["hash"]["count"], 3)
+
+    def test_rejects_after_queue_timeout(self):
+        self.app.config["AUTH_HASH_POOL_MAX_CONCURRENCY"] = 1
+        self.app.config["AUTH_HASH_POOL_QUEUE_TIMEOUT_SECONDS"] = 0.05
+        release = threading.Event()
+        started = threading.Event()
+
+        def slow_hash():
+            started.set()
+            release.wait(5)
+            return "hashed"
+
+        with patch.object(redis_module, "redis_client", self.fake_redis):
+            threads, results, _ = self._run_in_threads(1, slow_hash)
+            self.assertTrue(started.wait(5))
+            with self.app.app_context():
+                with self.assertRaises(password_hash_pool.PasswordHashingBusyError):
+                    password_hash_pool.run("verify", lambda: "never")
+            release.set()
+            for thread in threads:
+                thread.join(5)
+        self.assertEqual(results, ["hashed"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+from types import SimpleNamespace
 from unittest.mock import patch
 
 from app.performance_indexes import (
@@ -143,6 +144,28 @@ class TestPerformanceIndexes(unittest.TestCase):
         self.assertIn("ix_posts_author_created", missing_names)
         self.assertIn("ix_posts_hidden_created", missing_names)
 
+    def test_search_indexes_only_apply_to_postgresql(self):
+        inspector = _InspectorStub(
+            tables={"users", "profiles", "posts"},
+            indexes={},
+            unique_constraints={},
+        )
+
+        def _engine(dialect_name):
+            return SimpleNamespace(dialect=SimpleNamespace(name=dialect_name))
+
+        with patch("app.performance_indexes.inspect", return_value=inspector):
+            sqlite_missing = {item.index_name for item in collect_missing_managed_indexes(_engine("sqlite"))}
+            postgres_missing = {
+                item.index_name
+                for item in collect_missing_managed_indexes(_engine("postgresql"))
+            }
+
+        search_indexes = {"ix_users_username_trgm", "ix_profiles_name_trgm", "ix_posts_text_search"}
+        self.assertFalse(search_indexes & sqlite_missing)
+        self.assertTrue(search_indexes <= postgres_missing)
+        self.assertIn("ix_posts_author_created", sqlite_missing)
+
     def test_rollback_index_list_is_expected(self):
         self.assertEqual(
             set(ROLLBACK_SAFE_INDEX_NAMES),
@@ -0,0 +1,104 @@
+import unittest
+from unittest.mock import patch
+
+from tests.fake_redis import FakePipeline, FakeRedis
+
+
+class _CountingPipeline(FakePipeline):
+    def execute(self):
+        self._redis.round_trips += 1
+        return super().execute()
+
+
+class _CountingRedis(FakeRedis):
+    def __init__(self):
+        super().__init__()
+        self.round_trips = 0
+
+    def pipeline(self):
+        return _CountingPipeline(self)
+
+    def smembers(self, key):
+        self.round_trips += 1
+        return super().smembers(key)
+
+
+class TestPresenceEngine(unittest.TestCase):
+    def setUp(self):
+        import app.socket_events as socket_events
+        from app.extensions import redis_client as redis_module
+
+        self.socket_events = socket_events
+        self.fake_redis = _CountingRedis()
+        self.patcher = patch.object(redis_module, "redis_client", self.fake_redis)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def _connect(self, username, sid):
+        self.assertTrue(
+            self.socket_events._refresh_presence_connection(
+                username,
+                sid,
+                touch_recently_online=False,
+            )
+        )
+
+    def _expire(self, username, sid):
+        token = self.socket_events._presence_connection_token(sid)
+        self.fake_redis.zadd(
+            self.socket_events._presence_connections_key(username),
+            {token: 0},
+        )
+
+    def test_batch_status_prunes_expired_tokens_and_keeps_active_ones(self):
+        self._connect("alice", "sid-a1")
+        self._connect("alice", "sid-a2")
+        self._connect("bob", "sid-b1")
+        self._expire("alice", "sid-a1")
+        self._expire("bob", "sid-b1")
+
+        status = self.socket_events.get_users_online_status(["alice", "bob", "carol", "alice"])
+
+        self.assertEqual(status, {"alice": True, "bob": False, "carol": False})
+        self.assertEqual(
+            self.fake_redis.zcard(self.socket_events._presence_connections_key("alice")),
+            1,
+        )
+        self.assertEqual(
+            self.fake_redis.zcard(self.socket_events._presence_connections_key("bob")),
+            0,
+        )
+        self.assertEqual(
+            self.fake_redis.smembers(self.socket_events.PRESENCE_ONLINE_USERS_KEY),
+            {"alice"},
+        )
+
+    def test_status_lookup_round_trips_do_not_grow_with_member_count(self):
+        usernames = [f"user{index}" for index in range(500)]
+        for index, username in enumerate(usernames):
+            self._connect(username, f"sid-{index}-1")
+            self._connect(username, f"sid-{index}-2")
+
+        self.fake_redis.round_trips = 0
+        status = self.socket_events.get_users_online_status(usernames)
+        self.assertTrue(all(status.values()))
+        self.assertLessEqual(self.fake_redis.round_trips, 2)
+
+        self.fake_redis.round_trips = 0
+        self.assertEqual(len(self.socket_events.get_online_usernames()), 500)
+        self.assertLessEqual(self.fake_redis.round_trips, 3)
+
+    def test_set_user_offline_reports_transition_only_for_last_connection(self):
+        self.assertTrue(self.socket_events._set_user_online("alice", "sid-1"))
+        self.assertFalse(self.socket_events._set_user_online("alice", "sid-2"))
+
+        self.assertFalse(self.socket_events._set_user_offline("alice", "sid-1"))
+        self.assertTrue(self.socket_events.is_user_online("alice"))
+        self.assertTrue(self.socket_events._set_user_offline("alice", "sid-2"))
+        self.assertFalse(self.socket_events.is_user_online("alice"))
+
+
+if __name__ == "__main__":
+    unittest.main()